@@ -0,0 +1,129 @@
+"""add chat_messages table
+
+Revision ID: 4d2e6b8c1f3a
+Revises: 7c3e8f1a2b4d
+Create Date: 2026-10-19 09:00:00
+
+"""
+
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "4d2e6b8c1f3a"
+down_revision: Union[str, Sequence[str], None] = "7c3e8f1a2b4d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+chat_messages = sa.table(
+    "chat_messages",
+    sa.column("session_id", sa.String),
+    sa.column("seq", sa.Integer),
+    sa.column("role", sa.String),
+    sa.column("content", sa.Text),
+    sa.column("timestamp", sa.DateTime(timezone=True)),
+)
+
+
+def _parse_timestamp(value: object) -> datetime | None:
+    if isinstance(value, str) and value:
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    return None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "chat_messages",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("session_id", sa.String(length=128), nullable=False),
+        sa.Column("seq", sa.Integer(), nullable=False),
+        sa.Column("role", sa.String(length=16), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("timestamp", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_chat_messages_session_seq"
+        " ON chat_messages (session_id, seq)"
+    )
+
+    conn = op.get_bind()
+    already_migrated = {
+        r[0]
+        for r in conn.execute(sa.text("SELECT DISTINCT session_id FROM chat_messages"))
+    }
+    legacy_rows = conn.execute(
+        sa.text(
+            "SELECT session_id, messages_json FROM chat_sessions"
+            " WHERE messages_json IS NOT NULL AND messages_json NOT IN ('', '[]')"
+        )
+    ).all()
+    for session_id, messages_json in legacy_rows:
+        if session_id not in already_migrated:
+            try:
+                messages = json.loads(messages_json)
+            except json.JSONDecodeError:
+                continue
+            dict_messages = [m for m in messages if isinstance(m, dict)]
+            rows = [
+                {
+                    "session_id": session_id,
+                    "seq": seq,
+                    "role": str(message.get("role", "user")),
+                    "content": str(message.get("content", "")),
+                    "timestamp": _parse_timestamp(message.get("timestamp")),
+                }
+                for seq, message in enumerate(dict_messages)
+            ]
+            if rows:
+                op.bulk_insert(chat_messages, rows)
+        conn.execute(
+            sa.text(
+                "UPDATE chat_sessions SET messages_json = '[]'"
+                " WHERE session_id = :session_id"
+            ),
+            {"session_id": session_id},
+        )
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+    grouped: dict[str, list[dict[str, object]]] = {}
+    for session_id, role, content, timestamp in conn.execute(
+        sa.text(
+            "SELECT session_id, role, content, timestamp FROM chat_messages"
+            " ORDER BY session_id, seq"
+        )
+    ):
+        grouped.setdefault(session_id, []).append(
+            {
+                "role": role,
+                "content": content,
+                "timestamp": str(timestamp) if timestamp is not None else None,
+            }
+        )
+    for session_id, messages in grouped.items():
+        conn.execute(
+            sa.text(
+                "UPDATE chat_sessions SET messages_json = :messages_json"
+                " WHERE session_id = :session_id"
+            ),
+            {
+                "session_id": session_id,
+                "messages_json": json.dumps(messages, ensure_ascii=False),
+            },
+        )
+
+    op.execute("DROP INDEX IF EXISTS ix_chat_messages_session_seq")
+    op.drop_table("chat_messages", if_exists=True)
@@ -0,0 +1,77 @@
+"""add chat session summary columns
+
+Revision ID: 9a5c3e7d2f1b
+Revises: 4d2e6b8c1f3a
+Create Date: 2026-10-19 11:00:00
+
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "9a5c3e7d2f1b"
+down_revision: Union[str, Sequence[str], None] = "4d2e6b8c1f3a"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _existing_columns() -> set[str]:
+    return {c["name"] for c in sa.inspect(op.get_bind()).get_columns("chat_sessions")}
+
+
+def upgrade() -> None:
+    existing = _existing_columns()
+    with op.batch_alter_table("chat_sessions") as batch_op:
+        if "title" not in existing:
+            batch_op.add_column(sa.Column("title", sa.Text(), nullable=True))
+        if "message_count" not in existing:
+            batch_op.add_column(
+                sa.Column(
+                    "message_count",
+                    sa.Integer(),
+                    nullable=False,
+                    server_default="0",
+                )
+            )
+        if "last_message_at" not in existing:
+            batch_op.add_column(
+                sa.Column("last_message_at", sa.DateTime(timezone=True), nullable=True)
+            )
+
+    op.execute(
+        """
+        UPDATE chat_sessions SET
+            message_count = (
+                SELECT COUNT(*) FROM chat_messages m
+                WHERE m.session_id = chat_sessions.session_id
+            ),
+            title = (
+                SELECT m.content FROM chat_messages m
+                WHERE m.session_id = chat_sessions.session_id AND m.role = 'user'
+                ORDER BY m.seq LIMIT 1
+            ),
+            last_message_at = (
+                SELECT MAX(m.timestamp) FROM chat_messages m
+                WHERE m.session_id = chat_sessions.session_id
+            ),
+            updated_at = COALESCE(updated_at, created_at)
+        """
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_chat_sessions_user_updated"
+        " ON chat_sessions (user_id, updated_at)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_chat_sessions_user_updated")
+    existing = _existing_columns()
+    with op.batch_alter_table("chat_sessions") as batch_op:
+        for column in ("last_message_at", "message_count", "title"):
+            if column in existing:
+                batch_op.drop_column(column)
@@ -0,0 +1,48 @@
+"""add chat session rolling summary
+
+Revision ID: b6e2f4a9c7d1
+Revises: 9a5c3e7d2f1b
+Create Date: 2026-10-19 14:00:00
+
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "b6e2f4a9c7d1"
+down_revision: Union[str, Sequence[str], None] = "9a5c3e7d2f1b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _existing_columns() -> set[str]:
+    return {c["name"] for c in sa.inspect(op.get_bind()).get_columns("chat_sessions")}
+
+
+def upgrade() -> None:
+    existing = _existing_columns()
+    with op.batch_alter_table("chat_sessions") as batch_op:
+        if "summary" not in existing:
+            batch_op.add_column(sa.Column("summary", sa.Text(), nullable=True))
+        if "summary_upto" not in existing:
+            batch_op.add_column(
+                sa.Column(
+                    "summary_upto",
+                    sa.Integer(),
+                    nullable=False,
+                    server_default="0",
+                )
+            )
+
+
+def downgrade() -> None:
+    existing = _existing_columns()
+    with op.batch_alter_table("chat_sessions") as batch_op:
+        for column in ("summary_upto", "summary"):
+            if column in existing:
+                batch_op.drop_column(column)
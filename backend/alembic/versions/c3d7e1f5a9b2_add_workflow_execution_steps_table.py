@@ -0,0 +1,50 @@
+"""add workflow_execution_steps table
+
+Revision ID: c3d7e1f5a9b2
+Revises: b6e2f4a9c7d1
+Create Date: 2026-10-19 16:00:00
+
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "c3d7e1f5a9b2"
+down_revision: Union[str, Sequence[str], None] = "b6e2f4a9c7d1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "workflow_execution_steps",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("execution_id", sa.String(length=64), nullable=False),
+        sa.Column("seq", sa.Integer(), nullable=False),
+        sa.Column("node_id", sa.String(length=128), nullable=False),
+        sa.Column("output_json", sa.Text(), nullable=False),
+        sa.Column("variables_json", sa.Text(), nullable=False),
+        sa.Column("queue_json", sa.Text(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_workflow_execution_steps_execution_seq"
+        " ON workflow_execution_steps (execution_id, seq)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_workflow_execution_steps_execution_seq")
+    op.drop_table("workflow_execution_steps", if_exists=True)
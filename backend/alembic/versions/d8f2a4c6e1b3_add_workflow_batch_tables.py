@@ -0,0 +1,92 @@
+"""add workflow_batches and workflow_batch_rows tables
+
+Revision ID: d8f2a4c6e1b3
+Revises: c3d7e1f5a9b2
+Create Date: 2026-10-19 18:00:00
+
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "d8f2a4c6e1b3"
+down_revision: Union[str, Sequence[str], None] = "c3d7e1f5a9b2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "workflow_batches",
+        sa.Column("id", sa.String(length=64), nullable=False),
+        sa.Column("workflow_id", sa.String(length=64), nullable=False),
+        sa.Column("user_id", sa.String(length=64), nullable=True),
+        sa.Column(
+            "status", sa.String(length=32), nullable=False, server_default="pending"
+        ),
+        sa.Column("model", sa.String(length=255), nullable=True),
+        sa.Column("concurrency", sa.Integer(), nullable=False),
+        sa.Column("total_rows", sa.Integer(), nullable=False),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_workflow_batches_workflow_id"
+        " ON workflow_batches (workflow_id)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_workflow_batches_user_id"
+        " ON workflow_batches (user_id)"
+    )
+
+    op.create_table(
+        "workflow_batch_rows",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("batch_id", sa.String(length=64), nullable=False),
+        sa.Column("row_index", sa.Integer(), nullable=False),
+        sa.Column("input", sa.Text(), nullable=False),
+        sa.Column(
+            "status", sa.String(length=32), nullable=False, server_default="pending"
+        ),
+        sa.Column("output_json", sa.Text(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("finish_seq", sa.Integer(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_workflow_batch_rows_batch_row"
+        " ON workflow_batch_rows (batch_id, row_index)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_workflow_batch_rows_batch_finish"
+        " ON workflow_batch_rows (batch_id, finish_seq)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_workflow_batch_rows_batch_finish")
+    op.execute("DROP INDEX IF EXISTS ix_workflow_batch_rows_batch_row")
+    op.drop_table("workflow_batch_rows", if_exists=True)
+    op.execute("DROP INDEX IF EXISTS ix_workflow_batches_user_id")
+    op.execute("DROP INDEX IF EXISTS ix_workflow_batches_workflow_id")
+    op.drop_table("workflow_batches", if_exists=True)
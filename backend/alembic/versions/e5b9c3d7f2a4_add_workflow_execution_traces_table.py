@@ -0,0 +1,40 @@
+"""add workflow_execution_traces table
+
+Revision ID: e5b9c3d7f2a4
+Revises: d8f2a4c6e1b3
+Create Date: 2026-10-19 20:00:00
+
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "e5b9c3d7f2a4"
+down_revision: Union[str, Sequence[str], None] = "d8f2a4c6e1b3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "workflow_execution_traces",
+        sa.Column("execution_id", sa.String(length=64), nullable=False),
+        sa.Column("trace_json", sa.Text(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+        ),
+        sa.PrimaryKeyConstraint("execution_id"),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("workflow_execution_traces", if_exists=True)
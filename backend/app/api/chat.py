@@ -5,12 +5,13 @@ This module provides the chat completion endpoint with SSE streaming support,
 integrating RAG retrieval and DeepSeek LLM for AI-powered conversations.
 """
 
+import asyncio
 import logging
 import re
 from datetime import datetime, timezone
-from typing import Any, List, Optional, Tuple
+from typing import Annotated, Any, AsyncGenerator, List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from fastapi.responses import StreamingResponse
 
 from app.core.auth import User, get_current_user
@@ -37,14 +38,18 @@ from app.api.chat_stream import (
     skill_stream_generator,
     stream_with_save,
 )
-from app.utils.sse import with_heartbeat
-from app.models.chat import ChatMessage, ChatRequest
+from app.api.chat_summary import split_history
+from app.utils.sse import StreamEvent, coalesce_tokens
+from app.utils.sse_resume import event_stream_response
+from app.models.chat import ChatMessage, ChatRequest, SessionHistory
 
 router = APIRouter(prefix="/api/v1/chat", tags=["chat"])
 logger = logging.getLogger(__name__)
 
 # Constants
 DEFAULT_RAG_TOP_K = 5
+DEFAULT_SESSION_PAGE_SIZE = 50
+MAX_SESSION_PAGE_SIZE = 200
 
 
 def parse_at_skill(message: str) -> Tuple[Optional[str], str]:
@@ -107,6 +112,20 @@ def _build_history_messages(
     return selected
 
 
+def _sse_response(
+    payload: ChatRequest, source: AsyncGenerator[StreamEvent, None], user: User
+) -> StreamingResponse:
+    """Wrap an SSE generator with the client's framing mode and heartbeats."""
+    if payload.stream_mode == "coalesced":
+        s = settings()
+        source = coalesce_tokens(
+            source,
+            flush_interval=s.sse_coalesce_window_ms / 1000,
+            max_bytes=s.sse_coalesce_max_bytes,
+        )
+    return event_stream_response(source, owner_id=str(user.id))
+
+
 async def chat_completions(
     payload: ChatRequest,
     user: User,
@@ -122,36 +141,25 @@ async def chat_completions(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Message cannot be empty"
         )
 
-    # Load or create session
-    session = await load_session(payload.session_id)
-    user_id_str = str(user.id)
-    if session is None:
-        from app.models.chat import SessionHistory
-
-        session = SessionHistory(
-            session_id=payload.session_id,
-            kb_id=payload.kb_id,
-            workflow_id=payload.workflow_id,
-            user_id=user_id_str,
-        )
+    skill_name, remaining_text = parse_at_skill(payload.message)
 
-    # Check session ownership
-    if (
-        session.user_id is not None
-        and session.user_id != user_id_str
-        and user.role != UserRole.ADMIN
-    ):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You do not have permission to access this session",
+    # Start the knowledge base search right away so it overlaps with the
+    # session load; the stream awaits it after sending its first events.
+    retrieval: asyncio.Task[List[dict[str, Any]]] | None = None
+    if payload.kb_id and not payload.workflow_id and not skill_name:
+        retrieval = asyncio.ensure_future(
+            get_rag_pipeline().search(
+                payload.kb_id, payload.message, top_k=DEFAULT_RAG_TOP_K
+            )
         )
+        retrieval.add_done_callback(_consume_task_exception)
 
-    # Update session metadata
-    if payload.kb_id:
-        session.kb_id = payload.kb_id
-    if payload.workflow_id:
-        session.workflow_id = payload.workflow_id
-    session.user_id = user_id_str
+    try:
+        session = await _load_session_for_turn(payload, user)
+    except BaseException:
+        if retrieval is not None:
+            retrieval.cancel()
+        raise
 
     # Add user message to history
     user_message = ChatMessage(
@@ -173,84 +181,127 @@ async def chat_completions(
             payload.model,
             reserved_tokens=0,
         )
-        return StreamingResponse(
-            with_heartbeat(workflow_stream_generator(
+        return _sse_response(
+            payload,
+            workflow_stream_generator(
                 payload,
                 session,
                 user,
                 conversation_history=history_for_workflow,
-            )),
-            media_type="text/event-stream",
-            headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-                "X-Accel-Buffering": "no",
-            },
+            ),
+            user,
         )
 
-    skill_name, remaining_text = parse_at_skill(payload.message)
     if skill_name:
-        return StreamingResponse(
-            with_heartbeat(skill_stream_generator(skill_name, remaining_text, session, user)),
-            media_type="text/event-stream",
-            headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-                "X-Accel-Buffering": "no",
-            },
+        return _sse_response(
+            payload,
+            skill_stream_generator(skill_name, remaining_text, session, user),
+            user,
         )
 
-    # Prepare messages for LLM
-    messages_for_llm: List[dict[str, Any]] = []
-
-    # Build system prompt with RAG context if available
-    retrieved_results: List[dict[str, Any]] = []
-    retrieved_context = None
-    if payload.kb_id:
-        try:
-            rag_pipeline = get_rag_pipeline()
-            retrieved_results = await rag_pipeline.search(
-                payload.kb_id, payload.message, top_k=DEFAULT_RAG_TOP_K
+    def build_messages(
+        retrieved_results: List[dict[str, Any]],
+    ) -> tuple[List[dict[str, Any]], int]:
+        """Build system prompt (with RAG context) and trimmed history."""
+        retrieved_context = None
+        if retrieved_results:
+            context_parts = []
+            for i, r in enumerate(retrieved_results[:3], 1):
+                context_parts.append(f"[{i}] {r['text']}")
+            retrieved_context = "\n\n".join(context_parts)
+
+        system_prompt = build_system_prompt(bool(payload.kb_id), retrieved_context)
+        system_message = {"role": "system", "content": system_prompt}
+        system_tokens = estimate_message_tokens([system_message])
+        messages_for_llm: List[dict[str, Any]] = [system_message]
+
+        # With a rolling summary, send it plus only the unsummarized turns
+        summary_message, recent_messages = split_history(session)
+        if summary_message is None:
+            messages_for_llm.extend(
+                _build_history_messages(
+                    session.messages,
+                    payload.model,
+                    reserved_tokens=system_tokens,
+                )
             )
-            if retrieved_results:
-                context_parts = []
-                for i, r in enumerate(retrieved_results[:3], 1):
-                    context_parts.append(f"[{i}] {r['text']}")
-                retrieved_context = "\n\n".join(context_parts)
-        except Exception:
-            logger.warning(
-                "RAG retrieval failed for kb_id=%s", payload.kb_id, exc_info=True
+            return messages_for_llm, 0
+
+        history = [summary_message]
+        history.extend(
+            _build_history_messages(
+                recent_messages,
+                payload.model,
+                reserved_tokens=system_tokens + estimate_message_tokens(history),
             )
-
-    system_prompt = build_system_prompt(bool(payload.kb_id), retrieved_context)
-    system_message = {"role": "system", "content": system_prompt}
-    system_tokens = estimate_message_tokens([system_message])
-    messages_for_llm.append(system_message)
-    messages_for_llm.extend(
-        _build_history_messages(
+        )
+        messages_for_llm.extend(history)
+        full_history = _build_history_messages(
             session.messages,
             payload.model,
             reserved_tokens=system_tokens,
         )
-    )
+        full_tokens = estimate_message_tokens(full_history)
+        saved_tokens = full_tokens - estimate_message_tokens(history)
+        return messages_for_llm, max(0, saved_tokens)
 
-    return StreamingResponse(
-        with_heartbeat(stream_with_save(
+    return _sse_response(
+        payload,
+        stream_with_save(
             payload,
             session,
-            messages_for_llm,
-            retrieved_results,
+            [],
+            None if payload.kb_id else [],
             user_id=user.id,
-        )),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        },
+            retrieval=retrieval,
+            build_messages=build_messages,
+        ),
+        user,
     )
 
 
+def _consume_task_exception(task: asyncio.Task[Any]) -> None:
+    # The stream reports retrieval failures; this only avoids "exception was
+    # never retrieved" warnings when the stream never awaits the task.
+    if not task.cancelled():
+        task.exception()
+
+
+async def _load_session_for_turn(payload: ChatRequest, user: User) -> SessionHistory:
+    """Load or create the session for a chat turn and check ownership."""
+    # Only the recent window is needed for history
+    session = await load_session(
+        payload.session_id, limit=settings().chat_history_load_limit
+    )
+    user_id_str = str(user.id)
+    if session is None:
+        session = SessionHistory(
+            session_id=payload.session_id,
+            kb_id=payload.kb_id,
+            workflow_id=payload.workflow_id,
+            user_id=user_id_str,
+        )
+
+    # Check session ownership
+    if (
+        session.user_id is not None
+        and session.user_id != user_id_str
+        and user.role != UserRole.ADMIN
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You do not have permission to access this session",
+        )
+
+    # Update session metadata
+    if payload.kb_id:
+        session.kb_id = payload.kb_id
+    if payload.workflow_id:
+        session.workflow_id = payload.workflow_id
+    session.user_id = user_id_str
+    return session
+
+
 @router.post("/completions")
 @limiter.limit("10/minute")
 async def chat_completions_endpoint(
@@ -280,10 +331,27 @@ async def list_models(user: User = Depends(get_current_user)) -> dict[str, Any]:
 @router.get("/sessions")
 async def list_sessions(
     user: User = Depends(get_current_user),
-) -> dict[str, list[dict[str, Any]]]:
-    """List chat sessions for the current user."""
-    sessions = await list_user_sessions(user)
-    return {"sessions": sessions}
+    limit: Annotated[Optional[int], Query(ge=1, le=MAX_SESSION_PAGE_SIZE)] = None,
+    cursor: Annotated[Optional[str], Query()] = None,
+) -> dict[str, Any]:
+    """List chat sessions for the current user, newest first.
+
+    Without ``limit`` or ``cursor`` every session is returned. Otherwise pages
+    hold ``limit`` sessions (default 50); pass the returned ``next_cursor``
+    back as ``cursor`` to get the next page.
+    """
+    if cursor and limit is None:
+        limit = DEFAULT_SESSION_PAGE_SIZE
+    try:
+        sessions, next_cursor = await list_user_sessions(
+            user, limit=limit, cursor=cursor
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+    return {"sessions": sessions, "next_cursor": next_cursor}
 
 
 @router.get("/sessions/{session_id}")
@@ -2,21 +2,28 @@
 Chat session management with database storage.
 
 Provides async session CRUD operations using SQLAlchemy,
-replacing the previous file-based JSON + filelock approach.
+replacing the previous file-based JSON + filelock approach. Messages are
+stored one row per message in ``chat_messages`` and appended per turn.
 """
 
+import asyncio
+import base64
+import binascii
 import json
 import logging
+from collections import OrderedDict
 from datetime import datetime, timezone
 from typing import Optional
 
-from sqlalchemy import select, delete as sa_delete
+from sqlalchemy import func, select, delete as sa_delete
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import flag_modified
 
 from app.core.auth import User
+from app.core.config import settings
 from app.core.database import AsyncSessionLocal
 from app.models.chat import ChatMessage, SessionHistory
-from app.models.session import ChatSessionDB
+from app.models.session import ChatMessageDB, ChatSessionDB
 from app.models.user import UserRole
 
 logger = logging.getLogger(__name__)
@@ -33,120 +40,547 @@ def check_session_ownership(session: SessionHistory, user: User) -> bool:
     return session.user_id == str(user.id)
 
 
-def _db_to_pydantic(row: ChatSessionDB) -> SessionHistory:
-    """Convert ORM row to Pydantic SessionHistory."""
-    messages_raw = json.loads(row.messages_json) if row.messages_json else []
+def _message_rows(
+    session_id: str, messages: list[ChatMessage], first_seq: int
+) -> list[ChatMessageDB]:
+    return [
+        ChatMessageDB(
+            session_id=session_id,
+            seq=first_seq + i,
+            role=m.role,
+            content=m.content,
+            timestamp=m.timestamp,
+        )
+        for i, m in enumerate(messages)
+    ]
+
+
+def _parse_legacy_messages(messages_json: str | None) -> list[ChatMessage]:
+    """Parse the pre-``chat_messages`` JSON message list."""
+    messages_raw = json.loads(messages_json) if messages_json else []
     messages = []
     for m in messages_raw:
         if isinstance(m, dict):
             if m.get("timestamp") and isinstance(m["timestamp"], str):
                 m["timestamp"] = datetime.fromisoformat(m["timestamp"])
             messages.append(ChatMessage(**m))
-    return SessionHistory(
+    return messages
+
+
+def _update_summary(
+    row: ChatSessionDB, new_messages: list[ChatMessage], *, reset: bool
+) -> None:
+    """Maintain the listing columns (title/message_count/last_message_at)."""
+    if reset:
+        row.title = None
+        row.message_count = 0
+        row.last_message_at = None
+    if not new_messages:
+        return
+    row.message_count = (row.message_count or 0) + len(new_messages)
+    if not row.title:
+        first_user = next((m for m in new_messages if m.role == "user"), None)
+        if first_user is not None:
+            row.title = first_user.content
+    row.last_message_at = new_messages[-1].timestamp or datetime.now(timezone.utc)
+
+
+async def _migrate_legacy_messages(db: AsyncSession, row: ChatSessionDB) -> None:
+    """Move messages still stored in ``messages_json`` into ``chat_messages``.
+
+    Such rows were written by code that predates ``chat_messages`` (e.g. the
+    file migration script), so their JSON replaces any stored messages.
+    """
+    if not row.messages_json or row.messages_json == "[]":
+        return
+    legacy = _parse_legacy_messages(row.messages_json)
+    await db.execute(
+        sa_delete(ChatMessageDB).where(ChatMessageDB.session_id == row.session_id)
+    )
+    db.add_all(_message_rows(row.session_id, legacy, 0))
+    _update_summary(row, legacy, reset=True)
+    row.messages_json = "[]"
+    if row.updated_at is None:
+        row.updated_at = row.created_at
+    else:
+        # Keep the existing updated_at instead of letting onupdate bump it.
+        flag_modified(row, "updated_at")
+    await db.commit()
+    await db.refresh(row)
+
+
+async def _load_from_db(
+    session_id: str, limit: int | None
+) -> tuple[Optional[SessionHistory], bool]:
+    """Load a session and whether its message list is the complete history."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(ChatSessionDB).where(ChatSessionDB.session_id == session_id)
+        )
+        row = result.scalar_one_or_none()
+        if row is None:
+            return None, False
+        await _migrate_legacy_messages(db, row)
+
+        query = (
+            select(ChatMessageDB)
+            .where(ChatMessageDB.session_id == session_id)
+            .order_by(ChatMessageDB.seq.desc())
+        )
+        if limit is not None:
+            query = query.limit(limit)
+        message_rows = list(reversed((await db.execute(query)).scalars().all()))
+
+    session = SessionHistory(
         session_id=row.session_id,
-        messages=messages,
+        messages=[
+            ChatMessage(role=m.role, content=m.content, timestamp=m.timestamp)
+            for m in message_rows
+        ],
         created_at=row.created_at or datetime.now(timezone.utc),
         updated_at=row.updated_at,
         kb_id=row.kb_id,
         workflow_id=row.workflow_id,
         user_id=row.user_id,
+        summary=row.summary,
+        summary_upto=row.summary_upto or 0,
     )
+    session._persisted_count = len(message_rows)
+    session._first_seq = message_rows[0].seq if message_rows else 0
+    return session, limit is None or len(message_rows) < limit
 
 
-async def load_session(session_id: str) -> Optional[SessionHistory]:
-    """Load session from database."""
-    async with AsyncSessionLocal() as db:
-        result = await db.execute(
-            select(ChatSessionDB).where(ChatSessionDB.session_id == session_id)
+async def _write_session(db: AsyncSession, session: SessionHistory, upto: int) -> None:
+    """Stage ``session.messages[:upto]`` that are not yet persisted."""
+    result = await db.execute(
+        select(ChatSessionDB).where(ChatSessionDB.session_id == session.session_id)
+    )
+    row = result.scalar_one_or_none()
+    updated_at = session.updated_at or datetime.now(timezone.utc)
+    if row is None:
+        row = ChatSessionDB(
+            session_id=session.session_id,
+            user_id=session.user_id,
+            kb_id=session.kb_id,
+            workflow_id=session.workflow_id,
+            messages_json="[]",
+            created_at=session.created_at,
+            updated_at=updated_at,
         )
-        row = result.scalar_one_or_none()
-        if row is None:
+        db.add(row)
+    else:
+        row.updated_at = updated_at
+        row.kb_id = session.kb_id
+        row.workflow_id = session.workflow_id
+        if session.user_id is not None:
+            row.user_id = session.user_id
+
+    persisted = session._persisted_count
+    if persisted is None:
+        await db.execute(
+            sa_delete(ChatMessageDB).where(
+                ChatMessageDB.session_id == session.session_id
+            )
+        )
+        row.messages_json = "[]"
+        row.summary = None
+        row.summary_upto = 0
+        persisted = 0
+    new_messages = session.messages[persisted:upto]
+    _update_summary(row, new_messages, reset=session._persisted_count is None)
+    if new_messages:
+        last_seq = await db.scalar(
+            select(func.max(ChatMessageDB.seq)).where(
+                ChatMessageDB.session_id == session.session_id
+            )
+        )
+        next_seq = 0 if last_seq is None else last_seq + 1
+        db.add_all(_message_rows(session.session_id, new_messages, next_seq))
+
+
+def _detached(session: SessionHistory) -> SessionHistory:
+    """A copy of a cached session that a turn may change freely."""
+    copy = session.model_copy()
+    copy.messages = list(session.messages)
+    copy._cache_source = session
+    copy._cache_base = len(copy.messages)
+    return copy
+
+
+class _CacheEntry:
+    __slots__ = ("session", "complete")
+
+    def __init__(self, session: SessionHistory, complete: bool):
+        self.session = session
+        self.complete = complete
+
+
+class SessionCache:
+    """In-process LRU of chat sessions with write-behind persistence.
+
+    Loads hand out copies, so a turn's changes reach the cache only when it
+    is saved. While the flusher runs, :func:`save_session` only marks a
+    session dirty; dirty sessions are written in one transaction every
+    *flush_interval* seconds. Evicting an entry never drops a pending write. The cache
+    assumes it is the only writer, i.e. a single application process.
+    """
+
+    def __init__(self, max_entries: int, flush_interval: float):
+        self.max_entries = max_entries
+        self.flush_interval = flush_interval
+        self._entries: OrderedDict[str, _CacheEntry] = OrderedDict()
+        self._dirty: dict[str, SessionHistory] = {}
+        self._flushing: set[str] = set()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def get(self, session_id: str, limit: int | None) -> Optional[SessionHistory]:
+        """Return the cached session if it can serve a load with *limit*."""
+        entry = self._entries.get(session_id)
+        if entry is None:
             return None
-        return _db_to_pydantic(row)
+        if limit is None and not entry.complete:
+            return None
+        self._entries.move_to_end(session_id)
+        if limit is not None:
+            self._trim(entry, limit)
+        return _detached(entry.session)
+
+    def peek(self, session_id: str) -> Optional[SessionHistory]:
+        """The cached session itself, without touching the LRU order."""
+        entry = self._entries.get(session_id)
+        return entry.session if entry is not None else None
+
+    def put(self, session: SessionHistory, complete: bool) -> None:
+        self._entries[session.session_id] = _CacheEntry(session, complete)
+        self._entries.move_to_end(session.session_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def mark_dirty(self, session: SessionHistory) -> None:
+        """Apply a saved copy's changes to the cached session."""
+        entry = self._entries.get(session.session_id)
+        source = session._cache_source
+        if source is None:
+            # A session that was never loaded replaces the stored history.
+            target = _detached(session)
+            target._cache_source = None
+            self.put(target, complete=session._persisted_count is None)
+        else:
+            # Prefer the current entry: the source may have been evicted
+            # and reloaded since the copy was made.
+            target = entry.session if entry is not None else source
+            target.messages.extend(session.messages[session._cache_base :])
+            target.kb_id = session.kb_id
+            target.workflow_id = session.workflow_id
+            if session.user_id is not None:
+                target.user_id = session.user_id
+            target.updated_at = session.updated_at
+            if entry is None:
+                self.put(target, complete=False)
+            else:
+                self._entries.move_to_end(session.session_id)
+        # Later saves of the same copy apply only what was added since.
+        session._cache_source = target
+        session._cache_base = len(session.messages)
+        self._dirty[session.session_id] = target
+
+    def discard(self, session_id: str) -> None:
+        self._entries.pop(session_id, None)
+        self._dirty.pop(session_id, None)
+
+    def is_dirty(self, session_id: str) -> bool:
+        return session_id in self._dirty or session_id in self._flushing
+
+    def _trim(self, entry: _CacheEntry, limit: int) -> None:
+        """Drop persisted messages older than the *limit* most recent ones."""
+        session = entry.session
+        persisted = session._persisted_count
+        if persisted is None or self.is_dirty(session.session_id):
+            return
+        drop = min(len(session.messages) - limit, persisted)
+        if drop > 0:
+            session.messages = session.messages[drop:]
+            session._persisted_count = persisted - drop
+            session._first_seq += drop
+            entry.complete = False
+
+    async def flush(self) -> None:
+        """Write all dirty sessions in a single transaction."""
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+            batch = [(s, len(s.messages)) for s in self._dirty.values()]
+            self._dirty.clear()
+            self._flushing = {s.session_id for s, _ in batch}
+            try:
+                async with AsyncSessionLocal() as db:
+                    for session, upto in batch:
+                        await _write_session(db, session, upto)
+                    await db.commit()
+            except Exception:
+                logger.warning(
+                    "Failed to flush %d chat sessions; will retry",
+                    len(batch),
+                    exc_info=True,
+                )
+                for session, _ in batch:
+                    self._dirty.setdefault(session.session_id, session)
+                return
+            finally:
+                self._flushing = set()
+            for session, upto in batch:
+                session._persisted_count = upto
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flusher and write any pending sessions."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        self._entries.clear()
+
+
+_session_cache: Optional[SessionCache] = None
+
+
+def get_session_cache() -> SessionCache:
+    """Get the global session cache instance."""
+    global _session_cache
+    if _session_cache is None:
+        s = settings()
+        _session_cache = SessionCache(
+            max_entries=s.chat_session_cache_size,
+            flush_interval=s.chat_session_flush_interval_ms / 1000,
+        )
+    return _session_cache
+
+
+def _active_cache() -> Optional[SessionCache]:
+    """The session cache, if its write-behind flusher is running."""
+    if _session_cache is not None and _session_cache.running:
+        return _session_cache
+    return None
+
+
+def start_session_flusher() -> None:
+    """Enable the session cache and its write-behind flusher (app startup)."""
+    if settings().chat_session_cache_enabled:
+        get_session_cache().start()
+
+
+async def stop_session_flusher() -> None:
+    """Flush pending session writes and stop the flusher (app shutdown)."""
+    if _session_cache is not None:
+        await _session_cache.stop()
+
+
+async def _flush_pending() -> None:
+    if _session_cache is not None:
+        await _session_cache.flush()
+
+
+async def load_session(
+    session_id: str, limit: int | None = None
+) -> Optional[SessionHistory]:
+    """Load session from the cache or the database.
+
+    Args:
+        session_id: Session identifier
+        limit: If given, load only the most recent *limit* messages. Older
+            messages stay in storage and are untouched by later saves.
+    """
+    cache = _active_cache()
+    if cache is None:
+        session, _ = await _load_from_db(session_id, limit)
+        return session
+
+    cached = cache.get(session_id, limit)
+    if cached is not None:
+        return cached
+    if cache.is_dirty(session_id):
+        await cache.flush()
+    session, complete = await _load_from_db(session_id, limit)
+    if session is None:
+        return None
+    cache.put(session, complete)
+    return _detached(session)
 
 
 async def save_session(session: SessionHistory) -> None:
-    """Save session to database (upsert)."""
-    now = datetime.now(timezone.utc)
-    session.updated_at = now
-    messages_json = json.dumps(
-        session.model_dump(mode="json")["messages"], ensure_ascii=False
-    )
+    """Save session to database.
+
+    Sessions returned by :func:`load_session` are saved append-only: only
+    messages added since the load are inserted. A session object that was
+    not loaded from storage replaces any stored history for its id. While
+    the session cache is running the write is deferred to its flusher.
+    """
+    session.updated_at = datetime.now(timezone.utc)
+    cache = _active_cache()
+    if cache is not None:
+        cache.mark_dirty(session)
+        return
+
+    upto = len(session.messages)
+    async with AsyncSessionLocal() as db:
+        await _write_session(db, session, upto)
+        await db.commit()
+    session._persisted_count = upto
+
+
+async def save_session_summary(session_id: str, summary: str, upto: int) -> bool:
+    """Store a rolling summary covering messages with seq below *upto*.
+
+    The summary is written immediately, not through the write-behind cache.
+    Returns False if the session is gone or already has a newer summary.
+    """
+    cache = _active_cache()
+    if cache is not None and cache.is_dirty(session_id):
+        # The session row may not exist until its pending write lands.
+        await cache.flush()
     async with AsyncSessionLocal() as db:
         result = await db.execute(
-            select(ChatSessionDB).where(ChatSessionDB.session_id == session.session_id)
+            select(ChatSessionDB).where(ChatSessionDB.session_id == session_id)
         )
         row = result.scalar_one_or_none()
-        if row is None:
-            row = ChatSessionDB(
-                session_id=session.session_id,
-                user_id=session.user_id,
-                kb_id=session.kb_id,
-                workflow_id=session.workflow_id,
-                messages_json=messages_json,
-                created_at=session.created_at,
-                updated_at=now,
-            )
-            db.add(row)
-        else:
-            row.messages_json = messages_json
-            row.updated_at = now
-            row.kb_id = session.kb_id
-            row.workflow_id = session.workflow_id
-            if session.user_id is not None:
-                row.user_id = session.user_id
+        if row is None or (row.summary_upto or 0) >= upto:
+            return False
+        row.summary = summary
+        row.summary_upto = upto
+        # A summary is not activity; keep the listing order unchanged.
+        flag_modified(row, "updated_at")
         await db.commit()
+    if cache is not None:
+        cached = cache.peek(session_id)
+        if cached is not None and cached.summary_upto < upto:
+            cached.summary = summary
+            cached.summary_upto = upto
+    return True
 
 
-async def list_user_sessions(user: User) -> list[dict[str, object]]:
-    """List sessions for a user (admin sees all)."""
-    async with AsyncSessionLocal() as db:
-        query = select(ChatSessionDB)
-        if user.role != UserRole.ADMIN:
-            user_id_str = str(user.id)
+def _encode_cursor(row: ChatSessionDB) -> str:
+    updated_at = row.updated_at.isoformat() if row.updated_at else None
+    raw = json.dumps([updated_at, row.session_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime | None, str]:
+    """Decode a listing cursor. Raises ValueError if it is malformed."""
+    try:
+        updated_at, session_id = json.loads(base64.urlsafe_b64decode(cursor))
+        if not isinstance(session_id, str):
+            raise ValueError("session_id must be a string")
+        return (
+            datetime.fromisoformat(updated_at) if updated_at else None,
+            session_id,
+        )
+    except (TypeError, ValueError, binascii.Error) as exc:
+        raise ValueError(f"Invalid cursor: {cursor}") from exc
+
+
+async def list_user_sessions(
+    user: User, limit: int | None = None, cursor: str | None = None
+) -> tuple[list[dict[str, object]], str | None]:
+    """List sessions for a user (admin sees all), most recently updated first.
+
+    Reads only the summary columns, never the messages. Returns one page of
+    at most *limit* sessions plus the cursor for the next page (None on the
+    last page). Raises ValueError for a malformed *cursor*.
+    """
+    query = select(ChatSessionDB).order_by(
+        ChatSessionDB.updated_at.desc(), ChatSessionDB.session_id.desc()
+    )
+    if user.role != UserRole.ADMIN:
+        user_id_str = str(user.id)
+        query = query.where(
+            (ChatSessionDB.user_id == user_id_str) | (ChatSessionDB.user_id.is_(None))
+        )
+    if cursor:
+        after_updated_at, after_session_id = _decode_cursor(cursor)
+        if after_updated_at is None:
             query = query.where(
-                (ChatSessionDB.user_id == user_id_str)
-                | (ChatSessionDB.user_id.is_(None))
+                ChatSessionDB.updated_at.is_(None),
+                ChatSessionDB.session_id < after_session_id,
             )
-        result = await db.execute(query)
-        rows = result.scalars().all()
+        else:
+            query = query.where(
+                (ChatSessionDB.updated_at < after_updated_at)
+                | (
+                    (ChatSessionDB.updated_at == after_updated_at)
+                    & (ChatSessionDB.session_id < after_session_id)
+                )
+                | ChatSessionDB.updated_at.is_(None)
+            )
+    if limit is not None:
+        query = query.limit(limit + 1)
+
+    await _flush_pending()
+    async with AsyncSessionLocal() as db:
+        rows = list((await db.execute(query)).scalars().all())
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = _encode_cursor(rows[-1])
+        for row in rows:
+            await _migrate_legacy_messages(db, row)
 
-    sessions = []
+    sessions: list[dict[str, object]] = []
     for row in rows:
-        sh = _db_to_pydantic(row)
-        title = ""
-        for msg in sh.messages:
-            if msg.role == "user":
-                title = msg.content
-                break
+        created_at = row.created_at or datetime.now(timezone.utc)
         sessions.append(
             {
-                "session_id": sh.session_id,
-                "title": title,
-                "created_at": sh.created_at.isoformat(),
+                "session_id": row.session_id,
+                "title": row.title or "",
+                "created_at": created_at.isoformat(),
                 "updated_at": (
-                    sh.updated_at.isoformat()
-                    if sh.updated_at
-                    else sh.created_at.isoformat()
+                    row.updated_at.isoformat()
+                    if row.updated_at
+                    else created_at.isoformat()
                 ),
-                "message_count": len(sh.messages),
-                "kb_id": sh.kb_id,
-                "workflow_id": sh.workflow_id,
-                "user_id": sh.user_id,
+                "last_message_at": (
+                    row.last_message_at.isoformat() if row.last_message_at else None
+                ),
+                "message_count": row.message_count or 0,
+                "kb_id": row.kb_id,
+                "workflow_id": row.workflow_id,
+                "user_id": row.user_id,
             }
         )
-    sessions.sort(key=lambda s: s["updated_at"], reverse=True)
-    return sessions
+    return sessions, next_cursor
 
 
 async def delete_session_by_id(session_id: str) -> bool:
     """Delete a session from the database. Returns True if deleted."""
+    if _session_cache is not None:
+        _session_cache.discard(session_id)
+        # Wait for an in-flight flush so it cannot recreate the rows.
+        await _session_cache.flush()
     async with AsyncSessionLocal() as db:
         existing = await db.execute(
             select(ChatSessionDB.id).where(ChatSessionDB.session_id == session_id)
         )
         if existing.first() is None:
             return False
+        await db.execute(
+            sa_delete(ChatMessageDB).where(ChatMessageDB.session_id == session_id)
+        )
         await db.execute(
             sa_delete(ChatSessionDB).where(ChatSessionDB.session_id == session_id)
         )
@@ -1,19 +1,20 @@
 """
 Chat SSE stream generators for workflow, skill, and chat completion events.
 
-This module provides async generators that yield SSE events for different
+This module provides async generators that yield stream events for different
 chat interaction modes including workflow execution, skill invocation,
-and standard chat completion with RAG retrieval.
+and standard chat completion with RAG retrieval. Events are typed objects
+from ``app.utils.sse``; they are serialized only when the response is sent.
 """
 
 import asyncio
-import json
 import logging
 from datetime import datetime, timezone
-from typing import Any, AsyncGenerator, List, Optional
+from typing import Any, AsyncGenerator, Callable, List, Optional
 
 from fastapi import HTTPException
 
+from app.core.config import settings
 from app.core.llm import chat_completion_stream
 from app.core.paths import SKILLS_DIR
 from app.core.rag import get_rag_pipeline
@@ -22,9 +23,17 @@ from app.core.skill.skill_executor import get_skill_executor
 from app.core.workflow.workflow_engine import WorkflowEngine
 from app.api.workflow import get_workflow
 from app.api.chat_session import save_session, EXCERPT_LIMIT
+from app.api.chat_summary import maybe_schedule_summary
 from app.models.chat import ChatMessage, ChatRequest, SessionHistory
 from app.models.user import User
-from app.utils.sse import format_sse_event
+from app.utils.sse import (
+    CitationEvent,
+    DoneEvent,
+    ErrorEvent,
+    StreamEvent,
+    ThoughtEvent,
+    TokenEvent,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +44,10 @@ WORKFLOW_TIMEOUT = 300  # seconds, for entire workflow execution
 
 skill_loader = SkillLoader(SKILLS_DIR)
 
+# Builds the LLM messages from retrieval results; also returns the input
+# tokens saved by history summarization, for the usage log.
+BuildMessages = Callable[[List[dict[str, Any]]], tuple[List[dict[str, Any]], int]]
+
 
 def build_excerpt(text: str, limit: int = EXCERPT_LIMIT) -> str:
     """Build excerpt from text with character limit."""
@@ -43,9 +56,31 @@ def build_excerpt(text: str, limit: int = EXCERPT_LIMIT) -> str:
     return text[:limit] + "..."
 
 
+def build_skill_inputs(skill: Any, text: str) -> dict[str, str]:
+    """Map free text to the skill's first required input (or first input)."""
+    inputs: dict[str, str] = {}
+    skill_inputs = skill.inputs or []
+
+    # Find first required input
+    first_required = None
+    for inp in skill_inputs:
+        if inp.required:
+            first_required = inp.name
+            break
+
+    # If no required input, use first input
+    if first_required is None and skill_inputs:
+        first_required = skill_inputs[0].name
+
+    if first_required:
+        inputs[first_required] = text
+    # Otherwise the skill has no inputs and its prompt is used as-is
+    return inputs
+
+
 async def skill_stream_generator(
     skill_name: str, remaining_text: str, session: SessionHistory, user: User
-) -> AsyncGenerator[str, None]:
+) -> AsyncGenerator[StreamEvent, None]:
     """
     Generate SSE stream for @skill execution.
 
@@ -56,30 +91,24 @@ async def skill_stream_generator(
         user: Current authenticated user
 
     Yields:
-        SSE event strings (thought, token, citation, done)
+        Stream events (thought, token, citation, done)
     """
     executor = get_skill_executor()
 
     try:
         # Load the skill
-        yield format_sse_event(
-            "thought", {"type": "skill", "status": "start", "skill_name": skill_name}
+        yield ThoughtEvent(
+            {"type": "skill", "status": "start", "skill_name": skill_name}
         )
 
         try:
             skill = skill_loader.get_skill(skill_name)
         except SkillValidationError as e:
-            yield format_sse_event(
-                "thought", {"type": "skill", "status": "error", "error": str(e)}
-            )
-            yield format_sse_event(
-                "done",
-                {"status": "error", "message": f"Skill '{skill_name}' not found"},
-            )
+            yield ThoughtEvent({"type": "skill", "status": "error", "error": str(e)})
+            yield DoneEvent("error", f"Skill '{skill_name}' not found")
             return
 
-        yield format_sse_event(
-            "thought",
+        yield ThoughtEvent(
             {
                 "type": "skill",
                 "status": "loaded",
@@ -88,26 +117,7 @@ async def skill_stream_generator(
             },
         )
 
-        # Build inputs: map remaining_text to first required input
-        inputs: dict[str, str] = {}
-        skill_inputs = skill.inputs or []
-
-        # Find first required input
-        first_required = None
-        for inp in skill_inputs:
-            if inp.required:
-                first_required = inp.name
-                break
-
-        # If no required input, use first input
-        if first_required is None and skill_inputs:
-            first_required = skill_inputs[0].name
-
-        if first_required:
-            inputs[first_required] = remaining_text
-        else:
-            # Skill has no inputs, treat remaining_text as the entire prompt
-            pass
+        inputs = build_skill_inputs(skill, remaining_text)
 
         # Execute skill
         full_output = ""
@@ -116,15 +126,8 @@ async def skill_stream_generator(
                 yield event
 
                 # Accumulate output for session save
-                if event.startswith("event: token"):
-                    try:
-                        lines = event.strip().split("\n")
-                        for line in lines:
-                            if line.startswith("data: "):
-                                data = json.loads(line[6:])
-                                full_output += data.get("content", "")
-                    except (json.JSONDecodeError, IndexError):
-                        logger.warning("Failed to parse SSE token data")
+                if isinstance(event, TokenEvent):
+                    full_output += event.content
 
         # Save to session history
         if full_output:
@@ -138,24 +141,19 @@ async def skill_stream_generator(
 
     except TimeoutError:
         logger.warning("Skill execution timed out after %ds", LLM_STREAM_TIMEOUT)
-        yield format_sse_event(
-            "error", {"message": f"Skill execution timed out ({LLM_STREAM_TIMEOUT}s)"}
-        )
-        yield format_sse_event("done", {"status": "error", "message": "Timeout"})
+        yield ErrorEvent(f"Skill execution timed out ({LLM_STREAM_TIMEOUT}s)")
+        yield DoneEvent("error", "Timeout")
 
     except Exception:
         logger.warning("Skill stream failed for '%s'", skill_name, exc_info=True)
-        yield format_sse_event(
-            "thought",
+        yield ThoughtEvent(
             {
                 "type": "skill",
                 "status": "error",
                 "error": "Skill execution failed",
             },
         )
-        yield format_sse_event(
-            "done", {"status": "error", "message": "Skill execution failed"}
-        )
+        yield DoneEvent("error", "Skill execution failed")
 
 
 async def chat_stream_generator(
@@ -163,10 +161,19 @@ async def chat_stream_generator(
     messages: List[dict[str, Any]],
     pre_retrieved_results: Optional[List[dict[str, Any]]] = None,
     user_id: int | None = None,
-) -> AsyncGenerator[str, None]:
+    *,
+    retrieval: Optional["asyncio.Task[List[dict[str, Any]]]"] = None,
+    build_messages: Optional[BuildMessages] = None,
+) -> AsyncGenerator[StreamEvent, None]:
     """
     Generate SSE stream for chat completion.
 
+    Retrieval runs inside the stream, so the first thought is sent before
+    the knowledge base search finishes. *retrieval* may be a search task
+    the caller started early; otherwise the search is started here. When
+    *build_messages* is given, the LLM messages are built from the
+    retrieval results instead of using *messages*.
+
     Events:
     - thought: RAG retrieval process
     - token: LLM generated token
@@ -180,8 +187,7 @@ async def chat_stream_generator(
     try:
         # Step 1: RAG Retrieval (if kb_id provided)
         if request.kb_id:
-            yield format_sse_event(
-                "thought",
+            yield ThoughtEvent(
                 {
                     "type": "retrieval",
                     "status": "start",
@@ -190,8 +196,7 @@ async def chat_stream_generator(
                 },
             )
 
-            yield format_sse_event(
-                "thought",
+            yield ThoughtEvent(
                 {
                     "type": "retrieval",
                     "status": "searching",
@@ -202,16 +207,18 @@ async def chat_stream_generator(
 
             if pre_retrieved_results is None:
                 try:
-                    rag_pipeline = get_rag_pipeline()
-                    retrieved_results = await rag_pipeline.search(
-                        request.kb_id, request.message, top_k=DEFAULT_RAG_TOP_K
-                    )
+                    if retrieval is None:
+                        retrieval = asyncio.ensure_future(
+                            get_rag_pipeline().search(
+                                request.kb_id, request.message, top_k=DEFAULT_RAG_TOP_K
+                            )
+                        )
+                    retrieved_results = await retrieval
                 except Exception:
                     logger.warning(
                         "RAG retrieval failed for kb '%s'", request.kb_id, exc_info=True
                     )
-                    yield format_sse_event(
-                        "thought",
+                    yield ThoughtEvent(
                         {
                             "type": "retrieval",
                             "status": "error",
@@ -233,8 +240,7 @@ async def chat_stream_generator(
                 for r in retrieved_results[:3]
             ]
 
-            yield format_sse_event(
-                "thought",
+            yield ThoughtEvent(
                 {
                     "type": "retrieval",
                     "status": "complete",
@@ -255,7 +261,11 @@ async def chat_stream_generator(
                     }
                     for r in retrieved_results
                 ]
-                yield format_sse_event("citation", {"sources": sources})
+                yield CitationEvent(sources)
+
+        saved_input_tokens = 0
+        if build_messages is not None:
+            messages, saved_input_tokens = build_messages(retrieved_results)
 
         # Step 2: Stream LLM tokens
         async with asyncio.timeout(LLM_STREAM_TIMEOUT):
@@ -264,37 +274,44 @@ async def chat_stream_generator(
                 model=request.model,
                 temperature=0.7,
                 user_id=user_id,
+                saved_input_tokens=saved_input_tokens,
             ):
-                yield format_sse_event("token", {"content": token})
+                yield TokenEvent(token)
 
     except TimeoutError:
         has_error = True
         error_message = f"LLM response timed out ({LLM_STREAM_TIMEOUT}s)"
         logger.warning("Chat LLM stream timed out after %ds", LLM_STREAM_TIMEOUT)
-        yield format_sse_event("error", {"message": error_message})
+        yield ErrorEvent(error_message)
 
     except Exception:
         logger.warning("Chat stream failed", exc_info=True)
         has_error = True
         error_message = "Chat generation failed"
-        yield format_sse_event("error", {"message": error_message})
+        yield ErrorEvent(error_message)
+
+    finally:
+        # The client may disconnect while retrieval is still running.
+        if retrieval is not None and not retrieval.done():
+            retrieval.cancel()
 
     # Step 3: Done event
     if has_error:
-        yield format_sse_event("done", {"status": "error", "message": error_message})
+        yield DoneEvent("error", error_message)
     else:
-        yield format_sse_event(
-            "done", {"status": "success", "message": "Chat completed successfully"}
-        )
+        yield DoneEvent("success", "Chat completed successfully")
 
 
 async def stream_with_save(
     request: ChatRequest,
     session: SessionHistory,
     messages_for_llm: List[dict[str, Any]],
-    retrieved_results: List[dict[str, Any]],
+    retrieved_results: Optional[List[dict[str, Any]]],
     user_id: int | None = None,
-) -> AsyncGenerator[str, None]:
+    *,
+    retrieval: Optional["asyncio.Task[List[dict[str, Any]]]"] = None,
+    build_messages: Optional[BuildMessages] = None,
+) -> AsyncGenerator[StreamEvent, None]:
     """
     Stream response and save to session history.
 
@@ -302,10 +319,13 @@ async def stream_with_save(
         request: Chat request
         session: Current session
         messages_for_llm: Messages formatted for LLM
-        retrieved_results: Pre-retrieved RAG results
+        retrieved_results: Pre-retrieved RAG results, or None to retrieve
+            inside the stream (see ``chat_stream_generator``)
+        retrieval: Optional in-flight knowledge base search task
+        build_messages: Optional builder for LLM messages from retrieval results
 
     Yields:
-        SSE event strings
+        Stream events
     """
     assistant_content = ""
 
@@ -314,16 +334,11 @@ async def stream_with_save(
         messages_for_llm,
         retrieved_results,
         user_id=user_id,
+        retrieval=retrieval,
+        build_messages=build_messages,
     ):
-        if chunk.startswith("event: token"):
-            try:
-                lines = chunk.strip().split("\n")
-                for line in lines:
-                    if line.startswith("data: "):
-                        data = json.loads(line[6:])
-                        assistant_content += data.get("content", "")
-            except (json.JSONDecodeError, IndexError):
-                logger.warning("Failed to parse SSE token data")
+        if isinstance(chunk, TokenEvent):
+            assistant_content += chunk.content
         yield chunk
 
     # Save assistant response to session
@@ -335,6 +350,7 @@ async def stream_with_save(
         )
         session.messages.append(assistant_message)
         await save_session(session)
+        maybe_schedule_summary(session, user_id)
 
 
 async def workflow_stream_generator(
@@ -342,7 +358,7 @@ async def workflow_stream_generator(
     session: SessionHistory,
     user: User,
     conversation_history: Optional[List[dict[str, str]]] = None,
-) -> AsyncGenerator[str, None]:
+) -> AsyncGenerator[StreamEvent, None]:
     """
     Generate SSE stream for workflow execution.
 
@@ -352,20 +368,18 @@ async def workflow_stream_generator(
         user: Current authenticated user
 
     Yields:
-        SSE event strings for workflow execution progress
+        Stream events for workflow execution progress
     """
     if not request.workflow_id:
-        yield format_sse_event("error", {"message": "Workflow ID is required"})
-        yield format_sse_event(
-            "done", {"status": "error", "message": "Workflow ID is required"}
-        )
+        yield ErrorEvent("Workflow ID is required")
+        yield DoneEvent("error", "Workflow ID is required")
         return
 
     try:
-        workflow = await get_workflow(request.workflow_id)
+        workflow = await get_workflow(request.workflow_id, user)
     except HTTPException as exc:
-        yield format_sse_event("error", {"message": str(exc.detail)})
-        yield format_sse_event("done", {"status": "error", "message": str(exc.detail)})
+        yield ErrorEvent(str(exc.detail))
+        yield DoneEvent("error", str(exc.detail))
         return
 
     engine = WorkflowEngine(workflow)
@@ -378,12 +392,12 @@ async def workflow_stream_generator(
                 user_id=user.id,
                 model=request.model,
                 conversation_history=conversation_history,
+                execution_mode=settings().chat_workflow_execution_mode,
             ):
                 event_type = event.get("type")
 
                 if event_type == "workflow_start":
-                    yield format_sse_event(
-                        "thought",
+                    yield ThoughtEvent(
                         {
                             "type": "workflow",
                             "status": "start",
@@ -392,8 +406,7 @@ async def workflow_stream_generator(
                     )
 
                 elif event_type == "node_start":
-                    yield format_sse_event(
-                        "thought",
+                    yield ThoughtEvent(
                         {
                             "type": "node",
                             "status": "start",
@@ -405,7 +418,7 @@ async def workflow_stream_generator(
                 elif event_type == "token":
                     content = event.get("content", "")
                     full_output += content
-                    yield format_sse_event("token", {"content": content})
+                    yield TokenEvent(content, node_id=event.get("node_id"))
 
                 elif event_type == "thought":
                     payload = {"type": event.get("type_detail", "info")}
@@ -416,11 +429,10 @@ async def workflow_stream_generator(
                             if k not in ("type", "type_detail")
                         }
                     )
-                    yield format_sse_event("thought", payload)
+                    yield ThoughtEvent(payload)
 
                 elif event_type == "node_complete":
-                    yield format_sse_event(
-                        "thought",
+                    yield ThoughtEvent(
                         {
                             "type": "node",
                             "status": "complete",
@@ -430,10 +442,8 @@ async def workflow_stream_generator(
 
                 elif event_type in ("node_error", "workflow_error"):
                     message = event.get("error", "Unknown workflow error")
-                    yield format_sse_event("error", {"message": message})
-                    yield format_sse_event(
-                        "done", {"status": "error", "message": message}
-                    )
+                    yield ErrorEvent(message)
+                    yield DoneEvent("error", message)
                     return
 
                 elif event_type == "workflow_complete":
@@ -445,13 +455,9 @@ async def workflow_stream_generator(
                     )
                     session.messages.append(assistant_message)
                     await save_session(session)
-                    yield format_sse_event(
-                        "done", {"status": "success", "message": "Workflow completed"}
-                    )
+                    yield DoneEvent("success", "Workflow completed")
                     return
     except TimeoutError:
         logger.warning("Workflow execution timed out after %ds", WORKFLOW_TIMEOUT)
-        yield format_sse_event(
-            "error", {"message": f"Workflow execution timed out ({WORKFLOW_TIMEOUT}s)"}
-        )
-        yield format_sse_event("done", {"status": "error", "message": "Timeout"})
+        yield ErrorEvent(f"Workflow execution timed out ({WORKFLOW_TIMEOUT}s)")
+        yield DoneEvent("error", "Timeout")
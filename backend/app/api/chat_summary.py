@@ -0,0 +1,132 @@
+"""
+Rolling conversation summarization for chat sessions.
+
+When the unsummarized part of a session grows past
+``chat_summary_trigger_tokens``, its older turns are compacted in the
+background into a stored summary using ``chat_summary_model``. Later turns
+send that summary plus the recent messages instead of the raw history.
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+from app.api.chat_session import save_session_summary
+from app.core.config import settings
+from app.core.llm import chat_completion, estimate_message_tokens
+from app.models.chat import ChatMessage, SessionHistory
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_SYSTEM_PROMPT = (
+    "You maintain a running summary of a conversation between a user and an "
+    "AI assistant. Merge the previous summary and the new messages into one "
+    "concise summary that keeps the facts, decisions, user preferences and "
+    "open questions needed to continue the conversation. "
+    "Reply with the summary only."
+)
+
+_summary_tasks: dict[str, asyncio.Task[None]] = {}
+
+
+def summary_message(summary: str) -> dict[str, str]:
+    """Prompt message carrying a stored conversation summary."""
+    return {
+        "role": "system",
+        "content": f"Summary of the earlier conversation:\n{summary}",
+    }
+
+
+def unsummarized_messages(session: SessionHistory) -> list[ChatMessage]:
+    """Messages of *session* not covered by its summary."""
+    covered = session.summary_upto - session._first_seq
+    return session.messages[max(0, covered) :]
+
+
+def split_history(
+    session: SessionHistory,
+) -> tuple[Optional[dict[str, str]], list[ChatMessage]]:
+    """Split history into the summary message (if any) and the raw messages."""
+    if not settings().chat_summary_enabled or not session.summary:
+        return None, session.messages
+    return summary_message(session.summary), unsummarized_messages(session)
+
+
+def maybe_schedule_summary(
+    session: SessionHistory, user_id: int | str | None = None
+) -> Optional[asyncio.Task[None]]:
+    """Start a background summary if the unsummarized history is too long.
+
+    At most one summary runs per session. Returns the started task, or None.
+    """
+    s = settings()
+    if not s.chat_summary_enabled:
+        return None
+    running = _summary_tasks.get(session.session_id)
+    if running is not None and not running.done():
+        return None
+
+    pending = unsummarized_messages(session)
+    keep = s.chat_summary_keep_messages
+    if len(pending) <= keep:
+        return None
+    pending_tokens = estimate_message_tokens(
+        [{"role": m.role, "content": m.content} for m in pending]
+    )
+    if pending_tokens < s.chat_summary_trigger_tokens:
+        return None
+
+    to_compact = pending[:-keep]
+    start = len(session.messages) - len(pending)
+    upto = session._first_seq + start + len(to_compact)
+    task = asyncio.create_task(
+        _summarize(session, session.summary, to_compact, upto, user_id)
+    )
+    _summary_tasks[session.session_id] = task
+
+    def _forget(done: asyncio.Task[None]) -> None:
+        if _summary_tasks.get(session.session_id) is done:
+            del _summary_tasks[session.session_id]
+
+    task.add_done_callback(_forget)
+    return task
+
+
+async def _summarize(
+    session: SessionHistory,
+    previous: Optional[str],
+    messages: list[ChatMessage],
+    upto: int,
+    user_id: int | str | None,
+) -> None:
+    s = settings()
+    transcript = "\n".join(f"{m.role}: {m.content}" for m in messages)
+    parts = []
+    if previous:
+        parts.append(f"Previous summary:\n{previous}")
+    parts.append(f"New messages:\n{transcript}")
+    try:
+        summary = await chat_completion(
+            [
+                {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+                {"role": "user", "content": "\n\n".join(parts)},
+            ],
+            model=s.chat_summary_model or None,
+            temperature=0.2,
+            max_tokens=s.chat_summary_max_tokens,
+            user_id=user_id,
+        )
+    except Exception:
+        logger.warning(
+            "Conversation summary failed for session '%s'",
+            session.session_id,
+            exc_info=True,
+        )
+        return
+
+    summary = summary.strip()
+    if not summary or upto <= session.summary_upto:
+        return
+    if await save_session_summary(session.session_id, summary, upto):
+        session.summary = summary
+        session.summary_upto = upto
@@ -1,6 +1,8 @@
 """Observability API - Token usage statistics for LLM cost monitoring."""
 
 import json
+import time
+from dataclasses import asdict
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any
@@ -11,6 +13,7 @@ from pydantic import BaseModel, Field
 from app.api.admin import require_admin
 from app.core.llm import TOKEN_USAGE_LOG
 from app.models.user import User
+from app.utils.sse import active_stream_stats
 
 router = APIRouter(prefix="/api/v1/observability", tags=["observability"])
 
@@ -21,6 +24,9 @@ class TokenUsageSummary(BaseModel):
     total_input_tokens: int = Field(..., description="Total input tokens")
     total_output_tokens: int = Field(..., description="Total output tokens")
     total_requests: int = Field(..., description="Total number of requests")
+    total_saved_input_tokens: int = Field(
+        default=0, description="Input tokens avoided by conversation summaries"
+    )
     by_provider: dict[str, dict[str, int]] = Field(
         default_factory=dict, description="Usage grouped by provider"
     )
@@ -29,6 +35,19 @@ class TokenUsageSummary(BaseModel):
     )
 
 
+class SSEStreamSummary(BaseModel):
+    """Buffering metrics of the SSE connections currently open."""
+
+    active_streams: int = Field(..., description="Open SSE connections")
+    slow_streams: int = Field(..., description="Connections flagged as slow")
+    total_buffered_bytes: int = Field(
+        ..., description="Bytes buffered across all connections"
+    )
+    streams: list[dict[str, Any]] = Field(
+        default_factory=list, description="Per-connection buffering metrics"
+    )
+
+
 def _parse_token_log(hours: int) -> list[dict[str, Any]]:
     """Parse token_usage.log and filter by time range."""
     if not TOKEN_USAGE_LOG.exists():
@@ -61,6 +80,7 @@ def _aggregate_usage(entries: list[dict[str, Any]]) -> TokenUsageSummary:
     """Aggregate token usage from log entries."""
     total_input = 0
     total_output = 0
+    total_saved = 0
     by_provider: dict[str, dict[str, int]] = {}
     by_model: dict[str, dict[str, int]] = {}
 
@@ -72,6 +92,7 @@ def _aggregate_usage(entries: list[dict[str, Any]]) -> TokenUsageSummary:
 
         total_input += input_tokens
         total_output += output_tokens
+        total_saved += int(entry.get("saved_input_tokens", 0))
 
         # Aggregate by provider
         if provider not in by_provider:
@@ -91,6 +112,7 @@ def _aggregate_usage(entries: list[dict[str, Any]]) -> TokenUsageSummary:
         total_input_tokens=total_input,
         total_output_tokens=total_output,
         total_requests=len(entries),
+        total_saved_input_tokens=total_saved,
         by_provider=by_provider,
         by_model=by_model,
     )
@@ -104,3 +126,22 @@ async def get_token_usage(
     """Get token usage statistics for the specified time range."""
     entries = _parse_token_log(hours)
     return _aggregate_usage(entries)
+
+
+@router.get("/sse-streams", response_model=SSEStreamSummary)
+async def get_sse_streams(
+    admin: User = Depends(require_admin),
+) -> SSEStreamSummary:
+    """Get per-connection buffering metrics of open SSE streams."""
+    now = time.monotonic()
+    streams = []
+    for stats in active_stream_stats():
+        entry = asdict(stats)
+        entry["age_seconds"] = round(now - entry.pop("started_at"), 3)
+        streams.append(entry)
+    return SSEStreamSummary(
+        active_streams=len(streams),
+        slow_streams=sum(1 for entry in streams if entry["slow"]),
+        total_buffered_bytes=sum(entry["buffered_bytes"] for entry in streams),
+        streams=streams,
+    )
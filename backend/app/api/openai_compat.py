@@ -0,0 +1,409 @@
+"""
+OpenAI-compatible chat completions gateway.
+
+Lets internal services call provider models, workflows and skills with a
+standard OpenAI client (``base_url=<host>/v1``), gated by the
+``ENABLE_OPENAI_API`` feature flag. The ``model`` field selects the target:
+
+- ``workflow:<workflow_id>`` runs a workflow on the last user message
+- ``skill:<skill_name>`` runs a skill on the last user message
+- anything else is a provider model (``provider:model`` or a bare name)
+
+A non-standard ``kb_id`` field (``extra_body`` in the OpenAI SDK) adds RAG
+context to provider model calls. Streams use the plain OpenAI chunk format
+instead of the UI's SSE events.
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import Any, AsyncGenerator, List, Literal, Optional, Union
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from app.api.chat import build_system_prompt
+from app.api.chat_stream import (
+    DEFAULT_RAG_TOP_K,
+    LLM_STREAM_TIMEOUT,
+    WORKFLOW_TIMEOUT,
+    build_skill_inputs,
+    skill_loader,
+)
+from app.api.workflow import get_workflow
+from app.core.audit import audit_log
+from app.core.auth import get_current_user
+from app.core.feature_flags import is_feature_enabled
+from app.core.llm import (
+    chat_completion,
+    chat_completion_stream,
+    estimate_message_tokens,
+    estimate_text_tokens,
+    get_available_models,
+    resolve_model,
+)
+from app.core.rag import get_rag_pipeline
+from app.core.skill.skill_executor import get_skill_executor
+from app.core.skill.skill_loader import SkillValidationError
+from app.core.workflow.workflow_engine import WorkflowEngine
+from app.models.user import User
+from app.models.workflow import Workflow
+from app.utils.sse import DoneEvent, ErrorEvent, TokenEvent
+from app.utils.sse_resume import SSE_HEADERS
+
+logger = logging.getLogger(__name__)
+
+WORKFLOW_MODEL_PREFIX = "workflow:"
+SKILL_MODEL_PREFIX = "skill:"
+
+
+async def require_openai_api_enabled() -> None:
+    if not await is_feature_enabled("ENABLE_OPENAI_API"):
+        raise HTTPException(status_code=403, detail="OpenAI API is disabled")
+
+
+router = APIRouter(
+    prefix="/v1",
+    tags=["openai"],
+    dependencies=[Depends(require_openai_api_enabled)],
+)
+
+
+class OpenAIMessage(BaseModel):
+    role: Literal["system", "user", "assistant", "tool"]
+    content: Optional[Union[str, List[dict[str, Any]]]] = None
+
+    def text(self) -> str:
+        if isinstance(self.content, list):
+            return " ".join(
+                part["text"]
+                for part in self.content
+                if isinstance(part.get("text"), str)
+            )
+        return self.content or ""
+
+
+class OpenAIChatRequest(BaseModel):
+    """Subset of the OpenAI chat completions request that is honoured."""
+
+    model: str = Field(..., min_length=1)
+    messages: List[OpenAIMessage] = Field(..., min_length=1)
+    stream: bool = False
+    temperature: float = Field(default=0.7, ge=0, le=2)
+    max_tokens: Optional[int] = Field(default=None, ge=1)
+    kb_id: Optional[str] = Field(
+        default=None, description="Knowledge base for RAG (provider models only)"
+    )
+
+
+class UpstreamError(RuntimeError):
+    """A workflow or skill run failed after the response started."""
+
+
+def _plain_messages(payload: OpenAIChatRequest) -> list[dict[str, str]]:
+    return [{"role": m.role, "content": m.text()} for m in payload.messages]
+
+
+def _split_last_user_message(
+    payload: OpenAIChatRequest,
+) -> tuple[str, list[dict[str, str]]]:
+    """The last user message (the run input) and the messages before it."""
+    messages = _plain_messages(payload)
+    for i in range(len(messages) - 1, -1, -1):
+        if messages[i]["role"] == "user":
+            return messages[i]["content"], messages[:i]
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="A user message is required",
+    )
+
+
+async def _with_rag_context(
+    kb_id: str, messages: list[dict[str, str]]
+) -> list[dict[str, str]]:
+    query = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+    try:
+        results = await get_rag_pipeline().search(kb_id, query, top_k=DEFAULT_RAG_TOP_K)
+    except Exception:
+        logger.warning("RAG retrieval failed for kb_id=%s", kb_id, exc_info=True)
+        results = []
+    context = "\n\n".join(f"[{i}] {r['text']}" for i, r in enumerate(results[:3], 1))
+    system_message = {
+        "role": "system",
+        "content": build_system_prompt(True, context or None),
+    }
+    return [system_message, *messages]
+
+
+async def _workflow_text(
+    workflow: Workflow,
+    payload: OpenAIChatRequest,
+    user: User,
+) -> AsyncGenerator[str, None]:
+    message, history = _split_last_user_message(payload)
+    engine = WorkflowEngine(workflow)
+    streamed = False
+    async with asyncio.timeout(WORKFLOW_TIMEOUT):
+        async for event in engine.execute(
+            message,
+            user_id=user.id,
+            conversation_history=history,
+        ):
+            event_type = event.get("type")
+            if event_type == "token":
+                content = event.get("content", "")
+                if content:
+                    streamed = True
+                    yield content
+            elif event_type in ("node_error", "workflow_error"):
+                raise UpstreamError(event.get("error", "Unknown workflow error"))
+            elif event_type == "workflow_complete":
+                final_output = event.get("final_output")
+                if not streamed and final_output is not None:
+                    yield str(final_output)
+                return
+
+
+async def _skill_text(
+    skill: Any, payload: OpenAIChatRequest, user: User
+) -> AsyncGenerator[str, None]:
+    message, _ = _split_last_user_message(payload)
+    inputs = build_skill_inputs(skill, message)
+    async with asyncio.timeout(LLM_STREAM_TIMEOUT):
+        async for event in get_skill_executor().execute(skill, inputs, user_id=user.id):
+            if isinstance(event, TokenEvent):
+                yield event.content
+            elif isinstance(event, ErrorEvent):
+                raise UpstreamError(event.message)
+            elif isinstance(event, DoneEvent) and event.status == "error":
+                raise UpstreamError(event.message or "Skill execution failed")
+
+
+def _reject_sampling_options(payload: OpenAIChatRequest) -> None:
+    """Workflow and skill models use their own nodes' sampling settings."""
+    given = [
+        name
+        for name in ("temperature", "max_tokens")
+        if name in payload.model_fields_set and getattr(payload, name) is not None
+    ]
+    if given:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{', '.join(given)} is not supported for model '{payload.model}'",
+        )
+
+
+async def _resolve_target(
+    payload: OpenAIChatRequest, user: User, request: Request
+) -> Optional[AsyncGenerator[str, None]]:
+    """Validate the requested model up front so errors get a real status.
+
+    Returns the text stream of a workflow/skill run, or None for a provider
+    model.
+    """
+    if payload.model.startswith(WORKFLOW_MODEL_PREFIX):
+        _reject_sampling_options(payload)
+        workflow_id = payload.model[len(WORKFLOW_MODEL_PREFIX) :]
+        workflow = await get_workflow(workflow_id, user)
+        _split_last_user_message(payload)
+        audit_log(
+            request=request,
+            user_id=user.id,
+            action="workflow_execute",
+            resource_id=workflow_id,
+        )
+        return _workflow_text(workflow, payload, user)
+
+    if payload.model.startswith(SKILL_MODEL_PREFIX):
+        _reject_sampling_options(payload)
+        skill_name = payload.model[len(SKILL_MODEL_PREFIX) :]
+        try:
+            skill = skill_loader.get_skill(skill_name)
+        except SkillValidationError:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Skill '{skill_name}' not found",
+            )
+        _split_last_user_message(payload)
+        return _skill_text(skill, payload, user)
+
+    try:
+        resolve_model(payload.model)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    return None
+
+
+def chunk_encoder(completion_id: str, created: int, model: str):
+    """Return a function that formats one content delta as an SSE chunk.
+
+    Everything but the delta text is serialized once per stream, so each
+    token costs a single ``json.dumps`` of the token string.
+    """
+    head = json.dumps(
+        {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+        },
+        ensure_ascii=False,
+    )[:-1]
+    prefix = f'data: {head}, "choices": [{{"index": 0, "delta": {{"content": '
+    suffix = '}, "finish_reason": null}]}\n\n'
+
+    def encode(content: str) -> str:
+        return prefix + json.dumps(content, ensure_ascii=False) + suffix
+
+    return encode
+
+
+def _chunk(completion_id: str, created: int, model: str, **choice: Any) -> str:
+    body = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": created,
+        "model": model,
+        "choices": [{"index": 0, **choice}],
+    }
+    return f"data: {json.dumps(body, ensure_ascii=False)}\n\n"
+
+
+async def _stream_chunks(
+    text: AsyncGenerator[str, None], model: str
+) -> AsyncGenerator[str, None]:
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    created = int(time.time())
+    encode = chunk_encoder(completion_id, created, model)
+
+    yield _chunk(
+        completion_id,
+        created,
+        model,
+        delta={"role": "assistant", "content": ""},
+        finish_reason=None,
+    )
+    try:
+        async for content in text:
+            yield encode(content)
+    except Exception as exc:
+        logger.warning("OpenAI-compatible stream failed", exc_info=True)
+        message = str(exc) if isinstance(exc, UpstreamError) else "Generation failed"
+        if isinstance(exc, TimeoutError):
+            message = "Generation timed out"
+        error = {"error": {"message": message, "type": "server_error"}}
+        yield f"data: {json.dumps(error, ensure_ascii=False)}\n\n"
+    else:
+        yield _chunk(completion_id, created, model, delta={}, finish_reason="stop")
+    yield "data: [DONE]\n\n"
+
+
+def _completion_body(
+    model: str, content: str, messages: list[dict[str, str]]
+) -> dict[str, Any]:
+    prompt_tokens = estimate_message_tokens(messages)
+    completion_tokens = estimate_text_tokens(content) if content else 0
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+@router.post("/chat/completions", response_model=None)
+async def openai_chat_completions(
+    request: Request,
+    payload: OpenAIChatRequest,
+    user: User = Depends(get_current_user),
+) -> StreamingResponse | dict[str, Any]:
+    """OpenAI-compatible chat completions (streaming and non-streaming)."""
+    text = await _resolve_target(payload, user, request)
+    messages = _plain_messages(payload)
+
+    if text is None:
+        if payload.kb_id:
+            messages = await _with_rag_context(payload.kb_id, messages)
+        if payload.stream:
+            text = chat_completion_stream(
+                messages,
+                model=payload.model,
+                temperature=payload.temperature,
+                user_id=user.id,
+                max_tokens=payload.max_tokens,
+            )
+        else:
+            try:
+                content = await chat_completion(
+                    messages,
+                    model=payload.model,
+                    temperature=payload.temperature,
+                    max_tokens=payload.max_tokens or 4096,
+                    user_id=user.id,
+                )
+            except RuntimeError as exc:
+                raise HTTPException(
+                    status_code=status.HTTP_502_BAD_GATEWAY, detail=str(exc)
+                )
+            return _completion_body(payload.model, content, messages)
+
+    if payload.stream:
+        return StreamingResponse(
+            _stream_chunks(text, payload.model),
+            media_type="text/event-stream",
+            headers=SSE_HEADERS,
+        )
+
+    try:
+        content = "".join([part async for part in text])
+    except UpstreamError as exc:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(exc))
+    except TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Generation timed out",
+        )
+    return _completion_body(payload.model, content, messages)
+
+
+@router.get("/models")
+async def openai_list_models(
+    user: User = Depends(get_current_user),
+) -> dict[str, Any]:
+    """List provider models and skills in the OpenAI models format.
+
+    Workflows are addressed as ``workflow:<workflow_id>`` and not listed.
+    """
+    created = int(time.time())
+    ids = [item["id"] for item in get_available_models() if item["enabled"]]
+    ids.extend(
+        f"{SKILL_MODEL_PREFIX}{skill.name}"
+        for skill in skill_loader.list_skills(user_id=str(user.id))
+    )
+    return {
+        "object": "list",
+        "data": [
+            {
+                "id": model_id,
+                "object": "model",
+                "created": created,
+                "owned_by": "system",
+            }
+            for model_id in ids
+        ],
+    }
@@ -13,17 +13,18 @@ from pydantic import BaseModel, Field
 from app.api import workflow as workflow_api
 from app.core.audit import audit_log
 from app.core.auth import get_current_user
+from app.core.config import settings
 from app.core.feature_flags import is_feature_enabled
 from app.core.publish_embed import (
     EmbedTokenExpired,
     EmbedTokenNotFound,
     create_embed_token,
+    get_embed_output_cache,
     get_valid_embed_record,
 )
 from app.core.workflow.workflow_engine import WorkflowEngine
 from app.models.user import User
-from app.models.workflow import GraphData, Workflow, parse_workflow_nodes
-from pydantic import ValidationError
+from app.models.workflow import Workflow
 
 
 logger = logging.getLogger(__name__)
@@ -55,14 +56,22 @@ class PublishEmbedResponse(BaseModel):
 
 
 async def _execute_workflow_once(*, workflow_id: str, input_text: str) -> str:
+    """Output of the workflow for *input_text*, reusing recent identical runs."""
     workflow = await workflow_api.get_workflow_for_internal(workflow_id)
+    key = (workflow.id, workflow.updated_at, input_text)
+    return await get_embed_output_cache().get_or_run(
+        key, lambda: _run_workflow(workflow, input_text)
+    )
+
 
+async def _run_workflow(workflow: Workflow, input_text: str) -> str:
     engine = WorkflowEngine(workflow)
     final_output = None
     error_message = None
+    persist = settings().publish_embed_persist_executions
 
     async with asyncio.timeout(EXECUTION_TIMEOUT_SECONDS):
-        async for event in engine.execute(input_text, user_id=None):
+        async for event in engine.execute(input_text, user_id=None, persist=persist):
             event_obj = cast(dict[str, object], event)
             event_type = event_obj.get("type")
             if event_type == "workflow_error":
@@ -119,7 +128,7 @@ async def publish_embed(
     user: Annotated[User, Depends(get_current_user)],
 ) -> PublishEmbedResponse:
     workflow = await workflow_api.get_workflow_for_internal(payload.workflow_id)
-    _validate_graph_data_or_422(workflow.graph_data)
+    workflow_api.validate_workflow_or_422(workflow)
 
     record = create_embed_token(workflow_id=payload.workflow_id, created_by=user.id)
 
@@ -140,13 +149,6 @@ async def publish_embed(
     )
 
 
-def _validate_graph_data_or_422(graph_data: GraphData) -> None:
-    try:
-        _ = parse_workflow_nodes(graph_data.nodes)
-    except ValidationError as exc:
-        raise HTTPException(status_code=422, detail=exc.errors()) from exc
-
-
 @router.get("/embed/{token}")
 async def view_embed(
     request: Request,
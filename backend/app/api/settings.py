@@ -78,6 +78,7 @@ async def get_embedding_config(
         "siliconflow": s.embedding_model,
         "openai": s.openai_embedding_model,
         "ollama": s.ollama_embedding_model,
+        "fake": "fake-embedding",
     }
     model = model_map.get(provider, "")
     return {"provider": provider, "model": model}
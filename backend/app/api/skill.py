@@ -18,11 +18,7 @@ from fastapi.responses import JSONResponse, StreamingResponse
 
 from app.core.config import settings
 from app.core.paths import SKILLS_DIR
-from app.core.skill.skill_executor import (
-    SkillExecutor,
-    format_sse_event,
-    get_skill_executor,
-)
+from app.core.skill.skill_executor import SkillExecutor, get_skill_executor
 from app.core.skill.skill_loader import SkillLoader, SkillValidationError
 from app.models.skill import (
     SkillCreateRequest,
@@ -35,6 +31,7 @@ from app.models.skill import (
 from app.core.auth import User, get_current_user
 from app.middleware.rate_limit import limiter
 from app.models.user import UserRole
+from app.utils.sse import DoneEvent, encode_event
 
 logger = logging.getLogger(__name__)
 
@@ -178,13 +175,11 @@ async def _execute_skill_stream(
     """Execute skill and yield SSE events."""
     try:
         async for event in executor.execute(skill, inputs, user_id=user_id):
-            yield event
+            yield encode_event(event)
     except Exception as exc:
         logger.warning("Skill execution stream failed", exc_info=True)
         # Yield error event if execution fails
-        yield format_sse_event(
-            "done", {"status": "error", "message": "Skill execution failed"}
-        )
+        yield encode_event(DoneEvent("error", "Skill execution failed"))
 
 
 @router.post("/{name}/run")
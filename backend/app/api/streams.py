@@ -0,0 +1,58 @@
+"""Resume API - reconnect to an in-flight chat or workflow SSE stream."""
+
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import StreamingResponse
+
+from app.core.auth import get_current_user
+from app.models.user import User, UserRole
+from app.utils.sse_resume import (
+    SSE_HEADERS,
+    STREAM_LAGGED_MESSAGE,
+    get_stream_registry,
+    heartbeat_body,
+)
+
+router = APIRouter(prefix="/api/v1/streams", tags=["streams"])
+
+
+@router.get("/{stream_id}")
+async def resume_stream(
+    stream_id: str,
+    user: User = Depends(get_current_user),
+    last_event_id: Annotated[Optional[str], Header()] = None,
+) -> StreamingResponse:
+    """Replay the events after ``Last-Event-ID`` and continue the stream live.
+
+    *stream_id* is the ``X-Stream-Id`` header of the original response.
+    Without ``Last-Event-ID`` the stream is replayed from the start.
+    """
+    run = get_stream_registry().get(stream_id)
+    if run is None or (
+        run.owner_id is not None
+        and run.owner_id != str(user.id)
+        and user.role != UserRole.ADMIN
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Stream {stream_id} not found",
+        )
+
+    try:
+        after = int(last_event_id) if last_event_id else 0
+        body = run.subscribe(after)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=(
+                f"{STREAM_LAGGED_MESSAGE}: events after Last-Event-ID"
+                " are no longer available"
+            ),
+        )
+
+    return StreamingResponse(
+        heartbeat_body(body),
+        media_type="text/event-stream",
+        headers={**SSE_HEADERS, "X-Stream-Id": run.id},
+    )
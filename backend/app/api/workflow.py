@@ -25,8 +25,14 @@ from app.models.workflow import (
 from app.models.workflow_db import WorkflowDB
 from app.core.audit import audit_log
 from app.core.auth import User, get_current_user
+from app.core.workflow.workflow_model_cache import (
+    get_workflow_model_cache,
+    invalidate_workflow_model,
+)
+from app.core.workflow.workflow_plan import get_workflow_plan, invalidate_workflow_plan
 from app.middleware.rate_limit import limiter
-from app.utils.sse import format_sse_event, with_heartbeat
+from app.utils.sse import format_sse_event
+from app.utils.sse_resume import event_stream_response
 
 router = APIRouter(prefix="/api/v1/workflows", tags=["workflows"])
 
@@ -100,25 +106,65 @@ def workflow_to_model(workflow_id: str, data: dict[str, Any]) -> Workflow:
     )
 
 
+def _visible_to(stmt: Any, workflow_id: str, user_id: int | None) -> Any:
+    stmt = stmt.where(WorkflowDB.id == workflow_id)
+    if user_id is not None:
+        stmt = stmt.where(
+            or_(
+                WorkflowDB.user_id == str(user_id),
+                WorkflowDB.user_id.is_(None),
+            )
+        )
+    return stmt
+
+
 async def _get_workflow_row_by_id(
     workflow_id: str, user_id: int | None = None
 ) -> WorkflowDB:
     async with AsyncSessionLocal() as db:
-        stmt = select(WorkflowDB).where(WorkflowDB.id == workflow_id)
-        if user_id is not None:
-            stmt = stmt.where(
-                or_(
-                    WorkflowDB.user_id == str(user_id),
-                    WorkflowDB.user_id.is_(None),
-                )
-            )
-        result = await db.execute(stmt)
+        result = await db.execute(
+            _visible_to(select(WorkflowDB), workflow_id, user_id)
+        )
         row = result.scalar_one_or_none()
     if row is None:
         raise HTTPException(status_code=404, detail=f"Workflow {workflow_id} not found")
     return row
 
 
+async def load_workflow(
+    workflow_id: str, user_id: int | None = None
+) -> Workflow | None:
+    """The workflow model, served from the model cache when it is current.
+
+    Returns ``None`` when the workflow does not exist or is not visible to
+    *user_id* (no ownership filter when ``user_id`` is None).
+    """
+    cache = get_workflow_model_cache()
+    async with AsyncSessionLocal() as db:
+        updated_at = await db.scalar(
+            _visible_to(select(WorkflowDB.updated_at), workflow_id, user_id)
+        )
+        if updated_at is None:
+            return None
+        workflow = cache.get(workflow_id, ensure_utc_datetime(updated_at))
+        if workflow is not None:
+            return workflow
+        row = await db.get(WorkflowDB, workflow_id)
+    if row is None:
+        return None
+    workflow = _row_to_workflow_model(row)
+    cache.put(workflow)
+    return workflow
+
+
+async def workflow_owner(workflow_id: str) -> str | None:
+    """The stored owner id of a workflow; ``None`` if shared or missing."""
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(
+            select(WorkflowDB.user_id).where(WorkflowDB.id == workflow_id)
+        )
+
+
 def _validate_graph_data_or_422(graph_data: GraphData) -> None:
     try:
         parse_workflow_nodes(graph_data.nodes)
@@ -126,11 +172,20 @@ def _validate_graph_data_or_422(graph_data: GraphData) -> None:
         raise HTTPException(status_code=422, detail=exc.errors()) from exc
 
 
+def validate_workflow_or_422(workflow: Workflow) -> None:
+    """Like ``_validate_graph_data_or_422``, using the cached execution plan."""
+    errors = get_workflow_plan(workflow).validation_errors
+    if errors is not None:
+        raise HTTPException(status_code=422, detail=errors)
+
+
 async def _get_workflow_by_id(
     workflow_id: str, user_id: int | None = None
 ) -> Workflow:
-    row = await _get_workflow_row_by_id(workflow_id, user_id=user_id)
-    return _row_to_workflow_model(row)
+    workflow = await load_workflow(workflow_id, user_id=user_id)
+    if workflow is None:
+        raise HTTPException(status_code=404, detail=f"Workflow {workflow_id} not found")
+    return workflow
 
 
 async def get_workflow_for_internal(workflow_id: str) -> Workflow:
@@ -210,8 +265,8 @@ async def import_workflow(
         extra={"template_name": template_name} if template_name else None,
     )
 
-    row = await _get_workflow_row_by_id(workflow_id)
-    return _row_to_workflow_model(row)
+    invalidate_workflow_model(workflow_id)
+    return await _get_workflow_by_id(workflow_id)
 
 
 @router.get("", response_model=WorkflowList)
@@ -228,7 +283,12 @@ async def list_workflows(user: User = Depends(get_current_user)) -> WorkflowList
         )
         rows = result.scalars().all()
 
-    workflows = [_row_to_workflow_model(row) for row in rows]
+    cache = get_workflow_model_cache()
+    workflows = [
+        cache.get(row.id, ensure_utc_datetime(row.updated_at))
+        or _row_to_workflow_model(row)
+        for row in rows
+    ]
     workflows.sort(key=lambda w: w.created_at, reverse=True)
 
     return WorkflowList(items=workflows, total=len(workflows))
@@ -277,8 +337,8 @@ async def create_workflow(
         resource_id=workflow_id,
     )
 
-    row = await _get_workflow_row_by_id(workflow_id)
-    return _row_to_workflow_model(row)
+    invalidate_workflow_model(workflow_id)
+    return await _get_workflow_by_id(workflow_id)
 
 
 @router.get("/{workflow_id}", response_model=Workflow)
@@ -286,8 +346,7 @@ async def get_workflow(
     workflow_id: str, user: User = Depends(get_current_user)
 ) -> Workflow:
     """Get a workflow by ID"""
-    row = await _get_workflow_row_by_id(workflow_id, user_id=user.id)
-    return _row_to_workflow_model(row)
+    return await _get_workflow_by_id(workflow_id, user_id=user.id)
 
 
 @router.put("/{workflow_id}", response_model=Workflow)
@@ -326,9 +385,10 @@ async def update_workflow(
             )
         row.updated_at = datetime.now(timezone.utc)
         await db.commit()
+    invalidate_workflow_plan(workflow_id)
+    invalidate_workflow_model(workflow_id)
 
-    refreshed = await _get_workflow_row_by_id(workflow_id)
-    return _row_to_workflow_model(refreshed)
+    return await _get_workflow_by_id(workflow_id)
 
 
 @router.delete("/{workflow_id}", status_code=204)
@@ -355,6 +415,8 @@ async def delete_workflow(
             )
         await db.delete(row)
         await db.commit()
+    invalidate_workflow_plan(workflow_id)
+    invalidate_workflow_model(workflow_id)
 
     audit_log(
         request=request,
@@ -381,7 +443,7 @@ async def execute_workflow(
         template_name = None
 
     workflow = _row_to_workflow_model(row)
-    _validate_graph_data_or_422(workflow.graph_data)
+    validate_workflow_or_422(workflow)
 
     audit_log(
         request=request,
@@ -418,15 +480,7 @@ async def execute_workflow(
             yield format_sse_event(event_type, payload)
         yield format_sse_event("done", {"status": "complete"})
 
-    return StreamingResponse(
-        with_heartbeat(generate()),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        },
-    )
+    return event_stream_response(generate(), owner_id=str(user.id))
 
 
 @router.get("/executions/{execution_id}")
@@ -435,6 +489,7 @@ async def get_execution_status(
     user: User = Depends(get_current_user),
 ) -> dict[str, Any]:
     """Get workflow execution status and checkpoint data."""
+    from app.core.workflow.workflow_checkpoint import load_execution_state
     from app.models.workflow_execution_db import WorkflowExecutionDB
 
     async with AsyncSessionLocal() as db:
@@ -455,6 +510,7 @@ async def get_execution_status(
             detail=f"Execution {execution_id} not found",
         )
 
+    state = await load_execution_state(row)
     return {
         "id": row.id,
         "workflow_id": row.workflow_id,
@@ -462,13 +518,53 @@ async def get_execution_status(
         "status": row.status,
         "initial_input": row.initial_input,
         "model": row.model,
-        "executed_nodes": json.loads(row.executed_nodes_json),
-        "queue": json.loads(row.queue_json),
+        "executed_nodes": state.executed_nodes,
+        "queue": state.queue,
         "created_at": row.created_at.isoformat() if row.created_at else None,
         "updated_at": row.updated_at.isoformat() if row.updated_at else None,
     }
 
 
+@router.get("/executions/{execution_id}/trace")
+async def get_execution_trace(
+    execution_id: str,
+    user: User = Depends(get_current_user),
+) -> dict[str, Any]:
+    """Get per-node timing spans and the critical path of an execution."""
+    from app.core.workflow.workflow_trace import load_trace
+    from app.models.workflow_execution_db import WorkflowExecutionDB
+
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(WorkflowExecutionDB).where(
+                WorkflowExecutionDB.id == execution_id,
+                or_(
+                    WorkflowExecutionDB.user_id == str(user.id),
+                    WorkflowExecutionDB.user_id.is_(None),
+                ),
+            )
+        )
+        row = result.scalar_one_or_none()
+
+    if row is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Execution {execution_id} not found",
+        )
+
+    trace = await load_trace(execution_id) or {
+        "started_at": None,
+        "spans": [],
+        "critical_path": {"nodes": [], "duration_ms": 0.0},
+    }
+    return {
+        "execution_id": row.id,
+        "workflow_id": row.workflow_id,
+        "status": row.status,
+        **trace,
+    }
+
+
 @router.post("/executions/{execution_id}/resume")
 @limiter.limit("10/minute")
 async def resume_execution(
@@ -518,12 +614,4 @@ async def resume_execution(
             yield format_sse_event(event_type, payload)
         yield format_sse_event("done", {"status": "complete"})
 
-    return StreamingResponse(
-        with_heartbeat(generate()),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        },
-    )
+    return event_stream_response(generate(), owner_id=str(user.id))
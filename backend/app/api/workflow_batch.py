@@ -0,0 +1,209 @@
+"""
+Workflow batch execution API endpoints
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import AsyncGenerator
+from typing import Any
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy import or_, select
+
+from app.api import workflow as workflow_api
+from app.core.audit import audit_log
+from app.core.auth import User, get_current_user
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.workflow import workflow_batch
+from app.core.workflow.workflow_batch import BatchInputError
+from app.middleware.rate_limit import limiter
+from app.models.workflow_batch_db import WorkflowBatchDB
+
+router = APIRouter(prefix="/api/v1/workflows", tags=["workflows"])
+
+
+class WorkflowBatchRequest(BaseModel):
+    """Request body for a batch over an inline list of inputs."""
+
+    inputs: list[Any] = Field(
+        ...,
+        min_length=1,
+        description="Workflow inputs: strings, or objects holding input_field",
+    )
+    input_field: str = Field(default="input", min_length=1)
+    model: str | None = Field(
+        default=None,
+        description="Optional model override. Supports provider:model format.",
+    )
+    concurrency: int | None = Field(default=None, ge=1)
+
+
+def _concurrency(requested: int | None) -> int:
+    s = settings()
+    return min(
+        requested or s.workflow_batch_concurrency, s.workflow_batch_max_concurrency
+    )
+
+
+def _check_row_count(inputs: list[str]) -> None:
+    if not inputs:
+        raise HTTPException(status_code=400, detail="Batch has no inputs")
+    limit = settings().workflow_batch_max_rows
+    if len(inputs) > limit:
+        raise HTTPException(
+            status_code=400, detail=f"Batch exceeds the limit of {limit} rows"
+        )
+
+
+async def _batch_response(batch: WorkflowBatchDB) -> dict[str, Any]:
+    return {
+        "id": batch.id,
+        "workflow_id": batch.workflow_id,
+        "status": batch.status,
+        "model": batch.model,
+        "concurrency": batch.concurrency,
+        "total_rows": batch.total_rows,
+        "error": batch.error,
+        "counts": await workflow_batch.batch_counts(batch.id),
+        "created_at": batch.created_at.isoformat() if batch.created_at else None,
+        "updated_at": batch.updated_at.isoformat() if batch.updated_at else None,
+    }
+
+
+async def _start(
+    request: Request,
+    workflow_id: str,
+    inputs: list[str],
+    model: str | None,
+    concurrency: int | None,
+    user: User,
+) -> dict[str, Any]:
+    _check_row_count(inputs)
+    workflow = await workflow_api._get_workflow_by_id(workflow_id, user_id=user.id)
+    workflow_api.validate_workflow_or_422(workflow)
+
+    batch = await workflow_batch.create_batch(
+        workflow, inputs, user.id, model, _concurrency(concurrency)
+    )
+    audit_log(
+        request=request,
+        user_id=user.id,
+        action="workflow_batch_create",
+        resource_id=workflow_id,
+        extra={"batch_id": batch.id, "rows": batch.total_rows},
+    )
+    workflow_batch.start_batch(batch.id)
+    return await _batch_response(batch)
+
+
+@router.post("/{workflow_id}/batches", status_code=202)
+@limiter.limit("10/minute")
+async def create_batch(
+    request: Request,
+    workflow_id: str,
+    payload: WorkflowBatchRequest,
+    user: User = Depends(get_current_user),
+) -> dict[str, Any]:
+    """Run a workflow over an inline list of inputs in the background."""
+    try:
+        inputs = [
+            workflow_batch.row_input(value, payload.input_field, f"Input {index}")
+            for index, value in enumerate(payload.inputs)
+        ]
+    except BatchInputError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return await _start(
+        request, workflow_id, inputs, payload.model, payload.concurrency, user
+    )
+
+
+@router.post("/{workflow_id}/batches/upload", status_code=202)
+@limiter.limit("10/minute")
+async def upload_batch(
+    request: Request,
+    workflow_id: str,
+    file: UploadFile = File(...),
+    input_field: str = Form(default="input"),
+    model: str | None = Form(default=None),
+    concurrency: int | None = Form(default=None, ge=1),
+    user: User = Depends(get_current_user),
+) -> dict[str, Any]:
+    """Run a workflow over the rows of a JSONL or CSV file in the background."""
+    limit = settings().workflow_batch_max_upload_bytes
+    content = await file.read(limit + 1)
+    if len(content) > limit:
+        raise HTTPException(
+            status_code=400, detail=f"File too large. Maximum size is {limit} bytes."
+        )
+    try:
+        inputs = workflow_batch.parse_batch_file(
+            content, file.filename or "", input_field
+        )
+    except BatchInputError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return await _start(request, workflow_id, inputs, model or None, concurrency, user)
+
+
+async def _get_batch_or_404(batch_id: str, user: User) -> WorkflowBatchDB:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(WorkflowBatchDB).where(
+                WorkflowBatchDB.id == batch_id,
+                or_(
+                    WorkflowBatchDB.user_id == str(user.id),
+                    WorkflowBatchDB.user_id.is_(None),
+                ),
+            )
+        )
+        batch = result.scalar_one_or_none()
+    if batch is None:
+        raise HTTPException(status_code=404, detail=f"Batch {batch_id} not found")
+    return batch
+
+
+@router.get("/batches/{batch_id}")
+async def get_batch(
+    batch_id: str, user: User = Depends(get_current_user)
+) -> dict[str, Any]:
+    """Batch status and per-status row counts."""
+    return await _batch_response(await _get_batch_or_404(batch_id, user))
+
+
+@router.get("/batches/{batch_id}/results")
+async def stream_batch_results(
+    batch_id: str, user: User = Depends(get_current_user)
+) -> StreamingResponse:
+    """Finished rows as NDJSON, following the batch until it stops running."""
+    await _get_batch_or_404(batch_id, user)
+
+    async def generate() -> AsyncGenerator[str, None]:
+        async for item in workflow_batch.iter_batch_results(batch_id):
+            yield json.dumps(item, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+@router.post("/batches/{batch_id}/resume", status_code=202)
+@limiter.limit("10/minute")
+async def resume_batch(
+    request: Request,
+    batch_id: str,
+    user: User = Depends(get_current_user),
+) -> dict[str, Any]:
+    """Run the rows of an interrupted batch that have not finished yet."""
+    batch = await _get_batch_or_404(batch_id, user)
+    if batch.status == "completed":
+        raise HTTPException(status_code=400, detail="Batch already completed")
+    if workflow_batch.running_job(batch_id) is None:
+        audit_log(
+            request=request,
+            user_id=user.id,
+            action="workflow_batch_resume",
+            resource_id=batch_id,
+        )
+        workflow_batch.start_batch(batch_id)
+    return await _batch_response(batch)
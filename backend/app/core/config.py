@@ -5,6 +5,8 @@ Loads environment variables from .env files using python-dotenv.
 
 import os
 from pathlib import Path
+from typing import Literal
+
 from dotenv import load_dotenv
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -15,7 +17,7 @@ class Settings(BaseSettings):
 
     default_llm_provider: str = Field(
         default="deepseek",
-        description="Default LLM provider: deepseek/openai/qwen/ollama",
+        description="Default LLM provider: deepseek/openai/qwen/ollama/fake",
     )
     default_llm_model: str = Field(
         default="",
@@ -93,6 +95,51 @@ class Settings(BaseSettings):
         ge=1024,
     )
 
+    # Offline fake provider (load testing / benchmarks, no network)
+    fake_llm_enabled: bool = Field(
+        default=False,
+        description="Enable the offline 'fake' LLM provider",
+    )
+    fake_llm_model: str = Field(
+        default="fake-model",
+        description="Model name reported by the fake provider",
+    )
+    fake_llm_context_window: int = Field(
+        default=32768,
+        description="Context window reported for the fake provider",
+        ge=1024,
+    )
+    fake_llm_ttft_ms: float = Field(
+        default=200.0,
+        description="Simulated time to first token in milliseconds",
+        ge=0,
+    )
+    fake_llm_tokens_per_second: float = Field(
+        default=50.0,
+        description="Simulated streaming throughput",
+        gt=0,
+    )
+    fake_llm_output_tokens: int = Field(
+        default=64,
+        description="Number of tokens generated per fake completion",
+        ge=0,
+    )
+    fake_llm_error_rate: float = Field(
+        default=0.0,
+        description="Probability that a fake completion fails",
+        ge=0,
+        le=1,
+    )
+    fake_llm_seed: int = Field(
+        default=0,
+        description="Seed for the fake provider's error sampling",
+    )
+    fake_embedding_dimension: int = Field(
+        default=384,
+        description="Dimension of deterministic fake embeddings",
+        ge=1,
+    )
+
     llm_context_ratio: float = Field(
         default=0.7,
         description="Max ratio of context window used by chat history",
@@ -115,6 +162,217 @@ class Settings(BaseSettings):
         ge=1024,
     )
 
+    chat_history_load_limit: int = Field(
+        default=100,
+        description="Max recent messages loaded per chat turn before token trimming",
+        ge=1,
+    )
+
+    chat_session_cache_enabled: bool = Field(
+        default=True,
+        description="Cache chat sessions in-process and write them behind in batches",
+    )
+    chat_session_cache_size: int = Field(
+        default=1024,
+        description="Max chat sessions kept in the in-process session cache",
+        ge=1,
+    )
+    chat_session_flush_interval_ms: int = Field(
+        default=250,
+        description="Interval between write-behind flushes of dirty chat sessions",
+        ge=10,
+        le=10000,
+    )
+
+    chat_summary_enabled: bool = Field(
+        default=False,
+        description="Compact older chat turns into a stored rolling summary",
+    )
+    chat_summary_model: str = Field(
+        default="",
+        description="Model for summarization in provider:model format (empty = default)",
+    )
+    chat_summary_trigger_tokens: int = Field(
+        default=4000,
+        description="Unsummarized history tokens that trigger a background summary",
+        ge=256,
+    )
+    chat_summary_keep_messages: int = Field(
+        default=6,
+        description="Most recent messages always sent verbatim, never summarized",
+        ge=2,
+    )
+    chat_summary_max_tokens: int = Field(
+        default=512,
+        description="Max output tokens for a conversation summary",
+        ge=64,
+    )
+
+    llm_cache_max_entries: int = Field(
+        default=256,
+        description="Max in-memory entries for the opt-in LLM response cache",
+        ge=1,
+    )
+    llm_cache_ttl_seconds: int = Field(
+        default=3600,
+        description="Time-to-live for cached LLM responses",
+        ge=1,
+    )
+    llm_cache_persist: bool = Field(
+        default=False,
+        description="Also persist cached LLM responses to data/llm_cache.db",
+    )
+
+    sse_coalesce_window_ms: int = Field(
+        default=30,
+        description="Flush window for coalesced token streaming (stream_mode=coalesced)",
+        ge=1,
+        le=1000,
+    )
+    sse_coalesce_max_bytes: int = Field(
+        default=2048,
+        description="Max buffered token bytes before a coalesced frame is flushed",
+        ge=1,
+    )
+    sse_max_buffered_frames: int = Field(
+        default=64,
+        description="Max SSE frames buffered per connection before backpressure",
+        ge=1,
+    )
+    sse_slow_consumer_seconds: float = Field(
+        default=10.0,
+        description="Seconds the SSE buffer may stay full before a client is slow",
+        gt=0,
+    )
+    sse_slow_consumer_policy: Literal["coalesce", "disconnect"] = Field(
+        default="coalesce",
+        description="Slow SSE client handling: merge token frames, or disconnect",
+    )
+    sse_resume_enabled: bool = Field(
+        default=True,
+        description="Run chat/workflow streams detached so clients can resume them",
+    )
+    sse_resume_buffer_events: int = Field(
+        default=2048,
+        description="SSE frames kept per stream for Last-Event-ID replay",
+        ge=16,
+    )
+    sse_resume_ttl_seconds: int = Field(
+        default=120,
+        description="How long a finished stream stays resumable",
+        ge=1,
+    )
+
+    workflow_plan_cache_size: int = Field(
+        default=256,
+        description="Max compiled workflow execution plans kept in memory",
+        ge=1,
+    )
+
+    workflow_model_cache_size: int = Field(
+        default=256,
+        description="Max parsed workflow models kept in memory",
+        ge=1,
+    )
+    workflow_execution_mode: Literal["parallel", "sequential"] = Field(
+        default="sequential",
+        description=(
+            "Default workflow scheduler; workflows opt into the parallel one "
+            "with their start node's executionMode"
+        ),
+    )
+    chat_workflow_execution_mode: Literal["parallel", "sequential"] = Field(
+        default="sequential",
+        description=(
+            "Default scheduler for workflows run from chat, whose token stream "
+            "is a single message; a start node's executionMode overrides it"
+        ),
+    )
+    workflow_max_parallelism: int = Field(
+        default=4,
+        description="Max nodes of one workflow run executing concurrently",
+        ge=1,
+    )
+    workflow_checkpoint_policy: Literal["every_node", "batch", "on_failure"] = Field(
+        default="every_node",
+        description="When workflow step checkpoints are written; a start node's checkpointPolicy overrides it",
+    )
+    workflow_checkpoint_every_nodes: int = Field(
+        default=10,
+        description="Batch policy: write buffered checkpoints after this many nodes",
+        ge=1,
+    )
+    workflow_checkpoint_every_seconds: float = Field(
+        default=5.0,
+        description="Batch policy: write buffered checkpoints after this many seconds",
+        gt=0,
+    )
+    workflow_checkpoint_compact_steps: int = Field(
+        default=100,
+        description="Fold step checkpoints into the execution snapshot after this many",
+        ge=1,
+    )
+    workflow_output_spill_bytes: int = Field(
+        default=256 * 1024,
+        description="Text node outputs this large are kept on disk, not in memory (0 = never)",
+        ge=0,
+    )
+    workflow_blob_gc_interval_seconds: float = Field(
+        default=3600.0,
+        description="Seconds between sweeps of unreferenced spilled outputs (0 = never)",
+        ge=0,
+    )
+    workflow_blob_gc_grace_seconds: float = Field(
+        default=3600.0,
+        description="Unreferenced spilled outputs written or reused this recently are kept",
+        ge=0,
+    )
+    workflow_memo_max_entries: int = Field(
+        default=1024,
+        description="Max memoized node results kept in memory (nodes opt in with data.memoize)",
+        ge=1,
+    )
+    workflow_memo_ttl_seconds: float = Field(
+        default=300.0,
+        description="Default lifetime of a memoized node result; data.memoizeTtlSeconds overrides it",
+        gt=0,
+    )
+    workflow_map_max_items: int = Field(
+        default=1000,
+        description="Max list items one map node may fan out over",
+        ge=1,
+    )
+    workflow_map_max_concurrency: int = Field(
+        default=4,
+        description="Max items of one map node running at once; data.maxConcurrency may lower it",
+        ge=1,
+    )
+    workflow_batch_concurrency: int = Field(
+        default=4,
+        description="Default number of rows of one workflow batch run concurrently",
+        ge=1,
+    )
+    workflow_batch_max_concurrency: int = Field(
+        default=16,
+        description="Upper bound for the concurrency a batch request may ask for",
+        ge=1,
+    )
+    workflow_batch_provider_concurrency: int = Field(
+        default=8,
+        description="Max batch rows calling the same LLM provider at once, across batches",
+        ge=1,
+    )
+    workflow_batch_max_rows: int = Field(
+        default=10000,
+        description="Max inputs in one workflow batch",
+        ge=1,
+    )
+    workflow_batch_max_upload_bytes: int = Field(
+        default=10 * 1024 * 1024,
+        description="Max size of an uploaded JSONL/CSV batch file",
+        ge=1024,
+    )
+
     siliconflow_api_key: str = Field(
         default="", description="SiliconFlow API key for embedding models"
     )
@@ -129,7 +387,7 @@ class Settings(BaseSettings):
     # Embedding provider abstraction
     embedding_provider: str = Field(
         default="siliconflow",
-        description="Embedding provider: siliconflow/openai/ollama",
+        description="Embedding provider: siliconflow/openai/ollama/fake",
     )
     openai_embedding_model: str = Field(
         default="text-embedding-3-small",
@@ -164,6 +422,19 @@ class Settings(BaseSettings):
         default=False,
         description="Feature flag default for code node",
     )
+    code_sandbox_pool_size: int = Field(
+        default=2,
+        description=(
+            "Warm code-node sandbox workers kept idle "
+            "(0 starts a fresh interpreter per run)"
+        ),
+        ge=0,
+    )
+    code_sandbox_worker_max_jobs: int = Field(
+        default=100,
+        description="Runs a sandbox worker serves before it is replaced",
+        ge=1,
+    )
     enable_http_node: bool = Field(
         default=False,
         description="Feature flag default for HTTP node",
@@ -176,6 +447,31 @@ class Settings(BaseSettings):
         default=False,
         description="Feature flag default for public embed pages",
     )
+    publish_embed_cache_ttl_seconds: float = Field(
+        default=300.0,
+        description=(
+            "Seconds a public embed output is reused for the same workflow "
+            "version and input (0 disables the cache)"
+        ),
+        ge=0,
+    )
+    publish_embed_cache_max_entries: int = Field(
+        default=1024,
+        description="Max public embed outputs kept in memory",
+        ge=1,
+    )
+    publish_embed_persist_executions: bool = Field(
+        default=True,
+        description=(
+            "Write execution records and checkpoints for public embed runs; "
+            "off skips that write load but hides the runs from the execution "
+            "and trace endpoints"
+        ),
+    )
+    rate_limit_enabled: bool = Field(
+        default=True,
+        description="Enforce API rate limits (disable only for local load testing)",
+    )
     http_node_allow_domains: str = Field(
         default="",
         description="Comma-separated allowlist domains for HTTP node",
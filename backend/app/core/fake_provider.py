@@ -0,0 +1,131 @@
+"""
+Offline fake LLM and embedding provider.
+
+Implements the subset of the ``AsyncOpenAI`` client surface used by
+``app.core.llm`` and ``app.core.rag`` (``chat.completions.create`` and
+``embeddings.create``) without any network access. Latency, throughput,
+output length and error rate come from settings so load tests and
+benchmarks are reproducible.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import math
+import random
+from types import SimpleNamespace
+from typing import Any, AsyncIterator
+
+from .config import settings
+
+_VOCABULARY = (
+    "the", "workflow", "agent", "answer", "context", "node", "result", "model",
+    "token", "stream", "data", "value", "query", "source", "summary", "step",
+)
+
+
+class FakeProviderError(RuntimeError):
+    """Raised when the fake provider simulates an upstream failure."""
+
+
+def _seed_for(text: str) -> int:
+    return int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+
+
+def _prompt_text(messages: list[dict[str, Any]]) -> str:
+    return "\n".join(f"{m.get('role', '')}:{m.get('content', '')}" for m in messages)
+
+
+def fake_tokens(messages: list[dict[str, Any]], count: int) -> list[str]:
+    """Deterministic token sequence for a prompt."""
+    rng = random.Random(_seed_for(_prompt_text(messages)))
+    return [
+        (" " if i else "") + rng.choice(_VOCABULARY) for i in range(max(0, count))
+    ]
+
+
+def fake_embedding(text: str, dimension: int) -> list[float]:
+    """Deterministic unit-length embedding for *text*."""
+    rng = random.Random(_seed_for(text))
+    vector = [rng.uniform(-1.0, 1.0) for _ in range(max(1, dimension))]
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+class _FakeCompletions:
+    def __init__(self, rng: random.Random):
+        self._rng = rng
+
+    def _maybe_fail(self) -> None:
+        if self._rng.random() < settings().fake_llm_error_rate:
+            raise FakeProviderError("Simulated fake provider failure")
+
+    async def create(
+        self,
+        *,
+        model: str,
+        messages: list[dict[str, Any]],
+        temperature: float = 0.7,
+        stream: bool = False,
+        max_tokens: int | None = None,
+        **_: Any,
+    ) -> Any:
+        s = settings()
+        count = s.fake_llm_output_tokens
+        if max_tokens is not None:
+            count = min(count, max_tokens)
+        tokens = fake_tokens(messages, count)
+
+        if stream:
+            return self._stream(model, tokens)
+
+        self._maybe_fail()
+        await asyncio.sleep(
+            s.fake_llm_ttft_ms / 1000 + len(tokens) / s.fake_llm_tokens_per_second
+        )
+        content = "".join(tokens)
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(
+                prompt_tokens=sum(
+                    len(str(m.get("content", ""))) // 4 + 1 for m in messages
+                ),
+                completion_tokens=len(tokens),
+            ),
+        )
+
+    async def _stream(self, model: str, tokens: list[str]) -> AsyncIterator[Any]:
+        s = settings()
+        self._maybe_fail()
+        await asyncio.sleep(s.fake_llm_ttft_ms / 1000)
+        delay = 1 / s.fake_llm_tokens_per_second
+        for index, token in enumerate(tokens):
+            if index:
+                await asyncio.sleep(delay)
+            yield SimpleNamespace(
+                model=model,
+                choices=[SimpleNamespace(delta=SimpleNamespace(content=token))],
+            )
+
+
+class _FakeEmbeddings:
+    async def create(self, *, model: str, input: list[str], **_: Any) -> Any:
+        dimension = settings().fake_embedding_dimension
+        return SimpleNamespace(
+            model=model,
+            data=[
+                SimpleNamespace(index=i, embedding=fake_embedding(text, dimension))
+                for i, text in enumerate(input)
+            ],
+        )
+
+
+class FakeAsyncClient:
+    """Drop-in stand-in for ``AsyncOpenAI`` that never touches the network."""
+
+    def __init__(self, seed: int | None = None):
+        rng = random.Random(settings().fake_llm_seed if seed is None else seed)
+        self.chat = SimpleNamespace(completions=_FakeCompletions(rng))
+        self.embeddings = _FakeEmbeddings()
@@ -5,12 +5,14 @@ from datetime import datetime, timezone
 from functools import lru_cache
 from pathlib import Path
 from threading import Lock
-from typing import Any, AsyncGenerator
+from typing import Any, AsyncGenerator, cast
 
 from openai import AsyncOpenAI
 from openai.types.chat import ChatCompletionMessageParam
 
 from .config import settings
+from .fake_provider import FakeAsyncClient
+from .llm_cache import build_cache_key, get_llm_cache
 from .paths import BACKEND_DATA_DIR
 
 logger = logging.getLogger(__name__)
@@ -18,7 +20,7 @@ logger = logging.getLogger(__name__)
 TOKEN_USAGE_LOG = BACKEND_DATA_DIR / "token_usage.log"
 _token_usage_lock = Lock()
 
-SUPPORTED_PROVIDERS = ("deepseek", "openai", "qwen", "ollama")
+SUPPORTED_PROVIDERS = ("deepseek", "openai", "qwen", "ollama", "fake")
 
 
 @dataclass(frozen=True)
@@ -61,6 +63,15 @@ def _provider_configs() -> dict[str, ProviderConfig]:
             default_model=s.ollama_model,
             context_window=s.ollama_context_window,
         ),
+        "fake": ProviderConfig(
+            provider="fake",
+            # Only considered configured when explicitly enabled, so it is
+            # never picked as a silent fallback for real traffic.
+            api_key="fake" if s.fake_llm_enabled else "",
+            base_url="",
+            default_model=s.fake_llm_model,
+            context_window=s.fake_llm_context_window,
+        ),
     }
 
 
@@ -223,6 +234,8 @@ def get_available_models() -> list[dict[str, Any]]:
 
 @lru_cache(maxsize=8)
 def _create_client(provider: str, base_url: str, api_key: str) -> AsyncOpenAI:
+    if provider == "fake":
+        return cast(AsyncOpenAI, FakeAsyncClient())
     return AsyncOpenAI(api_key=api_key, base_url=base_url)
 
 
@@ -238,6 +251,7 @@ def _write_token_usage(
     input_tokens: int,
     output_tokens: int,
     user_id: int | str | None,
+    saved_input_tokens: int = 0,
 ) -> None:
     entry = {
         "timestamp": datetime.now(timezone.utc).isoformat(),
@@ -247,6 +261,9 @@ def _write_token_usage(
         "output_tokens": max(0, int(output_tokens)),
         "user_id": str(user_id) if user_id is not None else "anonymous",
     }
+    if saved_input_tokens > 0:
+        # Input tokens avoided by sending a conversation summary.
+        entry["saved_input_tokens"] = int(saved_input_tokens)
 
     try:
         TOKEN_USAGE_LOG.parent.mkdir(parents=True, exist_ok=True)
@@ -263,12 +280,32 @@ async def chat_completion(
     temperature: float = 0.7,
     max_tokens: int = 4096,
     user_id: int | str | None = None,
+    cache: bool = False,
 ) -> str:
+    """Run a non-streaming completion.
+
+    When *cache* is true, identical requests are answered from the response
+    cache instead of the provider. Callers should only opt in for
+    deterministic settings (typically ``temperature=0``).
+    """
     cfg, target_model = _resolve_provider_and_model(model, require_api_key=True)
     client = _create_client(cfg.provider, cfg.base_url, cfg.api_key)
     estimated_input_tokens = _estimate_input_tokens(messages)
     payload_messages = _normalize_messages(messages)
 
+    cache_key: str | None = None
+    if cache:
+        cache_key = build_cache_key(
+            provider=cfg.provider,
+            model=target_model,
+            messages=payload_messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+        )
+        cached = await get_llm_cache().get(cache_key)
+        if cached is not None:
+            return "".join(cached)
+
     try:
         response = await client.chat.completions.create(
             model=target_model,
@@ -299,6 +336,8 @@ async def chat_completion(
             output_tokens=output_tokens,
             user_id=user_id,
         )
+        if cache_key is not None:
+            await get_llm_cache().set(cache_key, [content])
         return content
 
     except Exception as exc:
@@ -313,19 +352,46 @@ async def chat_completion_stream(
     model: str | None = None,
     temperature: float = 0.7,
     user_id: int | str | None = None,
+    cache: bool = False,
+    saved_input_tokens: int = 0,
+    max_tokens: int | None = None,
 ) -> AsyncGenerator[str, None]:
+    """Stream completion tokens.
+
+    With *cache* enabled, a previously completed identical stream is replayed
+    chunk by chunk without contacting the provider, and a fresh stream is
+    stored only once it finishes without error. *saved_input_tokens* is
+    recorded in the usage log (input avoided by history summarization).
+    *max_tokens* caps the completion; None leaves it to the provider.
+    """
     cfg, target_model = _resolve_provider_and_model(model, require_api_key=True)
-    client = _create_client(cfg.provider, cfg.base_url, cfg.api_key)
     estimated_input_tokens = _estimate_input_tokens(messages)
     output_parts: list[str] = []
     payload_messages = _normalize_messages(messages)
 
+    cache_key: str | None = None
+    if cache:
+        cache_key = build_cache_key(
+            provider=cfg.provider,
+            model=target_model,
+            messages=payload_messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+        )
+        cached = await get_llm_cache().get(cache_key)
+        if cached is not None:
+            for token in cached:
+                yield token
+            return
+
+    client = _create_client(cfg.provider, cfg.base_url, cfg.api_key)
     try:
         stream = await client.chat.completions.create(
             model=target_model,
             messages=payload_messages,
             temperature=temperature,
             stream=True,
+            **({"max_tokens": max_tokens} if max_tokens is not None else {}),
         )
 
         async for chunk in stream:
@@ -334,6 +400,9 @@ async def chat_completion_stream(
                 output_parts.append(token)
                 yield token
 
+        if cache_key is not None:
+            await get_llm_cache().set(cache_key, output_parts)
+
     except Exception as exc:
         logger.warning(
             "LLM streaming failed for provider '%s'", cfg.provider, exc_info=True
@@ -347,4 +416,5 @@ async def chat_completion_stream(
             input_tokens=estimated_input_tokens,
             output_tokens=output_tokens,
             user_id=user_id,
+            saved_input_tokens=saved_input_tokens,
         )
@@ -0,0 +1,177 @@
+"""
+Exact-match LLM response cache.
+
+Completions are keyed by provider, model, normalized messages, temperature
+and max_tokens. Entries live in an in-memory LRU and, optionally, in a SQLite
+table so they survive restarts. Streamed responses are stored as the list of
+token chunks the provider produced, so a cache hit can be replayed through
+the same streaming interface.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from threading import Lock
+from typing import Any, Iterator
+
+from .config import settings
+from .paths import BACKEND_DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+CACHE_TABLE = "llm_response_cache"
+
+
+def build_cache_key(
+    *,
+    provider: str,
+    model: str,
+    messages: list[dict[str, Any]],
+    temperature: float,
+    max_tokens: int | None,
+) -> str:
+    """Return a stable digest for a completion request."""
+    payload = {
+        "provider": provider,
+        "model": model,
+        "messages": [
+            {"role": m.get("role", ""), "content": m.get("content", "")}
+            for m in messages
+        ],
+        "temperature": round(float(temperature), 4),
+        "max_tokens": max_tokens,
+    }
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """Two-tier (memory LRU + optional SQLite) cache of completion chunks."""
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 256,
+        ttl_seconds: float = 3600.0,
+        db_path: Path | None = None,
+    ):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self.db_path = db_path
+        self._memory: OrderedDict[str, tuple[float, list[str]]] = OrderedDict()
+        self._db_lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        if self.db_path is not None:
+            with self._connect() as conn:
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {CACHE_TABLE} ("
+                    " key TEXT PRIMARY KEY,"
+                    " chunks_json TEXT NOT NULL,"
+                    " expires_at REAL NOT NULL)"
+                )
+                conn.commit()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        assert self.db_path is not None
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.db_path))
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _remember(self, key: str, expires_at: float, chunks: list[str]) -> None:
+        self._memory[key] = (expires_at, chunks)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _db_get(self, key: str) -> tuple[float, list[str]] | None:
+        with self._db_lock, self._connect() as conn:
+            row = conn.execute(
+                f"SELECT chunks_json, expires_at FROM {CACHE_TABLE} WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= time.time():
+                conn.execute(f"DELETE FROM {CACHE_TABLE} WHERE key = ?", (key,))
+                conn.commit()
+                return None
+        return float(row[1]), json.loads(row[0])
+
+    def _db_set(self, key: str, expires_at: float, chunks: list[str]) -> None:
+        with self._db_lock, self._connect() as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO {CACHE_TABLE} (key, chunks_json, expires_at)"
+                " VALUES (?, ?, ?)",
+                (key, json.dumps(chunks, ensure_ascii=False), expires_at),
+            )
+            conn.commit()
+
+    async def get(self, key: str) -> list[str] | None:
+        """Return cached chunks for *key*, or None on miss/expiry."""
+        entry = self._memory.get(key)
+        if entry is not None:
+            if entry[0] > time.time():
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return list(entry[1])
+            del self._memory[key]
+
+        if self.db_path is not None:
+            try:
+                stored = await asyncio.to_thread(self._db_get, key)
+            except (sqlite3.Error, json.JSONDecodeError):
+                logger.warning("LLM cache lookup failed", exc_info=True)
+                stored = None
+            if stored is not None:
+                self._remember(key, stored[0], stored[1])
+                self.hits += 1
+                return list(stored[1])
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, chunks: list[str]) -> None:
+        """Store *chunks* under *key* in every configured tier."""
+        if not chunks:
+            return
+        expires_at = time.time() + self.ttl_seconds
+        stored = list(chunks)
+        self._remember(key, expires_at, stored)
+        if self.db_path is not None:
+            try:
+                await asyncio.to_thread(self._db_set, key, expires_at, stored)
+            except sqlite3.Error:
+                logger.warning("LLM cache write failed", exc_info=True)
+
+    def clear(self) -> None:
+        """Drop every entry from memory and the SQLite tier."""
+        self._memory.clear()
+        if self.db_path is not None:
+            with self._db_lock, self._connect() as conn:
+                conn.execute(f"DELETE FROM {CACHE_TABLE}")
+                conn.commit()
+
+
+@lru_cache(maxsize=1)
+def get_llm_cache() -> LLMResponseCache:
+    """Get the global LLM response cache instance."""
+    s = settings()
+    return LLMResponseCache(
+        max_entries=s.llm_cache_max_entries,
+        ttl_seconds=s.llm_cache_ttl_seconds,
+        db_path=BACKEND_DATA_DIR / "llm_cache.db" if s.llm_cache_persist else None,
+    )
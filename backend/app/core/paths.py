@@ -15,3 +15,6 @@ BACKEND_DATA_DIR = BACKEND_ROOT / "data"
 
 # Skills directory (backend/data/skills/)
 SKILLS_DIR = BACKEND_DATA_DIR / "skills"
+
+# Spilled workflow node outputs (backend/data/workflow_blobs/)
+WORKFLOW_BLOBS_DIR = BACKEND_DATA_DIR / "workflow_blobs"
@@ -1,15 +1,21 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import os
+import time
 import uuid
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from pathlib import Path
 from typing import TypedDict, cast
 
 from filelock import BaseFileLock
 
+from app.core.config import settings
 from app.core.paths import BACKEND_DATA_DIR
 
 
@@ -135,6 +141,36 @@ def _load_store_unlocked(path: Path) -> _EmbedTokenStore:
         return {"tokens": {}}
 
 
+# Parsed token store per file, reused while the file's (mtime_ns, size) is
+# unchanged so page views neither take the file lock nor re-read the JSON.
+_token_index: dict[Path, tuple[tuple[int, int], dict[str, _EmbedTokenEntry]]] = {}
+
+
+def _stat_key(path: Path) -> tuple[int, int] | None:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _remember_tokens(path: Path, tokens: dict[str, _EmbedTokenEntry]) -> None:
+    key = _stat_key(path)
+    if key is not None:
+        _token_index[path] = (key, tokens)
+
+
+def _load_tokens(path: Path) -> dict[str, _EmbedTokenEntry]:
+    indexed = _token_index.get(path)
+    if indexed is not None and indexed[0] == _stat_key(path):
+        return indexed[1]
+    lock = _lock_for(path)
+    with lock:
+        tokens = _load_store_unlocked(path)["tokens"]
+        _remember_tokens(path, tokens)
+    return tokens
+
+
 def _atomic_write(path: Path, data: _EmbedTokenStore) -> None:
     _ensure_data_dir(path)
     tmp_path = path.with_name(path.name + f".tmp.{uuid.uuid4().hex}")
@@ -176,6 +212,7 @@ def create_embed_token(*, workflow_id: str, created_by: int | str) -> EmbedToken
             "created_by": record.created_by,
         }
         _atomic_write(path, data)
+        _remember_tokens(path, tokens)
 
     return record
 
@@ -203,14 +240,81 @@ def _parse_record(token: str, raw: _EmbedTokenEntry) -> EmbedTokenRecord:
 
 
 def get_valid_embed_record(token: str) -> EmbedTokenRecord:
-    path = _store_path()
-    lock = _lock_for(path)
-    with lock:
-        data = _load_store_unlocked(path)
-    raw = data["tokens"].get(token)
+    raw = _load_tokens(_store_path()).get(token)
     if raw is None:
         raise EmbedTokenNotFound(token)
     record = _parse_record(token, raw)
     if record.expires_at <= _now_utc():
         raise EmbedTokenExpired(token)
     return record
+
+
+class EmbedOutputCache:
+    """Outputs of public embed runs with single-flight execution.
+
+    Outputs are kept for ``ttl_seconds`` per key (workflow id, workflow
+    ``updated_at``, input), so a shared page costs one run per distinct input
+    and workflow version. Concurrent requests for a key that is not cached
+    yet wait for the one run already in flight instead of starting their own.
+    Failed runs are not cached. A waiter that goes away (client disconnect)
+    does not cancel the shared run.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._outputs: OrderedDict[Hashable, tuple[float, str]] = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Task[str]] = {}
+
+    def get(self, key: Hashable) -> str | None:
+        entry = self._outputs.get(key)
+        if entry is None:
+            return None
+        expires_at, output = entry
+        if expires_at <= time.monotonic():
+            del self._outputs[key]
+            return None
+        self._outputs.move_to_end(key)
+        return output
+
+    def _set(self, key: Hashable, output: str) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        self._outputs[key] = (time.monotonic() + self.ttl_seconds, output)
+        self._outputs.move_to_end(key)
+        while len(self._outputs) > self.max_entries:
+            self._outputs.popitem(last=False)
+
+    async def get_or_run(self, key: Hashable, run: Callable[[], Awaitable[str]]) -> str:
+        output = self.get(key)
+        if output is not None:
+            return output
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(run())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task[str]) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled():
+            return
+        # Always retrieve the exception: every waiter may have gone away.
+        if task.exception() is None:
+            self._set(key, task.result())
+
+    def clear(self) -> None:
+        self._outputs.clear()
+
+
+@lru_cache(maxsize=1)
+def get_embed_output_cache() -> EmbedOutputCache:
+    """Get the global public embed output cache."""
+    s = settings()
+    return EmbedOutputCache(
+        max_entries=s.publish_embed_cache_max_entries,
+        ttl_seconds=s.publish_embed_cache_ttl_seconds,
+    )
@@ -23,6 +23,7 @@ from llama_index.core.node_parser import SentenceSplitter
 
 from app.core.chroma_client import get_chroma_client
 from app.core.config import settings
+from app.core.fake_provider import FakeAsyncClient
 
 logger = logging.getLogger(__name__)
 
@@ -86,10 +87,18 @@ class OpenAICompatibleEmbedding:
         return [item.embedding for item in resp.data]
 
 
+class FakeEmbedding(OpenAICompatibleEmbedding):
+    """Offline embedding client returning deterministic vectors."""
+
+    def __init__(self, model: str):
+        self.model = model
+        self.client = FakeAsyncClient()  # type: ignore[assignment]
+
+
 # Backwards-compatible alias
 SiliconFlowEmbedding = OpenAICompatibleEmbedding
 
-_EMBEDDING_PROVIDERS = ("siliconflow", "openai", "ollama")
+_EMBEDDING_PROVIDERS = ("siliconflow", "openai", "ollama", "fake")
 
 
 def create_embedding_model(
@@ -99,7 +108,7 @@ def create_embedding_model(
     """Create an embedding client based on the configured provider.
 
     Args:
-        provider: Override embedding provider (siliconflow/openai/ollama).
+        provider: Override embedding provider (siliconflow/openai/ollama/fake).
                   Defaults to settings().embedding_provider.
         model: Override embedding model name.
                Defaults to the model configured for the chosen provider.
@@ -107,6 +116,9 @@ def create_embedding_model(
     s = settings()
     provider = (provider or s.embedding_provider).strip().lower()
 
+    if provider == "fake":
+        return FakeEmbedding(model=(model or "fake-embedding").strip())
+
     if provider == "openai":
         api_key = s.openai_api_key
         base_url = s.openai_api_base
@@ -4,10 +4,9 @@ Skill Executor: variable substitution, RAG integration, and LLM streaming.
 This module provides the SkillExecutor class for executing skills with:
 - Input validation and variable substitution
 - Optional RAG retrieval if knowledge_base is configured
-- SSE streaming of thought/token/citation/done events
+- Streaming of thought/token/citation/done events
 """
 
-import json
 import logging
 import re
 from typing import AsyncGenerator, Dict, List, Optional, Any
@@ -15,7 +14,14 @@ from typing import AsyncGenerator, Dict, List, Optional, Any
 from app.core.llm import chat_completion_stream
 from app.core.rag import get_rag_pipeline
 from app.models.skill import SkillInput
-from app.utils.sse import format_sse_event
+from app.utils.sse import (
+    CitationEvent,
+    DoneEvent,
+    ErrorEvent,
+    StreamEvent,
+    ThoughtEvent,
+    TokenEvent,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -101,7 +107,7 @@ class SkillExecutor:
         skill: Any,
         inputs: Dict[str, str],
         user_id: int | str | None = None,
-    ) -> AsyncGenerator[str, None]:
+    ) -> AsyncGenerator[StreamEvent, None]:
         """
         Execute a skill with the provided inputs.
 
@@ -110,7 +116,8 @@ class SkillExecutor:
             inputs: Dictionary of input values
 
         Yields:
-            SSE event strings (thought, token, citation, done)
+            Stream events (thought, token, citation, error, done); callers
+            serialize them with ``encode_event`` at the HTTP edge
 
         Events:
             - thought: RAG retrieval status and results
@@ -137,12 +144,11 @@ class SkillExecutor:
                 model_config = skill.get("model", {})
 
             # Step 1: Validate required inputs
-            yield format_sse_event("thought", {"type": "validation", "status": "start"})
+            yield ThoughtEvent({"type": "validation", "status": "start"})
 
             try:
                 self.validate_inputs(skill_inputs, inputs)
-                yield format_sse_event(
-                    "thought",
+                yield ThoughtEvent(
                     {
                         "type": "validation",
                         "status": "complete",
@@ -150,22 +156,18 @@ class SkillExecutor:
                     },
                 )
             except ValueError as e:
-                yield format_sse_event(
-                    "thought",
+                yield ThoughtEvent(
                     {"type": "validation", "status": "error", "error": str(e)},
                 )
-                yield format_sse_event("done", {"status": "error", "message": str(e)})
+                yield DoneEvent("error", str(e))
                 return
 
             # Step 2: Variable substitution
-            yield format_sse_event(
-                "thought", {"type": "substitution", "status": "start"}
-            )
+            yield ThoughtEvent({"type": "substitution", "status": "start"})
 
             substituted_prompt = self.substitute_variables(prompt, skill_inputs, inputs)
 
-            yield format_sse_event(
-                "thought",
+            yield ThoughtEvent(
                 {
                     "type": "substitution",
                     "status": "complete",
@@ -179,13 +181,11 @@ class SkillExecutor:
             error_message = ""
 
             if knowledge_base:
-                yield format_sse_event(
-                    "thought",
+                yield ThoughtEvent(
                     {"type": "retrieval", "status": "start", "kb_id": knowledge_base},
                 )
 
-                yield format_sse_event(
-                    "thought",
+                yield ThoughtEvent(
                     {
                         "type": "retrieval",
                         "status": "searching",
@@ -218,8 +218,7 @@ class SkillExecutor:
                         for r in retrieved_results[:3]
                     ]
 
-                    yield format_sse_event(
-                        "thought",
+                    yield ThoughtEvent(
                         {
                             "type": "retrieval",
                             "status": "complete",
@@ -242,7 +241,7 @@ class SkillExecutor:
                             }
                             for r in retrieved_results
                         ]
-                        yield format_sse_event("citation", {"sources": sources})
+                        yield CitationEvent(sources)
 
                 except Exception:
                     logger.warning(
@@ -250,8 +249,7 @@ class SkillExecutor:
                         knowledge_base,
                         exc_info=True,
                     )
-                    yield format_sse_event(
-                        "thought",
+                    yield ThoughtEvent(
                         {
                             "type": "retrieval",
                             "status": "error",
@@ -284,7 +282,7 @@ class SkillExecutor:
             messages.append({"role": "user", "content": substituted_prompt})
 
             # Step 5: Stream LLM tokens
-            yield format_sse_event("thought", {"type": "generation", "status": "start"})
+            yield ThoughtEvent({"type": "generation", "status": "start"})
 
             temperature = (
                 model_config.get("temperature", 0.7)
@@ -298,44 +296,32 @@ class SkillExecutor:
                     temperature=temperature,
                     user_id=user_id,
                 ):
-                    yield format_sse_event("token", {"content": token})
+                    yield TokenEvent(token)
             except Exception:
                 logger.warning(
                     "LLM streaming failed during skill execution", exc_info=True
                 )
                 has_error = True
                 error_message = "Generation failed"
-                yield format_sse_event("error", {"message": error_message})
+                yield ErrorEvent(error_message)
 
             # Step 6: Done event
             if has_error:
-                yield format_sse_event(
-                    "done", {"status": "error", "message": error_message}
-                )
+                yield DoneEvent("error", error_message)
             else:
-                yield format_sse_event(
-                    "done",
-                    {
-                        "status": "success",
-                        "message": "Skill execution completed successfully",
-                    },
-                )
+                yield DoneEvent("success", "Skill execution completed successfully")
 
         except Exception:
             # Catch-all for unexpected errors
             logger.warning("Skill execution failed unexpectedly", exc_info=True)
-            yield format_sse_event(
-                "thought",
+            yield ThoughtEvent(
                 {
                     "type": "error",
                     "status": "error",
                     "error": "Skill execution failed",
                 },
             )
-            yield format_sse_event(
-                "done",
-                {"status": "error", "message": "Skill execution failed"},
-            )
+            yield DoneEvent("error", "Skill execution failed")
 
 
 # Global executor instance
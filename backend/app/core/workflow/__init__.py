@@ -7,10 +7,12 @@ from app.core.workflow.workflow_nodes import (
     execute_end_node,
     execute_knowledge_node,
     execute_llm_node,
+    execute_map_node,
     execute_skill_node,
     execute_start_node,
 )
 from app.core.workflow.workflow_context import ExecutionContext, safe_eval
+from app.core.workflow.workflow_plan import WorkflowPlan, get_workflow_plan
 
 __all__ = [
     "WorkflowEngine",
@@ -18,8 +20,11 @@ __all__ = [
     "execute_end_node",
     "execute_knowledge_node",
     "execute_llm_node",
+    "execute_map_node",
     "execute_skill_node",
     "execute_start_node",
     "ExecutionContext",
     "safe_eval",
+    "WorkflowPlan",
+    "get_workflow_plan",
 ]
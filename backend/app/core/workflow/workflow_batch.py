@@ -0,0 +1,414 @@
+"""
+Batch execution of a workflow over many inputs.
+
+A batch stores its inputs as ``workflow_batch_rows`` and runs them in the
+background with bounded concurrency. Rows run without per-row execution
+records or checkpoints; a row's persisted status is its checkpoint, so a
+batch interrupted by a restart resumes with the rows still pending.
+
+Rows that call LLMs also take a slot of a per-provider semaphore shared by
+all batches, so several batches cannot flood one provider together.
+Finished rows get an increasing ``finish_seq`` that result streams use as
+a cursor. A batch allocates and commits these under one lock, so rows become
+visible in ``finish_seq`` order and a cursor never passes a row still being
+written.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import csv
+import io
+import json
+import logging
+import uuid
+from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from sqlalchemy import func, insert, select, update
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.llm import resolve_model
+from app.core.workflow.workflow_plan import WorkflowPlan, get_workflow_plan
+from app.models.workflow import Workflow
+from app.models.workflow_batch_db import WorkflowBatchDB, WorkflowBatchRowDB
+
+logger = logging.getLogger(__name__)
+
+ROW_PAGE_SIZE = 500
+
+
+class BatchInputError(ValueError):
+    """The uploaded batch input could not be parsed."""
+
+
+def parse_batch_file(content: bytes, filename: str, input_field: str) -> list[str]:
+    """Inputs from a JSONL or CSV upload (chosen by file extension)."""
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError as exc:
+        raise BatchInputError("Batch file must be UTF-8 encoded") from exc
+
+    if filename.lower().endswith(".csv"):
+        return _parse_csv(text, input_field)
+    if filename.lower().endswith((".jsonl", ".ndjson")):
+        return _parse_jsonl(text, input_field)
+    raise BatchInputError("Batch file must be .jsonl or .csv")
+
+
+def _parse_jsonl(text: str, input_field: str) -> list[str]:
+    inputs = []
+    for line_no, line in enumerate(text.splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            value = json.loads(line)
+        except json.JSONDecodeError as exc:
+            raise BatchInputError(f"Line {line_no}: invalid JSON") from exc
+        inputs.append(row_input(value, input_field, f"Line {line_no}"))
+    return inputs
+
+
+def _parse_csv(text: str, input_field: str) -> list[str]:
+    reader = csv.DictReader(io.StringIO(text))
+    fields = reader.fieldnames or []
+    if input_field not in fields:
+        if len(fields) != 1:
+            raise BatchInputError(f"CSV has no '{input_field}' column")
+        input_field = fields[0]
+    return [row.get(input_field) or "" for row in reader]
+
+
+def row_input(value: Any, input_field: str, where: str) -> str:
+    """The workflow input of one batch item (a string or an object)."""
+    if isinstance(value, dict):
+        if input_field not in value:
+            raise BatchInputError(f"{where}: missing '{input_field}'")
+        value = value[input_field]
+    return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+
+
+def plan_providers(plan: WorkflowPlan, model: Optional[str]) -> list[str]:
+    """LLM providers the workflow's nodes call, in a stable order."""
+    providers = set()
+    for node in plan.nodes.values():
+        if node.get("type") != "llm":
+            continue
+        try:
+            provider, _ = resolve_model(node.get("data", {}).get("model") or model)
+        except ValueError:
+            # The row fails with the provider error; nothing to throttle.
+            continue
+        providers.add(provider)
+    return sorted(providers)
+
+
+_provider_slots: dict[str, asyncio.Semaphore] = {}
+
+
+def _provider_semaphore(provider: str) -> asyncio.Semaphore:
+    semaphore = _provider_slots.get(provider)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(settings().workflow_batch_provider_concurrency)
+        _provider_slots[provider] = semaphore
+    return semaphore
+
+
+async def create_batch(
+    workflow: Workflow,
+    inputs: list[str],
+    user_id: Optional[int],
+    model: Optional[str],
+    concurrency: int,
+) -> WorkflowBatchDB:
+    batch = WorkflowBatchDB(
+        id=str(uuid.uuid4()),
+        workflow_id=workflow.id,
+        user_id=str(user_id) if user_id is not None else None,
+        status="pending",
+        model=model,
+        concurrency=concurrency,
+        total_rows=len(inputs),
+    )
+    async with AsyncSessionLocal() as db:
+        db.add(batch)
+        await db.flush()
+        await db.execute(
+            insert(WorkflowBatchRowDB),
+            [
+                {"batch_id": batch.id, "row_index": index, "input": value}
+                for index, value in enumerate(inputs)
+            ],
+        )
+        await db.commit()
+        await db.refresh(batch)
+    return batch
+
+
+async def batch_counts(batch_id: str) -> dict[str, int]:
+    """Number of rows per status."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(WorkflowBatchRowDB.status, func.count())
+            .where(WorkflowBatchRowDB.batch_id == batch_id)
+            .group_by(WorkflowBatchRowDB.status)
+        )
+        counts = {"pending": 0, "completed": 0, "failed": 0}
+        counts.update({status: count for status, count in result.all()})
+    return counts
+
+
+@dataclass
+class BatchJob:
+    """A batch running in this process."""
+
+    batch_id: str
+    task: Optional[asyncio.Task[None]] = None
+    # Replaced (and the old one set) whenever a row finishes.
+    changed: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def notify(self) -> None:
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+
+_jobs: dict[str, BatchJob] = {}
+
+
+def running_job(batch_id: str) -> Optional[BatchJob]:
+    return _jobs.get(batch_id)
+
+
+def start_batch(batch_id: str) -> BatchJob:
+    """Run (or resume) the pending rows of a batch in the background."""
+    job = _jobs.get(batch_id)
+    if job is None:
+        job = BatchJob(batch_id)
+        _jobs[batch_id] = job
+        job.task = asyncio.create_task(_run_batch(job))
+    return job
+
+
+async def stop_batches() -> None:
+    """Cancel running batches (app shutdown); they stay resumable."""
+    jobs = list(_jobs.values())
+    for job in jobs:
+        if job.task is not None:
+            job.task.cancel()
+    for job in jobs:
+        if job.task is not None:
+            try:
+                await job.task
+            except asyncio.CancelledError:
+                pass
+    _provider_slots.clear()
+
+
+async def _set_status(batch_id: str, status: str, error: Optional[str] = None) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(WorkflowBatchDB)
+            .where(WorkflowBatchDB.id == batch_id)
+            .values(status=status, error=error, updated_at=datetime.now(timezone.utc))
+        )
+        await db.commit()
+
+
+async def _pending_rows(batch_id: str) -> AsyncIterator[tuple[int, str]]:
+    last = -1
+    while True:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(WorkflowBatchRowDB.row_index, WorkflowBatchRowDB.input)
+                .where(
+                    WorkflowBatchRowDB.batch_id == batch_id,
+                    WorkflowBatchRowDB.status == "pending",
+                    WorkflowBatchRowDB.row_index > last,
+                )
+                .order_by(WorkflowBatchRowDB.row_index)
+                .limit(ROW_PAGE_SIZE)
+            )
+            page = result.all()
+        for row_index, value in page:
+            yield row_index, value
+        if len(page) < ROW_PAGE_SIZE:
+            return
+        last = page[-1][0]
+
+
+async def _run_batch(job: BatchJob) -> None:
+    from app.api.workflow import load_workflow
+
+    batch_id = job.batch_id
+    try:
+        async with AsyncSessionLocal() as db:
+            batch = await db.get(WorkflowBatchDB, batch_id)
+            if batch is None:
+                return
+            last_seq = await db.scalar(
+                select(func.max(WorkflowBatchRowDB.finish_seq)).where(
+                    WorkflowBatchRowDB.batch_id == batch_id
+                )
+            )
+        workflow = await load_workflow(batch.workflow_id)
+        if workflow is None:
+            await _set_status(batch_id, "failed", "Workflow not found")
+            return
+
+        providers = plan_providers(get_workflow_plan(workflow), batch.model)
+        user_id = int(batch.user_id) if batch.user_id else None
+        runner = _BatchRunner(
+            job, workflow, providers, user_id, batch.model, (last_seq or 0) + 1
+        )
+        await _set_status(batch_id, "running")
+
+        queue: asyncio.Queue[Optional[tuple[int, str]]] = asyncio.Queue(
+            maxsize=batch.concurrency * 2
+        )
+
+        async def produce() -> None:
+            async for item in _pending_rows(batch_id):
+                await queue.put(item)
+            for _ in range(batch.concurrency):
+                await queue.put(None)
+
+        tasks = [asyncio.create_task(produce())]
+        tasks += [
+            asyncio.create_task(runner.work(queue)) for _ in range(batch.concurrency)
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        await _set_status(batch_id, "completed")
+    except asyncio.CancelledError:
+        raise
+    except Exception as exc:
+        logger.exception("Workflow batch %s failed", batch_id)
+        await _set_status(batch_id, "failed", str(exc))
+    finally:
+        _jobs.pop(batch_id, None)
+        job.notify()
+
+
+class _BatchRunner:
+    def __init__(
+        self,
+        job: BatchJob,
+        workflow: Workflow,
+        providers: list[str],
+        user_id: Optional[int],
+        model: Optional[str],
+        next_seq: int,
+    ):
+        self.job = job
+        self.workflow = workflow
+        self.providers = providers
+        self.user_id = user_id
+        self.model = model
+        self.next_seq = next_seq
+        self.finish_lock = asyncio.Lock()
+
+    async def work(self, queue: asyncio.Queue[Optional[tuple[int, str]]]) -> None:
+        while (item := await queue.get()) is not None:
+            row_index, value = item
+            async with AsyncExitStack() as stack:
+                for provider in self.providers:
+                    await stack.enter_async_context(_provider_semaphore(provider))
+                output, error = await self._run_row(value)
+            await self._finish_row(row_index, output, error)
+
+    async def _run_row(self, value: str) -> tuple[Any, Optional[str]]:
+        from app.core.workflow.workflow_engine import WorkflowEngine
+
+        # Engines are cheap: the compiled plan comes from the plan cache.
+        engine = WorkflowEngine(self.workflow)
+        try:
+            async for event in engine.execute(
+                value, user_id=self.user_id, model=self.model, persist=False
+            ):
+                if event["type"] == "workflow_complete":
+                    return event.get("final_output"), None
+                if event["type"] == "workflow_error":
+                    return None, str(event.get("error"))
+        except Exception as exc:
+            logger.warning("Batch row failed", exc_info=True)
+            return None, str(exc)
+        return None, "Workflow finished without output"
+
+    async def _finish_row(
+        self, row_index: int, output: Any, error: Optional[str]
+    ) -> None:
+        async with self.finish_lock, AsyncSessionLocal() as db:
+            seq, self.next_seq = self.next_seq, self.next_seq + 1
+            await db.execute(
+                update(WorkflowBatchRowDB)
+                .where(
+                    WorkflowBatchRowDB.batch_id == self.job.batch_id,
+                    WorkflowBatchRowDB.row_index == row_index,
+                )
+                .values(
+                    status="failed" if error is not None else "completed",
+                    output_json=json.dumps(output, ensure_ascii=False),
+                    error=error,
+                    finish_seq=seq,
+                    finished_at=datetime.now(timezone.utc),
+                )
+            )
+            await db.commit()
+        self.job.notify()
+
+
+def row_result(row: WorkflowBatchRowDB) -> dict[str, Any]:
+    return {
+        "type": "row",
+        "row": row.row_index,
+        "status": row.status,
+        "output": json.loads(row.output_json) if row.output_json else None,
+        "error": row.error,
+    }
+
+
+async def iter_batch_results(batch_id: str) -> AsyncIterator[dict[str, Any]]:
+    """Finished rows in completion order, following the batch while it runs.
+
+    Ends with a ``{"type": "batch", ...}`` summary.
+    """
+    cursor = 0
+    while True:
+        job = _jobs.get(batch_id)
+        # Taken before the query so a row finishing meanwhile wakes us up.
+        changed = job.changed if job is not None else None
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(WorkflowBatchRowDB)
+                .where(
+                    WorkflowBatchRowDB.batch_id == batch_id,
+                    WorkflowBatchRowDB.finish_seq > cursor,
+                )
+                .order_by(WorkflowBatchRowDB.finish_seq)
+                .limit(ROW_PAGE_SIZE)
+            )
+            rows = result.scalars().all()
+        for row in rows:
+            yield row_result(row)
+        if rows:
+            cursor = rows[-1].finish_seq or cursor
+            continue
+        if changed is None:
+            break
+        await changed.wait()
+
+    async with AsyncSessionLocal() as db:
+        batch = await db.get(WorkflowBatchDB, batch_id)
+    yield {
+        "type": "batch",
+        "id": batch_id,
+        "status": batch.status if batch else "unknown",
+        **await batch_counts(batch_id),
+    }
@@ -0,0 +1,69 @@
+"""
+Garbage collection of spilled workflow node outputs.
+
+A blob is kept while anything can still read it: execution checkpoints
+(snapshot and delta rows), node memo entries, and the contexts of runs in
+progress, including unpersisted ones such as batch rows, map items and
+public embed runs. Unreferenced blobs are deleted once they have not been
+written or reused for ``workflow_blob_gc_grace_seconds``, which also covers
+references created while a sweep is running.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.workflow import workflow_blobs
+from app.core.workflow.workflow_context import live_spilled_digests
+from app.core.workflow.workflow_memo import get_node_memo_cache
+from app.models.workflow_execution_db import (
+    WorkflowExecutionDB,
+    WorkflowExecutionStepDB,
+)
+
+
+async def _checkpoint_digests() -> set[str]:
+    digests: set[str] = set()
+    columns = (
+        WorkflowExecutionDB.step_outputs_json,
+        WorkflowExecutionStepDB.output_json,
+    )
+    async with AsyncSessionLocal() as db:
+        for column in columns:
+            result = await db.stream_scalars(
+                select(column).where(column.contains(workflow_blobs.SPILL_KEY))
+            )
+            async for text in result:
+                digests |= workflow_blobs.referenced_digests(text)
+    return digests
+
+
+def _memo_digests() -> set[str]:
+    digests: set[str] = set()
+    for stored in get_node_memo_cache().stored_outputs():
+        value = workflow_blobs.from_json(stored)
+        if isinstance(value, workflow_blobs.SpilledOutput):
+            digests.add(value.digest)
+    return digests
+
+
+async def collect_blob_garbage(grace_seconds: float | None = None) -> int:
+    """Delete unreferenced blobs unused for *grace_seconds*; returns the count."""
+    if grace_seconds is None:
+        grace_seconds = settings().workflow_blob_gc_grace_seconds
+    keep = await _checkpoint_digests()
+    keep |= _memo_digests() | live_spilled_digests()
+    cutoff = time.time() - grace_seconds
+
+    removed = 0
+    for directory in workflow_blobs.blob_dirs():
+        # Each directory is swept without yielding, so a blob reused (and
+        # touched) by a run on this loop is never deleted under it.
+        removed += workflow_blobs.sweep_dir(directory, keep, cutoff)
+        await asyncio.sleep(0)
+    return removed
@@ -0,0 +1,120 @@
+"""
+Content-addressed blob store for large workflow node outputs.
+
+Outputs above ``workflow_output_spill_bytes`` are written once, zlib
+compressed, under ``data/workflow_blobs/<aa>/<sha256>.json.z``. The execution
+context then keeps only a small ``SpilledOutput`` handle and checkpoints store
+its JSON reference instead of the text. Identical outputs share one blob.
+
+Blobs are deleted by ``workflow_blob_gc`` once nothing refers to them and
+they have not been written or reused for a grace period; ``spill`` refreshes
+a blob's mtime whenever it hands out a handle to it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from app.core import paths
+
+SPILL_KEY = "__spilled__"
+SPILL_REF_PATTERN = re.compile(r'"__spilled__":\s*"([0-9a-f]{64})"')
+
+
+def _blob_path(digest: str) -> Path:
+    return paths.WORKFLOW_BLOBS_DIR / digest[:2] / f"{digest}.json.z"
+
+
+@dataclass(frozen=True, slots=True)
+class SpilledOutput:
+    """Handle to a node output stored on disk."""
+
+    digest: str
+    size: int
+
+    def load(self) -> Any:
+        return json.loads(zlib.decompress(_blob_path(self.digest).read_bytes()))
+
+    def to_json(self) -> dict[str, Any]:
+        return {SPILL_KEY: self.digest, "size": self.size}
+
+
+def spill(value: Any) -> SpilledOutput:
+    """Write *value* to the blob store (if not already there)."""
+    data = json.dumps(value, ensure_ascii=False).encode()
+    digest = hashlib.sha256(data).hexdigest()
+    path = _blob_path(digest)
+    try:
+        # Reused blobs count as recently used for garbage collection.
+        os.utime(path)
+    except FileNotFoundError:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(zlib.compress(data, 1))
+        os.replace(tmp, path)
+    return SpilledOutput(digest, len(data))
+
+
+def maybe_spill(value: Any, threshold: int) -> Any:
+    """Spill text outputs of at least *threshold* characters (0 disables)."""
+    if threshold and isinstance(value, str) and len(value) >= threshold:
+        return spill(value)
+    return value
+
+
+def to_json(stored: Any) -> Any:
+    """JSON-safe form of a stored output."""
+    return stored.to_json() if isinstance(stored, SpilledOutput) else stored
+
+
+def from_json(value: Any) -> Any:
+    """Inverse of ``to_json``: turn blob references back into handles."""
+    if isinstance(value, dict) and SPILL_KEY in value and len(value) == 2:
+        return SpilledOutput(value[SPILL_KEY], value.get("size", 0))
+    return value
+
+
+def load(stored: Any) -> Any:
+    """The output value, read from disk if it was spilled."""
+    return stored.load() if isinstance(stored, SpilledOutput) else stored
+
+
+def referenced_digests(text: str) -> set[str]:
+    """Digests of the blob references inside a JSON document."""
+    return set(SPILL_REF_PATTERN.findall(text))
+
+
+def blob_dirs() -> list[Path]:
+    """The fan-out directories of the blob store."""
+    root = paths.WORKFLOW_BLOBS_DIR
+    if not root.is_dir():
+        return []
+    return sorted(path for path in root.iterdir() if path.is_dir())
+
+
+def sweep_dir(directory: Path, keep: set[str], cutoff: float) -> int:
+    """Delete blobs in *directory* that are not in *keep* and unused since *cutoff*.
+
+    *cutoff* is a ``time.time()`` timestamp. Leftover temp files of
+    interrupted writes are removed the same way. Returns the number of files
+    deleted.
+    """
+    removed = 0
+    for path in directory.iterdir():
+        if path.name.split(".", 1)[0] in keep:
+            continue
+        try:
+            if path.stat().st_mtime >= cutoff:
+                continue
+            path.unlink()
+        except FileNotFoundError:
+            continue
+        removed += 1
+    return removed
@@ -0,0 +1,266 @@
+"""
+Delta checkpoints for workflow executions.
+
+Instead of rewriting the whole execution state after every node, a run
+appends one ``workflow_execution_steps`` row per completed node holding only
+that node's output, the variables written since the previous step and the
+scheduler queue. The rows are folded into the snapshot columns of
+``workflow_executions`` (compaction) every ``workflow_checkpoint_compact_steps``
+steps and when the run finishes. ``load_execution_state`` rebuilds the state
+from the snapshot plus any remaining steps. Compactions also store the
+execution's timing trace (see ``workflow_trace``).
+
+How often buffered steps reach the database is a per-workflow policy:
+
+- ``every_node``: after each node (default)
+- ``batch``: after ``checkpointEveryNodes`` nodes or ``checkpointEverySeconds``
+- ``on_failure``: only when the run fails or finishes
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Literal, Optional
+
+from sqlalchemy import delete, select, update
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.workflow.workflow_context import ExecutionContext
+from app.core.workflow.workflow_plan import WorkflowPlan
+from app.core.workflow.workflow_trace import ExecutionTrace
+from app.models.workflow_execution_db import (
+    WorkflowExecutionDB,
+    WorkflowExecutionStepDB,
+    WorkflowExecutionTraceDB,
+)
+
+CheckpointMode = Literal["every_node", "batch", "on_failure"]
+CHECKPOINT_MODES = ("every_node", "batch", "on_failure")
+
+
+@dataclass(frozen=True, slots=True)
+class CheckpointPolicy:
+    mode: CheckpointMode
+    every_nodes: int
+    every_seconds: float
+
+
+def resolve_checkpoint_policy(plan: WorkflowPlan) -> CheckpointPolicy:
+    """The global policy, overridden by the workflow's start node options."""
+    s = settings()
+    options = plan.checkpoint_options
+    mode = options.get("checkpointPolicy")
+    every_nodes = options.get("checkpointEveryNodes")
+    every_seconds = options.get("checkpointEverySeconds")
+    return CheckpointPolicy(
+        mode=mode if mode in CHECKPOINT_MODES else s.workflow_checkpoint_policy,
+        every_nodes=(
+            every_nodes
+            if type(every_nodes) is int and every_nodes >= 1
+            else s.workflow_checkpoint_every_nodes
+        ),
+        every_seconds=(
+            float(every_seconds)
+            if isinstance(every_seconds, (int, float)) and every_seconds > 0
+            else s.workflow_checkpoint_every_seconds
+        ),
+    )
+
+
+@dataclass(slots=True)
+class ExecutionState:
+    """Execution state rebuilt from the snapshot and the step deltas.
+
+    ``step_outputs`` holds stored outputs: spilled ones are blob references.
+    """
+
+    step_outputs: dict[str, Any]
+    variables: dict[str, Any]
+    executed_nodes: list[str]
+    queue: list[str]
+    next_seq: int
+    # Step rows not yet folded into the snapshot.
+    pending_steps: int
+
+
+async def load_execution_state(row: WorkflowExecutionDB) -> ExecutionState:
+    """Apply the steps recorded after the last compaction to *row*'s snapshot."""
+    step_outputs: dict[str, Any] = json.loads(row.step_outputs_json)
+    variables: dict[str, Any] = json.loads(row.variables_json)
+    executed: list[str] = json.loads(row.executed_nodes_json)
+    queue: list[str] = json.loads(row.queue_json)
+    next_seq = 0
+
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(WorkflowExecutionStepDB)
+            .where(WorkflowExecutionStepDB.execution_id == row.id)
+            .order_by(WorkflowExecutionStepDB.seq)
+        )
+        steps = result.scalars().all()
+
+    for step in steps:
+        step_outputs[step.node_id] = json.loads(step.output_json)
+        variables.update(json.loads(step.variables_json))
+        if step.node_id not in executed:
+            executed.append(step.node_id)
+        queue = json.loads(step.queue_json)
+        next_seq = step.seq + 1
+
+    return ExecutionState(
+        step_outputs, variables, executed, queue, next_seq, pending_steps=len(steps)
+    )
+
+
+class CheckpointWriter:
+    """Records the steps of one execution according to a checkpoint policy."""
+
+    def __init__(
+        self,
+        execution_id: str,
+        ctx: ExecutionContext,
+        plan: WorkflowPlan,
+        policy: Optional[CheckpointPolicy] = None,
+        next_seq: int = 0,
+        pending_steps: int = 0,
+        trace: Optional[ExecutionTrace] = None,
+    ):
+        self.execution_id = execution_id
+        self.ctx = ctx
+        self.plan = plan
+        self.trace = trace
+        self.policy = policy or resolve_checkpoint_policy(plan)
+        self.compact_steps = settings().workflow_checkpoint_compact_steps
+        self._next_seq = next_seq
+        self._buffer: list[WorkflowExecutionStepDB] = []
+        self._uncompacted = pending_steps
+        self._last_flush = time.monotonic()
+
+    def _ordered(self, node_ids: Iterable[str]) -> list[str]:
+        rank = self.plan.rank
+        return sorted(node_ids, key=lambda node_id: rank.get(node_id, len(rank)))
+
+    async def step(
+        self, node_id: str, executed: set[str], queue: Iterable[str]
+    ) -> None:
+        """Record that *node_id* completed."""
+        if self.policy.mode == "on_failure":
+            # finish() writes the full snapshot; nothing to buffer.
+            return
+        variables = self.ctx.pop_written_variables()
+        self._buffer.append(
+            WorkflowExecutionStepDB(
+                execution_id=self.execution_id,
+                seq=self._next_seq,
+                node_id=node_id,
+                output_json=json.dumps(
+                    self.ctx.stored_output(node_id), ensure_ascii=False
+                ),
+                variables_json=json.dumps(variables, ensure_ascii=False),
+                queue_json=json.dumps(list(queue)),
+            )
+        )
+        self._next_seq += 1
+        self._uncompacted += 1
+
+        if self._uncompacted >= self.compact_steps:
+            await self._write(executed, queue, compact=True)
+        elif self._should_flush():
+            await self._write(executed, queue)
+
+    def _should_flush(self) -> bool:
+        policy = self.policy
+        if policy.mode == "every_node":
+            return True
+        return (
+            len(self._buffer) >= policy.every_nodes
+            or time.monotonic() - self._last_flush >= policy.every_seconds
+        )
+
+    async def finish(
+        self, status: str, executed: set[str], queue: Iterable[str]
+    ) -> None:
+        """Write the final snapshot and status, dropping the step rows."""
+        await self._write(executed, queue, compact=True, status=status)
+
+    async def _write(
+        self,
+        executed: set[str],
+        queue: Iterable[str],
+        *,
+        compact: bool = False,
+        status: Optional[str] = None,
+    ) -> None:
+        values: dict[str, Any] = {}
+        if compact:
+            # Serialize before the first await: in parallel runs other nodes
+            # keep writing to the context during the database round trip.
+            checkpoint = self.ctx.to_checkpoint()
+            values.update(
+                step_outputs_json=json.dumps(
+                    checkpoint["step_outputs"], ensure_ascii=False
+                ),
+                variables_json=json.dumps(checkpoint["variables"], ensure_ascii=False),
+                executed_nodes_json=json.dumps(self._ordered(executed)),
+                queue_json=json.dumps(list(queue)),
+            )
+        trace_json = None
+        if compact and self.trace is not None:
+            trace_json = json.dumps(self.trace.to_json(), ensure_ascii=False)
+        if status is not None:
+            values["status"] = status
+        if values:
+            values["updated_at"] = datetime.now(timezone.utc)
+
+        buffer, self._buffer = self._buffer, []
+        async with AsyncSessionLocal() as db:
+            if compact:
+                await db.execute(
+                    delete(WorkflowExecutionStepDB).where(
+                        WorkflowExecutionStepDB.execution_id == self.execution_id
+                    )
+                )
+            else:
+                db.add_all(buffer)
+            if values:
+                await db.execute(
+                    update(WorkflowExecutionDB)
+                    .where(WorkflowExecutionDB.id == self.execution_id)
+                    .values(**values)
+                )
+            if trace_json is not None:
+                await db.merge(
+                    WorkflowExecutionTraceDB(
+                        execution_id=self.execution_id,
+                        trace_json=trace_json,
+                        updated_at=datetime.now(timezone.utc),
+                    )
+                )
+            await db.commit()
+
+        self._last_flush = time.monotonic()
+        if compact:
+            self._uncompacted = 0
+
+
+class NullCheckpointWriter(CheckpointWriter):
+    """Writer for runs that are not persisted, e.g. batch rows."""
+
+    def __init__(self, ctx: ExecutionContext, plan: WorkflowPlan):
+        self.ctx = ctx
+        self.plan = plan
+
+    async def step(
+        self, node_id: str, executed: set[str], queue: Iterable[str]
+    ) -> None:
+        pass
+
+    async def finish(
+        self, status: str, executed: set[str], queue: Iterable[str]
+    ) -> None:
+        pass
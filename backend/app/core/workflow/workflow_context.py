@@ -4,8 +4,15 @@ Workflow execution context and expression helpers.
 
 from __future__ import annotations
 
-from typing import Any, Dict
+from collections.abc import Callable, Iterator, Mapping, MutableMapping
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Optional
 import re
+import weakref
+
+from app.core.config import settings
+from app.core.workflow import workflow_blobs
 
 InvalidExpression: type[Exception]
 
@@ -15,18 +22,174 @@ class _MissingInvalidExpression(Exception):
 
 
 try:
-    from simpleeval import InvalidExpression, simple_eval
+    from simpleeval import InvalidExpression, SimpleEval, simple_eval
 except ImportError:
     InvalidExpression = _MissingInvalidExpression
+    SimpleEval = None
     simple_eval = None
 
 
 # Support node IDs with hyphens (UUIDs like beddf374-3de6-4aba-bd0e-03a49b5baac7)
 TEMPLATE_PATTERN = re.compile(r"\{\{([\w-]+(?:\.[\w-]+)*)\}\}")
+# Distinct template strings whose split form is kept (prompts, URLs, headers).
+TEMPLATE_CACHE_SIZE = 4096
+
+_OUTPUT_SUFFIX = ".output"
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledTemplate:
+    """A template split once into literal text and variable paths.
+
+    ``fragments`` alternates literal text (even positions) and the paths of
+    ``{{path}}`` references (odd positions).
+    """
+
+    fragments: tuple[str, ...]
+
+    @property
+    def paths(self) -> tuple[str, ...]:
+        return self.fragments[1::2]
+
+    def render(
+        self, lookup: Callable[[str], Any], convert: Callable[[Any], str] = str
+    ) -> str:
+        """Substitute ``lookup(path)``; unresolved (None) references stay as is."""
+        fragments = self.fragments
+        if len(fragments) == 1:
+            return fragments[0]
+        parts = list(fragments)
+        for i in range(1, len(parts), 2):
+            value = lookup(parts[i])
+            parts[i] = convert(value) if value is not None else f"{{{{{parts[i]}}}}}"
+        return "".join(parts)
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compile_template(template: str) -> CompiledTemplate:
+    return CompiledTemplate(tuple(TEMPLATE_PATTERN.split(template)))
+
+
+class TrackedVariables(Dict[str, Any]):
+    """Variables dict that remembers which keys were written.
+
+    Delta checkpoints persist only the keys written since the last step.
+    """
+
+    __slots__ = ("dirty",)
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.dirty: set[str] = set()
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        super().__setitem__(key, value)
+        self.dirty.add(key)
+
+    def update(self, *args: Any, **kwargs: Any) -> None:  # type: ignore[override]
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+
+def _output_node_id(key: object, outputs: Mapping[str, Any]) -> str | None:
+    """The node whose output *key* (``<node_id>.output``) names, if any."""
+    if isinstance(key, str) and key.endswith(_OUTPUT_SUFFIX):
+        node_id = key[: -len(_OUTPUT_SUFFIX)]
+        if node_id in outputs:
+            return node_id
+    return None
+
+
+class NodeOutputs(Mapping[str, Any]):
+    """Read-only view of node outputs; spilled outputs are loaded on access."""
+
+    __slots__ = ("_ctx",)
+
+    def __init__(self, ctx: ExecutionContext):
+        self._ctx = ctx
+
+    def __getitem__(self, node_id: str) -> Any:
+        return workflow_blobs.load(self._ctx._outputs[node_id])
+
+    def __contains__(self, node_id: object) -> bool:
+        return node_id in self._ctx._outputs
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._ctx._outputs)
+
+    def __len__(self) -> int:
+        return len(self._ctx._outputs)
+
+
+class Variables(MutableMapping[str, Any]):
+    """Workflow variables plus a lazy ``<node_id>.output`` key per node output.
+
+    Writes go to the context's own variables; output keys are resolved from
+    the single stored copy of each output.
+    """
+
+    __slots__ = ("_ctx",)
+
+    def __init__(self, ctx: ExecutionContext):
+        self._ctx = ctx
+
+    def __getitem__(self, key: str) -> Any:
+        own = self._ctx._own
+        if key in own:
+            return own[key]
+        node_id = _output_node_id(key, self._ctx._outputs)
+        if node_id is None:
+            raise KeyError(key)
+        return workflow_blobs.load(self._ctx._outputs[node_id])
+
+    def __contains__(self, key: object) -> bool:
+        own, outputs = self._ctx._own, self._ctx._outputs
+        return key in own or _output_node_id(key, outputs) is not None
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._ctx._own[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        del self._ctx._own[key]
+
+    def __iter__(self) -> Iterator[str]:
+        own = self._ctx._own
+        yield from own
+        for node_id in self._ctx._outputs:
+            key = f"{node_id}{_OUTPUT_SUFFIX}"
+            if key not in own:
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+# Contexts of runs in progress, so blob GC keeps the outputs they spilled.
+_live_contexts: weakref.WeakSet[ExecutionContext] = weakref.WeakSet()
+
+
+def live_spilled_digests() -> set[str]:
+    """Blob digests of spilled outputs held by live execution contexts."""
+    return {
+        stored.digest
+        for ctx in list(_live_contexts)
+        for stored in list(ctx._outputs.values())
+        if isinstance(stored, workflow_blobs.SpilledOutput)
+    }
 
 
 class ExecutionContext:
-    """Execution context for variables and node outputs."""
+    """Execution context for variables and node outputs.
+
+    Each node output is stored once (``_outputs``); ``step_outputs`` and the
+    ``<node_id>.output`` keys of ``variables`` are views over it. Text outputs
+    of ``workflow_output_spill_bytes`` or more are kept on disk.
+    """
 
     def __init__(
         self,
@@ -35,15 +198,46 @@ class ExecutionContext:
         model: str | None = None,
         conversation_history: list[dict[str, str]] | None = None,
     ):
-        self.variables: Dict[str, Any] = {"input": initial_input}
-        self.step_outputs: Dict[str, Any] = {}
+        self._own = TrackedVariables()
+        self._own["input"] = initial_input
+        self._outputs: Dict[str, Any] = {}
+        self._spill_threshold = settings().workflow_output_spill_bytes
+        self.variables: MutableMapping[str, Any] = Variables(self)
         self.user_id = user_id
         self.model = model
         self.conversation_history = conversation_history or []
+        _live_contexts.add(self)
+
+    @property
+    def step_outputs(self) -> Mapping[str, Any]:
+        return NodeOutputs(self)
+
+    @step_outputs.setter
+    def step_outputs(self, outputs: Mapping[str, Any]) -> None:
+        self._outputs = {
+            node_id: workflow_blobs.maybe_spill(value, self._spill_threshold)
+            for node_id, value in outputs.items()
+        }
 
     def set_output(self, node_id: str, value: Any) -> None:
-        self.step_outputs[node_id] = value
-        self.variables[f"{node_id}.output"] = value
+        self._outputs[node_id] = workflow_blobs.maybe_spill(
+            value, self._spill_threshold
+        )
+
+    def stored_output(self, node_id: str) -> Any:
+        """JSON-safe stored form of an output (a blob reference if spilled)."""
+        return workflow_blobs.to_json(self._outputs.get(node_id))
+
+    def restore_output(self, node_id: str, stored: Any) -> None:
+        """Set an output from its ``stored_output`` form."""
+        self._outputs[node_id] = workflow_blobs.from_json(stored)
+
+    def pop_written_variables(self) -> Dict[str, Any]:
+        """Variables (excluding node outputs) written since the previous call."""
+        own = self._own
+        written = {key: own[key] for key in own.dirty if key in own}
+        own.dirty.clear()
+        return written
 
     def get_variable(self, var_path: str) -> Any:
         # First try flat key lookup (e.g. "node-id.output" stored by set_output)
@@ -52,24 +246,23 @@ class ExecutionContext:
         # Fallback to nested path traversal
         current: Any = self.variables
         for part in var_path.split("."):
-            if isinstance(current, dict):
+            if isinstance(current, Mapping):
                 current = current.get(part)
             else:
                 return None
         return current
 
     def resolve_template(self, template: str) -> str:
-        def replace_var(match: re.Match[str]) -> str:
-            value = self.get_variable(match.group(1))
-            return str(value) if value is not None else match.group(0)
-
-        return TEMPLATE_PATTERN.sub(replace_var, template)
+        return compile_template(template).render(self.get_variable)
 
     def to_checkpoint(self) -> dict[str, Any]:
         """Serialize context state to a JSON-safe dict for persistence."""
         return {
-            "step_outputs": self.step_outputs,
-            "variables": self.variables,
+            "step_outputs": {
+                node_id: workflow_blobs.to_json(stored)
+                for node_id, stored in self._outputs.items()
+            },
+            "variables": dict(self._own),
             "conversation_history": self.conversation_history,
         }
 
@@ -83,19 +276,25 @@ class ExecutionContext:
     ) -> ExecutionContext:
         """Restore context from a checkpoint dict."""
         ctx = cls(initial_input, user_id=user_id, model=model)
-        ctx.step_outputs = data.get("step_outputs", {})
-        ctx.variables = data.get("variables", {"input": initial_input})
+        ctx._outputs = {
+            node_id: workflow_blobs.from_json(value)
+            for node_id, value in data.get("step_outputs", {}).items()
+        }
+        variables = data.get("variables") or {"input": initial_input}
+        # Older checkpoints also stored a "<node_id>.output" copy of each output.
+        ctx._own = TrackedVariables(
+            (key, value)
+            for key, value in variables.items()
+            if _output_node_id(key, ctx._outputs) is None
+        )
         ctx.conversation_history = data.get("conversation_history", [])
         return ctx
 
     def resolve_expression(self, expression: str) -> str:
-        def replace_var(match: re.Match[str]) -> str:
-            value = self.get_variable(match.group(1))
-            if value is None:
-                return match.group(0)
-            return repr(value)
+        return compile_template(expression).render(self.get_variable, repr)
 
-        return TEMPLATE_PATTERN.sub(replace_var, expression)
+
+_STRING_LITERAL_RE = re.compile(r'("(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\')')
 
 
 def normalize_expression(expression: str) -> str:
@@ -106,7 +305,7 @@ def normalize_expression(expression: str) -> str:
 
     # Only replace true/false/contains OUTSIDE of string literals
     # Split by quoted strings, only transform non-string parts
-    parts = re.split(r'("(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\')', expr)
+    parts = _STRING_LITERAL_RE.split(expr)
     for i, part in enumerate(parts):
         if i % 2 == 0:  # Not inside a string literal
             part = re.sub(r"\btrue\b", "True", part, flags=re.IGNORECASE)
@@ -169,30 +368,94 @@ def _rewrite_contains(expression: str) -> str:
     return expression
 
 
-def safe_eval(expression: str) -> bool:
+def _to_condition_source(expression: str) -> str:
     expr = normalize_expression(expression)
     expr = _rewrite_includes(expr)
-    expr = _rewrite_contains(expr)
-    if simple_eval is None:
-        import logging
+    return _rewrite_contains(expr)
 
-        logging.warning(
-            f"simpleeval not available, falling back to string comparison for: {expr}"
-        )
-        lowered = expr.lower()
-        return lowered in ("true", "yes", "1")
+
+def _evaluate(expr: str, evaluate: Callable[[], Any]) -> bool:
+    import logging
 
     try:
-        return bool(simple_eval(expr, names=_SAFE_NAMES, functions={}))
+        return bool(evaluate())
 
     except (TypeError, ValueError, NameError, InvalidExpression):
-        import logging
-
         logging.warning(f"Expression evaluation error in {expr}")
         return False
 
     except Exception as e:
-        import logging
-
         logging.error(f"Unexpected error in safe_eval({expr}): {e}")
         raise
+
+
+def safe_eval(expression: str) -> bool:
+    expr = _to_condition_source(expression)
+    if simple_eval is None:
+        import logging
+
+        logging.warning(
+            f"simpleeval not available, falling back to string comparison for: {expr}"
+        )
+        lowered = expr.lower()
+        return lowered in ("true", "yes", "1")
+
+    return _evaluate(expr, lambda: simple_eval(expr, names=_SAFE_NAMES, functions={}))
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class CompiledCondition:
+    """A condition expression normalized and parsed once.
+
+    Each ``{{path}}`` reference becomes a name (``_v0``, ``_v1``, ...) bound to
+    the variable's value at evaluation time, instead of its ``repr`` being
+    spliced into the source and the result re-parsed. Expressions that do not
+    fit this (a reference inside a string literal, a parse error, simpleeval
+    missing) have ``parsed=None`` and go through ``safe_eval`` as before, as
+    do evaluations where a referenced variable is unresolved.
+    """
+
+    expression: str
+    template: CompiledTemplate
+    # Variable path -> bound name.
+    names: dict[str, str]
+    source: str
+    parsed: Optional[Any]
+    evaluator: Optional[Any]
+
+    def evaluate(self, ctx: ExecutionContext) -> tuple[bool, str]:
+        """The branch taken and the resolved expression (for display)."""
+        values = {path: ctx.get_variable(path) for path in self.names}
+        resolved = self.template.render(values.__getitem__, repr)
+        if self.parsed is None or any(v is None for v in values.values()):
+            return safe_eval(resolved), resolved
+
+        evaluator = self.evaluator
+        evaluator.names = {
+            **_SAFE_NAMES,
+            **{self.names[path]: value for path, value in values.items()},
+        }
+        return (
+            _evaluate(resolved, lambda: evaluator.eval(self.source, self.parsed)),
+            resolved,
+        )
+
+
+def compile_condition(expression: str) -> CompiledCondition:
+    template = compile_template(expression)
+    names = {path: f"_v{i}" for i, path in enumerate(dict.fromkeys(template.paths))}
+    source = ""
+    parsed = evaluator = None
+    in_literal = any(
+        TEMPLATE_PATTERN.search(part)
+        for part in _STRING_LITERAL_RE.split(expression)[1::2]
+    )
+    if SimpleEval is not None and not in_literal:
+        source = _to_condition_source(template.render(names.get))
+        try:
+            parsed = SimpleEval.parse(source)
+        except Exception:
+            parsed = None
+        else:
+            evaluator = SimpleEval(names=dict(_SAFE_NAMES), functions={})
+    return CompiledCondition(expression, template, names, source, parsed, evaluator)
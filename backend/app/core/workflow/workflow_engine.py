@@ -4,19 +4,37 @@ Workflow execution engine.
 
 from __future__ import annotations
 
-import json
+import asyncio
 import logging
 import uuid
 from collections import deque
+from collections.abc import Iterable
 from datetime import datetime, timezone
-from typing import Any, AsyncGenerator, Optional
+from typing import Any, AsyncGenerator, Callable, Optional
 
+from app.core.config import settings
+
+from app.core.workflow.workflow_checkpoint import (
+    CheckpointWriter,
+    NullCheckpointWriter,
+    load_execution_state,
+)
 from app.core.workflow.workflow_context import ExecutionContext
+from app.core.workflow.workflow_memo import (
+    MemoOptions,
+    get_node_memo_cache,
+    memo_allowed,
+    memo_key,
+    memo_options,
+)
+from app.core.workflow.workflow_plan import WorkflowPlan, get_workflow_plan
+from app.core.workflow.workflow_trace import ExecutionTrace, load_trace
 from app.core.workflow.workflow_nodes import (
     execute_code_node,
     execute_condition_node,
     execute_end_node,
     execute_http_node,
+    execute_map_node,
     execute_knowledge_node,
     execute_llm_node,
     execute_skill_node,
@@ -26,64 +44,100 @@ from app.models.workflow import Workflow
 
 logger = logging.getLogger(__name__)
 
+# Events buffered from concurrently running nodes before they are paused.
+NODE_EVENT_BUFFER = 64
+_NODE_DONE = object()
+
+
+class _JoinTracker:
+    """In-degree bookkeeping for the parallel scheduler.
+
+    A node is ready once each of its join predecessors has finished or been
+    skipped and at least one of them activated it; a condition only activates
+    the targets of its taken branch. A node that can no longer be activated
+    is skipped, which in turn releases its successors.
+    """
+
+    def __init__(self, plan: WorkflowPlan):
+        self.plan = plan
+        self.pending = {k: set(v) for k, v in plan.join_predecessors.items()}
+        self.activated: set[str] = set(plan.start_nodes)
+
+    def finish(self, node_id: str, branch: Optional[str]) -> list[str]:
+        """Record that *node_id* ran; return the nodes that became ready."""
+        ready: list[str] = []
+        stack = [(node_id, set(self.plan.next_nodes(node_id, branch)))]
+        while stack:
+            source, taken = stack.pop()
+            for target in self.plan.next_nodes(source):
+                pending = self.pending.get(target)
+                if pending is None or source not in pending:
+                    continue
+                pending.discard(source)
+                if target in taken:
+                    self.activated.add(target)
+                if pending:
+                    continue
+                if target in self.activated:
+                    ready.append(target)
+                else:
+                    stack.append((target, set()))
+        return ready
+
+    def ready(self, done: Iterable[str]) -> list[str]:
+        """Activated nodes whose joins are satisfied, in plan order."""
+        done = set(done)
+        return [
+            node_id
+            for node_id in self.plan.order
+            if node_id in self.activated
+            and node_id not in done
+            and not self.pending.get(node_id, True)
+        ]
+
 
 class WorkflowEngine:
     """Workflow execution engine."""
 
     def __init__(self, workflow: Workflow):
         self.workflow = workflow
-        graph_data = workflow.graph_data
-        self.nodes: dict[str, dict[str, Any]] = {n["id"]: n for n in graph_data.nodes}
-        self.edges: list[dict[str, Any]] = graph_data.edges
-        self.adjacency = self._build_adjacency()
+        self.plan = get_workflow_plan(workflow)
+        self.nodes: dict[str, dict[str, Any]] = self.plan.nodes
+        self.edges: list[dict[str, Any]] = self.plan.edges
         self.last_executed_id: str | None = None
 
-    def _build_adjacency(self) -> dict[str, list[dict[str, Any]]]:
-        adjacency: dict[str, list[dict[str, Any]]] = {
-            node_id: [] for node_id in self.nodes
-        }
-        for edge in self.edges:
-            source = edge.get("source")
-            if source in adjacency:
-                adjacency[source].append(edge)
-        return adjacency
-
     def _has_cycle(self) -> bool:
-        """Detect cycles via DFS coloring (0=white, 1=gray, 2=black)."""
-        color: dict[str, int] = {nid: 0 for nid in self.nodes}
-
-        def dfs(nid: str) -> bool:
-            color[nid] = 1
-            for edge in self.adjacency.get(nid, []):
-                target = edge.get("target")
-                if not target or target not in color:
-                    continue
-                if color[target] == 1:
-                    return True
-                if color[target] == 0 and dfs(target):
-                    return True
-            color[nid] = 2
-            return False
-
-        return any(color[nid] == 0 and dfs(nid) for nid in self.nodes)
+        return self.plan.has_cycle
 
     def _get_next_nodes(self, node_id: str, branch: Optional[str]) -> list[str]:
-        outgoing = self.adjacency.get(node_id, [])
-        next_nodes = []
-        for edge in outgoing:
-            if branch and edge.get("sourceHandle") not in (None, branch):
-                continue
-            target = edge.get("target")
-            if target:
-                next_nodes.append(target)
-        return next_nodes
+        return list(self.plan.next_nodes(node_id, branch))
+
+    def _branch_of(self, node_id: str, ctx: ExecutionContext) -> Optional[str]:
+        if self.nodes[node_id].get("type") != "condition":
+            return None
+        return "true" if ctx.variables.get(f"{node_id}.__branch") else "false"
+
+    def _in_plan_order(self, node_ids: Iterable[str]) -> list[str]:
+        rank = self.plan.rank
+        return sorted(node_ids, key=lambda node_id: rank.get(node_id, len(rank)))
+
+    def _max_parallelism(self) -> int:
+        limit = settings().workflow_max_parallelism
+        if self.plan.max_parallelism is not None:
+            limit = min(limit, self.plan.max_parallelism)
+        return limit
 
     def _get_input_for_node(self, node_id: str, ctx: ExecutionContext) -> Any:
-        for edge in self.edges:
-            if edge.get("target") == node_id:
-                source_id = edge.get("source")
-                if source_id and source_id in ctx.step_outputs:
-                    return ctx.step_outputs[source_id]
+        for source_id in self.plan.predecessors.get(node_id, ()):
+            if source_id in ctx.step_outputs:
+                return ctx.step_outputs[source_id]
+        return ctx.variables.get("input", "")
+
+    def _input_ref(self, node_id: str, ctx: ExecutionContext) -> Any:
+        """Like ``_get_input_for_node`` but without reading spilled outputs."""
+        for source_id in self.plan.predecessors.get(node_id, ()):
+            if source_id in ctx.step_outputs:
+                return ctx.stored_output(source_id)
         return ctx.variables.get("input", "")
 
     async def _execute_node(
@@ -102,12 +156,15 @@ class WorkflowEngine:
                 n, ctx, self._get_input_for_node
             ),
             "condition": lambda n: execute_condition_node(
-                n, ctx, self._get_input_for_node
+                n, ctx, self._get_input_for_node, self.plan.conditions.get(n["id"])
             ),
             "end": lambda n: execute_end_node(n, ctx, self._get_input_for_node),
             "skill": lambda n: execute_skill_node(n, ctx, self._get_input_for_node),
             "http": lambda n: execute_http_node(n, ctx, self._get_input_for_node),
             "code": lambda n: execute_code_node(n, ctx, self._get_input_for_node),
+            "map": lambda n: execute_map_node(
+                n, ctx, self._get_input_for_node, self.workflow
+            ),
         }
         executor = executors.get(node_type)
         if not executor:
@@ -118,45 +175,72 @@ class WorkflowEngine:
             }
             return
 
+        options = memo_options(node)
+        # A disabled node runs its executor, which reports the disabled flag.
+        if options is not None and await memo_allowed(node):
+            async for event in self._execute_memoized(node, executor, ctx, options):
+                yield event
+            return
+
         async for event in executor(node):
             yield event
 
-    async def _save_checkpoint(
+    async def _execute_memoized(
         self,
-        execution_id: str,
+        node: dict[str, Any],
+        executor: Callable[[dict[str, Any]], AsyncGenerator[dict[str, Any], None]],
         ctx: ExecutionContext,
-        executed_nodes: set[str],
-        queue: deque[str],
-        status: str = "running",
-    ) -> None:
-        """Persist current execution state to the database."""
-        from app.core.database import AsyncSessionLocal
-        from sqlalchemy import select
-        from app.models.workflow_execution_db import WorkflowExecutionDB
+        options: MemoOptions,
+    ) -> AsyncGenerator[dict[str, Any], None]:
+        node_id = node["id"]
+        cache = get_node_memo_cache()
+        key = memo_key(node, ctx, self._input_ref(node_id, ctx))
+
+        entry = cache.get(key)
+        if entry is not None:
+            ctx.restore_output(node_id, entry.output)
+            yield {"type": "node_start", "node_id": node_id, "node_type": node["type"]}
+            yield {
+                "type": "thought",
+                "type_detail": "memo_hit",
+                "node_id": node_id,
+                "age_seconds": round(entry.age_seconds(), 3),
+            }
+            yield {
+                "type": "node_complete",
+                "node_id": node_id,
+                "output": ctx.step_outputs[node_id],
+                **entry.extra,
+            }
+            return
 
-        checkpoint = ctx.to_checkpoint()
-        now = datetime.now(timezone.utc)
+        complete: dict[str, Any] | None = None
+        failed = False
+        async for event in executor(node):
+            if event.get("type") == "node_error":
+                failed = True
+            elif event.get("type") == "node_complete":
+                complete = event
+            yield event
 
-        async with AsyncSessionLocal() as db:
-            result = await db.execute(
-                select(WorkflowExecutionDB).where(
-                    WorkflowExecutionDB.id == execution_id
-                )
-            )
-            row = result.scalar_one_or_none()
-            if row is None:
-                return
-            row.step_outputs_json = json.dumps(
-                checkpoint["step_outputs"], ensure_ascii=False
-            )
-            row.variables_json = json.dumps(
-                checkpoint["variables"], ensure_ascii=False
-            )
-            row.executed_nodes_json = json.dumps(list(executed_nodes))
-            row.queue_json = json.dumps(list(queue))
-            row.status = status
-            row.updated_at = now
-            await db.commit()
+        # Failures and HTTP error responses are not worth replaying.
+        if failed or complete is None or complete.get("status_code", 200) >= 400:
+            return
+        extra = {
+            k: v for k, v in complete.items() if k not in ("type", "node_id", "output")
+        }
+        cache.set(
+            (self.workflow.id, node_id), key, ctx.stored_output(node_id), extra, options
+        )
+
+    async def _traced_node(
+        self, node_id: str, ctx: ExecutionContext, trace: ExecutionTrace
+    ) -> AsyncGenerator[dict[str, Any], None]:
+        trace.start(node_id, self.nodes.get(node_id, {}).get("type", ""))
+        async for event in self._execute_node(node_id, ctx):
+            trace.observe(node_id, event, ctx)
+            yield event
+        trace.end(node_id)
 
     async def _create_execution_record(
         self,
@@ -213,7 +297,17 @@ class WorkflowEngine:
         model: str | None = None,
         conversation_history: list[dict[str, str]] | None = None,
         execution_id: str | None = None,
+        persist: bool = True,
+        execution_mode: str | None = None,
     ) -> AsyncGenerator[dict[str, Any], None]:
+        """Run the workflow, yielding its events.
+
+        With ``persist=False`` no execution record or checkpoints are
+        written, so the run cannot be resumed (used for batch rows, which
+        track their own progress). *execution_mode* replaces the
+        ``workflow_execution_mode`` setting as the scheduler used when the
+        workflow's start node does not pick one.
+        """
         if execution_id is None:
             execution_id = str(uuid.uuid4())
 
@@ -224,11 +318,7 @@ class WorkflowEngine:
             "execution_id": execution_id,
         }
 
-        start_nodes = [
-            node_id
-            for node_id, node in self.nodes.items()
-            if node.get("type") == "start"
-        ]
+        start_nodes = self.plan.start_nodes
         if not start_nodes:
             yield {"type": "workflow_error", "error": "Workflow has no start node"}
             return
@@ -237,9 +327,10 @@ class WorkflowEngine:
             yield {"type": "workflow_error", "error": "Workflow contains a cycle"}
             return
 
-        await self._create_execution_record(
-            execution_id, initial_input, user_id, model
-        )
+        if persist:
+            await self._create_execution_record(
+                execution_id, initial_input, user_id, model
+            )
 
         ctx = ExecutionContext(
             initial_input,
@@ -249,65 +340,165 @@ class WorkflowEngine:
         )
         queue = deque(start_nodes)
         executed: set[str] = set()
+        trace = ExecutionTrace(self.plan.predecessors)
 
-        async for event in self._run_bfs(execution_id, ctx, queue, executed):
+        checkpoints = (
+            CheckpointWriter(execution_id, ctx, self.plan, trace=trace)
+            if persist
+            else NullCheckpointWriter(ctx, self.plan)
+        )
+        async for event in self._run(
+            checkpoints, ctx, queue, executed, trace, execution_mode
+        ):
             yield event
 
+    def _run(
+        self,
+        checkpoints: CheckpointWriter,
+        ctx: ExecutionContext,
+        queue: deque[str],
+        executed: set[str],
+        trace: ExecutionTrace,
+        default_mode: str | None = None,
+    ) -> AsyncGenerator[dict[str, Any], None]:
+        mode = (
+            self.plan.execution_mode
+            or default_mode
+            or settings().workflow_execution_mode
+        )
+        if mode == "sequential":
+            return self._run_bfs(checkpoints, ctx, queue, executed, trace)
+        return self._run_parallel(checkpoints, ctx, executed, trace)
+
     async def _run_bfs(
         self,
-        execution_id: str,
+        checkpoints: CheckpointWriter,
         ctx: ExecutionContext,
         queue: deque[str],
         executed: set[str],
+        trace: ExecutionTrace,
     ) -> AsyncGenerator[dict[str, Any], None]:
         """Run the BFS traversal loop with checkpoint persistence."""
+        trace.queued(queue)
         try:
             while queue:
                 node_id = queue.popleft()
                 if node_id in executed:
                     continue
 
-                async for event in self._execute_node(node_id, ctx):
+                async for event in self._traced_node(node_id, ctx, trace):
                     yield event
                     if event.get("type") == "node_error":
-                        await self._save_checkpoint(
-                            execution_id, ctx, executed, queue, status="failed"
-                        )
+                        await checkpoints.finish("failed", executed, queue)
                         yield {"type": "workflow_error", "error": event.get("error")}
                         return
                     if event.get("type") == "workflow_complete":
-                        await self._update_execution_status(
-                            execution_id, "completed"
-                        )
+                        await checkpoints.finish("completed", executed, queue)
                         return
 
                 executed.add(node_id)
                 self.last_executed_id = node_id
-                node_type = self.nodes[node_id].get("type")
-                branch = None
-                if node_type == "condition":
-                    branch = (
-                        "true"
-                        if ctx.variables.get(f"{node_id}.__branch")
-                        else "false"
-                    )
+                branch = self._branch_of(node_id, ctx)
 
                 for next_id in self._get_next_nodes(node_id, branch):
                     if next_id not in executed:
                         queue.append(next_id)
+                        trace.queued((next_id,))
 
-                await self._save_checkpoint(
-                    execution_id, ctx, executed, queue
-                )
+                with trace.checkpoint(node_id):
+                    await checkpoints.step(node_id, executed, queue)
+
+            final_output = None
+            if self.last_executed_id:
+                final_output = ctx.step_outputs.get(self.last_executed_id)
+            await checkpoints.finish("completed", executed, queue)
+            yield {"type": "workflow_complete", "final_output": final_output}
+        except Exception:
+            await checkpoints.finish("failed", executed, queue)
+            raise
+
+    async def _run_parallel(
+        self,
+        checkpoints: CheckpointWriter,
+        ctx: ExecutionContext,
+        executed: set[str],
+        trace: ExecutionTrace,
+    ) -> AsyncGenerator[dict[str, Any], None]:
+        """Run independent nodes concurrently, joining on all predecessors.
+
+        Node events are merged into one stream, each tagged with its
+        ``node_id``. Checkpoints list nodes in plan order, so the persisted
+        state does not depend on which concurrent node finished first. On
+        resume the join state is rebuilt from the executed nodes and the
+        recorded condition branches; the stored queue is informational.
+        """
+        tracker = _JoinTracker(self.plan)
+        for node_id in self._in_plan_order(executed):
+            if node_id in self.nodes:
+                tracker.finish(node_id, self._branch_of(node_id, ctx))
+        ready = tracker.ready(executed)
+        trace.queued(ready)
+        running: dict[str, asyncio.Task[None]] = {}
+        events: asyncio.Queue[tuple[str, Any]] = asyncio.Queue(NODE_EVENT_BUFFER)
+        max_parallelism = self._max_parallelism()
+
+        async def run_node(node_id: str) -> None:
+            try:
+                async for event in self._traced_node(node_id, ctx, trace):
+                    await events.put((node_id, event))
+            except Exception as exc:
+                await events.put((node_id, exc))
+            else:
+                await events.put((node_id, _NODE_DONE))
+
+        def pending_nodes() -> list[str]:
+            return self._in_plan_order([*running, *ready])
+
+        try:
+            while ready or running:
+                while ready and len(running) < max_parallelism:
+                    node_id = ready.pop(0)
+                    running[node_id] = asyncio.create_task(run_node(node_id))
+
+                node_id, item = await events.get()
+                if isinstance(item, Exception):
+                    raise item
+
+                if item is _NODE_DONE:
+                    del running[node_id]
+                    executed.add(node_id)
+                    released = tracker.finish(node_id, self._branch_of(node_id, ctx))
+                    trace.queued(released)
+                    ready = self._in_plan_order([*ready, *released])
+                    with trace.checkpoint(node_id):
+                        await checkpoints.step(node_id, executed, pending_nodes())
+                    continue
 
+                event = item
+                event.setdefault("node_id", node_id)
+                yield event
+                if event.get("type") == "node_error":
+                    await checkpoints.finish("failed", executed, pending_nodes())
+                    yield {"type": "workflow_error", "error": event.get("error")}
+                    return
+                if event.get("type") == "workflow_complete":
+                    await checkpoints.finish("completed", executed, pending_nodes())
+                    return
+
+            if executed:
+                self.last_executed_id = self._in_plan_order(executed)[-1]
             final_output = None
             if self.last_executed_id:
                 final_output = ctx.step_outputs.get(self.last_executed_id)
-            await self._update_execution_status(execution_id, "completed")
+            await checkpoints.finish("completed", executed, [])
             yield {"type": "workflow_complete", "final_output": final_output}
         except Exception:
-            await self._update_execution_status(execution_id, "failed")
+            await checkpoints.finish("failed", executed, pending_nodes())
             raise
+        finally:
+            for task in running.values():
+                task.cancel()
+            await asyncio.gather(*running.values(), return_exceptions=True)
 
     @classmethod
     async def resume(
@@ -317,7 +508,6 @@ class WorkflowEngine:
         from app.core.database import AsyncSessionLocal
         from sqlalchemy import select
         from app.models.workflow_execution_db import WorkflowExecutionDB
-        from app.models.workflow_db import WorkflowDB
 
         async with AsyncSessionLocal() as db:
             result = await db.execute(
@@ -341,27 +531,22 @@ class WorkflowEngine:
             }
             return
 
-        async with AsyncSessionLocal() as db:
-            result = await db.execute(
-                select(WorkflowDB).where(WorkflowDB.id == exec_row.workflow_id)
-            )
-            wf_row = result.scalar_one_or_none()
+        from app.api.workflow import load_workflow
 
-        if wf_row is None:
+        workflow = await load_workflow(exec_row.workflow_id)
+        if workflow is None:
             yield {
                 "type": "workflow_error",
                 "error": f"Workflow {exec_row.workflow_id} not found",
             }
             return
 
-        from app.api.workflow import _row_to_workflow_model
-
-        workflow = _row_to_workflow_model(wf_row)
         engine = cls(workflow)
 
+        state = await load_execution_state(exec_row)
         checkpoint_data = {
-            "step_outputs": json.loads(exec_row.step_outputs_json),
-            "variables": json.loads(exec_row.variables_json),
+            "step_outputs": state.step_outputs,
+            "variables": state.variables,
             "conversation_history": [],
         }
         user_id = int(exec_row.user_id) if exec_row.user_id else None
@@ -371,8 +556,23 @@ class WorkflowEngine:
             user_id=user_id,
             model=exec_row.model,
         )
-        executed = set(json.loads(exec_row.executed_nodes_json))
-        queue = deque(json.loads(exec_row.queue_json))
+        executed = set(state.executed_nodes)
+        # Nothing recorded yet (e.g. the on_failure policy): start over.
+        queue = deque(state.queue or ([] if executed else engine.plan.start_nodes))
+        stored_trace = await load_trace(execution_id)
+        trace = (
+            ExecutionTrace.from_json(stored_trace, engine.plan.predecessors)
+            if stored_trace
+            else ExecutionTrace(engine.plan.predecessors)
+        )
+        checkpoints = CheckpointWriter(
+            execution_id,
+            ctx,
+            engine.plan,
+            next_seq=state.next_seq,
+            pending_steps=state.pending_steps,
+            trace=trace,
+        )
 
         await engine._update_execution_status(execution_id, "running")
 
@@ -384,5 +584,5 @@ class WorkflowEngine:
             "resumed": True,
         }
 
-        async for event in engine._run_bfs(execution_id, ctx, queue, executed):
+        async for event in engine._run(checkpoints, ctx, queue, executed, trace):
             yield event
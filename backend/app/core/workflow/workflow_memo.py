@@ -0,0 +1,199 @@
+"""
+Opt-in memoization of deterministic workflow nodes.
+
+A node with ``memoize: true`` in its ``data`` reuses the output of an earlier
+run when its type, template-resolved configuration, input and caller are the
+same. ``memoizeTtlSeconds`` and ``memoizeMaxEntries`` bound how long and how
+many results are kept for that node. Only nodes without side effects
+qualify: knowledge, code, HTTP GET and temperature-0 LLM nodes. Code and
+HTTP results are not served while their feature flag is off.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Optional
+
+from app.core.config import settings
+from app.core.feature_flags import is_feature_enabled
+from app.core.workflow.workflow_context import ExecutionContext
+
+MEMO_OPTION_KEYS = ("memoize", "memoizeTtlSeconds", "memoizeMaxEntries")
+
+# Node types gated by a feature flag, which a memo hit must not bypass.
+_NODE_FEATURE_FLAGS = {"code": "ENABLE_CODE_NODE", "http": "ENABLE_HTTP_NODE"}
+
+
+@dataclass(frozen=True, slots=True)
+class MemoOptions:
+    ttl_seconds: float
+    max_entries: int
+
+
+@dataclass(slots=True)
+class MemoEntry:
+    scope: tuple[str, str]
+    created_at: float
+    expires_at: float
+    # ExecutionContext.stored_output() form: spilled outputs stay on disk.
+    output: Any
+    # Extra node_complete fields, e.g. the HTTP status code.
+    extra: dict[str, Any]
+
+    def age_seconds(self) -> float:
+        return time.monotonic() - self.created_at
+
+
+def _is_memoizable(node: dict[str, Any]) -> bool:
+    data = node.get("data", {})
+    node_type = node.get("type")
+    if node_type in ("knowledge", "code"):
+        return True
+    if node_type == "http":
+        return str(data.get("method", "GET")).upper() == "GET"
+    if node_type == "llm":
+        try:
+            return float(data.get("temperature", 0.7)) == 0
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def memo_options(node: dict[str, Any]) -> Optional[MemoOptions]:
+    """Memoization options of *node*, or None if it is not memoized."""
+    data = node.get("data", {})
+    if data.get("memoize") is not True or not _is_memoizable(node):
+        return None
+    s = settings()
+    ttl = data.get("memoizeTtlSeconds")
+    max_entries = data.get("memoizeMaxEntries")
+    return MemoOptions(
+        ttl_seconds=(
+            float(ttl)
+            if isinstance(ttl, (int, float)) and ttl > 0
+            else s.workflow_memo_ttl_seconds
+        ),
+        max_entries=(
+            min(max_entries, s.workflow_memo_max_entries)
+            if type(max_entries) is int and max_entries >= 1
+            else s.workflow_memo_max_entries
+        ),
+    )
+
+
+def _resolve(value: Any, ctx: ExecutionContext) -> Any:
+    if isinstance(value, str):
+        return ctx.resolve_template(value)
+    if isinstance(value, dict):
+        return {str(k): _resolve(v, ctx) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_resolve(v, ctx) for v in value]
+    return value
+
+
+async def memo_allowed(node: dict[str, Any]) -> bool:
+    """Whether the node's feature is enabled, so its memo may be used."""
+    flag = _NODE_FEATURE_FLAGS.get(node.get("type", ""))
+    return flag is None or await is_feature_enabled(flag)
+
+
+def memo_key(node: dict[str, Any], ctx: ExecutionContext, input_ref: Any) -> str:
+    """Digest of everything the node's output depends on.
+
+    *input_ref* is the stored form of the node input, so a spilled input is
+    identified by its content hash without being read back.
+    """
+    data = {
+        key: value
+        for key, value in node.get("data", {}).items()
+        if key not in MEMO_OPTION_KEYS
+    }
+    payload: dict[str, Any] = {
+        "type": node.get("type"),
+        "config": _resolve(data, ctx),
+        "input": input_ref,
+        "user_id": ctx.user_id,
+    }
+    if node.get("type") == "llm":
+        payload["model"] = data.get("model") or ctx.model
+        if data.get("inheritChatHistory"):
+            payload["history"] = ctx.conversation_history
+    raw = json.dumps(
+        payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class NodeMemoCache:
+    """LRU of node results with per-entry TTL and a per-node entry limit."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max(1, int(max_entries))
+        self._entries: OrderedDict[str, MemoEntry] = OrderedDict()
+        # Keys per (workflow_id, node_id), least recently used first.
+        self._scopes: dict[tuple[str, str], OrderedDict[str, None]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        keys = self._scopes[entry.scope]
+        del keys[key]
+        if not keys:
+            del self._scopes[entry.scope]
+
+    def get(self, key: str) -> Optional[MemoEntry]:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= time.monotonic():
+            self._evict(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self._scopes[entry.scope].move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def set(
+        self,
+        scope: tuple[str, str],
+        key: str,
+        output: Any,
+        extra: dict[str, Any],
+        options: MemoOptions,
+    ) -> None:
+        if key in self._entries:
+            self._evict(key)
+        now = time.monotonic()
+        self._entries[key] = MemoEntry(
+            scope, now, now + options.ttl_seconds, output, extra
+        )
+        keys = self._scopes.setdefault(scope, OrderedDict())
+        keys[key] = None
+        while len(keys) > options.max_entries:
+            self._evict(next(iter(keys)))
+        while len(self._entries) > self.max_entries:
+            self._evict(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._scopes.clear()
+
+    def stored_outputs(self) -> list[Any]:
+        """Outputs of all entries, in stored form (expired ones included)."""
+        return [entry.output for entry in list(self._entries.values())]
+
+
+@lru_cache(maxsize=1)
+def get_node_memo_cache() -> NodeMemoCache:
+    """Get the process-wide node memo cache."""
+    return NodeMemoCache(settings().workflow_memo_max_entries)
@@ -0,0 +1,69 @@
+"""
+Cache of parsed workflow models.
+
+Turning a ``workflows`` row into a ``Workflow`` (``json.loads`` of the graph
+plus Pydantic validation) costs far more than checking whether a cached copy
+is current, so models are cached per ``(workflow_id, updated_at)``: callers
+read only the row's ``updated_at`` (with their ownership filter) and load and
+parse the full row on a miss, see ``app.api.workflow.load_workflow``. Every
+write bumps ``updated_at``, so a stale model is never served even by another
+worker; the write handlers also invalidate entries so old versions do not
+linger. Cached models are shared between requests and must not be mutated.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+
+from app.core.config import settings
+from app.models.workflow import Workflow
+
+
+class WorkflowModelCache:
+    """LRU cache of workflow models keyed by ``(workflow_id, updated_at)``."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._models: OrderedDict[tuple[str, datetime], Workflow] = OrderedDict()
+
+    def get(self, workflow_id: str, updated_at: datetime) -> Optional[Workflow]:
+        key = (workflow_id, updated_at)
+        workflow = self._models.get(key)
+        if workflow is not None:
+            self._models.move_to_end(key)
+        return workflow
+
+    def put(self, workflow: Workflow) -> None:
+        # An older version of the workflow can never be requested again.
+        self.invalidate(workflow.id)
+        self._models[(workflow.id, workflow.updated_at)] = workflow
+        while len(self._models) > self.max_entries:
+            self._models.popitem(last=False)
+
+    def invalidate(self, workflow_id: str) -> None:
+        for key in [key for key in self._models if key[0] == workflow_id]:
+            del self._models[key]
+
+    def clear(self) -> None:
+        self._models.clear()
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+
+_model_cache: Optional[WorkflowModelCache] = None
+
+
+def get_workflow_model_cache() -> WorkflowModelCache:
+    global _model_cache
+    if _model_cache is None:
+        _model_cache = WorkflowModelCache(settings().workflow_model_cache_size)
+    return _model_cache
+
+
+def invalidate_workflow_model(workflow_id: str) -> None:
+    """Drop cached models of a workflow (call after writing it)."""
+    if _model_cache is not None:
+        _model_cache.invalidate(workflow_id)
@@ -4,12 +4,15 @@ Workflow node execution helpers.
 
 from __future__ import annotations
 
-import json
 import logging
 import asyncio
+import json
+import time
+from contextvars import ContextVar
 from typing import Any, AsyncGenerator, Callable
 
 import httpx
+from pydantic import ValidationError
 
 from app.core.config import settings
 from app.core.feature_flags import is_feature_enabled
@@ -18,8 +21,14 @@ from app.core.paths import SKILLS_DIR
 from app.core.rag import get_rag_pipeline
 from app.core.skill.skill_executor import get_skill_executor
 from app.core.skill.skill_loader import SkillLoader
-from app.core.workflow.workflow_context import ExecutionContext, safe_eval
+from app.core.workflow.workflow_context import (
+    CompiledCondition,
+    ExecutionContext,
+    compile_condition,
+)
+from app.models.workflow import GraphData, Workflow
 from app.utils.code_sandbox import execute_python
+from app.utils.sse import CitationEvent, DoneEvent, ThoughtEvent, TokenEvent
 from app.utils.ssrf_guard import create_ssrf_safe_client, ensure_url_safe
 
 logger = logging.getLogger(__name__)
@@ -75,6 +84,7 @@ async def execute_llm_node(
     temperature = data.get("temperature", 0.7)
     target_model = data.get("model") or ctx.model
     inherit_chat_history = bool(data.get("inheritChatHistory", False))
+    cache_response = bool(data.get("cacheResponse", False))
 
     if skill_name:
         try:
@@ -129,6 +139,8 @@ async def execute_llm_node(
             model=target_model,
             temperature=temperature,
             user_id=ctx.user_id,
+            # Only deterministic generations are safe to replay.
+            cache=cache_response and float(temperature) == 0,
         ):
             output += token
             yield {"type": "token", "node_id": node_id, "content": token}
@@ -200,15 +212,18 @@ async def execute_knowledge_node(
 
 
 async def execute_condition_node(
-    node: dict[str, Any], ctx: ExecutionContext, get_input: GetInput
+    node: dict[str, Any],
+    ctx: ExecutionContext,
+    get_input: GetInput,
+    compiled: CompiledCondition | None = None,
 ) -> AsyncGenerator[dict[str, Any], None]:
     node_id = node["id"]
     yield {"type": "node_start", "node_id": node_id, "node_type": "condition"}
 
-    data = node.get("data", {})
-    expression = data.get("expression", "true")
-    resolved = ctx.resolve_expression(expression)
-    result = safe_eval(resolved)
+    if compiled is None:
+        data = node.get("data", {})
+        compiled = compile_condition(str(data.get("expression", "true")))
+    result, resolved = compiled.evaluate(ctx)
 
     # Store boolean for branch routing (used by engine)
     ctx.variables[f"{node_id}.__branch"] = result
@@ -311,43 +326,29 @@ async def execute_skill_node(
     output_parts = []
 
     try:
-        async for event_str in executor.execute(skill, inputs):
-            # Parse SSE event string
-            lines = event_str.strip().split("\n")
-            event_type = None
-            event_data = {}
-
-            for line in lines:
-                if line.startswith("event: "):
-                    event_type = line[7:].strip()
-                elif line.startswith("data: "):
-                    try:
-                        event_data = json.loads(line[6:])
-                    except Exception:
-                        event_data = {"content": line[6:]}
-
-            if event_type == "token" and "content" in event_data:
-                output_parts.append(event_data["content"])
+        async for event in executor.execute(skill, inputs):
+            if isinstance(event, TokenEvent):
+                output_parts.append(event.content)
                 yield {
                     "type": "token",
                     "node_id": node_id,
-                    "content": event_data["content"],
+                    "content": event.content,
                 }
-            elif event_type == "thought":
+            elif isinstance(event, ThoughtEvent):
                 yield {
                     "type": "thought",
-                    "type_detail": event_data.get("type", "skill_execution"),
+                    "type_detail": event.data.get("type", "skill_execution"),
                     "node_id": node_id,
-                    **{k: v for k, v in event_data.items() if k != "type"},
+                    **{k: v for k, v in event.data.items() if k != "type"},
                 }
-            elif event_type == "citation":
-                yield {"type": "citation", "node_id": node_id, **event_data}
-            elif event_type == "done":
-                if event_data.get("status") == "error":
+            elif isinstance(event, CitationEvent):
+                yield {"type": "citation", "node_id": node_id, "sources": event.sources}
+            elif isinstance(event, DoneEvent):
+                if event.status == "error":
                     yield {
                         "type": "node_error",
                         "node_id": node_id,
-                        "error": event_data.get("message", "Skill execution failed"),
+                        "error": event.message or "Skill execution failed",
                     }
                     ctx.set_output(node_id, "")
                     return
@@ -540,3 +541,184 @@ async def execute_code_node(
     output = result.stdout.strip()
     ctx.set_output(node_id, output)
     yield {"type": "node_complete", "node_id": node_id, "output": output}
+
+
+# Nesting depth of map node sub-runs, guarding against recursive workflows.
+_map_depth: ContextVar[int] = ContextVar("workflow_map_depth", default=0)
+MAX_MAP_DEPTH = 3
+
+
+def _map_items(value: Any, items_path: str) -> list[Any] | None:
+    """The list a map node iterates over, or None if *value* holds none.
+
+    Strings are parsed as JSON when possible; other text maps over its
+    non-empty lines.
+    """
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            if items_path:
+                return None
+            return [line for line in value.splitlines() if line.strip()]
+    if items_path:
+        value = _extract_json_path(value, items_path)
+    return value if isinstance(value, list) else None
+
+
+def _root_id(workflow: Workflow) -> str:
+    """The saved workflow an inline map sub-graph belongs to."""
+    return workflow.id.split("#", 1)[0]
+
+
+async def _map_sub_workflow(
+    node: dict[str, Any], ctx: ExecutionContext, parent: Workflow
+) -> Workflow | None:
+    data = node.get("data", {})
+    graph = data.get("graph")
+    if isinstance(graph, dict):
+        # Scoped to the parent's version so the compiled plan is cached.
+        return Workflow(
+            id=f"{parent.id}#{node['id']}",
+            name=f"{parent.name} / {node['id']}",
+            graph_data=GraphData.model_validate(graph),
+            created_at=parent.created_at,
+            updated_at=parent.updated_at,
+        )
+
+    workflow_id = data.get("workflowId")
+    if not workflow_id:
+        return None
+    from app.api.workflow import load_workflow, workflow_owner
+
+    workflow = await load_workflow(str(workflow_id), user_id=ctx.user_id)
+    if workflow is None or ctx.user_id is not None:
+        return workflow
+    # Anonymous runs (public embeds) have no user to filter by: only the
+    # parent workflow owner's workflows and shared ones are visible.
+    owner = await workflow_owner(workflow.id)
+    if owner is not None and owner != await workflow_owner(_root_id(parent)):
+        return None
+    return workflow
+
+
+async def execute_map_node(
+    node: dict[str, Any],
+    ctx: ExecutionContext,
+    get_input: GetInput,
+    parent: Workflow,
+) -> AsyncGenerator[dict[str, Any], None]:
+    """Run a sub-graph once per item of a list and collect the outputs.
+
+    ``data``: ``graph`` (inline ``{nodes, edges}``) or ``workflowId``;
+    ``itemsPath`` (JSON path into the input); ``maxConcurrency``;
+    ``failFast`` (default true: stop at the first failed item).
+    The output is the JSON array of item outputs, in item order.
+    """
+    from app.core.workflow.workflow_engine import WorkflowEngine
+
+    node_id = node["id"]
+    yield {"type": "node_start", "node_id": node_id, "node_type": "map"}
+
+    def fail(error: str) -> dict[str, Any]:
+        ctx.set_output(node_id, "")
+        return {"type": "node_error", "node_id": node_id, "error": error}
+
+    if _map_depth.get() >= MAX_MAP_DEPTH:
+        yield fail(f"Map nodes nested deeper than {MAX_MAP_DEPTH} levels")
+        return
+
+    data = node.get("data", {})
+    s = settings()
+    items = _map_items(get_input(node_id, ctx), str(data.get("itemsPath", "")).strip())
+    if items is None:
+        yield fail("Map input is not a list")
+        return
+    if len(items) > s.workflow_map_max_items:
+        yield fail(f"Map input exceeds {s.workflow_map_max_items} items")
+        return
+
+    try:
+        sub_workflow = await _map_sub_workflow(node, ctx, parent)
+    except ValidationError as exc:
+        # Inline graphs are not validated when the workflow is saved.
+        yield fail(f"Invalid map sub-graph: {exc.errors()[0]['msg']}")
+        return
+    if sub_workflow is None:
+        yield fail("Map sub-workflow not found")
+        return
+
+    concurrency = data.get("maxConcurrency")
+    if type(concurrency) is not int or concurrency < 1:
+        concurrency = s.workflow_map_max_concurrency
+    concurrency = min(concurrency, s.workflow_map_max_concurrency)
+    fail_fast = data.get("failFast", True) is not False
+
+    events: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+    results: list[Any] = [None] * len(items)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_item(index: int, item: Any) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            output: Any = None
+            error: str | None = "Sub-workflow finished without output"
+            item_input = (
+                item if isinstance(item, str) else json.dumps(item, ensure_ascii=False)
+            )
+            try:
+                async for event in WorkflowEngine(sub_workflow).execute(
+                    item_input, user_id=ctx.user_id, model=ctx.model, persist=False
+                ):
+                    if event["type"] == "workflow_complete":
+                        output, error = event.get("final_output"), None
+                    elif event["type"] == "workflow_error":
+                        error = str(event.get("error"))
+            except Exception as exc:
+                logger.warning("Map item %d of node '%s' failed", index, node_id)
+                error = str(exc)
+            results[index] = output
+            item_event = {
+                "type": "map_item",
+                "node_id": node_id,
+                "index": index,
+                "status": "failed" if error is not None else "completed",
+                "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+            }
+            if error is not None:
+                item_event["error"] = error
+            events.put_nowait(item_event)
+
+    token = _map_depth.set(_map_depth.get() + 1)
+    try:
+        tasks = [
+            asyncio.create_task(run_item(index, item))
+            for index, item in enumerate(items)
+        ]
+    finally:
+        _map_depth.reset(token)
+
+    failed: list[int] = []
+    try:
+        for _ in items:
+            item_event = await events.get()
+            yield item_event
+            if item_event["status"] == "failed":
+                failed.append(item_event["index"])
+                if fail_fast:
+                    yield fail(
+                        f"Map item {item_event['index']} failed: {item_event['error']}"
+                    )
+                    return
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    output = json.dumps(results, ensure_ascii=False)
+    ctx.set_output(node_id, output)
+    yield {
+        "type": "node_complete",
+        "node_id": node_id,
+        "output": output,
+        "failed_items": failed,
+    }
@@ -0,0 +1,261 @@
+"""
+Compiled workflow execution plans.
+
+Compiling a workflow graph (node index, successor and predecessor lists,
+topological order, cycle check, node schema validation, condition
+expressions) is pure work on the graph, so the result is cached per ``(workflow_id, updated_at)`` and shared by
+every run of the same workflow version. ``app.api.workflow`` invalidates a
+workflow's plans when it is updated or deleted.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Optional
+
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.core.workflow.workflow_context import CompiledCondition, compile_condition
+from app.models.workflow import NodeSchema, Workflow, parse_workflow_nodes
+
+# Branches a condition node can take; see ``execute_condition_node``.
+CONDITION_BRANCHES = ("true", "false")
+EXECUTION_MODES = ("parallel", "sequential")
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class WorkflowPlan:
+    """Immutable, precomputed view of a workflow graph."""
+
+    workflow_id: str
+    updated_at: datetime
+    nodes: dict[str, dict[str, Any]]
+    edges: list[dict[str, Any]]
+    start_nodes: tuple[str, ...]
+    # Topological order of the nodes; partial when the graph has a cycle.
+    order: tuple[str, ...]
+    has_cycle: bool
+    # Position of each node in ``order`` (nodes on a cycle come last).
+    rank: dict[str, int]
+    # Sources of each node's incoming edges, in edge order.
+    predecessors: dict[str, tuple[str, ...]]
+    # Distinct predecessors a node joins on in parallel runs: those reachable
+    # from a start node. Start nodes never wait.
+    join_predecessors: dict[str, frozenset[str]]
+    # Successors per node and branch; the ``None`` branch follows every edge.
+    branches: dict[str, dict[Optional[str], tuple[str, ...]]]
+    # Validated node models, or the validation errors when the graph is invalid.
+    node_models: Optional[dict[str, NodeSchema]]
+    validation_errors: Optional[list[dict[str, Any]]]
+    # Per-workflow scheduler options from the start node's data
+    # (``executionMode``, ``maxParallelism``); None means the global default.
+    execution_mode: Optional[str]
+    max_parallelism: Optional[int]
+    # Raw ``checkpoint*`` keys of the start node's data, see
+    # ``workflow_checkpoint.resolve_checkpoint_policy``.
+    checkpoint_options: dict[str, Any]
+    # Compiled ``expression`` of each condition node.
+    conditions: dict[str, CompiledCondition]
+
+    def next_nodes(self, node_id: str, branch: Optional[str] = None) -> tuple[str, ...]:
+        by_branch = self.branches.get(node_id)
+        if not by_branch:
+            return ()
+        return by_branch.get(branch, by_branch[None])
+
+
+def compile_workflow(workflow: Workflow) -> WorkflowPlan:
+    """Build the execution plan of *workflow* (uncached)."""
+    graph_data = workflow.graph_data
+    nodes: dict[str, dict[str, Any]] = {n["id"]: n for n in graph_data.nodes}
+    edges: list[dict[str, Any]] = graph_data.edges
+
+    outgoing: dict[str, list[dict[str, Any]]] = {node_id: [] for node_id in nodes}
+    predecessors: dict[str, list[str]] = {node_id: [] for node_id in nodes}
+    for edge in edges:
+        source = edge.get("source")
+        target = edge.get("target")
+        if source in outgoing:
+            outgoing[source].append(edge)
+        if target in predecessors and source:
+            predecessors[target].append(source)
+
+    branches: dict[str, dict[Optional[str], tuple[str, ...]]] = {}
+    for node_id, node_edges in outgoing.items():
+        by_branch = {None: tuple(e["target"] for e in node_edges if e.get("target"))}
+        if nodes[node_id].get("type") == "condition":
+            for branch in CONDITION_BRANCHES:
+                by_branch[branch] = tuple(
+                    e["target"]
+                    for e in node_edges
+                    if e.get("target") and e.get("sourceHandle") in (None, branch)
+                )
+        branches[node_id] = by_branch
+
+    order = _topological_order(nodes, branches)
+    start_nodes = tuple(
+        node_id for node_id, node in nodes.items() if node.get("type") == "start"
+    )
+    execution_mode, max_parallelism = _execution_options(nodes, start_nodes)
+    checkpoint_options: dict[str, Any] = {}
+    for node_id in reversed(start_nodes):
+        data = nodes[node_id].get("data") or {}
+        checkpoint_options.update(
+            (key, value) for key, value in data.items() if key.startswith("checkpoint")
+        )
+
+    node_models: Optional[dict[str, NodeSchema]] = None
+    validation_errors: Optional[list[dict[str, Any]]] = None
+    try:
+        models = parse_workflow_nodes(graph_data.nodes)
+        node_models = {model.id: model for model in models}
+    except ValidationError as exc:
+        validation_errors = exc.errors()
+
+    return WorkflowPlan(
+        workflow_id=workflow.id,
+        updated_at=workflow.updated_at,
+        nodes=nodes,
+        edges=edges,
+        start_nodes=start_nodes,
+        order=order,
+        has_cycle=len(order) < len(nodes),
+        rank={
+            **{node_id: len(order) for node_id in nodes},
+            **{node_id: i for i, node_id in enumerate(order)},
+        },
+        predecessors={k: tuple(v) for k, v in predecessors.items()},
+        join_predecessors=_join_predecessors(start_nodes, predecessors, branches),
+        branches=branches,
+        node_models=node_models,
+        validation_errors=validation_errors,
+        execution_mode=execution_mode,
+        max_parallelism=max_parallelism,
+        checkpoint_options=checkpoint_options,
+        conditions={
+            node_id: compile_condition(
+                str(node.get("data", {}).get("expression", "true"))
+            )
+            for node_id, node in nodes.items()
+            if node.get("type") == "condition"
+        },
+    )
+
+
+def _join_predecessors(
+    start_nodes: tuple[str, ...],
+    predecessors: dict[str, list[str]],
+    branches: dict[str, dict[Optional[str], tuple[str, ...]]],
+) -> dict[str, frozenset[str]]:
+    reachable = set(start_nodes)
+    stack = list(start_nodes)
+    while stack:
+        for target in branches[stack.pop()][None]:
+            if target in branches and target not in reachable:
+                reachable.add(target)
+                stack.append(target)
+    return {
+        node_id: (
+            frozenset()
+            if node_id in start_nodes
+            else frozenset(p for p in predecessors[node_id] if p in reachable)
+        )
+        for node_id in reachable
+    }
+
+
+def _execution_options(
+    nodes: dict[str, dict[str, Any]], start_nodes: tuple[str, ...]
+) -> tuple[Optional[str], Optional[int]]:
+    execution_mode: Optional[str] = None
+    max_parallelism: Optional[int] = None
+    for node_id in start_nodes:
+        data = nodes[node_id].get("data") or {}
+        mode = data.get("executionMode")
+        if execution_mode is None and mode in EXECUTION_MODES:
+            execution_mode = mode
+        limit = data.get("maxParallelism")
+        if max_parallelism is None and type(limit) is int and limit >= 1:
+            max_parallelism = limit
+    return execution_mode, max_parallelism
+
+
+def _topological_order(
+    nodes: dict[str, dict[str, Any]],
+    branches: dict[str, dict[Optional[str], tuple[str, ...]]],
+) -> tuple[str, ...]:
+    """Kahn's algorithm; nodes on or behind a cycle are left out."""
+    in_degree = {node_id: 0 for node_id in nodes}
+    for by_branch in branches.values():
+        for target in by_branch[None]:
+            if target in in_degree:
+                in_degree[target] += 1
+
+    ready = deque(node_id for node_id, degree in in_degree.items() if degree == 0)
+    order: list[str] = []
+    while ready:
+        node_id = ready.popleft()
+        order.append(node_id)
+        for target in branches[node_id][None]:
+            if target in in_degree:
+                in_degree[target] -= 1
+                if in_degree[target] == 0:
+                    ready.append(target)
+    return tuple(order)
+
+
+class WorkflowPlanCache:
+    """LRU cache of compiled plans keyed by ``(workflow_id, updated_at)``."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._plans: OrderedDict[tuple[str, datetime], WorkflowPlan] = OrderedDict()
+
+    def get(self, workflow: Workflow) -> WorkflowPlan:
+        key = (workflow.id, workflow.updated_at)
+        plan = self._plans.get(key)
+        if plan is not None:
+            self._plans.move_to_end(key)
+            return plan
+
+        # An older version of the workflow can never be requested again.
+        self.invalidate(workflow.id)
+        plan = compile_workflow(workflow)
+        self._plans[key] = plan
+        while len(self._plans) > self.max_entries:
+            self._plans.popitem(last=False)
+        return plan
+
+    def invalidate(self, workflow_id: str) -> None:
+        for key in [key for key in self._plans if key[0] == workflow_id]:
+            del self._plans[key]
+
+    def clear(self) -> None:
+        self._plans.clear()
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+
+_plan_cache: Optional[WorkflowPlanCache] = None
+
+
+def _get_plan_cache() -> WorkflowPlanCache:
+    global _plan_cache
+    if _plan_cache is None:
+        _plan_cache = WorkflowPlanCache(settings().workflow_plan_cache_size)
+    return _plan_cache
+
+
+def get_workflow_plan(workflow: Workflow) -> WorkflowPlan:
+    """Get the (cached) execution plan for *workflow*."""
+    return _get_plan_cache().get(workflow)
+
+
+def invalidate_workflow_plan(workflow_id: str) -> None:
+    """Drop cached plans of a workflow (call after updating or deleting it)."""
+    if _plan_cache is not None:
+        _plan_cache.invalidate(workflow_id)
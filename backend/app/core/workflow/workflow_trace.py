@@ -0,0 +1,214 @@
+"""
+Per-node timing spans for workflow executions.
+
+Every node run records when it was queued, when it started, when it produced
+its first event and first streamed token, when it ended, how long the
+checkpoint write after it took, and how many bytes and tokens it produced.
+Times are milliseconds since the execution started, so spans recorded after a
+resume stay comparable with the ones recorded before it.
+
+The critical path is the chain of nodes that bounded the run: starting from
+the node that ended last, repeatedly step to the predecessor that ended last.
+Shortening any node off that chain does not make the run finish sooner.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Optional
+
+from sqlalchemy import select
+
+from app.core.database import AsyncSessionLocal
+from app.core.workflow.workflow_blobs import SPILL_KEY
+from app.core.workflow.workflow_context import ExecutionContext
+from app.models.workflow_execution_db import WorkflowExecutionTraceDB
+
+
+def output_bytes(stored: Any) -> int:
+    """Size of a stored node output; spilled outputs report their blob size."""
+    if stored is None:
+        return 0
+    if isinstance(stored, dict) and SPILL_KEY in stored:
+        return int(stored.get("size") or 0)
+    if isinstance(stored, str):
+        return len(stored.encode("utf-8"))
+    return len(json.dumps(stored, ensure_ascii=False).encode("utf-8"))
+
+
+@dataclass(slots=True)
+class NodeSpan:
+    node_id: str
+    node_type: str = ""
+    status: str = "queued"
+    queued_ms: Optional[float] = None
+    start_ms: Optional[float] = None
+    first_event_ms: Optional[float] = None
+    first_token_ms: Optional[float] = None
+    end_ms: Optional[float] = None
+    checkpoint_ms: float = 0.0
+    bytes_out: int = 0
+    tokens: int = 0
+
+    def to_json(self) -> dict[str, Any]:
+        data = asdict(self)
+        data["queue_wait_ms"] = _diff(self.queued_ms, self.start_ms)
+        data["time_to_first_token_ms"] = _diff(self.start_ms, self.first_token_ms)
+        data["duration_ms"] = _diff(self.start_ms, self.end_ms)
+        return data
+
+
+def _diff(start: Optional[float], end: Optional[float]) -> Optional[float]:
+    if start is None or end is None:
+        return None
+    return round(end - start, 3)
+
+
+class ExecutionTrace:
+    """Collects the spans of one execution."""
+
+    def __init__(
+        self,
+        predecessors: dict[str, tuple[str, ...]],
+        started_at: Optional[float] = None,
+    ):
+        self.predecessors = predecessors
+        self.started_at = time.time() if started_at is None else started_at
+        self.spans: dict[str, NodeSpan] = {}
+
+    def _now(self) -> float:
+        return round((time.time() - self.started_at) * 1000, 3)
+
+    def _span(self, node_id: str) -> NodeSpan:
+        span = self.spans.get(node_id)
+        if span is None:
+            span = self.spans[node_id] = NodeSpan(node_id)
+        return span
+
+    def queued(self, node_ids: Iterable[str]) -> None:
+        now = self._now()
+        for node_id in node_ids:
+            span = self._span(node_id)
+            if span.queued_ms is None and span.end_ms is None:
+                span.queued_ms = now
+
+    def start(self, node_id: str, node_type: str) -> None:
+        previous = self.spans.get(node_id)
+        # A node run again after a resume starts a fresh span.
+        span = self.spans[node_id] = NodeSpan(node_id, node_type, "running")
+        if previous is not None and previous.end_ms is None:
+            span.queued_ms = previous.queued_ms
+        span.start_ms = self._now()
+        if span.queued_ms is None:
+            span.queued_ms = span.start_ms
+
+    def observe(
+        self, node_id: str, event: dict[str, Any], ctx: ExecutionContext
+    ) -> None:
+        span = self.spans.get(node_id)
+        if span is None or span.end_ms is not None:
+            return
+        now = self._now()
+        if span.first_event_ms is None:
+            span.first_event_ms = now
+        kind = event.get("type")
+        if kind == "token":
+            span.tokens += 1
+            if span.first_token_ms is None:
+                span.first_token_ms = now
+        elif kind == "node_complete":
+            span.bytes_out = output_bytes(ctx.stored_output(node_id))
+            self.end(node_id, "completed")
+        elif kind == "node_error":
+            self.end(node_id, "failed")
+
+    def end(self, node_id: str, status: str = "completed") -> None:
+        span = self.spans.get(node_id)
+        if span is not None and span.end_ms is None:
+            span.end_ms = self._now()
+            span.status = status
+
+    @contextmanager
+    def checkpoint(self, node_id: str) -> Iterator[None]:
+        """Time the checkpoint write that follows *node_id*."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            span = self.spans.get(node_id)
+            if span is not None:
+                span.checkpoint_ms += round((time.perf_counter() - started) * 1000, 3)
+
+    def critical_path(self) -> dict[str, Any]:
+        ended = {
+            node_id: span
+            for node_id, span in self.spans.items()
+            if span.start_ms is not None and span.end_ms is not None
+        }
+        if not ended:
+            return {"nodes": [], "duration_ms": 0.0}
+
+        node_id = max(ended, key=lambda n: ended[n].end_ms)
+        path = [node_id]
+        while True:
+            preds = [p for p in self.predecessors.get(node_id, ()) if p in ended]
+            if not preds:
+                break
+            node_id = max(preds, key=lambda n: ended[n].end_ms)
+            path.append(node_id)
+        path.reverse()
+
+        nodes = []
+        previous_end: Optional[float] = None
+        for node_id in path:
+            span = ended[node_id]
+            nodes.append(
+                {
+                    "node_id": node_id,
+                    "node_type": span.node_type,
+                    "duration_ms": _diff(span.start_ms, span.end_ms),
+                    # Time between the gating predecessor ending and this
+                    # node starting: scheduling, queueing and checkpoints.
+                    "wait_ms": _diff(previous_end, span.start_ms) or 0.0,
+                }
+            )
+            previous_end = span.end_ms
+        first = ended[path[0]]
+        return {
+            "nodes": nodes,
+            "duration_ms": _diff(first.queued_ms, ended[path[-1]].end_ms),
+        }
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "started_at": self.started_at,
+            "spans": [span.to_json() for span in self.spans.values()],
+            "critical_path": self.critical_path(),
+        }
+
+    @classmethod
+    def from_json(
+        cls, data: dict[str, Any], predecessors: dict[str, tuple[str, ...]]
+    ) -> "ExecutionTrace":
+        trace = cls(predecessors, started_at=data.get("started_at"))
+        fields = NodeSpan.__dataclass_fields__
+        for item in data.get("spans", []):
+            span = NodeSpan(**{k: v for k, v in item.items() if k in fields})
+            trace.spans[span.node_id] = span
+        return trace
+
+
+async def load_trace(execution_id: str) -> Optional[dict[str, Any]]:
+    """The stored trace of an execution, or ``None`` if none was written."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(WorkflowExecutionTraceDB.trace_json).where(
+                WorkflowExecutionTraceDB.execution_id == execution_id
+            )
+        )
+        trace_json = result.scalar_one_or_none()
+    return json.loads(trace_json) if trace_json else None
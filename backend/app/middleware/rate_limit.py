@@ -10,6 +10,7 @@ from fastapi import FastAPI, Request
 from sqlalchemy import text as sa_text
 from starlette.types import ASGIApp, Receive, Scope, Send
 
+from app.core.config import settings
 from app.core.database import DATA_DIR, AsyncSessionLocal
 
 _slowapi = importlib.import_module("slowapi")
@@ -129,6 +130,7 @@ def rate_limit_exception_handler(request: Request, exc: Exception):
 
 
 def setup_rate_limiting(app: FastAPI) -> None:
+    limiter.enabled = settings().rate_limit_enabled
     app.state.limiter = limiter
     app.add_exception_handler(RateLimitExceeded, rate_limit_exception_handler)
     app.add_middleware(SlowAPIASGIMiddleware)
@@ -4,7 +4,7 @@ Chat API models for request/response handling.
 
 from datetime import datetime, timezone
 from typing import Any, List, Literal, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 
 class ChatMessage(BaseModel):
@@ -25,6 +25,7 @@ class ChatRequest(BaseModel):
     - message: User's input message
     - workflow_id: Optional workflow to execute
     - kb_id: Optional knowledge base ID for RAG-enhanced responses
+    - stream_mode: "token" (one frame per token) or "coalesced" (batched tokens)
     - user_id: DEPRECATED - User ID is now obtained from authentication token
     """
 
@@ -46,6 +47,10 @@ class ChatRequest(BaseModel):
         default=None,
         description="DEPRECATED: User ID is obtained from auth token. This field is ignored.",
     )
+    stream_mode: Literal["token", "coalesced"] = Field(
+        default="token",
+        description="SSE token framing: one frame per token, or coalesced frames",
+    )
 
 
 class SessionHistory(BaseModel):
@@ -60,6 +65,22 @@ class SessionHistory(BaseModel):
     kb_id: Optional[str] = Field(default=None)
     workflow_id: Optional[str] = Field(default=None)
     user_id: Optional[str] = Field(default=None)
+    summary: Optional[str] = Field(
+        default=None, description="Rolling summary of the older conversation"
+    )
+    summary_upto: int = Field(
+        default=0, description="Messages with seq below this are in the summary"
+    )
+
+    # How many of ``messages`` are already persisted (None if the object was
+    # not loaded from storage); save_session only inserts the rest.
+    _persisted_count: Optional[int] = PrivateAttr(default=None)
+    # Storage seq of ``messages[0]``; loads may return only a recent window.
+    _first_seq: int = PrivateAttr(default=0)
+    # Set on copies handed out by the session cache: the cached session
+    # they were taken from and how many of ``messages`` it already had.
+    _cache_source: Optional["SessionHistory"] = PrivateAttr(default=None)
+    _cache_base: int = PrivateAttr(default=0)
 
 
 class SSEEvent(BaseModel):
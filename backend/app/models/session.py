@@ -1,7 +1,7 @@
 """Chat session ORM model for database storage."""
 from datetime import datetime, timezone
 
-from sqlalchemy import DateTime, Integer, String, Text, func
+from sqlalchemy import DateTime, Index, Integer, String, Text, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.core.database import Base
@@ -11,6 +11,7 @@ class ChatSessionDB(Base):
     """Persistent chat session stored in the database."""
 
     __tablename__ = "chat_sessions"
+    __table_args__ = (Index("ix_chat_sessions_user_updated", "user_id", "updated_at"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     session_id: Mapped[str] = mapped_column(
@@ -19,7 +20,22 @@ class ChatSessionDB(Base):
     user_id: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
     kb_id: Mapped[str | None] = mapped_column(String(128), nullable=True)
     workflow_id: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    # Legacy storage; messages now live in ``chat_messages``. Rows written by
+    # older versions are moved over on first load.
     messages_json: Mapped[str] = mapped_column(Text, nullable=False, default="[]")
+    # Listing summary, maintained by save_session.
+    title: Mapped[str | None] = mapped_column(Text, nullable=True)
+    message_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    last_message_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    # Rolling summary of messages with seq < summary_upto.
+    summary: Mapped[str | None] = mapped_column(Text, nullable=True)
+    summary_upto: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         server_default=func.now(),
@@ -30,3 +46,21 @@ class ChatSessionDB(Base):
         nullable=True,
         onupdate=func.now(),
     )
+
+
+class ChatMessageDB(Base):
+    """A single chat message, appended once and never rewritten."""
+
+    __tablename__ = "chat_messages"
+    __table_args__ = (
+        Index("ix_chat_messages_session_seq", "session_id", "seq", unique=True),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    session_id: Mapped[str] = mapped_column(String(128), nullable=False)
+    seq: Mapped[int] = mapped_column(Integer, nullable=False)
+    role: Mapped[str] = mapped_column(String(16), nullable=False)
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+    timestamp: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
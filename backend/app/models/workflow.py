@@ -75,6 +75,14 @@ class CodeNode(BaseModel):
     model_config = ConfigDict(extra="allow")
 
 
+class MapNode(BaseModel):
+    id: str = Field(..., min_length=1)
+    type: Literal["map"]
+    data: Dict[str, Any] = Field(default_factory=dict)
+
+    model_config = ConfigDict(extra="allow")
+
+
 class EndNode(BaseModel):
     id: str = Field(..., min_length=1)
     type: Literal["end"]
@@ -92,6 +100,7 @@ NodeSchema = Annotated[
         SkillNode,
         HttpNode,
         CodeNode,
+        MapNode,
         EndNode,
     ],
     Field(discriminator="type"),
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, Index, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class WorkflowBatchDB(Base):
+    """A batch job running one workflow over many inputs."""
+
+    __tablename__ = "workflow_batches"
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    workflow_id: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
+    user_id: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+    # pending | running | completed | failed
+    status: Mapped[str] = mapped_column(
+        String(32), nullable=False, server_default="pending"
+    )
+    model: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    concurrency: Mapped[int] = mapped_column(Integer, nullable=False)
+    total_rows: Mapped[int] = mapped_column(Integer, nullable=False)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+
+class WorkflowBatchRowDB(Base):
+    """One input of a batch and, once run, its result."""
+
+    __tablename__ = "workflow_batch_rows"
+    __table_args__ = (
+        Index("ix_workflow_batch_rows_batch_row", "batch_id", "row_index", unique=True),
+        Index("ix_workflow_batch_rows_batch_finish", "batch_id", "finish_seq"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    batch_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    row_index: Mapped[int] = mapped_column(Integer, nullable=False)
+    input: Mapped[str] = mapped_column(Text, nullable=False)
+    # pending | completed | failed
+    status: Mapped[str] = mapped_column(
+        String(32), nullable=False, server_default="pending"
+    )
+    output_json: Mapped[str | None] = mapped_column(Text, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Order in which rows finished, used as the result stream cursor.
+    finish_seq: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
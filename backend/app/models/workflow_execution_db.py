@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, String, Text, func
+from sqlalchemy import DateTime, Index, Integer, String, Text, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.core.database import Base
@@ -34,3 +34,55 @@ class WorkflowExecutionDB(Base):
         onupdate=func.now(),
         nullable=False,
     )
+
+
+class WorkflowExecutionStepDB(Base):
+    """Delta checkpoint: the state one completed node added to an execution.
+
+    Rows are appended and never rewritten; compaction folds them into the
+    snapshot columns of ``workflow_executions`` and deletes them.
+    """
+
+    __tablename__ = "workflow_execution_steps"
+    __table_args__ = (
+        Index(
+            "ix_workflow_execution_steps_execution_seq",
+            "execution_id",
+            "seq",
+            unique=True,
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    execution_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    seq: Mapped[int] = mapped_column(Integer, nullable=False)
+    node_id: Mapped[str] = mapped_column(String(128), nullable=False)
+    output_json: Mapped[str] = mapped_column(Text, nullable=False)
+    # Variables written since the previous step, minus ``<node_id>.output``.
+    variables_json: Mapped[str] = mapped_column(Text, nullable=False)
+    # Scheduler queue after this step.
+    queue_json: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+
+
+class WorkflowExecutionTraceDB(Base):
+    """Per-node timing spans and critical path of an execution.
+
+    Kept apart from ``workflow_executions`` so checkpoint writes do not
+    rewrite it; see ``app.core.workflow.workflow_trace``.
+    """
+
+    __tablename__ = "workflow_execution_traces"
+
+    execution_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    trace_json: Mapped[str] = mapped_column(Text, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
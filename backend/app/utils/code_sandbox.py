@@ -1,13 +1,20 @@
 from __future__ import annotations
 
 import ast
+import json
 import os
+import select
+import signal
 import subprocess
 import sys
 import tempfile
+import threading
+import time
 from dataclasses import dataclass
 from pathlib import Path
 
+from app.core.config import settings
+
 BANNED_MODULES = {
     "importlib",
     "os",
@@ -93,15 +100,14 @@ def _preexec_limit(memory_limit_mb: int):
     return _set_limits
 
 
-def execute_python(
+def _spawn_python(
     code: str,
     env: dict[str, str],
-    timeout_seconds: int = 30,
-    memory_limit_mb: int = 256,
-    stdout_limit_bytes: int = 10 * 1024,
+    timeout_seconds: int,
+    memory_limit_mb: int,
+    stdout_limit_bytes: int,
 ) -> SandboxResult:
-    validate_python_code(code)
-
+    """Run *code* in a freshly started interpreter (no warm pool)."""
     with tempfile.TemporaryDirectory(prefix="afl-code-node-") as temp_dir:
         script_path = Path(temp_dir) / "run.py"
         script_path.write_text(code, encoding="utf-8")
@@ -143,13 +149,229 @@ def execute_python(
                 error=f"Code execution failed: {exc}",
             )
 
-        stdout = _truncate_text(completed.stdout or "", stdout_limit_bytes)
-        stderr = _truncate_text(completed.stderr or "", stdout_limit_bytes)
-        if completed.returncode != 0:
+        return _completed_result(
+            completed.returncode,
+            completed.stdout or "",
+            completed.stderr or "",
+            stdout_limit_bytes,
+        )
+
+
+def _completed_result(
+    returncode: int, stdout: str, stderr: str, stdout_limit_bytes: int
+) -> SandboxResult:
+    stdout = _truncate_text(stdout, stdout_limit_bytes)
+    stderr = _truncate_text(stderr, stdout_limit_bytes)
+    if returncode != 0:
+        return SandboxResult(
+            ok=False,
+            stdout=stdout,
+            stderr=stderr,
+            error="Code execution returned non-zero status",
+        )
+    return SandboxResult(ok=True, stdout=stdout, stderr=stderr, error="")
+
+
+_WORKER_SCRIPT = Path(__file__).with_name("code_sandbox_worker.py")
+
+
+class _SandboxWorker:
+    """A warm worker process (``code_sandbox_worker.py``), one job at a time."""
+
+    def __init__(self) -> None:
+        self.process = subprocess.Popen(
+            [sys.executable, str(_WORKER_SCRIPT)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=tempfile.gettempdir(),
+            env=_build_env({}),
+            start_new_session=True,
+        )
+        self.jobs = 0
+        self._buffer = b""
+
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def run(self, job: dict, timeout_seconds: float) -> dict:
+        """Send *job* and wait for its reply.
+
+        Raises TimeoutError if no reply arrives in time and EOFError if the
+        worker exits first.
+        """
+        self.jobs += 1
+        self.process.stdin.write(json.dumps(job).encode("utf-8") + b"\n")
+        self.process.stdin.flush()
+        deadline = time.monotonic() + timeout_seconds
+        fd = self.process.stdout.fileno()
+        while b"\n" not in self._buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                raise TimeoutError
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise EOFError("sandbox worker exited")
+            self._buffer += chunk
+        line, _, self._buffer = self._buffer.partition(b"\n")
+        return json.loads(line)
+
+    def close(self) -> None:
+        """Kill the worker together with any job it is still running."""
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        self.process.wait()
+        for pipe in (self.process.stdin, self.process.stdout):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+
+
+class SandboxPool:
+    """Warm code-node workers, so runs skip interpreter startup.
+
+    Each worker forks a child per job that applies the job's rlimits and
+    runs the code in a fresh ``__main__`` namespace, environment and temp
+    directory, so runs see the same isolation as a freshly spawned
+    interpreter. Up to ``size`` idle workers are kept; a run that finds none
+    idle starts another. Workers are replaced after ``max_jobs`` runs and
+    whenever a run times out or its process is killed by a signal (CPU or
+    memory limit).
+    """
+
+    def __init__(self, size: int, max_jobs: int):
+        self.size = size
+        self.max_jobs = max_jobs
+        self._idle: list[_SandboxWorker] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def warm(self) -> None:
+        """Start idle workers up to ``size``."""
+        with self._lock:
+            while not self._closed and len(self._idle) < self.size:
+                self._idle.append(_SandboxWorker())
+
+    def run(
+        self,
+        code: str,
+        env: dict[str, str],
+        timeout_seconds: int = 30,
+        memory_limit_mb: int = 256,
+        stdout_limit_bytes: int = 10 * 1024,
+    ) -> SandboxResult:
+        job = {
+            "code": code,
+            "env": _build_env(env),
+            "memory_limit_mb": memory_limit_mb,
+            "output_limit_bytes": stdout_limit_bytes,
+        }
+        worker = self._acquire()
+        recycle = True
+        try:
+            reply = worker.run(job, timeout_seconds)
+        except TimeoutError:
+            return SandboxResult(
+                ok=False,
+                stdout="",
+                stderr="",
+                error="Code execution timed out",
+            )
+        except Exception as exc:
             return SandboxResult(
                 ok=False,
-                stdout=stdout,
-                stderr=stderr,
-                error="Code execution returned non-zero status",
+                stdout="",
+                stderr="",
+                error=f"Code execution failed: {exc}",
+            )
+        else:
+            recycle = reply["returncode"] < 0
+            return _completed_result(
+                reply["returncode"],
+                reply["stdout"],
+                reply["stderr"],
+                stdout_limit_bytes,
+            )
+        finally:
+            self._release(worker, recycle)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.close()
+
+    def __len__(self) -> int:
+        return len(self._idle)
+
+    def _acquire(self) -> _SandboxWorker:
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.alive():
+                    return worker
+                worker.close()
+        return _SandboxWorker()
+
+    def _release(self, worker: _SandboxWorker, recycle: bool) -> None:
+        retire = recycle or worker.jobs >= self.max_jobs
+        with self._lock:
+            keep = not self._closed and len(self._idle) < self.size
+            if keep:
+                self._idle.append(_SandboxWorker() if retire else worker)
+        if retire or not keep:
+            worker.close()
+
+
+_pool: SandboxPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_sandbox_pool() -> SandboxPool | None:
+    """The shared warm worker pool, or None when disabled or unsupported."""
+    global _pool
+    cfg = settings()
+    if os.name == "nt" or cfg.code_sandbox_pool_size <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = SandboxPool(
+                cfg.code_sandbox_pool_size, cfg.code_sandbox_worker_max_jobs
             )
-        return SandboxResult(ok=True, stdout=stdout, stderr=stderr, error="")
+        return _pool
+
+
+def warm_sandbox_pool() -> None:
+    """Start the idle workers up front when the code node is on by default."""
+    pool = get_sandbox_pool()
+    if pool is not None and settings().enable_code_node:
+        pool.warm()
+
+
+def close_sandbox_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
+
+
+def execute_python(
+    code: str,
+    env: dict[str, str],
+    timeout_seconds: int = 30,
+    memory_limit_mb: int = 256,
+    stdout_limit_bytes: int = 10 * 1024,
+) -> SandboxResult:
+    validate_python_code(code)
+
+    pool = get_sandbox_pool()
+    if pool is not None:
+        return pool.run(code, env, timeout_seconds, memory_limit_mb, stdout_limit_bytes)
+    return _spawn_python(
+        code, env, timeout_seconds, memory_limit_mb, stdout_limit_bytes
+    )
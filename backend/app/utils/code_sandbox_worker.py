@@ -0,0 +1,132 @@
+"""Warm sandbox worker for code-node runs, started by ``SandboxPool``.
+
+Run as a script (not imported by the app). The worker reads one JSON job
+per line on stdin and forks a child per job. The child applies the job's
+rlimits, gets a fresh ``__main__`` namespace, environment and working
+directory, and runs the code. The worker waits for the child and writes
+one JSON line back on stdout: the child's return code plus its captured
+stdout/stderr. The worker itself never runs user code.
+"""
+
+from __future__ import annotations
+
+import atexit
+import builtins
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import traceback
+import types
+
+
+def _read_capped(handle, limit: int) -> str:
+    handle.seek(0)
+    return handle.read(limit).decode("utf-8", errors="ignore")
+
+
+def _exit_status(code: object) -> int:
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def _run_child(job: dict, workdir: str, stdout, stderr) -> int:
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.dup2(stdout.fileno(), 1)
+    os.dup2(stderr.fileno(), 2)
+    os.close(devnull)
+    stdout.close()
+    stderr.close()
+
+    bytes_limit = int(job["memory_limit_mb"]) * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (bytes_limit, bytes_limit))
+    resource.setrlimit(resource.RLIMIT_CPU, (30, 30))
+
+    os.environ.clear()
+    os.environ.update(job["env"])
+    os.chdir(workdir)
+    script_path = os.path.join(workdir, "run.py")
+    sys.argv = [script_path]
+    sys.path[0] = workdir
+
+    module = types.ModuleType("__main__")
+    module.__file__ = script_path
+    module.__builtins__ = builtins
+    sys.modules["__main__"] = module
+    try:
+        exec(compile(job["code"], script_path, "exec"), module.__dict__)
+    except SystemExit as exc:
+        return _exit_status(exc.code)
+    except BaseException as exc:
+        traceback.print_exception(type(exc), exc, exc.__traceback__.tb_next)
+        return 1
+    return 0
+
+
+def _exit_child(status: int) -> None:
+    """Exit the way the interpreter would, minus the slow finalization."""
+    for thread in threading.enumerate():
+        if thread is not threading.current_thread() and not thread.daemon:
+            thread.join()
+    atexit._run_exitfuncs()
+    for stream in (sys.stdout, sys.stderr):
+        try:
+            stream.flush()
+        except (OSError, ValueError):
+            pass
+    os._exit(status & 0xFF)
+
+
+def main() -> dict | None:
+    """Serve jobs until stdin closes; in a forked child, return its job."""
+    requests = sys.stdin.buffer
+    replies = sys.stdout.buffer
+    while True:
+        line = requests.readline()
+        if not line:
+            return None
+        job = json.loads(line)
+        workdir = tempfile.mkdtemp(prefix="afl-code-node-")
+        with open(os.path.join(workdir, "run.py"), "w", encoding="utf-8") as f:
+            f.write(job["code"])
+        stdout = tempfile.TemporaryFile()
+        stderr = tempfile.TemporaryFile()
+
+        pid = os.fork()
+        if pid == 0:
+            job.update(workdir=workdir, stdout=stdout, stderr=stderr)
+            return job
+
+        _, status = os.waitpid(pid, 0)
+        limit = int(job["output_limit_bytes"])
+        reply = {
+            "returncode": os.waitstatus_to_exitcode(status),
+            "stdout": _read_capped(stdout, limit),
+            "stderr": _read_capped(stderr, limit),
+        }
+        stdout.close()
+        stderr.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+        replies.write(json.dumps(reply).encode("utf-8") + b"\n")
+        replies.flush()
+
+
+if __name__ == "__main__":
+    child_job = main()
+    if child_job is not None:
+        _exit_child(
+            _run_child(
+                child_job,
+                child_job.pop("workdir"),
+                child_job.pop("stdout"),
+                child_job.pop("stderr"),
+            )
+        )
@@ -1,7 +1,13 @@
-"""SSE (Server-Sent Events) utility functions."""
+"""SSE (Server-Sent Events) utility functions and internal stream events."""
 import asyncio
 import json
+import logging
+import time
 from collections.abc import AsyncGenerator
+from dataclasses import dataclass, field
+from typing import Any, ClassVar, Literal
+
+logger = logging.getLogger(__name__)
 
 
 def format_sse_event(event: str, data: dict) -> str:
@@ -21,48 +27,316 @@ def format_sse_event(event: str, data: dict) -> str:
 
 SSE_HEARTBEAT = ": heartbeat\n\n"
 
+# Sent before closing a stream under the "disconnect" slow-consumer policy.
+SLOW_CONSUMER_MESSAGE = "Client too slow; stream closed"
+
+
+@dataclass(slots=True)
+class ThoughtEvent:
+    """Progress update (retrieval, validation, workflow node status, ...)."""
+
+    event: ClassVar[str] = "thought"
+    data: dict[str, Any]
+
+    def payload(self) -> dict[str, Any]:
+        return self.data
+
+
+@dataclass(slots=True)
+class TokenEvent:
+    """A chunk of generated text; workflow tokens name the node producing them."""
+
+    event: ClassVar[str] = "token"
+    content: str
+    node_id: str | None = None
+
+    def payload(self) -> dict[str, Any]:
+        if self.node_id is None:
+            return {"content": self.content}
+        return {"content": self.content, "node_id": self.node_id}
+
+
+@dataclass(slots=True)
+class CitationEvent:
+    """Sources backing a retrieval-augmented answer."""
+
+    event: ClassVar[str] = "citation"
+    sources: list[dict[str, Any]]
+
+    def payload(self) -> dict[str, Any]:
+        return {"sources": self.sources}
+
+
+@dataclass(slots=True)
+class ErrorEvent:
+    """A user-facing error message; usually followed by a failed DoneEvent."""
+
+    event: ClassVar[str] = "error"
+    message: str
+
+    def payload(self) -> dict[str, Any]:
+        return {"message": self.message}
+
+
+@dataclass(slots=True)
+class DoneEvent:
+    """Terminal event of a stream."""
+
+    event: ClassVar[str] = "done"
+    status: str
+    message: str | None = None
+
+    def payload(self) -> dict[str, Any]:
+        if self.message is None:
+            return {"status": self.status}
+        return {"status": self.status, "message": self.message}
+
+
+StreamEvent = ThoughtEvent | TokenEvent | CitationEvent | ErrorEvent | DoneEvent
+
+
+@dataclass(slots=True)
+class SequencedEvent:
+    """An event (or pre-formatted frame) with its resumable-stream ``id:``."""
+
+    id: int
+    event: StreamEvent | str
+
+
+StreamItem = StreamEvent | SequencedEvent | str
+
+
+def encode_event(event: StreamItem) -> str:
+    """Serialize a stream event to SSE text; pre-formatted strings pass through.
+
+    This is the only place chat/skill events are turned into wire format, so
+    producers and intermediate consumers work with event objects and never
+    re-parse JSON.
+    """
+    if isinstance(event, str):
+        return event
+    if isinstance(event, SequencedEvent):
+        return f"id: {event.id}\n{encode_event(event.event)}"
+    return format_sse_event(event.event, event.payload())
+
+
+def _token_of(item: StreamItem) -> TokenEvent | None:
+    if isinstance(item, SequencedEvent):
+        item = item.event
+    return item if isinstance(item, TokenEvent) else None
+
+
+async def coalesce_tokens(
+    source: AsyncGenerator[StreamItem, None],
+    flush_interval: float = 0.03,
+    max_bytes: int = 2048,
+) -> AsyncGenerator[StreamItem, None]:
+    """Merge consecutive ``TokenEvent`` items into fewer, larger ones.
+
+    Tokens are buffered until *flush_interval* seconds have passed since the
+    first buffered token, the buffer reaches *max_bytes*, or any other event
+    arrives. Non-token events (thought/citation/error/done) are never
+    reordered: the pending buffer is always flushed before them, as it is
+    before a token from a different workflow node. Merged
+    :class:`SequencedEvent` tokens keep the id of the last token merged, so
+    a client resuming from it misses nothing.
+    """
+    iterator = source.__aiter__()
+    loop = asyncio.get_running_loop()
+    parts: list[str] = []
+    node_id: str | None = None
+    last_id: int | None = None
+    buffered_bytes = 0
+    deadline = 0.0
+    pending: asyncio.Future[StreamItem] | None = None
+
+    def _flush() -> StreamItem:
+        nonlocal buffered_bytes
+        merged = TokenEvent("".join(parts), node_id)
+        parts.clear()
+        buffered_bytes = 0
+        return merged if last_id is None else SequencedEvent(last_id, merged)
+
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            timeout = max(0.0, deadline - loop.time()) if parts else None
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if not done:
+                yield _flush()
+                continue
+
+            task, pending = pending, None
+            try:
+                item = task.result()
+            except StopAsyncIteration:
+                break
+
+            token = _token_of(item)
+            if token is None or (parts and token.node_id != node_id):
+                if parts:
+                    yield _flush()
+            if token is None:
+                yield item
+                continue
+
+            if not parts:
+                deadline = loop.time() + flush_interval
+                node_id = token.node_id
+            parts.append(token.content)
+            last_id = item.id if isinstance(item, SequencedEvent) else None
+            buffered_bytes += len(token.content.encode("utf-8"))
+            if buffered_bytes >= max_bytes:
+                yield _flush()
+
+        if parts:
+            yield _flush()
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
+            try:
+                await pending
+            except (asyncio.CancelledError, StopAsyncIteration, Exception):
+                pass
+
+
+@dataclass(slots=True, eq=False)
+class StreamStats:
+    """Buffering metrics of one SSE connection served by :func:`with_heartbeat`."""
+
+    frames_sent: int = 0
+    bytes_sent: int = 0
+    buffered_frames: int = 0
+    buffered_bytes: int = 0
+    max_buffered_bytes: int = 0
+    slow: bool = False
+    started_at: float = field(default_factory=time.monotonic)
+
+
+_active_streams: set[StreamStats] = set()
+
+
+def active_stream_stats() -> list[StreamStats]:
+    """Metrics of the SSE connections currently being served."""
+    return list(_active_streams)
+
 
 async def with_heartbeat(
-    source: AsyncGenerator[str, None],
+    source: AsyncGenerator[StreamItem, None],
     interval: float = 15.0,
+    *,
+    max_buffered_frames: int = 64,
+    slow_consumer_timeout: float = 10.0,
+    slow_consumer_policy: Literal["coalesce", "disconnect"] = "coalesce",
+    coalesce_interval: float = 0.25,
+    coalesce_max_bytes: int = 2048,
 ) -> AsyncGenerator[str, None]:
     """Wrap an SSE generator to automatically inject heartbeat comments.
 
     Runs a background heartbeat task that emits ``: heartbeat`` SSE comments
     at the given *interval* (seconds) while the *source* generator is active.
     This keeps reverse-proxy connections alive during long LLM thinking pauses.
+    Event objects from *source* are serialized with :func:`encode_event`.
+
+    At most *max_buffered_frames* frames are buffered; beyond that the source
+    is not read until the client catches up. If the buffer stays full for
+    *slow_consumer_timeout* seconds the client is considered slow and either
+    disconnected (with an error and a failed done frame) or, for
+    ``"coalesce"``, sent merged token frames from then on (pre-formatted
+    string frames cannot be merged and stay backpressured).
+    Resumable stream subscribers yield typed events here, so the policy
+    applies to each subscriber separately.
     """
     _SENTINEL = object()
-    queue: asyncio.Queue[str | object] = asyncio.Queue()
+    queue: asyncio.Queue[tuple[str, int, bool] | object] = asyncio.Queue()
+    # Source frames need a slot; heartbeats and the end marker do not, so
+    # they never block.
+    slots = asyncio.Semaphore(max(1, max_buffered_frames))
+    stats = StreamStats()
     pump_error: BaseException | None = None
+    disconnect = False
+
+    def _account(size: int) -> None:
+        stats.buffered_frames += 1
+        stats.buffered_bytes += size
+        stats.max_buffered_bytes = max(stats.max_buffered_bytes, stats.buffered_bytes)
+
+    async def _put(frame: str, timeout: float | None) -> bool:
+        """Enqueue *frame*; False if the buffer stayed full for *timeout*."""
+        size = len(frame.encode("utf-8"))
+        try:
+            async with asyncio.timeout(timeout):
+                await slots.acquire()
+        except TimeoutError:
+            return False
+        queue.put_nowait((frame, size, True))
+        _account(size)
+        return True
 
     async def _pump() -> None:
-        nonlocal pump_error
+        nonlocal pump_error, disconnect
         try:
             async for chunk in source:
-                await queue.put(chunk)
+                if await _put(encode_event(chunk), slow_consumer_timeout):
+                    continue
+                stats.slow = True
+                logger.warning(
+                    "Slow SSE consumer: buffer full for %.1fs, %s",
+                    slow_consumer_timeout,
+                    slow_consumer_policy,
+                )
+                if slow_consumer_policy == "disconnect":
+                    disconnect = True
+                    return
+                await _put(encode_event(chunk), None)
+                break
+            if stats.slow:
+                # Merge token frames for the rest of the stream.
+                async for chunk in coalesce_tokens(
+                    source,
+                    flush_interval=coalesce_interval,
+                    max_bytes=coalesce_max_bytes,
+                ):
+                    await _put(encode_event(chunk), None)
         except BaseException as exc:
             pump_error = exc
         finally:
-            await queue.put(_SENTINEL)
+            queue.put_nowait(_SENTINEL)
 
     async def _heartbeat() -> None:
         while True:
             await asyncio.sleep(interval)
-            await queue.put(SSE_HEARTBEAT)
+            # Only needed while idle; queued frames keep the connection alive.
+            if queue.empty():
+                queue.put_nowait((SSE_HEARTBEAT, len(SSE_HEARTBEAT), False))
+                _account(len(SSE_HEARTBEAT))
 
+    _active_streams.add(stats)
     pump_task = asyncio.create_task(_pump())
     hb_task = asyncio.create_task(_heartbeat())
 
     try:
-        while True:
+        while not disconnect:
             item = await queue.get()
             if item is _SENTINEL:
                 if pump_error is not None:
                     raise pump_error
                 break
-            yield item  # type: ignore[misc]
+            frame, size, has_slot = item  # type: ignore[misc]
+            if has_slot:
+                slots.release()
+            stats.buffered_frames -= 1
+            stats.buffered_bytes -= size
+            stats.frames_sent += 1
+            stats.bytes_sent += size
+            yield frame
+        if disconnect:
+            # Tell the client the stream was cut off rather than finished.
+            yield encode_event(ErrorEvent(SLOW_CONSUMER_MESSAGE))
+            yield encode_event(DoneEvent("error", SLOW_CONSUMER_MESSAGE))
     finally:
+        _active_streams.discard(stats)
         hb_task.cancel()
         if not pump_task.done():
             pump_task.cancel()
@@ -71,3 +345,15 @@ async def with_heartbeat(
                 await t
             except (asyncio.CancelledError, Exception):
                 pass
+        # Close the source now, not at garbage collection, so a resumable
+        # stream run stops waiting for this subscriber right away.
+        try:
+            await source.aclose()
+        except Exception:
+            pass
+        logger.debug(
+            "SSE stream closed: %d frames, %d bytes, max buffered %d bytes",
+            stats.frames_sent,
+            stats.bytes_sent,
+            stats.max_buffered_bytes,
+        )
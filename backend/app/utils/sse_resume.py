@@ -0,0 +1,266 @@
+"""Resumable SSE streams.
+
+A stream run drives an event source to completion in a background task,
+independent of the HTTP connection that started it, and keeps its most
+recent events in a bounded ring buffer. Every event carries an ``id:``
+field; a client whose connection dropped reconnects with ``Last-Event-ID``
+to replay the frames it missed and then continues live, instead of
+re-sending the request and paying for a second generation.
+
+The buffer is also what applies backpressure: a run pauses its source
+rather than evict an event a connected subscriber has not taken yet, so a
+slow client is held back (and its connection merges tokens) as it would
+be without resume. Only events no live subscriber needs are evicted.
+
+Runs live in process memory, so resuming requires reaching the same
+application process (single-process deployment, like the session cache).
+"""
+import asyncio
+import logging
+import uuid
+import weakref
+from collections import deque
+from collections.abc import AsyncGenerator
+from typing import Optional
+
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+from app.utils.sse import (
+    SequencedEvent,
+    StreamEvent,
+    StreamItem,
+    with_heartbeat,
+)
+
+logger = logging.getLogger(__name__)
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+}
+
+# Sent when resuming after events that were already evicted from the buffer.
+STREAM_LAGGED_MESSAGE = "Stream lagged behind; history truncated"
+
+
+class _Cursor:
+    """A live subscriber's position: the id of the last event it took."""
+
+    __slots__ = ("sent", "__weakref__")
+
+    def __init__(self, sent: int):
+        self.sent = sent
+
+
+class StreamRun:
+    """One in-flight (or recently finished) event stream and its replay buffer."""
+
+    def __init__(self, run_id: str, owner_id: str | None, buffer_size: int):
+        self.id = run_id
+        self.owner_id = owner_id
+        self._events: deque[SequencedEvent] = deque(maxlen=buffer_size)
+        self._last_id = 0
+        self._error: BaseException | None = None
+        self._changed = asyncio.Event()
+        # Live subscribers, and an event set whenever one advances or leaves.
+        self._cursors: weakref.WeakSet[_Cursor] = weakref.WeakSet()
+        self._advanced = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        self.finished_at: float | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    @property
+    def last_event_id(self) -> int:
+        return self._last_id
+
+    def start(self, source: AsyncGenerator[StreamEvent | str, None]) -> None:
+        self._task = asyncio.create_task(self._run(source))
+
+    async def cancel(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self, source: AsyncGenerator[StreamEvent | str, None]) -> None:
+        try:
+            async for item in source:
+                await self._wait_for_room()
+                self._append(item)
+        except Exception as exc:
+            logger.warning("Stream run %s failed", self.id, exc_info=True)
+            self._error = exc
+        finally:
+            self.finished_at = asyncio.get_running_loop().time()
+            self._notify()
+
+    def _append(self, item: StreamEvent | str) -> None:
+        self._last_id += 1
+        self._events.append(SequencedEvent(self._last_id, item))
+        self._notify()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def _notify_advanced(self) -> None:
+        self._advanced.set()
+        self._advanced = asyncio.Event()
+
+    async def _wait_for_room(self) -> None:
+        """Pause while the next event would evict one a subscriber still needs."""
+        size = self._events.maxlen or 0
+        while any(self._last_id - c.sent >= size for c in list(self._cursors)):
+            await self._advanced.wait()
+
+    def can_resume(self, last_event_id: int) -> bool:
+        """Whether every event after *last_event_id* is still buffered."""
+        return 0 <= self._last_id - last_event_id <= len(self._events)
+
+    def subscribe(
+        self, last_event_id: int = 0
+    ) -> AsyncGenerator[SequencedEvent | StreamEvent, None]:
+        """Replay events after *last_event_id*, then follow the run live.
+
+        Events are yielded unencoded, so each subscriber's connection can
+        merge tokens for a slow client (see :func:`with_heartbeat`). The run
+        waits for the subscriber until it is closed (or garbage collected).
+        Raises ValueError if some of those events were already evicted.
+        Closing the subscription does not stop the run.
+        """
+        if not self.can_resume(last_event_id):
+            raise ValueError(
+                f"Stream {self.id} cannot resume after event {last_event_id}"
+            )
+        cursor = _Cursor(last_event_id)
+        self._cursors.add(cursor)
+        # A subscription dropped before it started never runs its finally.
+        weakref.finalize(cursor, self._notify_advanced)
+        return self._follow(cursor)
+
+    async def _follow(
+        self, cursor: _Cursor
+    ) -> AsyncGenerator[SequencedEvent | StreamEvent, None]:
+        try:
+            while True:
+                missing = self._last_id - cursor.sent
+                if missing:
+                    batch = [self._events[-k] for k in range(missing, 0, -1)]
+                    cursor.sent += missing
+                    self._notify_advanced()
+                    for event in batch:
+                        yield event
+                    continue
+                if self.finished:
+                    if self._error is not None:
+                        raise self._error
+                    return
+                await self._changed.wait()
+        finally:
+            self._cursors.discard(cursor)
+            self._notify_advanced()
+
+
+class StreamRunRegistry:
+    """Stream runs by id; finished runs are kept for *ttl* seconds."""
+
+    def __init__(self, buffer_size: int, ttl: float):
+        self.buffer_size = buffer_size
+        self.ttl = ttl
+        self._runs: dict[str, StreamRun] = {}
+
+    def start(
+        self,
+        source: AsyncGenerator[StreamEvent | str, None],
+        owner_id: str | None = None,
+    ) -> StreamRun:
+        self._expire()
+        run = StreamRun(uuid.uuid4().hex, owner_id, self.buffer_size)
+        run.start(source)
+        self._runs[run.id] = run
+        return run
+
+    def get(self, run_id: str) -> Optional[StreamRun]:
+        self._expire()
+        return self._runs.get(run_id)
+
+    def _expire(self) -> None:
+        now = asyncio.get_running_loop().time()
+        expired = [
+            run_id
+            for run_id, run in self._runs.items()
+            if run.finished_at is not None and now - run.finished_at > self.ttl
+        ]
+        for run_id in expired:
+            del self._runs[run_id]
+
+    async def close(self) -> None:
+        """Cancel in-flight runs and forget all runs."""
+        runs = list(self._runs.values())
+        self._runs.clear()
+        for run in runs:
+            await run.cancel()
+
+
+_registry: Optional[StreamRunRegistry] = None
+
+
+def get_stream_registry() -> StreamRunRegistry:
+    """Get the global stream run registry."""
+    global _registry
+    if _registry is None:
+        s = settings()
+        _registry = StreamRunRegistry(
+            buffer_size=s.sse_resume_buffer_events,
+            ttl=s.sse_resume_ttl_seconds,
+        )
+    return _registry
+
+
+async def close_stream_runs() -> None:
+    """Cancel in-flight stream runs (app shutdown)."""
+    if _registry is not None:
+        await _registry.close()
+
+
+def heartbeat_body(
+    source: AsyncGenerator[StreamItem, None],
+) -> AsyncGenerator[str, None]:
+    """:func:`with_heartbeat` with the configured buffering limits."""
+    s = settings()
+    return with_heartbeat(
+        source,
+        max_buffered_frames=s.sse_max_buffered_frames,
+        slow_consumer_timeout=s.sse_slow_consumer_seconds,
+        slow_consumer_policy=s.sse_slow_consumer_policy,
+        coalesce_max_bytes=s.sse_coalesce_max_bytes,
+    )
+
+
+def event_stream_response(
+    source: AsyncGenerator[StreamEvent | str, None],
+    owner_id: str | None = None,
+) -> StreamingResponse:
+    """SSE response for *source* with heartbeats.
+
+    With ``sse_resume_enabled`` the source runs as a resumable stream run
+    whose id is returned in the ``X-Stream-Id`` header.
+    """
+    headers = dict(SSE_HEADERS)
+    body: AsyncGenerator[StreamItem, None] = source
+    if settings().sse_resume_enabled:
+        run = get_stream_registry().start(source, owner_id=owner_id)
+        body = run.subscribe()
+        headers["X-Stream-Id"] = run.id
+    return StreamingResponse(
+        heartbeat_body(body),
+        media_type="text/event-stream",
+        headers=headers,
+    )
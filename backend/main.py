@@ -19,16 +19,25 @@ from fastapi.responses import FileResponse
 from app.api.admin import router as admin_router
 from app.api.auth import router as auth_router
 from app.api.chat import router as chat_router
+from app.api.chat_session import start_session_flusher, stop_session_flusher
 from app.api.knowledge import router as knowledge_router
 from app.api.observability import router as observability_router
+from app.api.openai_compat import router as openai_router
 from app.api.publish import router as publish_router
 from app.api.settings import router as settings_router
 from app.api.skill import router as skill_router
+from app.api.streams import router as streams_router
 from app.api.workflow import router as workflow_router
+from app.api.workflow_batch import router as workflow_batch_router
 from app.core.auth import cleanup_expired_tokens
+from app.core.config import settings
 from app.core.database import AsyncSessionLocal, init_db
 from app.core.safety_check import run_safety_checks
+from app.core.workflow.workflow_batch import stop_batches
+from app.core.workflow.workflow_blob_gc import collect_blob_garbage
 from app.middleware.rate_limit import setup_rate_limiting
+from app.utils.code_sandbox import close_sandbox_pool, warm_sandbox_pool
+from app.utils.sse_resume import close_stream_runs
 
 # Load environment variables
 _ = load_dotenv()
@@ -57,6 +66,21 @@ async def _periodic_token_cleanup() -> None:
             logger.exception("Token cleanup failed")
 
 
+async def _periodic_blob_gc() -> None:
+    """Periodically delete spilled workflow outputs nothing refers to."""
+    interval = settings().workflow_blob_gc_interval_seconds
+    if not interval:
+        return
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            removed = await collect_blob_garbage()
+            if removed > 0:
+                logger.info("Removed %d unreferenced workflow blobs", removed)
+        except Exception:
+            logger.exception("Workflow blob cleanup failed")
+
+
 @asynccontextmanager
 async def lifespan(_app: FastAPI):
     """Application lifespan context manager"""
@@ -65,13 +89,23 @@ async def lifespan(_app: FastAPI):
     await init_db()
     run_safety_checks()
     cleanup_task = asyncio.create_task(_periodic_token_cleanup())
+    blob_gc_task = asyncio.create_task(_periodic_blob_gc())
+    start_session_flusher()
+    await asyncio.to_thread(warm_sandbox_pool)
     yield
     # Shutdown: Cleanup resources
-    _ = cleanup_task.cancel()
-    try:
-        await cleanup_task
-    except asyncio.CancelledError:
-        pass
+    for task in (cleanup_task, blob_gc_task):
+        _ = task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    # Stop detached streams before the final session flush.
+    await close_stream_runs()
+    # Interrupted batches keep their finished rows and can be resumed.
+    await stop_batches()
+    await stop_session_flusher()
+    close_sandbox_pool()
 
 
 def create_app() -> FastAPI:
@@ -121,13 +155,16 @@ def create_app() -> FastAPI:
 
     app.include_router(auth_router)
     app.include_router(workflow_router)
+    app.include_router(workflow_batch_router)
     app.include_router(knowledge_router)
     app.include_router(settings_router)
     app.include_router(skill_router)
     app.include_router(chat_router)
+    app.include_router(streams_router)
     app.include_router(admin_router)
     app.include_router(publish_router)
     app.include_router(observability_router)
+    app.include_router(openai_router)
 
     # SPA catch-all: serve static assets or fall back to index.html
     # Registered after API routers so /api/v1/* routes take priority.
@@ -0,0 +1,93 @@
+"""Benchmark code-node sandbox runs: cold spawn vs the warm worker pool.
+
+Cold spawn starts a fresh rlimited interpreter per run (the path used when
+``CODE_SANDBOX_POOL_SIZE=0``); the warm pool hands runs to pre-started
+workers that fork a limited child per job. Reports per-run latency and
+throughput with several runs in flight, as the engine issues them from
+worker threads.
+
+Examples:
+    python scripts/code_sandbox_bench.py
+    python scripts/code_sandbox_bench.py --runs 200 --concurrency 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.utils.code_sandbox import (  # noqa: E402
+    SandboxPool,
+    SandboxResult,
+    _spawn_python,
+)
+
+CODE = "import json\nprint(json.dumps({'sum': sum(range(1000))}))"
+
+Runner = Callable[[], SandboxResult]
+
+
+def _run_once(run: Runner) -> float:
+    started = time.perf_counter()
+    result = run()
+    elapsed = time.perf_counter() - started
+    assert result.ok, result
+    return elapsed
+
+
+def _latency(run: Runner, runs: int) -> list[float]:
+    return [_run_once(run) for _ in range(runs)]
+
+
+def _throughput(run: Runner, runs: int, concurrency: int) -> float:
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(lambda _: _run_once(run), range(runs)))
+    return runs / (time.perf_counter() - started)
+
+
+def _report(name: str, latencies: list[float], throughput: float) -> None:
+    ms = sorted(value * 1000 for value in latencies)
+    p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+    print(
+        f"{name:<6} p50 {statistics.median(ms):7.1f} ms  p95 {p95:7.1f} ms"
+        f"  throughput {throughput:7.1f} runs/s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--max-jobs", type=int, default=100)
+    args = parser.parse_args()
+
+    def cold() -> SandboxResult:
+        return _spawn_python(CODE, {}, 30, 256, 10 * 1024)
+
+    pool = SandboxPool(size=args.concurrency, max_jobs=args.max_jobs)
+    pool.warm()
+
+    def warm() -> SandboxResult:
+        return pool.run(CODE, {})
+
+    try:
+        _latency(warm, args.concurrency)  # let the workers finish starting
+        for name, run in (("cold", cold), ("warm", warm)):
+            latencies = _latency(run, args.runs)
+            throughput = _throughput(run, args.runs, args.concurrency)
+            _report(name, latencies, throughput)
+    finally:
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
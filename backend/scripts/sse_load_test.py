@@ -0,0 +1,551 @@
+"""End-to-end SSE load test for chat, skill and workflow streams.
+
+By default this starts a local backend process configured with the offline
+``fake`` LLM/embedding providers (no network, no provider cost) and drives
+``--concurrency`` parallel ``/api/v1/chat/completions`` streams for each
+scenario. It reports TTFT, inter-token latency and total duration
+percentiles, error rates, server event-loop lag and RSS, writes the results
+as JSON and optionally compares them against a saved baseline.
+
+Examples:
+    python scripts/sse_load_test.py --concurrency 50 --sessions 200
+    python scripts/sse_load_test.py --save-baseline data/loadtest_baseline.json
+    python scripts/sse_load_test.py --baseline data/loadtest_baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, cast
+
+import httpx
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+SCENARIOS = ("chat", "skill", "workflow")
+METRICS_PATH = "/__loadtest/metrics"
+
+# (path, lower-is-better) metrics checked against the baseline
+_COMPARED_METRICS: tuple[str, ...] = (
+    "ttft_ms.p95",
+    "inter_token_ms.p95",
+    "duration_ms.p95",
+    "error_rate",
+)
+_COMPARED_SERVER_METRICS: tuple[str, ...] = (
+    "event_loop_lag_ms.p99",
+    "peak_rss_mb",
+)
+
+
+@dataclass
+class SessionResult:
+    ok: bool
+    ttft_ms: float | None = None
+    duration_ms: float = 0.0
+    inter_token_ms: list[float] = field(default_factory=list)
+    tokens: int = 0
+    error: str = ""
+
+
+def _percentile(values: list[float], pct: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return round(ordered[low] + (ordered[high] - ordered[low]) * (rank - low), 3)
+
+
+def _summarize(values: list[float]) -> dict[str, float | None]:
+    return {
+        "p50": _percentile(values, 50),
+        "p95": _percentile(values, 95),
+        "p99": _percentile(values, 99),
+        "max": round(max(values), 3) if values else None,
+    }
+
+
+def _read_rss_mb() -> tuple[float, float]:
+    """Return (current RSS, peak RSS) of this process in MiB."""
+    current = peak = 0.0
+    try:
+        with open("/proc/self/status", encoding="utf-8") as handle:
+            for line in handle:
+                if line.startswith("VmRSS:"):
+                    current = int(line.split()[1]) / 1024
+                elif line.startswith("VmHWM:"):
+                    peak = int(line.split()[1]) / 1024
+    except OSError:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        current = peak
+    return round(current, 2), round(peak, 2)
+
+
+# ---------------------------------------------------------------------------
+# Server side (``--serve``): the app plus an event-loop lag probe
+# ---------------------------------------------------------------------------
+
+
+def _serve(port: int) -> int:
+    sys.path.insert(0, str(BACKEND_ROOT))
+    os.chdir(BACKEND_ROOT)
+
+    import uvicorn
+
+    from main import create_app
+
+    app = create_app()
+    lag_samples: deque[float] = deque(maxlen=100_000)
+    probe_interval = 0.05
+
+    async def _lag_probe() -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(probe_interval)
+            lag_samples.append((loop.time() - started - probe_interval) * 1000)
+
+    async def metrics(reset: bool = False) -> dict[str, Any]:
+        current, peak = _read_rss_mb()
+        payload = {
+            "event_loop_lag_ms": _summarize(list(lag_samples)),
+            "rss_mb": current,
+            "peak_rss_mb": peak,
+        }
+        if reset:
+            lag_samples.clear()
+        return payload
+
+    app.add_api_route(METRICS_PATH, metrics, methods=["GET"])
+
+    async def _run() -> None:
+        config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+        probe = asyncio.create_task(_lag_probe())
+        try:
+            await uvicorn.Server(config).serve()
+        finally:
+            probe.cancel()
+
+    asyncio.run(_run())
+    return 0
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def _server_env(args: argparse.Namespace) -> dict[str, str]:
+    env = dict(os.environ)
+    env.update(
+        {
+            "FAKE_LLM_ENABLED": "true",
+            "DEFAULT_LLM_PROVIDER": "fake",
+            "DEFAULT_LLM_MODEL": "",
+            "EMBEDDING_PROVIDER": "fake",
+            "FAKE_LLM_TTFT_MS": str(args.ttft_ms),
+            "FAKE_LLM_TOKENS_PER_SECOND": str(args.tokens_per_second),
+            "FAKE_LLM_OUTPUT_TOKENS": str(args.output_tokens),
+            "FAKE_LLM_ERROR_RATE": str(args.error_rate),
+            "RATE_LIMIT_ENABLED": "false",
+        }
+    )
+    return env
+
+
+async def _wait_healthy(client: httpx.AsyncClient, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            response = await client.get("/health")
+            if response.status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("Backend did not become healthy in time")
+
+
+# ---------------------------------------------------------------------------
+# Client side
+# ---------------------------------------------------------------------------
+
+
+async def _run_session(
+    client: httpx.AsyncClient,
+    headers: dict[str, str],
+    payload: dict[str, Any],
+) -> SessionResult:
+    started = time.perf_counter()
+    last_token_at: float | None = None
+    result = SessionResult(ok=False)
+    event_name = ""
+    try:
+        async with client.stream(
+            "POST", "/api/v1/chat/completions", json=payload, headers=headers
+        ) as response:
+            if response.status_code != 200:
+                result.error = f"HTTP {response.status_code}"
+                return result
+            async for line in response.aiter_lines():
+                if line.startswith("event: "):
+                    event_name = line[7:].strip()
+                    continue
+                if not line.startswith("data: "):
+                    continue
+                now = time.perf_counter()
+                if event_name == "token":
+                    if last_token_at is None:
+                        result.ttft_ms = (now - started) * 1000
+                    else:
+                        result.inter_token_ms.append((now - last_token_at) * 1000)
+                    last_token_at = now
+                    result.tokens += 1
+                elif event_name == "error":
+                    result.error = "error event"
+                elif event_name == "done":
+                    data = cast(dict[str, Any], json.loads(line[6:]))
+                    result.ok = data.get("status") == "success" and not result.error
+                    if not result.ok and not result.error:
+                        result.error = str(data.get("message") or "done with error")
+    except httpx.HTTPError as exc:
+        result.error = type(exc).__name__
+    finally:
+        result.duration_ms = (time.perf_counter() - started) * 1000
+    return result
+
+
+async def _setup_fixtures(
+    client: httpx.AsyncClient,
+) -> tuple[dict[str, str], str, str]:
+    suffix = uuid.uuid4().hex[:8]
+    register = await client.post(
+        "/api/v1/auth/register",
+        json={"email": f"loadtest-{suffix}@example.com", "password": "loadtest-pw"},
+    )
+    register.raise_for_status()
+    headers = {"Authorization": f"Bearer {register.json()['token']}"}
+
+    skill_name = f"loadtest-{suffix}"
+    skill = await client.post(
+        "/api/v1/skills",
+        headers=headers,
+        json={
+            "name": skill_name,
+            "content": (
+                f"---\nname: {skill_name}\ndescription: load test skill\n"
+                "inputs:\n  - name: text\n    required: true\n---\n\n"
+                "Summarize: {{text}}"
+            ),
+        },
+    )
+    skill.raise_for_status()
+
+    workflow = await client.post(
+        "/api/v1/workflows",
+        headers=headers,
+        json={
+            "name": f"loadtest-{suffix}",
+            "graph_data": {
+                "nodes": [
+                    {"id": "start-1", "type": "start", "data": {}},
+                    {"id": "llm-1", "type": "llm", "data": {}},
+                    {"id": "end-1", "type": "end", "data": {}},
+                ],
+                "edges": [
+                    {"id": "e1", "source": "start-1", "target": "llm-1"},
+                    {"id": "e2", "source": "llm-1", "target": "end-1"},
+                ],
+            },
+        },
+    )
+    workflow.raise_for_status()
+    return headers, skill_name, str(workflow.json()["id"])
+
+
+async def _cleanup_fixtures(
+    client: httpx.AsyncClient,
+    headers: dict[str, str],
+    skill_name: str,
+    workflow_id: str,
+) -> None:
+    for path in (f"/api/v1/skills/{skill_name}", f"/api/v1/workflows/{workflow_id}"):
+        try:
+            await client.delete(path, headers=headers)
+        except httpx.HTTPError:
+            pass
+
+
+def _payload_for(
+    scenario: str, index: int, skill_name: str, workflow_id: str, stream_mode: str
+) -> dict[str, Any]:
+    payload: dict[str, Any] = {
+        "session_id": f"lt-{scenario}-{uuid.uuid4().hex[:12]}",
+        "message": f"load test message {index}",
+        "stream_mode": stream_mode,
+    }
+    if scenario == "skill":
+        payload["message"] = f"@{skill_name} {payload['message']}"
+    elif scenario == "workflow":
+        payload["workflow_id"] = workflow_id
+    return payload
+
+
+async def _get_server_metrics(
+    client: httpx.AsyncClient, reset: bool = False
+) -> dict[str, Any] | None:
+    try:
+        response = await client.get(METRICS_PATH, params={"reset": str(reset).lower()})
+    except httpx.HTTPError:
+        return None
+    if response.status_code != 200:
+        return None
+    return cast(dict[str, Any], response.json())
+
+
+async def _run_scenario(
+    client: httpx.AsyncClient,
+    scenario: str,
+    args: argparse.Namespace,
+    headers: dict[str, str],
+    skill_name: str,
+    workflow_id: str,
+) -> dict[str, Any]:
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def _bounded(index: int) -> SessionResult:
+        async with semaphore:
+            return await _run_session(
+                client,
+                headers,
+                _payload_for(
+                    scenario, index, skill_name, workflow_id, args.stream_mode
+                ),
+            )
+
+    await _get_server_metrics(client, reset=True)
+    started = time.perf_counter()
+    results = await asyncio.gather(*(_bounded(i) for i in range(args.sessions)))
+    elapsed = time.perf_counter() - started
+    server = await _get_server_metrics(client)
+
+    errors: dict[str, int] = {}
+    for item in results:
+        if not item.ok:
+            errors[item.error or "unknown"] = errors.get(item.error or "unknown", 0) + 1
+
+    inter_token = [gap for item in results for gap in item.inter_token_ms]
+    total_tokens = sum(item.tokens for item in results)
+    return {
+        "sessions": len(results),
+        "errors": sum(errors.values()),
+        "error_rate": round(sum(errors.values()) / max(1, len(results)), 4),
+        "error_breakdown": errors,
+        "ttft_ms": _summarize([r.ttft_ms for r in results if r.ttft_ms is not None]),
+        "inter_token_ms": _summarize(inter_token),
+        "duration_ms": _summarize([r.duration_ms for r in results]),
+        "wall_time_s": round(elapsed, 3),
+        "sessions_per_second": round(len(results) / elapsed, 3) if elapsed else None,
+        "tokens_per_second": round(total_tokens / elapsed, 3) if elapsed else None,
+        "server": server,
+    }
+
+
+def _lookup(data: dict[str, Any], dotted: str) -> float | None:
+    current: Any = data
+    for part in dotted.split("."):
+        if not isinstance(current, dict):
+            return None
+        current = current.get(part)
+    return float(current) if isinstance(current, (int, float)) else None
+
+
+def compare_to_baseline(
+    current: dict[str, Any], baseline: dict[str, Any], tolerance: float
+) -> list[str]:
+    """Return human-readable regressions of *current* versus *baseline*."""
+    regressions: list[str] = []
+    for scenario, cur in current.get("scenarios", {}).items():
+        base = baseline.get("scenarios", {}).get(scenario)
+        if not isinstance(base, dict):
+            continue
+        checks = [(m, m) for m in _COMPARED_METRICS] + [
+            (m, f"server.{m}") for m in _COMPARED_SERVER_METRICS
+        ]
+        for label, path in checks:
+            cur_value = _lookup(cur, path)
+            base_value = _lookup(base, path)
+            if cur_value is None or base_value is None:
+                continue
+            if label == "error_rate":
+                limit = base_value + 0.01
+            else:
+                # Small absolute slack keeps near-zero metrics from flapping.
+                limit = base_value * (1 + tolerance) + 1.0
+            if cur_value > limit:
+                regressions.append(
+                    f"{scenario}.{label}: {cur_value:.3f} > baseline {base_value:.3f}"
+                )
+    return regressions
+
+
+async def _drive(args: argparse.Namespace, base_url: str) -> dict[str, Any]:
+    limits = httpx.Limits(
+        max_connections=args.concurrency + 4,
+        max_keepalive_connections=args.concurrency + 4,
+    )
+    async with httpx.AsyncClient(
+        base_url=base_url, timeout=args.timeout, limits=limits
+    ) as client:
+        await _wait_healthy(client)
+        headers, skill_name, workflow_id = await _setup_fixtures(client)
+        try:
+            scenarios: dict[str, Any] = {}
+            for scenario in args.scenarios:
+                scenarios[scenario] = await _run_scenario(
+                    client, scenario, args, headers, skill_name, workflow_id
+                )
+        finally:
+            await _cleanup_fixtures(client, headers, skill_name, workflow_id)
+
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "concurrency": args.concurrency,
+            "sessions": args.sessions,
+            "ttft_ms": args.ttft_ms,
+            "tokens_per_second": args.tokens_per_second,
+            "output_tokens": args.output_tokens,
+            "error_rate": args.error_rate,
+            "stream_mode": args.stream_mode,
+            "base_url": base_url,
+        },
+        "scenarios": scenarios,
+    }
+
+
+def _parse_scenarios(value: str) -> list[str]:
+    items = [item.strip() for item in value.split(",") if item.strip()]
+    unknown = [item for item in items if item not in SCENARIOS]
+    if unknown or not items:
+        raise argparse.ArgumentTypeError(
+            f"scenarios must be a comma-separated subset of {','.join(SCENARIOS)}"
+        )
+    return items
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Concurrent SSE load test against a local backend"
+    )
+    _ = parser.add_argument("--concurrency", type=int, default=20)
+    _ = parser.add_argument("--sessions", type=int, default=100, help="Sessions per scenario")
+    _ = parser.add_argument(
+        "--scenarios", type=_parse_scenarios, default=list(SCENARIOS)
+    )
+    _ = parser.add_argument(
+        "--base-url",
+        type=str,
+        default="",
+        help="Target an already running backend instead of starting one",
+    )
+    _ = parser.add_argument(
+        "--stream-mode", choices=("token", "coalesced"), default="token"
+    )
+    _ = parser.add_argument("--timeout", type=float, default=120.0)
+    _ = parser.add_argument("--ttft-ms", type=float, default=50.0)
+    _ = parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    _ = parser.add_argument("--output-tokens", type=int, default=64)
+    _ = parser.add_argument("--error-rate", type=float, default=0.0)
+    _ = parser.add_argument(
+        "--output",
+        type=str,
+        default="data/loadtest_results.json",
+        help="Where to write the JSON results",
+    )
+    _ = parser.add_argument("--baseline", type=str, default="", help="Baseline JSON to compare")
+    _ = parser.add_argument("--save-baseline", type=str, default="")
+    _ = parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed relative regression vs baseline (default: 0.2)",
+    )
+    _ = parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    _ = parser.add_argument("--port", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        return _serve(args.port)
+
+    if args.concurrency <= 0 or args.sessions <= 0:
+        print("--concurrency and --sessions must be positive", file=sys.stderr)
+        return 2
+
+    server: subprocess.Popen[bytes] | None = None
+    base_url = cast(str, args.base_url).rstrip("/")
+    if not base_url:
+        port = _free_port()
+        server = subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), "--serve", "--port", str(port)],
+            cwd=str(BACKEND_ROOT),
+            env=_server_env(args),
+        )
+        base_url = f"http://127.0.0.1:{port}"
+
+    try:
+        results = asyncio.run(_drive(args, base_url))
+    finally:
+        if server is not None:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+    output_path = Path(cast(str, args.output))
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
+    if args.save_baseline:
+        baseline_path = Path(cast(str, args.save_baseline))
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(
+            json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8"
+        )
+
+    json.dump(results, sys.stdout, ensure_ascii=False, indent=2)
+    _ = sys.stdout.write("\n")
+
+    if args.baseline:
+        baseline = cast(
+            dict[str, Any],
+            json.loads(Path(cast(str, args.baseline)).read_text(encoding="utf-8")),
+        )
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print("Regressions vs baseline:", file=sys.stderr)
+            for line in regressions:
+                print(f"  - {line}", file=sys.stderr)
+            return 1
+        print("No regressions vs baseline.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
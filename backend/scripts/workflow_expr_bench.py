@@ -0,0 +1,93 @@
+"""Microbenchmarks for workflow condition expressions and templates.
+
+Compares the per-evaluation cost of the legacy path (``resolve_expression``
+plus ``safe_eval``, regex substitution of templates) with the precompiled
+forms used by the engine (``compile_condition``, ``compile_template``).
+
+Examples:
+    python scripts/workflow_expr_bench.py
+    python scripts/workflow_expr_bench.py --number 50000 --output-bytes 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.core.workflow.workflow_context import (  # noqa: E402
+    TEMPLATE_PATTERN,
+    ExecutionContext,
+    compile_condition,
+    safe_eval,
+)
+
+CONDITIONS = (
+    "{{classify.output}} contains 'refund'",
+    "{{score.output}} > 0.5 && {{classify.output}}.includes('urgent')",
+    "{{lang}} === 'en' || {{lang}} === 'de'",
+)
+TEMPLATE = (
+    "You are a support agent for {{company}}. The customer wrote in {{lang}}.\n"
+    "Classification: {{classify.output}}\nAnswer using: {{kb.output}}"
+)
+
+
+def _context(output_bytes: int) -> ExecutionContext:
+    ctx = ExecutionContext("I want a refund, this is urgent")
+    ctx.variables.update(company="ACME", lang="en")
+    ctx.set_output("classify", "refund urgent billing")
+    ctx.set_output("score", 0.82)
+    ctx.set_output("kb", "x" * output_bytes)
+    return ctx
+
+
+def _legacy_template(ctx: ExecutionContext, template: str) -> str:
+    def replace_var(match):
+        value = ctx.get_variable(match.group(1))
+        return str(value) if value is not None else match.group(0)
+
+    return TEMPLATE_PATTERN.sub(replace_var, template)
+
+
+def _report(name: str, legacy: float, compiled: float, number: int) -> None:
+    legacy_us = legacy / number * 1e6
+    compiled_us = compiled / number * 1e6
+    print(
+        f"{name:<10} legacy {legacy_us:9.2f} us  compiled {compiled_us:9.2f} us"
+        f"  speedup {legacy_us / compiled_us:5.1f}x"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000)
+    parser.add_argument("--output-bytes", type=int, default=2000)
+    args = parser.parse_args()
+
+    ctx = _context(args.output_bytes)
+    number = args.number
+
+    for i, expression in enumerate(CONDITIONS):
+        compiled = compile_condition(expression)
+        assert compiled.evaluate(ctx)[0] is safe_eval(
+            ctx.resolve_expression(expression)
+        )
+        legacy_time = timeit.timeit(
+            lambda: safe_eval(ctx.resolve_expression(expression)), number=number
+        )
+        compiled_time = timeit.timeit(lambda: compiled.evaluate(ctx), number=number)
+        _report(f"cond[{i}]", legacy_time, compiled_time, number)
+
+    assert ctx.resolve_template(TEMPLATE) == _legacy_template(ctx, TEMPLATE)
+    legacy_time = timeit.timeit(lambda: _legacy_template(ctx, TEMPLATE), number=number)
+    compiled_time = timeit.timeit(lambda: ctx.resolve_template(TEMPLATE), number=number)
+    _report("template", legacy_time, compiled_time, number)
+
+
+if __name__ == "__main__":
+    main()
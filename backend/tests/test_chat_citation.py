@@ -1,9 +1,8 @@
-import json
-
 import pytest
 
 from app.api.chat_stream import chat_stream_generator
 from app.models.chat import ChatRequest
+from app.utils.sse import CitationEvent
 
 
 @pytest.mark.asyncio
@@ -19,12 +18,9 @@ async def test_citation_payload_includes_excerpt() -> None:
     ]
 
     citation_payload = None
-    async for chunk in chat_stream_generator(request, [], pre_retrieved_results):
-        if chunk.startswith("event: citation"):
-            data_line = next(
-                line for line in chunk.split("\n") if line.startswith("data: ")
-            )
-            citation_payload = json.loads(data_line[6:])
+    async for event in chat_stream_generator(request, [], pre_retrieved_results):
+        if isinstance(event, CitationEvent):
+            citation_payload = event.payload()
             break
 
     assert citation_payload is not None
@@ -0,0 +1,226 @@
+"""Tests for append-only chat message storage and session listing."""
+
+import json
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+
+from app.api.chat_session import (
+    delete_session_by_id,
+    list_user_sessions,
+    load_session,
+    save_session,
+)
+from app.core.database import AsyncSessionLocal, init_db
+from app.models.chat import ChatMessage, SessionHistory
+from app.models.session import ChatMessageDB, ChatSessionDB
+from app.models.user import User
+
+
+@pytest_asyncio.fixture
+async def session_ids():
+    await init_db()
+    ids: list[str] = []
+    yield ids
+    for session_id in ids:
+        await delete_session_by_id(session_id)
+
+
+async def _stored_seqs(session_id: str) -> list[tuple[int, str]]:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(ChatMessageDB.seq, ChatMessageDB.content)
+            .where(ChatMessageDB.session_id == session_id)
+            .order_by(ChatMessageDB.seq)
+        )
+        return [tuple(row) for row in result.all()]
+
+
+@pytest.mark.asyncio
+async def test_turns_are_appended(session_ids):
+    session_ids.append("storage-append")
+    session = SessionHistory(
+        session_id="storage-append",
+        messages=[ChatMessage(role="user", content="hi")],
+    )
+    await save_session(session)
+
+    loaded = await load_session("storage-append")
+    assert loaded is not None
+    loaded.messages.append(ChatMessage(role="assistant", content="hello"))
+    await save_session(loaded)
+    loaded.messages.append(ChatMessage(role="user", content="again"))
+    await save_session(loaded)
+
+    assert await _stored_seqs("storage-append") == [
+        (0, "hi"),
+        (1, "hello"),
+        (2, "again"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_windowed_load_keeps_older_messages(session_ids):
+    session_ids.append("storage-window")
+    session = SessionHistory(
+        session_id="storage-window",
+        messages=[ChatMessage(role="user", content=str(i)) for i in range(5)],
+    )
+    await save_session(session)
+
+    window = await load_session("storage-window", limit=2)
+    assert window is not None
+    assert [m.content for m in window.messages] == ["3", "4"]
+
+    window.messages.append(ChatMessage(role="assistant", content="5"))
+    await save_session(window)
+
+    full = await load_session("storage-window")
+    assert full is not None
+    assert [m.content for m in full.messages] == ["0", "1", "2", "3", "4", "5"]
+
+
+@pytest.mark.asyncio
+async def test_unloaded_session_replaces_history(session_ids):
+    session_ids.append("storage-replace")
+    await save_session(
+        SessionHistory(
+            session_id="storage-replace",
+            messages=[ChatMessage(role="user", content="old")],
+        )
+    )
+    await save_session(
+        SessionHistory(
+            session_id="storage-replace",
+            messages=[ChatMessage(role="user", content="new")],
+        )
+    )
+
+    assert await _stored_seqs("storage-replace") == [(0, "new")]
+
+
+@pytest.mark.asyncio
+async def test_legacy_messages_json_is_migrated_on_load(session_ids):
+    session_ids.append("storage-legacy")
+    legacy = [
+        {"role": "user", "content": "q", "timestamp": "2026-01-01T00:00:00+00:00"},
+        {"role": "assistant", "content": "a", "timestamp": None},
+    ]
+    async with AsyncSessionLocal() as db:
+        db.add(
+            ChatSessionDB(
+                session_id="storage-legacy",
+                messages_json=json.dumps(legacy),
+            )
+        )
+        await db.commit()
+
+    loaded = await load_session("storage-legacy")
+
+    assert loaded is not None
+    assert [m.content for m in loaded.messages] == ["q", "a"]
+    assert await _stored_seqs("storage-legacy") == [(0, "q"), (1, "a")]
+    async with AsyncSessionLocal() as db:
+        row = await db.scalar(
+            select(ChatSessionDB).where(ChatSessionDB.session_id == "storage-legacy")
+        )
+        assert row.messages_json == "[]"
+
+
+@pytest.mark.asyncio
+async def test_delete_removes_messages(session_ids):
+    await save_session(
+        SessionHistory(
+            session_id="storage-delete",
+            messages=[ChatMessage(role="user", content="bye")],
+        )
+    )
+
+    assert await delete_session_by_id("storage-delete") is True
+    assert await _stored_seqs("storage-delete") == []
+
+
+@pytest.mark.asyncio
+async def test_summary_columns_are_maintained(session_ids):
+    session_ids.append("storage-summary")
+    session = SessionHistory(
+        session_id="storage-summary",
+        user_id="summary-user",
+        messages=[ChatMessage(role="user", content="first question")],
+    )
+    await save_session(session)
+    loaded = await load_session("storage-summary")
+    loaded.messages.append(ChatMessage(role="assistant", content="answer"))
+    await save_session(loaded)
+
+    sessions, next_cursor = await list_user_sessions(
+        User(id="summary-user", email="summary@example.com"), limit=10
+    )
+
+    assert next_cursor is None
+    [summary] = [s for s in sessions if s["session_id"] == "storage-summary"]
+    assert summary["title"] == "first question"
+    assert summary["message_count"] == 2
+    assert summary["last_message_at"] is not None
+
+
+@pytest.mark.asyncio
+async def test_cursor_pagination_walks_all_sessions(session_ids):
+    user = User(id="pager-user", email="pager@example.com")
+    for i in range(5):
+        session_id = f"storage-page-{i}"
+        session_ids.append(session_id)
+        await save_session(
+            SessionHistory(
+                session_id=session_id,
+                user_id="pager-user",
+                messages=[ChatMessage(role="user", content=str(i))],
+            )
+        )
+
+    seen: list[str] = []
+    cursor = None
+    pages = 0
+    while True:
+        page, cursor = await list_user_sessions(user, limit=2, cursor=cursor)
+        seen.extend(s["session_id"] for s in page if s["user_id"] == "pager-user")
+        pages += 1
+        if cursor is None:
+            break
+
+    assert seen == [f"storage-page-{i}" for i in reversed(range(5))]
+    assert pages >= 3
+
+
+@pytest.mark.asyncio
+async def test_invalid_cursor_is_rejected():
+    with pytest.raises(ValueError):
+        await list_user_sessions(
+            User(id="pager-user", email="pager@example.com"), cursor="not-a-cursor"
+        )
+
+
+@pytest.mark.asyncio
+async def test_listing_without_limit_returns_every_session(session_ids):
+    from app.api.chat import DEFAULT_SESSION_PAGE_SIZE, list_sessions
+
+    user = User(id="unpaged-user", email="unpaged@example.com")
+    long_title = "q" * 300
+    for i in range(DEFAULT_SESSION_PAGE_SIZE + 2):
+        session_id = f"storage-unpaged-{i}"
+        session_ids.append(session_id)
+        await save_session(
+            SessionHistory(
+                session_id=session_id,
+                user_id="unpaged-user",
+                messages=[ChatMessage(role="user", content=long_title)],
+            )
+        )
+
+    listing = await list_sessions(user=user)
+    mine = [s for s in listing["sessions"] if s["user_id"] == "unpaged-user"]
+
+    assert listing["next_cursor"] is None
+    assert len(mine) == DEFAULT_SESSION_PAGE_SIZE + 2
+    assert all(s["title"] == long_title for s in mine)
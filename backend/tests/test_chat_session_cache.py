@@ -0,0 +1,146 @@
+"""Tests for the write-behind chat session cache."""
+
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from sqlalchemy import func, select
+
+from app.api import chat_session
+from app.api.chat import _load_session_for_turn
+from app.api.chat_session import (
+    SessionCache,
+    delete_session_by_id,
+    load_session,
+    save_session,
+)
+from app.core.database import AsyncSessionLocal, init_db
+from app.models.chat import ChatMessage, ChatRequest, SessionHistory
+from app.models.session import ChatMessageDB
+from app.models.user import User, UserRole
+
+
+@pytest_asyncio.fixture
+async def cache(monkeypatch):
+    await init_db()
+    session_cache = SessionCache(max_entries=2, flush_interval=3600)
+    monkeypatch.setattr(chat_session, "_session_cache", session_cache)
+    session_cache.start()
+    yield session_cache
+    await session_cache.stop()
+    for session_id in ("cache-a", "cache-b", "cache-c"):
+        await delete_session_by_id(session_id)
+
+
+async def _stored_count(session_id: str) -> int:
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(
+            select(func.count()).where(ChatMessageDB.session_id == session_id)
+        )
+
+
+def _session(session_id: str, *contents: str) -> SessionHistory:
+    return SessionHistory(
+        session_id=session_id,
+        messages=[ChatMessage(role="user", content=c) for c in contents],
+    )
+
+
+@pytest.mark.asyncio
+async def test_save_is_deferred_until_flush(cache):
+    await save_session(_session("cache-a", "hi"))
+    assert await _stored_count("cache-a") == 0
+
+    await cache.flush()
+
+    assert await _stored_count("cache-a") == 1
+
+
+@pytest.mark.asyncio
+async def test_load_returns_cached_session_with_pending_writes(cache):
+    await save_session(_session("cache-a", "hi"))
+    loaded = await load_session("cache-a", limit=10)
+    assert loaded is not None
+    loaded.messages.append(ChatMessage(role="assistant", content="hello"))
+    await save_session(loaded)
+
+    again = await load_session("cache-a", limit=10)
+
+    assert again is not loaded
+    assert [m.content for m in again.messages] == ["hi", "hello"]
+    await cache.flush()
+    assert await _stored_count("cache-a") == 2
+
+
+@pytest.mark.asyncio
+async def test_eviction_keeps_dirty_sessions(cache):
+    for session_id in ("cache-a", "cache-b", "cache-c"):
+        await save_session(_session(session_id, session_id))
+
+    # cache-a was evicted from the LRU but its write is still pending.
+    loaded = await load_session("cache-a")
+
+    assert loaded is not None
+    assert [m.content for m in loaded.messages] == ["cache-a"]
+    assert await _stored_count("cache-c") == 1
+
+
+@pytest.mark.asyncio
+async def test_stop_flushes_pending_writes(cache):
+    await save_session(_session("cache-b", "x", "y"))
+
+    await cache.stop()
+
+    assert await _stored_count("cache-b") == 2
+
+
+@pytest.mark.asyncio
+async def test_delete_drops_pending_writes(cache):
+    await save_session(_session("cache-c", "gone"))
+    await cache.flush()
+    loaded = await load_session("cache-c", limit=10)
+    loaded.messages.append(ChatMessage(role="assistant", content="pending"))
+    await save_session(loaded)
+
+    assert await delete_session_by_id("cache-c") is True
+    await cache.flush()
+
+    assert await _stored_count("cache-c") == 0
+    assert await load_session("cache-c") is None
+
+
+@pytest.mark.asyncio
+async def test_unsaved_turn_leaves_the_cached_session_untouched(cache):
+    await save_session(_session("cache-a", "hi"))
+    failed = await load_session("cache-a", limit=10)
+    failed.messages.append(ChatMessage(role="user", content="lost"))
+
+    turn = await load_session("cache-a", limit=10)
+    assert [m.content for m in turn.messages] == ["hi"]
+    turn.messages.append(ChatMessage(role="user", content="next"))
+    await save_session(turn)
+    await cache.flush()
+
+    assert await _stored_count("cache-a") == 2
+    assert [m.content for m in (await load_session("cache-a")).messages] == [
+        "hi",
+        "next",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_unsaved_admin_turn_keeps_the_session_owner(cache):
+    owned = _session("cache-b", "mine")
+    owned.user_id = "1"
+    await save_session(owned)
+    owner = User(id=1, email="owner@example.com", role=UserRole.USER)
+    admin = User(id=2, email="admin@example.com", role=UserRole.ADMIN)
+    request = ChatRequest(session_id="cache-b", message="hello")
+
+    await _load_session_for_turn(request, admin)
+    session = await _load_session_for_turn(request, owner)
+
+    assert session.user_id == "1"
+    with pytest.raises(HTTPException):
+        await _load_session_for_turn(
+            request, User(id=3, email="other@example.com", role=UserRole.USER)
+        )
@@ -1,4 +1,4 @@
-import json
+import asyncio
 from datetime import datetime, timezone
 import pytest
 
@@ -7,22 +7,15 @@ from app.core.skill.skill_loader import SkillValidationError
 from app.models.chat import ChatRequest, SessionHistory
 from app.models.user import User
 from app.models.workflow import GraphData, Workflow
+from app.utils.sse import DoneEvent, StreamEvent, TokenEvent
 
 
-def _event_name(chunk: str) -> str:
-    for line in chunk.splitlines():
-        if line.startswith("event: "):
-            return line[7:].strip()
-    return ""
+def _event_name(event: StreamEvent) -> str:
+    return event.event
 
 
-def _event_data(chunk: str) -> dict[str, object]:
-    for line in chunk.splitlines():
-        if line.startswith("data: "):
-            payload = line[6:]
-            if payload:
-                return json.loads(payload)
-    return {}
+def _event_data(event: StreamEvent) -> dict[str, object]:
+    return event.payload()
 
 
 @pytest.mark.asyncio
@@ -82,15 +75,57 @@ async def test_chat_stream_generator_error(monkeypatch: pytest.MonkeyPatch) -> N
     assert _event_data(chunks[-1]).get("status") == "error"
 
 
+@pytest.mark.asyncio
+async def test_chat_stream_generator_streams_before_retrieval_completes(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    release = asyncio.Event()
+    seen_messages: list[list[dict[str, object]]] = []
+
+    async def slow_search() -> list[dict[str, object]]:
+        await release.wait()
+        return [{"text": "ctx", "metadata": {"doc_id": "d1"}, "score": 0.9}]
+
+    async def fake_chat_completion_stream(messages, *args, **kwargs):
+        _ = (args, kwargs)
+        seen_messages.append(messages)
+        yield "A"
+
+    monkeypatch.setattr(
+        chat_stream_api, "chat_completion_stream", fake_chat_completion_stream
+    )
+
+    def build_messages(results):
+        return [{"role": "system", "content": results[0]["text"]}], 0
+
+    request = ChatRequest(session_id="s1", message="hello", kb_id="kb1")
+    gen = chat_stream_api.chat_stream_generator(
+        request,
+        [],
+        user_id=1,
+        retrieval=asyncio.ensure_future(slow_search()),
+        build_messages=build_messages,
+    )
+
+    first = await asyncio.wait_for(gen.__anext__(), timeout=1)
+    assert _event_data(first)["status"] == "start"
+
+    release.set()
+    chunks = [first] + [chunk async for chunk in gen]
+
+    assert [_event_name(c) for c in chunks][-3:] == ["citation", "token", "done"]
+    assert seen_messages == [[{"role": "system", "content": "ctx"}]]
+
+
 @pytest.mark.asyncio
 async def test_stream_with_save_accumulates_assistant_output(
     monkeypatch: pytest.MonkeyPatch,
 ) -> None:
     async def fake_chat_stream_generator(*args, **kwargs):
         _ = (args, kwargs)
-        yield chat_stream_api.format_sse_event("token", {"content": "Hi"})
-        yield chat_stream_api.format_sse_event("token", {"content": "!"})
-        yield chat_stream_api.format_sse_event("done", {"status": "success"})
+        yield TokenEvent("Hi")
+        yield TokenEvent("!")
+        yield DoneEvent("success")
 
     saved_sessions: list[SessionHistory] = []
 
@@ -135,8 +170,8 @@ async def test_workflow_stream_generator_success_saves_session(
         updated_at=now,
     )
 
-    async def fake_get_workflow(workflow_id: str):
-        _ = workflow_id
+    async def fake_get_workflow(workflow_id: str, user: User | None = None):
+        _ = (workflow_id, user)
         return workflow
 
     class FakeEngine:
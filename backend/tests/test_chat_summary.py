@@ -0,0 +1,110 @@
+"""Tests for rolling conversation summarization."""
+
+import pytest
+import pytest_asyncio
+
+from app.api import chat_summary
+from app.api.chat_session import delete_session_by_id, load_session, save_session
+from app.api.chat_summary import maybe_schedule_summary, split_history
+from app.api.observability import _aggregate_usage
+from app.core import config
+from app.core.database import init_db
+from app.models.chat import ChatMessage, SessionHistory
+
+
+@pytest_asyncio.fixture
+async def summary_settings(monkeypatch):
+    await init_db()
+    monkeypatch.setattr(
+        config,
+        "_settings",
+        config.Settings(
+            chat_summary_enabled=True,
+            chat_summary_trigger_tokens=256,
+            chat_summary_keep_messages=2,
+            chat_session_cache_enabled=False,
+        ),
+    )
+    yield
+    await delete_session_by_id("summary-a")
+
+
+def _long_session(count: int) -> SessionHistory:
+    return SessionHistory(
+        session_id="summary-a",
+        messages=[
+            ChatMessage(
+                role="user" if i % 2 == 0 else "assistant", content=f"{i} " + "x" * 400
+            )
+            for i in range(count)
+        ],
+    )
+
+
+@pytest.mark.asyncio
+async def test_long_history_is_summarized_in_background(summary_settings, monkeypatch):
+    prompts: list[str] = []
+
+    async def fake_chat_completion(messages, **kwargs):
+        prompts.append(messages[-1]["content"])
+        return "  the user asked about x  "
+
+    monkeypatch.setattr(chat_summary, "chat_completion", fake_chat_completion)
+    session = _long_session(6)
+    await save_session(session)
+
+    task = maybe_schedule_summary(session, user_id=1)
+    assert task is not None
+    await task
+
+    assert session.summary == "the user asked about x"
+    assert session.summary_upto == 4
+    assert "3 xxx" in prompts[0] and "4 xxx" not in prompts[0]
+
+    loaded = await load_session("summary-a", limit=5)
+    assert loaded is not None
+    summary_message, recent = split_history(loaded)
+    assert summary_message is not None
+    assert "the user asked about x" in summary_message["content"]
+    assert [m.content[:1] for m in recent] == ["4", "5"]
+
+
+@pytest.mark.asyncio
+async def test_short_history_is_not_summarized(summary_settings):
+    session = _long_session(2)
+    await save_session(session)
+
+    assert maybe_schedule_summary(session) is None
+    assert split_history(session) == (None, session.messages)
+
+
+@pytest.mark.asyncio
+async def test_failed_summary_keeps_raw_history(summary_settings, monkeypatch):
+    async def failing_chat_completion(messages, **kwargs):
+        raise RuntimeError("provider down")
+
+    monkeypatch.setattr(chat_summary, "chat_completion", failing_chat_completion)
+    session = _long_session(6)
+    await save_session(session)
+
+    await maybe_schedule_summary(session)
+
+    loaded = await load_session("summary-a")
+    assert loaded is not None
+    assert loaded.summary is None
+    assert split_history(loaded) == (None, loaded.messages)
+
+
+def test_usage_summary_totals_saved_input_tokens():
+    entries = [
+        {"provider": "fake", "model": "m", "input_tokens": 10, "output_tokens": 1},
+        {
+            "provider": "fake",
+            "model": "m",
+            "input_tokens": 10,
+            "output_tokens": 1,
+            "saved_input_tokens": 90,
+        },
+    ]
+
+    assert _aggregate_usage(entries).total_saved_input_tokens == 90
@@ -2,6 +2,7 @@ import subprocess
 
 import pytest
 
+from app.utils import code_sandbox
 from app.utils.code_sandbox import (
     SandboxResult,
     _build_env,
@@ -11,6 +12,12 @@ from app.utils.code_sandbox import (
 )
 
 
+@pytest.fixture(autouse=True)
+def _cold_spawn(monkeypatch: pytest.MonkeyPatch) -> None:
+    # These tests cover the fresh-interpreter path; see test_code_sandbox_pool.
+    monkeypatch.setattr(code_sandbox, "get_sandbox_pool", lambda: None)
+
+
 def test_validate_python_code_blocks_banned_imports() -> None:
     with pytest.raises(ValueError):
         validate_python_code("import socket\nprint('x')")
@@ -0,0 +1,127 @@
+"""Tests for the warm code-node sandbox worker pool."""
+
+import os
+
+import pytest
+
+from app.utils import code_sandbox
+from app.utils.code_sandbox import SandboxPool, execute_python
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="workers fork per job")
+
+
+@pytest.fixture
+def pool():
+    pool = SandboxPool(size=1, max_jobs=3)
+    yield pool
+    pool.close()
+
+
+def _worker_pid(pool: SandboxPool) -> int:
+    assert len(pool) == 1
+    return pool._idle[0].process.pid
+
+
+def test_runs_reuse_a_warm_worker(pool):
+    pool.warm()
+    pid = _worker_pid(pool)
+
+    first = pool.run("print('hello')", env={})
+    second = pool.run("import json\nprint(json.dumps([1, 2]))", env={})
+
+    assert (first.ok, first.stdout) == (True, "hello\n")
+    assert (second.ok, second.stdout) == (True, "[1, 2]\n")
+    assert _worker_pid(pool) == pid
+
+
+def test_each_run_gets_a_fresh_namespace_env_and_directory(pool):
+    code = (
+        "import sys\n"
+        "from pathlib import Path\n"
+        "print('leaked' if 'marker' in globals() else 'clean')\n"
+        "print(sys.argv[0] == str(Path.cwd() / 'run.py'))\n"
+        "marker = 1\n"
+        "Path('scratch.txt').write_text('x')\n"
+        "print(sorted(Path.cwd().iterdir())[-1].name)\n"
+    )
+    first = pool.run(code, env={})
+    second = pool.run(code, env={})
+
+    assert first.stdout == second.stdout == "clean\nTrue\nscratch.txt\n"
+
+    env_code = "import sys\nprint(sys.modules['posix'].environ.get(b'X', b'-'))"
+    assert pool.run(env_code, env={"x": "1"}).stdout == "b'1'\n"
+    assert pool.run(env_code, env={}).stdout == "b'-'\n"
+
+
+def test_errors_and_exit_codes_match_a_fresh_interpreter(pool):
+    failed = pool.run("raise ValueError('boom')", env={})
+    assert failed.ok is False
+    assert failed.error == "Code execution returned non-zero status"
+    assert failed.stderr.startswith("Traceback")
+    assert "run.py" in failed.stderr
+    assert failed.stderr.rstrip().endswith("ValueError: boom")
+
+    exited = pool.run("import sys\nprint('partial')\nsys.exit('bye')", env={})
+    assert (exited.ok, exited.stdout, exited.stderr) == (False, "partial\n", "bye\n")
+
+    assert pool.run("import sys\nsys.exit(0)", env={}).ok is True
+
+
+def test_output_is_truncated(pool):
+    result = pool.run("print('a' * 1000)", env={}, stdout_limit_bytes=10)
+    assert result.stdout == "a" * 10
+
+
+def test_workers_are_recycled_after_max_jobs(pool):
+    pool.run("print(1)", env={})
+    pid = _worker_pid(pool)
+    pool.run("print(2)", env={})
+    pool.run("print(3)", env={})
+
+    assert _worker_pid(pool) != pid
+
+
+def test_timeouts_kill_the_worker_and_a_fresh_one_takes_over(pool):
+    pool.run("print(1)", env={})
+    worker = pool._idle[0]
+
+    result = pool.run("while True:\n    pass", env={}, timeout_seconds=1)
+
+    assert result.ok is False
+    assert result.error == "Code execution timed out"
+    assert worker.process.poll() is not None
+    assert _worker_pid(pool) != worker.process.pid
+    assert pool.run("print('next')", env={}).stdout == "next\n"
+
+
+def test_memory_limit_applies_per_run(pool):
+    code = "data = bytearray(200 * 1024 * 1024)\nprint(len(data))"
+
+    limited = pool.run(code, env={}, memory_limit_mb=128)
+    assert limited.ok is False
+    assert "MemoryError" in limited.stderr
+
+    assert pool.run(code, env={}, memory_limit_mb=512).ok is True
+
+
+def test_execute_python_validates_before_using_the_pool(monkeypatch, pool):
+    monkeypatch.setattr(code_sandbox, "_pool", pool)
+
+    with pytest.raises(ValueError):
+        execute_python("import os", env={})
+    assert len(pool) == 0
+
+    result = execute_python("print('pooled')", env={})
+    assert result.stdout == "pooled\n"
+    assert len(pool) == 1
+
+
+def test_closed_pool_stops_its_workers(pool):
+    pool.warm()
+    worker = pool._idle[0]
+
+    pool.close()
+
+    assert worker.process.poll() is not None
+    assert len(pool) == 0
@@ -0,0 +1,85 @@
+import pytest
+
+from app.core import config
+from app.core import llm as llm_module
+from app.core.fake_provider import FakeAsyncClient, FakeProviderError
+from app.core.rag import FakeEmbedding, create_embedding_model
+
+
+@pytest.fixture
+def fake_settings():
+    original = config._settings
+    config._settings = config.Settings(
+        default_llm_provider="fake",
+        deepseek_api_key="",
+        openai_api_key="",
+        qwen_api_key="",
+        fake_llm_enabled=True,
+        fake_llm_ttft_ms=0,
+        fake_llm_tokens_per_second=10_000,
+        fake_llm_output_tokens=5,
+        fake_embedding_dimension=8,
+    )
+    try:
+        yield config._settings
+    finally:
+        config._settings = original
+
+
+def test_fake_provider_is_not_a_fallback_unless_enabled() -> None:
+    original = config._settings
+    try:
+        config._settings = config.Settings(
+            default_llm_provider="deepseek",
+            deepseek_api_key="",
+            openai_api_key="",
+            qwen_api_key="",
+            fake_llm_enabled=False,
+        )
+        with pytest.raises(ValueError):
+            llm_module.resolve_model(None)
+    finally:
+        config._settings = original
+
+
+def test_resolve_fake_provider(fake_settings) -> None:
+    assert llm_module.resolve_model(None) == ("fake", "fake-model")
+    assert llm_module.resolve_model("fake:other") == ("fake", "other")
+
+
+@pytest.mark.asyncio
+async def test_fake_stream_is_deterministic(fake_settings, monkeypatch) -> None:
+    monkeypatch.setattr(llm_module, "_write_token_usage", lambda **k: None)
+    messages = [{"role": "user", "content": "hello"}]
+
+    first = [t async for t in llm_module.chat_completion_stream(messages)]
+    second = [t async for t in llm_module.chat_completion_stream(messages)]
+
+    assert len(first) == 5
+    assert first == second
+    assert await llm_module.chat_completion(messages) == "".join(first)
+    capped = llm_module.chat_completion_stream(messages, max_tokens=2)
+    assert [t async for t in capped] == first[:2]
+
+
+@pytest.mark.asyncio
+async def test_fake_error_rate(fake_settings) -> None:
+    fake_settings.fake_llm_error_rate = 1.0
+    client = FakeAsyncClient()
+    with pytest.raises(FakeProviderError):
+        await client.chat.completions.create(
+            model="fake-model", messages=[{"role": "user", "content": "x"}]
+        )
+
+
+@pytest.mark.asyncio
+async def test_fake_embeddings_are_deterministic(fake_settings) -> None:
+    embedder = create_embedding_model(provider="fake")
+    assert isinstance(embedder, FakeEmbedding)
+
+    a = await embedder.get_text_embedding("alpha")
+    batch = await embedder.get_text_embedding_batch(["alpha", "beta"])
+
+    assert len(a) == 8
+    assert batch[0] == a
+    assert batch[1] != a
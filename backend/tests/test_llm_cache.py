@@ -0,0 +1,117 @@
+import time
+
+import pytest
+
+from app.core import config
+from app.core import llm as llm_module
+from app.core import llm_cache as llm_cache_module
+from app.core.llm_cache import LLMResponseCache, build_cache_key
+
+
+def _key(content: str = "hi", temperature: float = 0.0) -> str:
+    return build_cache_key(
+        provider="openai",
+        model="gpt-4o-mini",
+        messages=[{"role": "user", "content": content}],
+        temperature=temperature,
+        max_tokens=None,
+    )
+
+
+def test_cache_key_is_stable_and_sensitive_to_inputs() -> None:
+    assert _key() == _key()
+    assert _key() != _key(content="hello")
+    assert _key() != _key(temperature=0.5)
+
+
+@pytest.mark.asyncio
+async def test_memory_tier_evicts_least_recently_used() -> None:
+    cache = LLMResponseCache(max_entries=2, ttl_seconds=60)
+    await cache.set("a", ["1"])
+    await cache.set("b", ["2"])
+    assert await cache.get("a") == ["1"]
+    await cache.set("c", ["3"])
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == ["1"]
+    assert await cache.get("c") == ["3"]
+
+
+@pytest.mark.asyncio
+async def test_entries_expire_after_ttl(monkeypatch: pytest.MonkeyPatch) -> None:
+    cache = LLMResponseCache(max_entries=4, ttl_seconds=10)
+    await cache.set("a", ["x"])
+    now = time.time()
+    monkeypatch.setattr(llm_cache_module.time, "time", lambda: now + 11)
+
+    assert await cache.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_sqlite_tier_survives_new_instance(tmp_path) -> None:
+    db_path = tmp_path / "llm_cache.db"
+    first = LLMResponseCache(max_entries=4, ttl_seconds=60, db_path=db_path)
+    await first.set("k", ["Hel", "lo"])
+
+    second = LLMResponseCache(max_entries=4, ttl_seconds=60, db_path=db_path)
+    assert await second.get("k") == ["Hel", "lo"]
+
+
+class _FakeChunk:
+    def __init__(self, text: str):
+        delta = type("Delta", (), {"content": text})()
+        self.choices = [type("Choice", (), {"delta": delta})()]
+
+
+class _FakeStream:
+    def __init__(self, tokens: list[str]):
+        self._tokens = tokens
+
+    def __aiter__(self):
+        return self._gen()
+
+    async def _gen(self):
+        for token in self._tokens:
+            yield _FakeChunk(token)
+
+
+@pytest.mark.asyncio
+async def test_stream_replays_cached_tokens(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[dict] = []
+
+    class _Completions:
+        async def create(self, **kwargs):
+            calls.append(kwargs)
+            return _FakeStream(["A", "B", "C"])
+
+    class _Client:
+        chat = type("Chat", (), {"completions": _Completions()})()
+
+    cache = LLMResponseCache(max_entries=4, ttl_seconds=60)
+    monkeypatch.setattr(llm_module, "get_llm_cache", lambda: cache)
+    monkeypatch.setattr(llm_module, "_create_client", lambda *a: _Client())
+    monkeypatch.setattr(llm_module, "_write_token_usage", lambda **k: None)
+
+    original = config._settings
+    try:
+        config._settings = config.Settings(openai_api_key="key-openai")
+        messages = [{"role": "user", "content": "classify me"}]
+        first = [
+            t
+            async for t in llm_module.chat_completion_stream(
+                messages, model="openai:gpt-4o-mini", temperature=0, cache=True
+            )
+        ]
+        second = [
+            t
+            async for t in llm_module.chat_completion_stream(
+                messages, model="openai:gpt-4o-mini", temperature=0, cache=True
+            )
+        ]
+    finally:
+        config._settings = original
+
+    assert first == ["A", "B", "C"]
+    assert second == first
+    assert len(calls) == 1
+    assert cache.hits == 1
@@ -0,0 +1,192 @@
+"""Tests for the OpenAI-compatible chat completions gateway."""
+
+import json
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.api import openai_compat
+from app.api.openai_compat import (
+    OpenAIChatRequest,
+    chunk_encoder,
+    openai_chat_completions,
+    require_openai_api_enabled,
+)
+from app.models.user import User
+
+USER = User(id=1, email="svc@example.com")
+
+
+def _request() -> Request:
+    return Request({"type": "http", "method": "POST", "headers": [], "client": None})
+
+
+async def _chunks(response) -> list[dict | str]:
+    body = "".join([part async for part in response.body_iterator])
+    frames = [frame for frame in body.split("\n\n") if frame]
+    assert all(frame.startswith("data: ") for frame in frames)
+    return [
+        frame[6:] if frame == "data: [DONE]" else json.loads(frame[6:])
+        for frame in frames
+    ]
+
+
+def test_chunk_encoder_produces_openai_chunks():
+    encode = chunk_encoder("chatcmpl-1", 123, "openai:gpt")
+
+    chunk = json.loads(encode('say "hi"\n')[len("data: ") :])
+
+    assert chunk == {
+        "id": "chatcmpl-1",
+        "object": "chat.completion.chunk",
+        "created": 123,
+        "model": "openai:gpt",
+        "choices": [
+            {"index": 0, "delta": {"content": 'say "hi"\n'}, "finish_reason": None}
+        ],
+    }
+
+
+@pytest.mark.asyncio
+async def test_disabled_flag_rejects_requests(monkeypatch):
+    async def disabled(_: str) -> bool:
+        return False
+
+    monkeypatch.setattr(openai_compat, "is_feature_enabled", disabled)
+
+    with pytest.raises(HTTPException) as exc:
+        await require_openai_api_enabled()
+    assert exc.value.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_provider_model_streams_chunks(monkeypatch):
+    seen: dict = {}
+
+    async def fake_stream(messages, **kwargs):
+        seen.update(messages=messages, **kwargs)
+        for token in ("Hel", "lo"):
+            yield token
+
+    monkeypatch.setattr(openai_compat, "resolve_model", lambda model: ("p", "m"))
+    monkeypatch.setattr(openai_compat, "chat_completion_stream", fake_stream)
+    payload = OpenAIChatRequest(
+        model="p:m",
+        stream=True,
+        max_tokens=16,
+        messages=[{"role": "user", "content": [{"type": "text", "text": "hi"}]}],
+    )
+
+    response = await openai_chat_completions(_request(), payload, user=USER)
+    chunks = await _chunks(response)
+
+    assert chunks[0]["choices"][0]["delta"] == {"role": "assistant", "content": ""}
+    assert [c["choices"][0]["delta"]["content"] for c in chunks[1:3]] == [
+        "Hel",
+        "lo",
+    ]
+    assert chunks[3]["choices"][0]["finish_reason"] == "stop"
+    assert chunks[4] == "[DONE]"
+    assert seen["messages"] == [{"role": "user", "content": "hi"}]
+    assert seen["model"] == "p:m"
+    assert seen["max_tokens"] == 16
+
+
+@pytest.mark.asyncio
+async def test_unknown_provider_model_is_rejected(monkeypatch):
+    def unknown(model):
+        raise ValueError(f"Unknown model: {model}")
+
+    monkeypatch.setattr(openai_compat, "resolve_model", unknown)
+    payload = OpenAIChatRequest(
+        model="nope", messages=[{"role": "user", "content": "hi"}]
+    )
+
+    with pytest.raises(HTTPException) as exc:
+        await openai_chat_completions(_request(), payload, user=USER)
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("model", ["workflow:wf-1", "skill:summarize"])
+@pytest.mark.parametrize("option", [{"temperature": 0.2}, {"max_tokens": 16}])
+async def test_workflow_and_skill_models_reject_sampling_options(model, option):
+    payload = OpenAIChatRequest(
+        model=model, messages=[{"role": "user", "content": "hi"}], **option
+    )
+
+    with pytest.raises(HTTPException) as exc:
+        await openai_chat_completions(_request(), payload, user=USER)
+    assert exc.value.status_code == 400
+    assert next(iter(option)) in exc.value.detail
+
+
+@pytest.mark.asyncio
+async def test_workflow_model_returns_completion(monkeypatch):
+    calls: dict = {}
+
+    async def fake_get_workflow(workflow_id, user):
+        calls["workflow_id"] = workflow_id
+        return object()
+
+    class FakeEngine:
+        def __init__(self, workflow):
+            pass
+
+        async def execute(self, message, user_id=None, conversation_history=None):
+            calls.update(message=message, history=conversation_history)
+            yield {"type": "workflow_start"}
+            yield {"type": "workflow_complete", "final_output": "done: " + message}
+
+    monkeypatch.setattr(openai_compat, "get_workflow", fake_get_workflow)
+    monkeypatch.setattr(openai_compat, "WorkflowEngine", FakeEngine)
+    monkeypatch.setattr(openai_compat, "audit_log", lambda **kwargs: None)
+    payload = OpenAIChatRequest(
+        model="workflow:wf-1",
+        messages=[
+            {"role": "user", "content": "first"},
+            {"role": "assistant", "content": "ok"},
+            {"role": "user", "content": "second"},
+        ],
+    )
+
+    body = await openai_chat_completions(_request(), payload, user=USER)
+
+    assert body["choices"][0]["message"]["content"] == "done: second"
+    assert body["usage"]["total_tokens"] > 0
+    assert calls["workflow_id"] == "wf-1"
+    assert calls["history"] == [
+        {"role": "user", "content": "first"},
+        {"role": "assistant", "content": "ok"},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_workflow_error_mid_stream_emits_error_chunk(monkeypatch):
+    async def fake_get_workflow(workflow_id, user):
+        return object()
+
+    class FailingEngine:
+        def __init__(self, workflow):
+            pass
+
+        async def execute(self, message, user_id=None, conversation_history=None):
+            yield {"type": "token", "content": "partial"}
+            yield {"type": "node_error", "error": "node exploded"}
+
+    monkeypatch.setattr(openai_compat, "get_workflow", fake_get_workflow)
+    monkeypatch.setattr(openai_compat, "WorkflowEngine", FailingEngine)
+    monkeypatch.setattr(openai_compat, "audit_log", lambda **kwargs: None)
+    payload = OpenAIChatRequest(
+        model="workflow:wf-1",
+        stream=True,
+        messages=[{"role": "user", "content": "go"}],
+    )
+
+    response = await openai_chat_completions(_request(), payload, user=USER)
+    chunks = await _chunks(response)
+
+    assert chunks[1]["choices"][0]["delta"]["content"] == "partial"
+    assert chunks[2] == {"error": {"message": "node exploded", "type": "server_error"}}
+    assert chunks[3] == "[DONE]"
@@ -0,0 +1,195 @@
+"""Tests for the public embed token index and output cache."""
+
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text, update
+
+import app.api.publish as publish_api
+import app.core.publish_embed as publish_embed
+from app.core import config
+from app.core.database import AsyncSessionLocal, init_db
+from app.core.publish_embed import EmbedOutputCache
+from app.core.workflow import workflow_engine
+from app.models.workflow_db import WorkflowDB
+
+
+@pytest.fixture(autouse=True)
+def output_cache(monkeypatch: pytest.MonkeyPatch) -> EmbedOutputCache:
+    cache = EmbedOutputCache(max_entries=8, ttl_seconds=60)
+    monkeypatch.setattr(publish_api, "get_embed_output_cache", lambda: cache)
+    return cache
+
+
+async def test_concurrent_identical_runs_are_coalesced(output_cache):
+    calls: list[str] = []
+    release = asyncio.Event()
+
+    async def run() -> str:
+        calls.append("run")
+        await release.wait()
+        return "out"
+
+    waiters = [asyncio.create_task(output_cache.get_or_run("k", run)) for _ in range(5)]
+    await asyncio.sleep(0)
+    waiters[0].cancel()  # a client going away must not cancel the shared run
+    release.set()
+
+    results = await asyncio.gather(*waiters[1:])
+    assert results == ["out"] * 4
+    assert calls == ["run"]
+    assert await output_cache.get_or_run("k", run) == "out"
+    assert calls == ["run"]
+
+
+async def test_failed_runs_are_not_cached(output_cache):
+    attempts = 0
+
+    async def flaky() -> str:
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            raise RuntimeError("boom")
+        return "ok"
+
+    with pytest.raises(RuntimeError):
+        await output_cache.get_or_run("k", flaky)
+    assert await output_cache.get_or_run("k", flaky) == "ok"
+    assert attempts == 2
+
+
+async def test_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(publish_embed.time, "monotonic", lambda: now[0])
+    cache = EmbedOutputCache(max_entries=8, ttl_seconds=10)
+
+    async def run() -> str:
+        return "out"
+
+    await cache.get_or_run("k", run)
+    assert cache.get("k") == "out"
+    now[0] += 11
+    assert cache.get("k") is None
+
+
+def test_token_index_skips_the_file_lock_until_the_store_changes(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+):
+    store = tmp_path / "embed_tokens.json"
+    monkeypatch.setattr(publish_embed, "_store_path", lambda: store)
+    record = publish_embed.create_embed_token(workflow_id="wf-1", created_by="1")
+
+    locks: list[Path] = []
+    original_lock = publish_embed._lock_for
+    monkeypatch.setattr(
+        publish_embed,
+        "_lock_for",
+        lambda path: locks.append(path) or original_lock(path),
+    )
+
+    for _ in range(3):
+        assert publish_embed.get_valid_embed_record(record.token).workflow_id == "wf-1"
+    assert locks == []
+
+    data = json.loads(store.read_text(encoding="utf-8"))
+    data["tokens"][record.token]["expires_at"] = (
+        datetime.now(timezone.utc) - timedelta(days=1)
+    ).isoformat()
+    store.write_text(json.dumps(data) + "\n", encoding="utf-8")
+
+    with pytest.raises(publish_embed.EmbedTokenExpired):
+        publish_embed.get_valid_embed_record(record.token)
+    assert locks == [store]
+
+
+async def test_embed_views_share_runs_per_workflow_version(monkeypatch):
+    await init_db()
+    now = datetime.now(timezone.utc)
+    graph = {
+        "nodes": [
+            {"id": "start", "type": "start", "data": {}},
+            {"id": "llm", "type": "llm", "data": {}},
+        ],
+        "edges": [{"source": "start", "target": "llm"}],
+    }
+    async with AsyncSessionLocal() as db:
+        db.add(
+            WorkflowDB(
+                id="wf-embed",
+                name="Embed",
+                graph_data_json=json.dumps(graph),
+                created_at=now,
+                updated_at=now,
+            )
+        )
+        await db.commit()
+
+    calls: list[str] = []
+
+    async def fake_llm_node(node, ctx, get_input):
+        node_id = node["id"]
+        value = str(get_input(node_id, ctx))
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        ctx.set_output(node_id, value.upper())
+        yield {"type": "node_complete", "node_id": node_id, "output": value.upper()}
+
+    monkeypatch.setattr(workflow_engine, "execute_llm_node", fake_llm_node)
+
+    async def view(value: str) -> str:
+        return await publish_api._execute_workflow_once(
+            workflow_id="wf-embed", input_text=value
+        )
+
+    async def executions() -> int:
+        async with AsyncSessionLocal() as db:
+            return await db.scalar(
+                text(
+                    "SELECT COUNT(*) FROM workflow_executions"
+                    " WHERE workflow_id = 'wf-embed'"
+                )
+            )
+
+    try:
+        outputs = await asyncio.gather(view("hi"), view("hi"), view("yo"))
+        assert outputs == ["HI", "HI", "YO"]
+        assert sorted(calls) == ["hi", "yo"]
+        assert await view("hi") == "HI"
+        assert len(calls) == 2
+
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(WorkflowDB)
+                .where(WorkflowDB.id == "wf-embed")
+                .values(updated_at=now + timedelta(seconds=1))
+            )
+            await db.commit()
+        # Embed runs are recorded by default.
+        assert await executions() == 2
+
+        monkeypatch.setattr(
+            config,
+            "_settings",
+            config.Settings(publish_embed_persist_executions=False),
+        )
+        assert await view("hi") == "HI"
+        assert len(calls) == 3
+        assert await executions() == 2
+    finally:
+        async with AsyncSessionLocal() as db:
+            for table in ("workflow_execution_steps", "workflow_execution_traces"):
+                await db.execute(
+                    text(
+                        f"DELETE FROM {table} WHERE execution_id IN"
+                        " (SELECT id FROM workflow_executions"
+                        " WHERE workflow_id = 'wf-embed')"
+                    )
+                )
+            await db.execute(
+                text("DELETE FROM workflow_executions WHERE workflow_id = 'wf-embed'")
+            )
+            await db.execute(text("DELETE FROM workflows"))
+            await db.commit()
@@ -8,6 +8,7 @@ import app.api.skill as skill_api
 from app.core.skill.skill_loader import SkillValidationError
 from app.models.skill import SkillDetail, SkillRunRequest
 from app.models.user import User
+from app.utils.sse import DoneEvent, TokenEvent
 
 
 def _fake_request() -> Request:
@@ -43,8 +44,8 @@ async def test_run_skill_returns_streaming_response(
     class _Executor:
         async def execute(self, skill, inputs, user_id=None):
             _ = (skill, inputs, user_id)
-            yield skill_api.format_sse_event("token", {"content": "ok"})
-            yield skill_api.format_sse_event("done", {"status": "success"})
+            yield TokenEvent("ok")
+            yield DoneEvent("success")
 
     monkeypatch.setattr(
         skill_api.skill_loader, "get_skill", lambda _name: _sample_skill()
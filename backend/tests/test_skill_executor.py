@@ -11,8 +11,9 @@ Tests cover:
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 
-from app.core.skill.skill_executor import SkillExecutor, format_sse_event
+from app.core.skill.skill_executor import SkillExecutor
 from app.models.skill import SkillInput
+from app.utils.sse import encode_event, format_sse_event
 
 
 def _si(name: str, *, required: bool = False, default: str | None = None) -> SkillInput:
@@ -195,7 +196,7 @@ class TestSkillExecutorIntegration:
 
         events = []
         async for event in self.executor.execute(skill, inputs):
-            events.append(event)
+            events.append(encode_event(event))
 
         # Should have validation error and done events
         assert any("validation" in e and "error" in e for e in events)
@@ -220,7 +221,7 @@ class TestSkillExecutorIntegration:
         with patch('app.core.skill.skill_executor.chat_completion_stream', mock_stream):
             events = []
             async for event in self.executor.execute(skill, inputs):
-                events.append(event)
+                events.append(encode_event(event))
 
         # Check event types
         event_types = []
@@ -263,7 +264,7 @@ class TestSkillExecutorIntegration:
             with patch('app.core.skill.skill_executor.chat_completion_stream', mock_stream):
                 events = []
                 async for event in self.executor.execute(skill, inputs):
-                    events.append(event)
+                    events.append(encode_event(event))
 
         # Should have retrieval thought events
         assert any("retrieval" in e for e in events)
@@ -293,7 +294,7 @@ class TestSkillExecutorIntegration:
             with patch('app.core.skill.skill_executor.chat_completion_stream', mock_stream):
                 events = []
                 async for event in self.executor.execute(skill, inputs):
-                    events.append(event)
+                    events.append(encode_event(event))
 
         # Should have retrieval error event
         assert any("retrieval" in e and "error" in e for e in events)
@@ -319,7 +320,7 @@ class TestSkillExecutorIntegration:
         with patch('app.core.skill.skill_executor.chat_completion_stream', mock_stream):
             events = []
             async for event in self.executor.execute(skill, inputs):
-                events.append(event)
+                events.append(encode_event(event))
 
         # Should have error in done event
         assert any('"status": "error"' in e for e in events)
@@ -351,7 +352,7 @@ class TestSkillExecutorWithSkillDetail:
         with patch('app.core.skill.skill_executor.chat_completion_stream', mock_stream):
             events = []
             async for event in self.executor.execute(skill, inputs):
-                events.append(event)
+                events.append(encode_event(event))
 
         # Should complete successfully
         assert any('"status": "success"' in e for e in events)
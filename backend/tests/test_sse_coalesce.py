@@ -0,0 +1,135 @@
+"""Tests for stream event encoding and SSE token coalescing."""
+import asyncio
+
+import pytest
+
+from app.utils.sse import (
+    CitationEvent,
+    DoneEvent,
+    ThoughtEvent,
+    TokenEvent,
+    coalesce_tokens,
+    encode_event,
+    format_sse_event,
+)
+
+
+async def _collect(gen):
+    return [item async for item in gen]
+
+
+async def _source(items, delay=0.0):
+    for item in items:
+        if delay:
+            await asyncio.sleep(delay)
+        yield item
+
+
+def test_encode_event_matches_format_sse_event():
+    assert encode_event(TokenEvent("hi")) == format_sse_event(
+        "token", {"content": "hi"}
+    )
+    assert encode_event(DoneEvent("success")) == format_sse_event(
+        "done", {"status": "success"}
+    )
+    assert encode_event(DoneEvent("error", "boom")) == format_sse_event(
+        "done", {"status": "error", "message": "boom"}
+    )
+    raw = ": heartbeat\n\n"
+    assert encode_event(raw) is raw
+
+
+def test_events_use_slots():
+    with pytest.raises(AttributeError):
+        TokenEvent("x").extra = 1  # type: ignore[attr-defined]
+
+
+@pytest.mark.asyncio
+async def test_burst_of_tokens_becomes_one_frame():
+    items = [TokenEvent(c) for c in "hello"] + [DoneEvent("success")]
+
+    result = await _collect(coalesce_tokens(_source(items), flush_interval=1.0))
+
+    assert result == [TokenEvent("hello"), DoneEvent("success")]
+
+
+@pytest.mark.asyncio
+async def test_non_token_events_keep_their_position():
+    items = [
+        ThoughtEvent({"type": "retrieval", "status": "start"}),
+        TokenEvent("a"),
+        TokenEvent("b"),
+        CitationEvent([]),
+        TokenEvent("c"),
+        DoneEvent("success"),
+    ]
+
+    result = await _collect(coalesce_tokens(_source(items), flush_interval=1.0))
+
+    assert [type(r) for r in result] == [
+        ThoughtEvent,
+        TokenEvent,
+        CitationEvent,
+        TokenEvent,
+        DoneEvent,
+    ]
+    assert result[1].content == "ab"
+    assert result[3].content == "c"
+
+
+@pytest.mark.asyncio
+async def test_flush_window_emits_while_source_is_slow():
+    items = [TokenEvent("a"), TokenEvent("b"), TokenEvent("c")]
+
+    result = await _collect(
+        coalesce_tokens(_source(items, delay=0.05), flush_interval=0.01)
+    )
+
+    assert [r.content for r in result] == ["a", "b", "c"]
+
+
+@pytest.mark.asyncio
+async def test_byte_budget_forces_flush():
+    items = [TokenEvent("xx") for _ in range(4)]
+
+    result = await _collect(
+        coalesce_tokens(_source(items), flush_interval=10, max_bytes=4)
+    )
+
+    assert [r.content for r in result] == ["xxxx", "xxxx"]
+
+
+@pytest.mark.asyncio
+async def test_preformatted_strings_are_not_merged():
+    raw = format_sse_event("token", {"content": "a", "node_id": "n1"})
+    items = [TokenEvent("x"), raw, TokenEvent("y")]
+
+    result = await _collect(coalesce_tokens(_source(items), flush_interval=1.0))
+
+    assert result == [TokenEvent("x"), raw, TokenEvent("y")]
+
+
+@pytest.mark.asyncio
+async def test_source_exception_propagates():
+    async def failing():
+        yield TokenEvent("a")
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        await _collect(coalesce_tokens(failing(), flush_interval=1.0))
+
+
+@pytest.mark.asyncio
+async def test_coalesce_never_merges_tokens_of_different_nodes():
+    items = [
+        TokenEvent("a", node_id="x"),
+        TokenEvent("b", node_id="x"),
+        TokenEvent("c", node_id="y"),
+    ]
+
+    result = await _collect(coalesce_tokens(_source(items), flush_interval=10))
+
+    assert result == [TokenEvent("ab", node_id="x"), TokenEvent("c", node_id="y")]
+    assert encode_event(result[1]) == format_sse_event(
+        "token", {"content": "c", "node_id": "y"}
+    )
@@ -1,9 +1,19 @@
 """Tests for the SSE heartbeat helper."""
 import asyncio
+import json
 
 import pytest
 
-from app.utils.sse import SSE_HEARTBEAT, with_heartbeat
+from app.utils.sse import (
+    SLOW_CONSUMER_MESSAGE,
+    SSE_HEARTBEAT,
+    DoneEvent,
+    ErrorEvent,
+    TokenEvent,
+    active_stream_stats,
+    encode_event,
+    with_heartbeat,
+)
 
 
 async def _collect(gen, max_items=50):
@@ -57,7 +67,7 @@ async def test_heartbeat_stops_after_source_ends():
 @pytest.mark.asyncio
 async def test_heartbeat_propagates_source_items_in_order():
     """All source items are yielded, interleaved with heartbeats."""
-    items = [f"event: token\ndata: {{\"i\": {i}}}\n\n" for i in range(5)]
+    items = [f'event: token\ndata: {{"i": {i}}}\n\n' for i in range(5)]
 
     result = await _collect(with_heartbeat(_async_gen_from_list(items), interval=10))
 
@@ -97,3 +107,73 @@ async def test_heartbeat_with_empty_source():
     # Only heartbeats or nothing; no data items
     non_hb = [r for r in result if r != SSE_HEARTBEAT]
     assert non_hb == []
+
+
+@pytest.mark.asyncio
+async def test_bounded_buffer_applies_backpressure():
+    """The source is not read far ahead of a consumer that stops reading."""
+    produced = 0
+
+    async def eager_source():
+        nonlocal produced
+        for i in range(100):
+            produced += 1
+            yield f"data: {i}\n\n"
+
+    gen = with_heartbeat(eager_source(), interval=10, max_buffered_frames=4)
+    first = await gen.__anext__()
+    await asyncio.sleep(0.05)
+
+    assert first == "data: 0\n\n"
+    # One frame handed out, four buffered, one blocked in the pump.
+    assert produced <= 6
+    stats = active_stream_stats()
+    assert any(s.buffered_frames == 4 for s in stats)
+    await gen.aclose()
+    assert not active_stream_stats()
+
+
+@pytest.mark.asyncio
+async def test_slow_consumer_is_downgraded_to_coalesced_tokens():
+    items = [TokenEvent(c) for c in "abcdefgh"] + [DoneEvent("success")]
+
+    gen = with_heartbeat(
+        _async_gen_from_list(items),
+        interval=10,
+        max_buffered_frames=1,
+        slow_consumer_timeout=0.01,
+        coalesce_interval=10,
+    )
+    first = await gen.__anext__()
+    await asyncio.sleep(0.05)
+    result = [first] + await _collect(gen)
+
+    tokens = [r for r in result if r.startswith("event: token")]
+    assert len(tokens) < 8
+    assert (
+        "".join(json.loads(r.split("data: ", 1)[1])["content"] for r in tokens)
+        == "abcdefgh"
+    )
+    assert result[-1] == encode_event(DoneEvent("success"))
+
+
+@pytest.mark.asyncio
+async def test_slow_consumer_can_be_disconnected():
+    items = [f"data: {i}\n\n" for i in range(10)]
+
+    gen = with_heartbeat(
+        _async_gen_from_list(items),
+        interval=10,
+        max_buffered_frames=2,
+        slow_consumer_timeout=0.01,
+        slow_consumer_policy="disconnect",
+    )
+    first = await gen.__anext__()
+    await asyncio.sleep(0.05)
+    rest = await _collect(gen)
+
+    assert first == "data: 0\n\n"
+    assert rest == [
+        encode_event(ErrorEvent(SLOW_CONSUMER_MESSAGE)),
+        encode_event(DoneEvent("error", SLOW_CONSUMER_MESSAGE)),
+    ]
@@ -0,0 +1,207 @@
+"""Tests for resumable SSE stream runs."""
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from app.api import streams
+from app.models.user import User
+from app.utils.sse import (
+    DoneEvent,
+    TokenEvent,
+    encode_event,
+    with_heartbeat,
+)
+from app.utils.sse_resume import STREAM_LAGGED_MESSAGE, StreamRunRegistry
+
+
+async def _collect(gen):
+    return [encode_event(item) async for item in gen]
+
+
+async def _source(items, gate: asyncio.Event | None = None):
+    for i, item in enumerate(items):
+        if gate is not None and i == 2:
+            await gate.wait()
+        yield item
+
+
+async def _wait_finished(run) -> None:
+    while not run.finished:
+        await asyncio.sleep(0)
+
+
+def _frame(event_id: int, event) -> str:
+    return f"id: {event_id}\n{encode_event(event)}"
+
+
+@pytest.mark.asyncio
+async def test_frames_get_sequential_ids():
+    registry = StreamRunRegistry(buffer_size=16, ttl=60)
+    items = [TokenEvent("a"), TokenEvent("b"), DoneEvent("success")]
+
+    run = registry.start(_source(items))
+    frames = await _collect(run.subscribe())
+
+    assert frames == [_frame(i, item) for i, item in enumerate(items, 1)]
+
+
+@pytest.mark.asyncio
+async def test_reconnect_replays_missed_events_and_continues_live():
+    registry = StreamRunRegistry(buffer_size=16, ttl=60)
+    gate = asyncio.Event()
+    items = [TokenEvent("a"), TokenEvent("b"), TokenEvent("c"), DoneEvent("success")]
+    run = registry.start(_source(items, gate))
+
+    first = run.subscribe()
+    assert encode_event(await first.__anext__()) == _frame(1, items[0])
+    # The client disconnects; the run keeps going without it.
+    await first.aclose()
+    await asyncio.sleep(0)
+    assert not run.finished
+
+    resumed = registry.get(run.id).subscribe(last_event_id=1)
+    gate.set()
+    frames = await _collect(resumed)
+
+    assert frames == [_frame(i, items[i - 1]) for i in (2, 3, 4)]
+
+
+@pytest.mark.asyncio
+async def test_evicted_events_cannot_be_resumed():
+    registry = StreamRunRegistry(buffer_size=2, ttl=60)
+    run = registry.start(_source([TokenEvent(c) for c in "abcd"]))
+    await _wait_finished(run)
+
+    assert run.can_resume(2)
+    assert not run.can_resume(1)
+    with pytest.raises(ValueError):
+        run.subscribe(last_event_id=1)
+
+
+@pytest.mark.asyncio
+async def test_source_error_reaches_subscriber():
+    async def failing():
+        yield TokenEvent("a")
+        raise RuntimeError("boom")
+
+    run = StreamRunRegistry(buffer_size=16, ttl=60).start(failing())
+
+    with pytest.raises(RuntimeError, match="boom"):
+        await _collect(run.subscribe())
+
+
+@pytest.mark.asyncio
+async def test_finished_runs_expire():
+    registry = StreamRunRegistry(buffer_size=16, ttl=0)
+    run = registry.start(_source([DoneEvent("success")]))
+    await _collect(run.subscribe())
+    await asyncio.sleep(0.01)
+
+    assert registry.get(run.id) is None
+
+
+@pytest.mark.asyncio
+async def test_resume_endpoint_checks_owner_and_last_event_id(monkeypatch):
+    registry = StreamRunRegistry(buffer_size=2, ttl=60)
+    monkeypatch.setattr(streams, "get_stream_registry", lambda: registry)
+    run = registry.start(_source([TokenEvent(c) for c in "abc"]), owner_id="1")
+    await _wait_finished(run)
+
+    owner = User(id=1, email="owner@example.com")
+    other = User(id=2, email="other@example.com")
+
+    response = await streams.resume_stream(run.id, user=owner, last_event_id="2")
+    assert response.headers["X-Stream-Id"] == run.id
+    with pytest.raises(HTTPException) as not_found:
+        await streams.resume_stream(run.id, user=other, last_event_id="2")
+    assert not_found.value.status_code == 404
+    with pytest.raises(HTTPException) as gone:
+        await streams.resume_stream(run.id, user=owner, last_event_id="0")
+    assert gone.value.status_code == 409
+    assert STREAM_LAGGED_MESSAGE in gone.value.detail
+
+
+@pytest.mark.asyncio
+async def test_run_waits_for_a_subscriber_instead_of_evicting():
+    registry = StreamRunRegistry(buffer_size=2, ttl=60)
+    run = registry.start(_source([TokenEvent(c) for c in "abcdef"]))
+
+    subscriber = run.subscribe()
+    assert encode_event(await subscriber.__anext__()) == _frame(1, TokenEvent("a"))
+    await asyncio.sleep(0.01)
+
+    # The run paused rather than evict events the subscriber has not read.
+    assert not run.finished
+    assert run.last_event_id <= 4
+    assert await _collect(subscriber) == [
+        _frame(i, TokenEvent(c)) for i, c in enumerate("bcdef", 2)
+    ]
+    assert run.finished
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_receives_a_long_stream_in_full():
+    registry = StreamRunRegistry(buffer_size=8, ttl=60)
+    items = [TokenEvent(str(i % 10)) for i in range(200)] + [DoneEvent("success")]
+    run = registry.start(_source(items))
+
+    body = with_heartbeat(
+        run.subscribe(),
+        interval=10,
+        max_buffered_frames=2,
+        slow_consumer_timeout=0.01,
+        coalesce_interval=0.001,
+    )
+    frames = []
+    async for frame in body:
+        frames.append(frame)
+        await asyncio.sleep(0.001)
+
+    tokens = [f for f in frames if "event: token" in f]
+    contents = [json.loads(f.split("data: ", 1)[1])["content"] for f in tokens]
+    assert "".join(contents) == "".join(item.content for item in items[:-1])
+    assert frames[-1] == _frame(201, DoneEvent("success"))
+
+
+@pytest.mark.asyncio
+async def test_closed_subscriber_no_longer_holds_the_run_back():
+    registry = StreamRunRegistry(buffer_size=2, ttl=60)
+    run = registry.start(_source([TokenEvent(c) for c in "abcdef"]))
+
+    subscriber = run.subscribe()
+    await subscriber.__anext__()
+    await subscriber.aclose()
+    await _wait_finished(run)
+
+    assert run.last_event_id == 6
+    assert not run.can_resume(1)
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_gets_coalesced_tokens_with_resumable_ids():
+    registry = StreamRunRegistry(buffer_size=64, ttl=60)
+    items = [TokenEvent(c) for c in "abcdefgh"] + [DoneEvent("success")]
+    run = registry.start(_source(items))
+    await _wait_finished(run)
+
+    body = with_heartbeat(
+        run.subscribe(),
+        interval=10,
+        max_buffered_frames=1,
+        slow_consumer_timeout=0.01,
+        coalesce_interval=10,
+    )
+    first = await body.__anext__()
+    await asyncio.sleep(0.05)
+    frames = [first] + [frame async for frame in body]
+
+    tokens = [f for f in frames if "event: token" in f]
+    assert len(tokens) < 8
+    contents = [json.loads(f.split("data: ", 1)[1])["content"] for f in tokens]
+    assert "".join(contents) == "abcdefgh"
+    # A merged frame carries the id of its last token, so resuming from it
+    # continues exactly after the text the client already has.
+    assert tokens[-1].startswith("id: 8\n")
+    assert frames[-1] == _frame(9, DoneEvent("success"))
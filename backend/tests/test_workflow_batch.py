@@ -0,0 +1,222 @@
+"""Tests for batch execution of workflows."""
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import select, text, update
+
+from app.api.workflow_batch import get_batch, stream_batch_results
+from app.core.database import AsyncSessionLocal, init_db
+from app.core.workflow import workflow_batch, workflow_engine
+from app.core.workflow.workflow_batch import (
+    BatchInputError,
+    create_batch,
+    iter_batch_results,
+    parse_batch_file,
+    start_batch,
+)
+from app.models.user import User
+from app.models.workflow import GraphData, Workflow
+from app.models.workflow_batch_db import WorkflowBatchRowDB
+from app.models.workflow_db import WorkflowDB
+
+USER = User(id=1, email="batch@example.com")
+
+
+@pytest.fixture(scope="function", autouse=True)
+async def setup_database():
+    await init_db()
+    yield
+    async with AsyncSessionLocal() as session:
+        for table in (
+            "workflow_batch_rows",
+            "workflow_batches",
+            "workflow_executions",
+            "workflows",
+        ):
+            await session.execute(text(f"DELETE FROM {table}"))
+        await session.commit()
+
+
+@pytest.fixture(autouse=True)
+def llm_calls(monkeypatch):
+    calls: list[str] = []
+
+    async def fake_llm_node(node, ctx, get_input):
+        node_id = node["id"]
+        value = str(get_input(node_id, ctx))
+        calls.append(value)
+        yield {"type": "node_start", "node_id": node_id, "node_type": "llm"}
+        if value == "bad":
+            yield {"type": "node_error", "node_id": node_id, "error": "bad input"}
+            return
+        ctx.set_output(node_id, value.upper())
+        yield {"type": "node_complete", "node_id": node_id, "output": value.upper()}
+
+    monkeypatch.setattr(workflow_engine, "execute_llm_node", fake_llm_node)
+    return calls
+
+
+async def _workflow() -> Workflow:
+    now = datetime.now(timezone.utc)
+    workflow = Workflow(
+        id="wf-batch",
+        name="Batch",
+        graph_data=GraphData(
+            nodes=[
+                {"id": "start", "type": "start", "data": {}},
+                {"id": "llm", "type": "llm", "data": {}},
+            ],
+            edges=[{"source": "start", "target": "llm"}],
+        ),
+        created_at=now,
+        updated_at=now,
+    )
+    async with AsyncSessionLocal() as db:
+        db.add(
+            WorkflowDB(
+                id=workflow.id,
+                name=workflow.name,
+                user_id=str(USER.id),
+                graph_data_json=json.dumps(workflow.graph_data.model_dump()),
+                created_at=now,
+                updated_at=now,
+            )
+        )
+        await db.commit()
+    return workflow
+
+
+async def _results(batch_id: str) -> list[dict]:
+    return [item async for item in iter_batch_results(batch_id)]
+
+
+def test_parse_jsonl_and_csv():
+    jsonl = b'{"input": "a"}\n\n"b"\n{"input": {"k": 1}}\n'
+    csv_rows = b"id,input\n1,x\n2,y\n"
+    single_column = b"question\nq1\n"
+
+    assert parse_batch_file(jsonl, "rows.jsonl", "input") == ["a", "b", '{"k": 1}']
+    assert parse_batch_file(csv_rows, "rows.csv", "input") == ["x", "y"]
+    assert parse_batch_file(single_column, "rows.csv", "input") == ["q1"]
+    with pytest.raises(BatchInputError, match="Line 2"):
+        parse_batch_file(b'{"input": "a"}\n{"other": 1}\n', "rows.jsonl", "input")
+    with pytest.raises(BatchInputError):
+        parse_batch_file(b"a,b\n1,2\n", "rows.csv", "input")
+    with pytest.raises(BatchInputError):
+        parse_batch_file(b"x", "rows.txt", "input")
+
+
+async def test_batch_runs_rows_and_streams_results(llm_calls):
+    workflow = await _workflow()
+    batch = await create_batch(workflow, ["a", "bad", "c"], USER.id, None, 2)
+
+    job = start_batch(batch.id)
+    await job.task
+
+    results = await _results(batch.id)
+    rows = sorted((r for r in results if r["type"] == "row"), key=lambda r: r["row"])
+    assert [(r["row"], r["status"], r["output"]) for r in rows] == [
+        (0, "completed", "A"),
+        (1, "failed", None),
+        (2, "completed", "C"),
+    ]
+    assert rows[1]["error"] == "bad input"
+    assert results[-1] == {
+        "type": "batch",
+        "id": batch.id,
+        "status": "completed",
+        "pending": 0,
+        "completed": 2,
+        "failed": 1,
+    }
+    assert sorted(llm_calls) == ["a", "bad", "c"]
+
+    # Rows are not persisted as individual workflow executions.
+    async with AsyncSessionLocal() as db:
+        count = await db.scalar(text("SELECT COUNT(*) FROM workflow_executions"))
+    assert count == 0
+
+
+async def test_result_stream_follows_a_running_batch():
+    workflow = await _workflow()
+    batch = await create_batch(workflow, [f"r{i}" for i in range(5)], USER.id, None, 1)
+
+    start_batch(batch.id)
+    response = await stream_batch_results(batch.id, user=USER)
+    lines = [json.loads(line) async for line in response.body_iterator]
+
+    assert response.media_type == "application/x-ndjson"
+    assert [line["row"] for line in lines[:-1]] == [0, 1, 2, 3, 4]
+    assert lines[-1]["completed"] == 5
+
+
+async def test_interrupted_batch_resumes_pending_rows(llm_calls):
+    workflow = await _workflow()
+    batch = await create_batch(workflow, ["a", "b", "c"], USER.id, None, 2)
+    # Simulate a restart after row 0 finished.
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(WorkflowBatchRowDB)
+            .where(WorkflowBatchRowDB.row_index == 0)
+            .values(status="completed", output_json='"A"', finish_seq=1)
+        )
+        await db.commit()
+
+    await start_batch(batch.id).task
+
+    assert sorted(llm_calls) == ["b", "c"]
+    async with AsyncSessionLocal() as db:
+        seqs = (
+            await db.execute(
+                select(WorkflowBatchRowDB.finish_seq).order_by(
+                    WorkflowBatchRowDB.finish_seq
+                )
+            )
+        ).scalars()
+        assert list(seqs) == [1, 2, 3]
+    status = await get_batch(batch.id, user=USER)
+    assert status["status"] == "completed"
+    assert status["counts"] == {"pending": 0, "completed": 3, "failed": 0}
+    assert workflow_batch.running_job(batch.id) is None
+
+
+async def test_result_stream_keeps_rows_whose_write_lands_late(monkeypatch):
+    workflow = await _workflow()
+    batch = await create_batch(workflow, ["slow", "fast"], USER.id, None, 2)
+    real_session = workflow_batch.AsyncSessionLocal
+    stalled = asyncio.Event()
+    release = asyncio.Event()
+
+    @asynccontextmanager
+    async def session():
+        async with real_session() as db:
+            execute = db.execute
+
+            async def delayed_execute(statement, *args, **kwargs):
+                # Hold back the first row write, after its seq was taken.
+                table = getattr(statement, "table", None)
+                if getattr(table, "name", None) == "workflow_batch_rows":
+                    if not stalled.is_set():
+                        stalled.set()
+                        await release.wait()
+                return await execute(statement, *args, **kwargs)
+
+            db.execute = delayed_execute
+            yield db
+
+    monkeypatch.setattr(workflow_batch, "AsyncSessionLocal", session)
+    job = start_batch(batch.id)
+    reader = asyncio.create_task(_results(batch.id))
+    await stalled.wait()
+    # Give the other row time to finish while the first write is stalled.
+    await asyncio.sleep(0.1)
+    release.set()
+    await job.task
+    results = await reader
+
+    assert sorted(r["row"] for r in results if r["type"] == "row") == [0, 1]
+    assert results[-1]["completed"] == 2
@@ -0,0 +1,98 @@
+"""
+Tests for garbage collection of spilled workflow outputs.
+"""
+
+import json
+import os
+import time
+
+import pytest
+from sqlalchemy import text
+
+from app.core import paths
+from app.core.database import AsyncSessionLocal, init_db
+from app.core.workflow import workflow_blobs
+from app.core.workflow.workflow_blob_gc import collect_blob_garbage
+from app.core.workflow.workflow_context import ExecutionContext
+from app.core.workflow.workflow_memo import MemoOptions, get_node_memo_cache
+from app.models.workflow_execution_db import (
+    WorkflowExecutionDB,
+    WorkflowExecutionStepDB,
+)
+
+OLD = time.time() - 2 * 86400
+
+
+@pytest.fixture(autouse=True)
+async def blob_store(monkeypatch, tmp_path):
+    monkeypatch.setattr(paths, "WORKFLOW_BLOBS_DIR", tmp_path)
+    await init_db()
+    get_node_memo_cache().clear()
+    yield tmp_path
+    get_node_memo_cache().clear()
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            text("DELETE FROM workflow_execution_steps WHERE execution_id = 'gc-run'")
+        )
+        await session.execute(
+            text("DELETE FROM workflow_executions WHERE id = 'gc-run'")
+        )
+        await session.commit()
+
+
+def _spill_aged(value: str) -> workflow_blobs.SpilledOutput:
+    handle = workflow_blobs.spill(value)
+    os.utime(workflow_blobs._blob_path(handle.digest), (OLD, OLD))
+    return handle
+
+
+def _exists(handle: workflow_blobs.SpilledOutput) -> bool:
+    return workflow_blobs._blob_path(handle.digest).exists()
+
+
+async def test_only_old_unreferenced_blobs_are_removed():
+    snapshot = _spill_aged("in the snapshot")
+    delta = _spill_aged("in a delta row")
+    memo = _spill_aged("in the memo cache")
+    live = _spill_aged("held by a running workflow")
+    garbage = _spill_aged("nothing refers to this")
+    fresh = workflow_blobs.spill("written just now")
+
+    async with AsyncSessionLocal() as session:
+        session.add(
+            WorkflowExecutionDB(
+                id="gc-run",
+                workflow_id="wf-gc",
+                step_outputs_json=json.dumps({"a": snapshot.to_json()}),
+            )
+        )
+        session.add(
+            WorkflowExecutionStepDB(
+                execution_id="gc-run",
+                seq=1,
+                node_id="b",
+                output_json=json.dumps(delta.to_json()),
+                variables_json="{}",
+                queue_json="[]",
+            )
+        )
+        await session.commit()
+    get_node_memo_cache().set(("wf-gc", "n"), "key", memo, {}, MemoOptions(60.0, 16))
+    ctx = ExecutionContext("hi")
+    ctx.restore_output("n", live.to_json())
+
+    removed = await collect_blob_garbage(grace_seconds=3600)
+
+    assert removed == 1
+    assert not _exists(garbage)
+    for handle in (snapshot, delta, memo, live, fresh):
+        assert _exists(handle)
+
+
+async def test_spilling_an_existing_blob_marks_it_recently_used():
+    handle = _spill_aged("shared output")
+
+    workflow_blobs.spill("shared output")
+
+    assert await collect_blob_garbage(grace_seconds=3600) == 0
+    assert _exists(handle)
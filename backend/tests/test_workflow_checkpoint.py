@@ -0,0 +1,178 @@
+"""Tests for delta checkpoints of workflow executions."""
+
+import json
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import select, text
+
+from app.core import config
+from app.core.database import AsyncSessionLocal, init_db
+from app.core.workflow import workflow_engine
+from app.core.workflow.workflow_checkpoint import load_execution_state
+from app.core.workflow.workflow_engine import WorkflowEngine
+from app.models.workflow import GraphData, Workflow
+from app.models.workflow_db import WorkflowDB
+from app.models.workflow_execution_db import (
+    WorkflowExecutionDB,
+    WorkflowExecutionStepDB,
+)
+
+
+@pytest.fixture(scope="function", autouse=True)
+async def setup_database(monkeypatch):
+    await init_db()
+    monkeypatch.setattr(
+        config, "_settings", config.Settings(workflow_execution_mode="sequential")
+    )
+
+    async def fake_llm_node(node, ctx, get_input):
+        node_id = node["id"]
+        yield {"type": "node_start", "node_id": node_id, "node_type": "llm"}
+        output = f"{node_id}({get_input(node_id, ctx)})"
+        ctx.set_output(node_id, output)
+        yield {"type": "node_complete", "node_id": node_id, "output": output}
+
+    monkeypatch.setattr(workflow_engine, "execute_llm_node", fake_llm_node)
+    yield
+    async with AsyncSessionLocal() as session:
+        await session.execute(text("DELETE FROM workflow_execution_steps"))
+        await session.execute(text("DELETE FROM workflow_executions"))
+        await session.execute(text("DELETE FROM workflows"))
+        await session.commit()
+
+
+async def _chain(**start_data) -> Workflow:
+    now = datetime.now(timezone.utc)
+    workflow = Workflow(
+        id="wf-checkpoint",
+        name="Chain",
+        graph_data=GraphData(
+            nodes=[
+                {
+                    "id": "start",
+                    "type": "start",
+                    "data": {"inputVariable": "q", **start_data},
+                },
+                {"id": "a", "type": "llm", "data": {}},
+                {"id": "b", "type": "llm", "data": {}},
+                {"id": "end", "type": "end", "data": {}},
+            ],
+            edges=[
+                {"source": "start", "target": "a"},
+                {"source": "a", "target": "b"},
+                {"source": "b", "target": "end"},
+            ],
+        ),
+        created_at=now,
+        updated_at=now,
+    )
+    async with AsyncSessionLocal() as db:
+        db.add(
+            WorkflowDB(
+                id=workflow.id,
+                name=workflow.name,
+                graph_data_json=json.dumps(workflow.graph_data.model_dump()),
+                created_at=now,
+                updated_at=now,
+            )
+        )
+        await db.commit()
+    return workflow
+
+
+async def _interrupt_before(workflow: Workflow, node_id: str) -> None:
+    """Run until *node_id* starts, then drop the run as if the process died."""
+    run = WorkflowEngine(workflow).execute("in", execution_id="run-1")
+    async for event in run:
+        if event["type"] == "node_start" and event["node_id"] == node_id:
+            break
+    await run.aclose()
+
+
+async def _steps() -> list[WorkflowExecutionStepDB]:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(WorkflowExecutionStepDB).order_by(WorkflowExecutionStepDB.seq)
+        )
+        return list(result.scalars().all())
+
+
+async def _execution() -> WorkflowExecutionDB:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(WorkflowExecutionDB).where(WorkflowExecutionDB.id == "run-1")
+        )
+        return result.scalar_one()
+
+
+async def test_each_node_appends_a_delta_and_resume_rebuilds_state():
+    workflow = await _chain()
+
+    await _interrupt_before(workflow, "b")
+
+    steps = await _steps()
+    assert [s.node_id for s in steps] == ["start", "a"]
+    assert json.loads(steps[0].variables_json) == {"input": "in", "q": "in"}
+    assert json.loads(steps[1].output_json) == "a(in)"
+    assert json.loads(steps[1].variables_json) == {}
+    assert json.loads((await _execution()).step_outputs_json) == {}
+
+    state = await load_execution_state(await _execution())
+    assert state.executed_nodes == ["start", "a"]
+    assert state.queue == ["b"]
+    assert state.variables == {"input": "in", "q": "in"}
+    assert state.step_outputs == {"start": "in", "a": "a(in)"}
+
+    events = [e async for e in WorkflowEngine.resume("run-1")]
+
+    assert events[-1] == {"type": "workflow_complete", "final_output": "b(a(in))"}
+    row = await _execution()
+    assert row.status == "completed"
+    assert json.loads(row.executed_nodes_json) == ["start", "a", "b"]
+    assert await _steps() == []
+
+
+async def test_batch_policy_buffers_steps():
+    workflow = await _chain(checkpointPolicy="batch", checkpointEveryNodes=2)
+
+    await _interrupt_before(workflow, "end")
+
+    assert [s.node_id for s in await _steps()] == ["start", "a"]
+
+
+async def test_on_failure_policy_writes_only_the_final_snapshot():
+    workflow = await _chain(checkpointPolicy="on_failure")
+
+    await _interrupt_before(workflow, "end")
+    assert await _steps() == []
+
+    events = [e async for e in WorkflowEngine.resume("run-1")]
+
+    # Nothing was persisted, so the resumed run starts over.
+    assert events[-1] == {"type": "workflow_complete", "final_output": "b(a(in))"}
+    assert json.loads((await _execution()).executed_nodes_json) == [
+        "start",
+        "a",
+        "b",
+    ]
+
+
+async def test_steps_are_compacted_into_the_snapshot(monkeypatch):
+    monkeypatch.setattr(
+        config,
+        "_settings",
+        config.Settings(
+            workflow_execution_mode="sequential", workflow_checkpoint_compact_steps=2
+        ),
+    )
+    workflow = await _chain()
+
+    await _interrupt_before(workflow, "end")
+
+    assert [s.node_id for s in await _steps()] == ["b"]
+    row = await _execution()
+    assert json.loads(row.executed_nodes_json) == ["start", "a"]
+    state = await load_execution_state(row)
+    assert state.executed_nodes == ["start", "a", "b"]
+    assert state.step_outputs["b"] == "b(a(in))"
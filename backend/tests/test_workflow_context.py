@@ -1,4 +1,10 @@
-from app.core.workflow.workflow_context import ExecutionContext, normalize_expression, safe_eval
+from app.core.workflow.workflow_context import (
+    ExecutionContext,
+    compile_condition,
+    compile_template,
+    normalize_expression,
+    safe_eval,
+)
 
 
 def test_resolve_expression_supports_hyphenated_node_id() -> None:
@@ -24,3 +30,47 @@ def test_contains_literal_not_rewritten_inside_string() -> None:
 
     assert normalized == "'contains' == 'contains'"
     assert safe_eval(normalized) is True
+
+
+def test_compiled_condition_matches_safe_eval() -> None:
+    ctx = ExecutionContext('input')
+    ctx.set_output('a', 'project risk summary')
+    ctx.set_output('n', 7)
+    ctx.variables['flag'] = True
+
+    for expression in (
+        "{{a.output}} contains 'risk'",
+        "{{a.output}}.includes('summary') && {{n.output}} > 5",
+        "{{n.output}} === 7 || false",
+        "{{flag}} == true",
+        "{{a.output}} == 'other'",
+        "{{missing}} == None",
+    ):
+        result, resolved = compile_condition(expression).evaluate(ctx)
+        assert resolved == ctx.resolve_expression(expression)
+        assert result is safe_eval(resolved), expression
+
+
+def test_reference_inside_string_literal_is_not_compiled() -> None:
+    assert compile_condition("'{{a.output}}' == 'x'").parsed is None
+
+
+def test_compiled_condition_binds_values_instead_of_splicing() -> None:
+    ctx = ExecutionContext('input')
+    ctx.set_output('a', "x' or 'y contains")
+    compiled = compile_condition("{{a.output}} == {{a.output}} and {{input}} != ''")
+
+    assert compiled.parsed is not None
+    assert compiled.names == {'a.output': '_v0', 'input': '_v1'}
+    assert compiled.evaluate(ctx)[0] is True
+
+
+def test_compiled_template_keeps_unresolved_references() -> None:
+    ctx = ExecutionContext('hello')
+    template = compile_template('{{input}} / {{nope.output}} / {{input}}')
+
+    assert template.paths == ('input', 'nope.output', 'input')
+    assert ctx.resolve_template('{{input}} / {{nope.output}} / {{input}}') == (
+        'hello / {{nope.output}} / hello'
+    )
+    assert compile_template('plain') is compile_template('plain')
@@ -0,0 +1,209 @@
+"""Tests for the map (fan-out) workflow node."""
+
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import text
+
+from app.core.database import AsyncSessionLocal, init_db
+from app.core.workflow import workflow_engine
+from app.core.workflow.workflow_engine import WorkflowEngine
+from app.models.workflow import GraphData, Workflow, parse_workflow_nodes
+from app.models.workflow_db import WorkflowDB
+
+SUB_GRAPH = {
+    "nodes": [
+        {"id": "s", "type": "start", "data": {}},
+        {"id": "shout", "type": "llm", "data": {}},
+    ],
+    "edges": [{"source": "s", "target": "shout"}],
+}
+
+
+@pytest.fixture(autouse=True)
+def running(monkeypatch):
+    """Fake LLM node: upper-cases its input; tracks concurrent calls."""
+    state = {"now": 0, "peak": 0}
+
+    async def fake_llm_node(node, ctx, get_input):
+        node_id = node["id"]
+        value = str(get_input(node_id, ctx))
+        yield {"type": "node_start", "node_id": node_id, "node_type": "llm"}
+        state["now"] += 1
+        state["peak"] = max(state["peak"], state["now"])
+        await asyncio.sleep(0.01 if value != "slow" else 0.05)
+        state["now"] -= 1
+        if value == "bad":
+            yield {"type": "node_error", "node_id": node_id, "error": "bad item"}
+            return
+        ctx.set_output(node_id, value.upper())
+        yield {"type": "node_complete", "node_id": node_id, "output": value.upper()}
+
+    monkeypatch.setattr(workflow_engine, "execute_llm_node", fake_llm_node)
+    return state
+
+
+def _workflow(map_data) -> Workflow:
+    now = datetime.now(timezone.utc)
+    return Workflow(
+        id="wf-map",
+        name="Map",
+        graph_data=GraphData(
+            nodes=[
+                {"id": "start", "type": "start", "data": {}},
+                {"id": "map", "type": "map", "data": map_data},
+            ],
+            edges=[{"source": "start", "target": "map"}],
+        ),
+        created_at=now,
+        updated_at=now,
+    )
+
+
+async def _run(workflow: Workflow, value: str) -> list[dict]:
+    return [e async for e in WorkflowEngine(workflow).execute(value, persist=False)]
+
+
+def test_map_node_is_a_registered_node_type():
+    (node,) = parse_workflow_nodes([{"id": "m", "type": "map", "data": {}}])
+    assert type(node).__name__ == "MapNode"
+
+
+async def test_map_runs_inline_graph_per_item_in_order(running):
+    workflow = _workflow({"graph": SUB_GRAPH, "maxConcurrency": 2})
+
+    events = await _run(workflow, json.dumps(["slow", "b", "c", "d"]))
+
+    items = [e for e in events if e["type"] == "map_item"]
+    assert sorted(e["index"] for e in items) == [0, 1, 2, 3]
+    assert all(e["status"] == "completed" and e["duration_ms"] >= 0 for e in items)
+    assert items[-1]["index"] == 0  # the slow item finishes last
+    assert running["peak"] == 2
+    assert json.loads(events[-1]["final_output"]) == ["SLOW", "B", "C", "D"]
+
+
+async def test_map_items_from_json_path_and_lines():
+    by_path = _workflow({"graph": SUB_GRAPH, "itemsPath": "data.items"})
+    by_line = _workflow({"graph": SUB_GRAPH})
+
+    path_events = await _run(by_path, json.dumps({"data": {"items": ["x", "y"]}}))
+    line_events = await _run(by_line, "one\n\ntwo\n")
+
+    assert json.loads(path_events[-1]["final_output"]) == ["X", "Y"]
+    assert json.loads(line_events[-1]["final_output"]) == ["ONE", "TWO"]
+
+
+async def test_map_fails_fast_on_item_error():
+    workflow = _workflow({"graph": SUB_GRAPH, "maxConcurrency": 1})
+
+    events = await _run(workflow, json.dumps(["a", "bad", "c"]))
+
+    assert [e["index"] for e in events if e["type"] == "map_item"] == [0, 1]
+    assert events[-1] == {
+        "type": "workflow_error",
+        "error": "Map item 1 failed: bad item",
+    }
+
+
+async def test_map_without_fail_fast_collects_failures():
+    workflow = _workflow({"graph": SUB_GRAPH, "failFast": False})
+
+    events = await _run(workflow, json.dumps(["a", "bad"]))
+
+    complete = next(
+        e for e in events if e["type"] == "node_complete" and e["node_id"] == "map"
+    )
+    assert complete["failed_items"] == [1]
+    assert json.loads(complete["output"]) == ["A", None]
+
+
+async def test_map_rejects_non_list_input():
+    workflow = _workflow({"graph": SUB_GRAPH, "itemsPath": "missing"})
+
+    events = await _run(workflow, json.dumps({"data": []}))
+
+    assert events[-1] == {"type": "workflow_error", "error": "Map input is not a list"}
+
+
+async def test_map_with_malformed_inline_graph_fails_the_node():
+    workflow = _workflow({"graph": {"nodes": "not a list"}})
+
+    events = await _run(workflow, '["q"]')
+
+    error = next(e for e in events if e["type"] == "node_error")
+    assert error["node_id"] == "map"
+    assert error["error"].startswith("Invalid map sub-graph")
+    assert events[-1]["type"] == "workflow_error"
+
+
+async def test_map_runs_referenced_workflow_and_limits_recursion():
+    await init_db()
+    now = datetime.now(timezone.utc)
+    loop_graph = {
+        "nodes": [
+            {"id": "s", "type": "start", "data": {}},
+            {"id": "again", "type": "map", "data": {"workflowId": "wf-loop"}},
+        ],
+        "edges": [{"source": "s", "target": "again"}],
+    }
+    async with AsyncSessionLocal() as db:
+        for workflow_id, graph in (("wf-sub", SUB_GRAPH), ("wf-loop", loop_graph)):
+            db.add(
+                WorkflowDB(
+                    id=workflow_id,
+                    name=workflow_id,
+                    graph_data_json=json.dumps(graph),
+                    created_at=now,
+                    updated_at=now,
+                )
+            )
+        await db.commit()
+    try:
+        events = await _run(_workflow({"workflowId": "wf-sub"}), '["q"]')
+        assert json.loads(events[-1]["final_output"]) == ["Q"]
+
+        events = await _run(_workflow({"workflowId": "wf-loop"}), '["q"]')
+        assert events[-1]["type"] == "workflow_error"
+        assert "nested deeper" in events[-1]["error"]
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(text("DELETE FROM workflows"))
+            await db.commit()
+
+
+async def test_anonymous_map_only_sees_the_parent_owners_workflows():
+    await init_db()
+    now = datetime.now(timezone.utc)
+    parent = _workflow({"workflowId": "wf-private"})
+    async with AsyncSessionLocal() as db:
+        for workflow_id, owner, graph in (
+            ("wf-map", "1", parent.graph_data.model_dump()),
+            ("wf-own", "1", SUB_GRAPH),
+            ("wf-private", "2", SUB_GRAPH),
+        ):
+            db.add(
+                WorkflowDB(
+                    id=workflow_id,
+                    name=workflow_id,
+                    user_id=owner,
+                    graph_data_json=json.dumps(graph),
+                    created_at=now,
+                    updated_at=now,
+                )
+            )
+        await db.commit()
+    try:
+        events = await _run(parent, '["q"]')
+        assert events[-1] == {
+            "type": "workflow_error",
+            "error": "Map sub-workflow not found",
+        }
+
+        events = await _run(_workflow({"workflowId": "wf-own"}), '["q"]')
+        assert json.loads(events[-1]["final_output"]) == ["Q"]
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(text("DELETE FROM workflows"))
+            await db.commit()
@@ -0,0 +1,185 @@
+"""Tests for opt-in memoization of workflow nodes."""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core.workflow import workflow_engine, workflow_memo
+from app.core.workflow.workflow_engine import WorkflowEngine
+from app.core.workflow.workflow_memo import (
+    MemoOptions,
+    NodeMemoCache,
+    get_node_memo_cache,
+    memo_options,
+)
+from app.models.workflow import GraphData, Workflow
+
+
+@pytest.fixture(autouse=True)
+def llm_calls(monkeypatch):
+    get_node_memo_cache.cache_clear()
+    calls: list[str] = []
+
+    async def fake_llm_node(node, ctx, get_input):
+        node_id = node["id"]
+        calls.append(str(get_input(node_id, ctx)))
+        yield {"type": "node_start", "node_id": node_id, "node_type": "llm"}
+        if node["data"].get("fail"):
+            yield {"type": "node_error", "node_id": node_id, "error": "boom"}
+            return
+        output = f"{node['data']['systemPrompt']}:{get_input(node_id, ctx)}"
+        ctx.set_output(node_id, output)
+        yield {"type": "node_complete", "node_id": node_id, "output": output}
+
+    monkeypatch.setattr(workflow_engine, "execute_llm_node", fake_llm_node)
+    yield calls
+    get_node_memo_cache.cache_clear()
+
+
+def _workflow(**llm_data) -> Workflow:
+    now = datetime.now(timezone.utc)
+    data = {"memoize": True, "temperature": 0, "systemPrompt": "sp", **llm_data}
+    return Workflow(
+        id="wf-memo",
+        name="Memo",
+        graph_data=GraphData(
+            nodes=[
+                {"id": "start", "type": "start", "data": {}},
+                {"id": "llm", "type": "llm", "data": data},
+            ],
+            edges=[{"source": "start", "target": "llm"}],
+        ),
+        created_at=now,
+        updated_at=now,
+    )
+
+
+async def _run(workflow: Workflow, text: str) -> list[dict]:
+    return [e async for e in WorkflowEngine(workflow).execute(text)]
+
+
+def _memo_hits(events: list[dict]) -> list[dict]:
+    return [e for e in events if e.get("type_detail") == "memo_hit"]
+
+
+async def test_identical_input_reuses_the_result(llm_calls):
+    first = await _run(_workflow(), "q")
+    second = await _run(_workflow(), "q")
+
+    assert llm_calls == ["q"]
+    assert _memo_hits(first) == []
+    assert [e["node_id"] for e in _memo_hits(second)] == ["llm"]
+    assert second[-1] == first[-1]
+    assert first[-1] == {"type": "workflow_complete", "final_output": "sp:q"}
+
+
+async def test_different_input_or_config_misses(llm_calls):
+    await _run(_workflow(), "q")
+    await _run(_workflow(), "other")
+    await _run(_workflow(systemPrompt="changed"), "q")
+
+    assert llm_calls == ["q", "other", "q"]
+
+
+async def test_templates_are_resolved_into_the_key(llm_calls):
+    workflow = _workflow(systemPrompt="{{input}}")
+
+    await _run(workflow, "a")
+    await _run(workflow, "b")
+
+    assert llm_calls == ["a", "b"]
+
+
+async def test_failed_runs_are_not_memoized(llm_calls):
+    await _run(_workflow(fail=True), "q")
+    await _run(_workflow(fail=True), "q")
+
+    assert llm_calls == ["q", "q"]
+
+
+@pytest.mark.parametrize(
+    "node",
+    [
+        {"type": "llm", "data": {"memoize": True}},
+        {"type": "llm", "data": {"memoize": True, "temperature": 0.2}},
+        {"type": "http", "data": {"memoize": True, "method": "POST"}},
+        {"type": "http", "data": {"memoize": True, "method": "delete"}},
+        {"type": "skill", "data": {"memoize": True}},
+        {"type": "knowledge", "data": {}},
+    ],
+)
+def test_non_deterministic_or_unopted_nodes_are_excluded(node):
+    assert memo_options(node) is None
+
+
+def test_memo_options_from_node_data():
+    node = {
+        "type": "http",
+        "data": {"memoize": True, "memoizeTtlSeconds": 30, "memoizeMaxEntries": 2},
+    }
+
+    assert memo_options(node) == MemoOptions(ttl_seconds=30.0, max_entries=2)
+
+
+def test_cache_enforces_per_node_limit_and_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(workflow_memo.time, "monotonic", lambda: now[0])
+    cache = NodeMemoCache(max_entries=10)
+    options = MemoOptions(ttl_seconds=5, max_entries=2)
+
+    for key in ("k1", "k2", "k3"):
+        cache.set(("wf", "n1"), key, key, {}, options)
+    cache.set(("wf", "n2"), "other", "other", {}, options)
+
+    assert cache.get("k1") is None
+    assert cache.get("k2").output == "k2"
+    assert len(cache) == 3
+
+    now[0] += 5
+    assert cache.get("k3") is None
+    assert cache.get("other") is None
+    assert len(cache) == 1
+
+
+async def test_disabled_code_node_is_not_served_from_the_memo(monkeypatch):
+    enabled = [True]
+    calls: list[str] = []
+
+    async def flag(_key):
+        return enabled[0]
+
+    async def fake_code_node(node, ctx, get_input):
+        node_id = node["id"]
+        calls.append(str(get_input(node_id, ctx)))
+        yield {"type": "node_start", "node_id": node_id, "node_type": "code"}
+        if not enabled[0]:
+            yield {"type": "node_error", "node_id": node_id, "error": "disabled"}
+            return
+        ctx.set_output(node_id, "ran")
+        yield {"type": "node_complete", "node_id": node_id, "output": "ran"}
+
+    monkeypatch.setattr(workflow_memo, "is_feature_enabled", flag)
+    monkeypatch.setattr(workflow_engine, "execute_code_node", fake_code_node)
+    now = datetime.now(timezone.utc)
+    workflow = Workflow(
+        id="wf-memo-code",
+        name="Memo code",
+        graph_data=GraphData(
+            nodes=[
+                {"id": "start", "type": "start", "data": {}},
+                {"id": "code", "type": "code", "data": {"memoize": True}},
+            ],
+            edges=[{"source": "start", "target": "code"}],
+        ),
+        created_at=now,
+        updated_at=now,
+    )
+    await _run(workflow, "q")
+    assert _memo_hits(await _run(workflow, "q"))
+
+    enabled[0] = False
+    events = await _run(workflow, "q")
+
+    assert _memo_hits(events) == []
+    assert calls == ["q", "q"]
+    assert events[-1]["type"] == "workflow_error"
@@ -0,0 +1,111 @@
+"""Tests for the parsed workflow model cache."""
+
+import json
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import delete
+
+from app.api import workflow as workflow_api
+from app.core.database import AsyncSessionLocal, init_db
+from app.core.workflow import workflow_model_cache
+from app.core.workflow.workflow_model_cache import WorkflowModelCache
+from app.models.workflow import GraphData, Workflow, WorkflowUpdate
+from app.models.workflow_db import WorkflowDB
+
+NOW = datetime(2026, 3, 1, tzinfo=timezone.utc)
+GRAPH = {"nodes": [{"id": "start", "type": "start", "data": {}}], "edges": []}
+
+
+@pytest.fixture(autouse=True)
+async def _setup_db(monkeypatch: pytest.MonkeyPatch):
+    await init_db()
+    monkeypatch.setattr(workflow_model_cache, "_model_cache", WorkflowModelCache(8))
+    monkeypatch.setattr(workflow_api, "audit_log", lambda **kwargs: None)
+    async with AsyncSessionLocal() as db:
+        db.add(
+            WorkflowDB(
+                id="wf-cached",
+                user_id="1",
+                name="Cached",
+                graph_data_json=json.dumps(GRAPH),
+                created_at=NOW,
+                updated_at=NOW,
+            )
+        )
+        await db.commit()
+    yield
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(WorkflowDB))
+        await db.commit()
+
+
+def _model(workflow_id: str, updated_at: datetime) -> Workflow:
+    return Workflow(
+        id=workflow_id,
+        name=workflow_id,
+        graph_data=GraphData(),
+        created_at=NOW,
+        updated_at=updated_at,
+    )
+
+
+def test_cache_keeps_one_version_per_workflow_and_evicts_lru():
+    cache = WorkflowModelCache(max_entries=2)
+    old, new = _model("a", NOW), _model("a", NOW + timedelta(seconds=1))
+
+    cache.put(old)
+    cache.put(new)
+    assert cache.get("a", NOW) is None
+    assert cache.get("a", new.updated_at) is new
+
+    cache.put(_model("b", NOW))
+    cache.get("a", new.updated_at)
+    cache.put(_model("c", NOW))
+    assert cache.get("b", NOW) is None
+    assert len(cache) == 2
+
+
+async def test_repeated_loads_share_one_parsed_model(monkeypatch):
+    parsed = []
+    original = workflow_api._row_to_workflow_model
+
+    def counting(row):
+        parsed.append(row.id)
+        return original(row)
+
+    monkeypatch.setattr(workflow_api, "_row_to_workflow_model", counting)
+
+    first = await workflow_api.get_workflow("wf-cached", user=MagicMock(id=1))
+    second = await workflow_api.get_workflow_for_internal("wf-cached")
+
+    assert second is first
+    assert parsed == ["wf-cached"]
+
+
+async def test_ownership_is_checked_on_cache_hits():
+    await workflow_api.load_workflow("wf-cached", user_id=1)
+
+    assert await workflow_api.load_workflow("wf-cached", user_id=2) is None
+    with pytest.raises(HTTPException) as exc_info:
+        await workflow_api.get_workflow("wf-cached", user=MagicMock(id=2))
+    assert exc_info.value.status_code == 404
+
+
+async def test_writes_invalidate_cached_models():
+    user = MagicMock(id=1)
+    before = await workflow_api.get_workflow("wf-cached", user=user)
+
+    updated = await workflow_api.update_workflow(
+        "wf-cached", WorkflowUpdate(name="Renamed"), user=user
+    )
+
+    assert updated.name == "Renamed"
+    assert await workflow_api.get_workflow("wf-cached", user=user) is updated
+    assert updated is not before
+
+    await workflow_api.delete_workflow(MagicMock(), "wf-cached", user=user)
+    assert len(workflow_model_cache.get_workflow_model_cache()) == 0
+    assert await workflow_api.load_workflow("wf-cached") is None
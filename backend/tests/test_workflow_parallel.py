@@ -0,0 +1,237 @@
+"""Tests for the parallel DAG scheduler of the workflow engine."""
+
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import select, text
+
+from app.api import chat_stream
+from app.core import config
+from app.core.database import AsyncSessionLocal, init_db
+from app.core.workflow import workflow_engine
+from app.core.workflow.workflow_engine import WorkflowEngine
+from app.models.chat import ChatRequest, SessionHistory
+from app.models.user import User
+from app.models.workflow import GraphData, Workflow
+from app.models.workflow_db import WorkflowDB
+from app.models.workflow_execution_db import WorkflowExecutionDB
+from app.utils.sse import TokenEvent
+
+
+@pytest.fixture(scope="function", autouse=True)
+async def setup_database():
+    await init_db()
+    yield
+    async with AsyncSessionLocal() as session:
+        await session.execute(text("DELETE FROM workflow_execution_steps"))
+        await session.execute(text("DELETE FROM workflow_executions"))
+        await session.execute(text("DELETE FROM workflows"))
+        await session.commit()
+
+
+@pytest.fixture
+def llm_calls(monkeypatch):
+    """Replace LLM nodes with a fake that sleeps ``data.delay`` seconds."""
+    calls: list[str] = []
+
+    async def fake_llm_node(node, ctx, get_input):
+        node_id = node["id"]
+        calls.append(node_id)
+        yield {"type": "node_start", "node_id": node_id, "node_type": "llm"}
+        if node["data"].get("fail") and calls.count(node_id) == 1:
+            yield {"type": "node_error", "node_id": node_id, "error": "flaky"}
+            return
+        await asyncio.sleep(node["data"].get("delay", 0))
+        yield {"type": "token", "content": node_id}
+        output = f"{node_id}({get_input(node_id, ctx)})"
+        ctx.set_output(node_id, output)
+        yield {"type": "node_complete", "node_id": node_id, "output": output}
+
+    monkeypatch.setattr(workflow_engine, "execute_llm_node", fake_llm_node)
+    return calls
+
+
+def _workflow(nodes, edges, start_data=None, workflow_id="wf-parallel") -> Workflow:
+    now = datetime.now(timezone.utc)
+    return Workflow(
+        id=workflow_id,
+        name="Parallel",
+        graph_data=GraphData(
+            nodes=[{"id": "start", "type": "start", "data": start_data or {}}, *nodes],
+            edges=edges,
+        ),
+        created_at=now,
+        updated_at=now,
+    )
+
+
+def _fan_out(start_data=None, fail_b=False, workflow_id="wf-parallel") -> Workflow:
+    return _workflow(
+        nodes=[
+            {"id": "a", "type": "llm", "data": {"delay": 0.05}},
+            {"id": "b", "type": "llm", "data": {"delay": 0.01, "fail": fail_b}},
+            {"id": "end", "type": "end", "data": {}},
+        ],
+        edges=[
+            {"source": "start", "target": "a"},
+            {"source": "start", "target": "b"},
+            {"source": "a", "target": "end"},
+            {"source": "b", "target": "end"},
+        ],
+        start_data=start_data,
+        workflow_id=workflow_id,
+    )
+
+
+PARALLEL = {"executionMode": "parallel"}
+
+
+def _order(events, event_type):
+    return [e["node_id"] for e in events if e["type"] == event_type]
+
+
+async def test_independent_branches_run_concurrently_and_join(llm_calls):
+    workflow = _fan_out(start_data=PARALLEL)
+
+    events = [e async for e in WorkflowEngine(workflow).execute("in")]
+
+    assert _order(events, "node_start")[1:3] == ["a", "b"]
+    assert _order(events, "node_complete") == ["start", "b", "a", "end"]
+    tokens = [e for e in events if e["type"] == "token"]
+    assert {(e["node_id"], e["content"]) for e in tokens} == {("a", "a"), ("b", "b")}
+    assert events[-1] == {
+        "type": "workflow_complete",
+        "final_output": "a(in)",
+        "node_id": "end",
+    }
+
+
+async def test_workflows_run_sequentially_unless_they_opt_in(llm_calls):
+    events = [e async for e in WorkflowEngine(_fan_out()).execute("in")]
+
+    assert _order(events, "node_complete") == ["start", "a", "b", "end"]
+    assert _order(events, "node_start") == _order(events, "node_complete")
+    # Existing fan-out graphs keep their final output.
+    assert events[-1] == {"type": "workflow_complete", "final_output": "a(in)"}
+
+
+async def test_max_parallelism_limits_concurrent_nodes(llm_calls):
+    workflow = _fan_out(start_data={**PARALLEL, "maxParallelism": 1})
+
+    events = [e async for e in WorkflowEngine(workflow).execute("in")]
+
+    lifecycle = [
+        (e["type"], e["node_id"])
+        for e in events
+        if e["type"] in ("node_start", "node_complete") and e["node_id"] in "ab"
+    ]
+    assert lifecycle == [
+        ("node_start", "a"),
+        ("node_complete", "a"),
+        ("node_start", "b"),
+        ("node_complete", "b"),
+    ]
+
+
+async def test_untaken_condition_branch_does_not_block_join(llm_calls):
+    workflow = _workflow(
+        nodes=[
+            {"id": "cond", "type": "condition", "data": {"expression": "true"}},
+            {"id": "yes", "type": "llm", "data": {}},
+            {"id": "no", "type": "llm", "data": {}},
+            {"id": "join", "type": "llm", "data": {}},
+        ],
+        edges=[
+            {"source": "start", "target": "cond"},
+            {"source": "cond", "target": "yes", "sourceHandle": "true"},
+            {"source": "cond", "target": "no", "sourceHandle": "false"},
+            {"source": "yes", "target": "join"},
+            {"source": "no", "target": "join"},
+        ],
+    )
+
+    events = [e async for e in WorkflowEngine(workflow).execute("in")]
+
+    assert llm_calls == ["yes", "join"]
+    assert events[-1] == {"type": "workflow_complete", "final_output": "join(yes(in))"}
+
+
+async def test_failed_parallel_run_resumes_from_checkpoint(llm_calls):
+    workflow = _fan_out(
+        start_data=PARALLEL, fail_b=True, workflow_id="wf-parallel-resume"
+    )
+    async with AsyncSessionLocal() as db:
+        db.add(
+            WorkflowDB(
+                id=workflow.id,
+                name=workflow.name,
+                graph_data_json=json.dumps(workflow.graph_data.model_dump()),
+                created_at=workflow.created_at,
+                updated_at=workflow.updated_at,
+            )
+        )
+        await db.commit()
+
+    events = [
+        e async for e in WorkflowEngine(workflow).execute("in", execution_id="run-1")
+    ]
+    assert events[-1] == {"type": "workflow_error", "error": "flaky"}
+
+    async with AsyncSessionLocal() as db:
+        row = (
+            await db.execute(
+                select(WorkflowExecutionDB).where(WorkflowExecutionDB.id == "run-1")
+            )
+        ).scalar_one()
+    assert row.status == "failed"
+    assert json.loads(row.executed_nodes_json) == ["start"]
+    assert json.loads(row.queue_json) == ["a", "b"]
+
+    resumed = [e async for e in WorkflowEngine.resume("run-1")]
+
+    assert resumed[-1]["final_output"] == "a(in)"
+    assert _order(resumed, "node_complete") == ["b", "a", "end"]
+    assert llm_calls == ["a", "b", "a", "b"]
+
+
+async def test_chat_streams_workflow_branches_one_node_at_a_time(monkeypatch):
+    async def streaming_llm_node(node, ctx, get_input):
+        node_id = node["id"]
+        yield {"type": "node_start", "node_id": node_id, "node_type": "llm"}
+        for i in range(3):
+            await asyncio.sleep(0.001)
+            yield {"type": "token", "node_id": node_id, "content": f"{node_id}{i} "}
+        ctx.set_output(node_id, node_id)
+        yield {"type": "node_complete", "node_id": node_id, "output": node_id}
+
+    monkeypatch.setattr(workflow_engine, "execute_llm_node", streaming_llm_node)
+    monkeypatch.setattr(
+        config, "_settings", config.Settings(workflow_execution_mode="parallel")
+    )
+    workflow = _fan_out(workflow_id="wf-parallel-chat")
+
+    async def fake_get_workflow(workflow_id, user=None):
+        return workflow
+
+    async def fake_save_session(session):
+        pass
+
+    monkeypatch.setattr(chat_stream, "get_workflow", fake_get_workflow)
+    monkeypatch.setattr(chat_stream, "save_session", fake_save_session)
+
+    tokens = [
+        event
+        async for event in chat_stream.workflow_stream_generator(
+            ChatRequest(session_id="s", message="in", workflow_id=workflow.id),
+            SessionHistory(session_id="s"),
+            User(id=1, email="chat@example.com"),
+        )
+        if isinstance(event, TokenEvent)
+    ]
+
+    # Chat runs stay sequential even where other runs default to parallel,
+    # so each branch's text arrives whole.
+    assert [t.node_id for t in tokens] == ["a"] * 3 + ["b"] * 3
+    assert "".join(t.content for t in tokens) == "a0 a1 a2 b0 b1 b2 "
@@ -9,6 +9,7 @@ from datetime import datetime, timezone
 import pytest
 from sqlalchemy import select, text
 
+from app.core import config, paths
 from app.core.database import AsyncSessionLocal, init_db
 from app.core.workflow.workflow_context import ExecutionContext
 from app.core.workflow.workflow_engine import WorkflowEngine
@@ -56,7 +57,9 @@ class TestCheckpointSerialization:
         assert checkpoint["step_outputs"]["node-1"] == "result-1"
         assert checkpoint["step_outputs"]["node-2"] == {"key": "value"}
         assert checkpoint["variables"]["input"] == "hello"
-        assert checkpoint["variables"]["node-1.output"] == "result-1"
+        # Outputs are stored once; the variable view resolves them lazily.
+        assert "node-1.output" not in checkpoint["variables"]
+        assert ctx.variables["node-1.output"] == "result-1"
 
     def test_from_checkpoint_restores_state(self):
         original = ExecutionContext("hello", user_id=1, model="test-model")
@@ -100,6 +103,58 @@ class TestCheckpointSerialization:
         assert restored.conversation_history == []
 
 
+class TestLargeOutputSpill:
+    """Large outputs are stored once, on disk, and loaded on access."""
+
+    @pytest.fixture(autouse=True)
+    def small_spill_threshold(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(paths, "WORKFLOW_BLOBS_DIR", tmp_path)
+        monkeypatch.setattr(
+            config, "_settings", config.Settings(workflow_output_spill_bytes=10)
+        )
+
+    def test_large_output_is_spilled_and_read_back(self, tmp_path):
+        ctx = ExecutionContext("hello")
+        ctx.set_output("big", "x" * 100)
+        ctx.set_output("small", "tiny")
+
+        blobs = list(tmp_path.rglob("*.json.z"))
+        assert len(blobs) == 1
+        assert blobs[0].stat().st_size < 100
+        assert ctx.step_outputs["big"] == "x" * 100
+        assert ctx.variables["big.output"] == "x" * 100
+        assert ctx.resolve_template("{{big.output}}") == "x" * 100
+
+    def test_checkpoint_stores_blob_reference(self, tmp_path):
+        ctx = ExecutionContext("hello")
+        ctx.set_output("a", "y" * 50)
+        ctx.set_output("b", "y" * 50)
+
+        checkpoint = json.loads(json.dumps(ctx.to_checkpoint()))
+        assert checkpoint["step_outputs"]["a"] == checkpoint["step_outputs"]["b"]
+        assert "__spilled__" in checkpoint["step_outputs"]["a"]
+        assert len(list(tmp_path.rglob("*.json.z"))) == 1
+
+        restored = ExecutionContext.from_checkpoint(checkpoint, initial_input="hello")
+        assert restored.step_outputs == {"a": "y" * 50, "b": "y" * 50}
+
+    def test_legacy_checkpoint_output_variables_are_dropped(self):
+        restored = ExecutionContext.from_checkpoint(
+            {
+                "step_outputs": {"n1": "out"},
+                "variables": {"input": "hello", "n1.output": "out", "q": 1},
+            },
+            initial_input="hello",
+        )
+
+        assert restored.to_checkpoint()["variables"] == {"input": "hello", "q": 1}
+        assert dict(restored.variables) == {
+            "input": "hello",
+            "q": 1,
+            "n1.output": "out",
+        }
+
+
 class TestExecutionCreatesDBRecord:
     """Test that workflow execution creates and updates DB records."""
 
@@ -0,0 +1,118 @@
+"""Tests for compiled workflow execution plans."""
+
+from datetime import datetime, timedelta, timezone
+
+from app.core.workflow import workflow_plan
+from app.core.workflow.workflow_engine import WorkflowEngine
+from app.core.workflow.workflow_plan import (
+    WorkflowPlanCache,
+    compile_workflow,
+    get_workflow_plan,
+    invalidate_workflow_plan,
+)
+from app.models.workflow import GraphData, Workflow
+
+NOW = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def build_workflow(nodes, edges, updated_at=NOW, workflow_id="wf-plan") -> Workflow:
+    return Workflow(
+        id=workflow_id,
+        name="Plan",
+        graph_data=GraphData(nodes=nodes, edges=edges),
+        created_at=NOW,
+        updated_at=updated_at,
+    )
+
+
+def branching_workflow(**kwargs) -> Workflow:
+    return build_workflow(
+        nodes=[
+            {"id": "start", "type": "start", "data": {}},
+            {"id": "cond", "type": "condition", "data": {"expression": "true"}},
+            {"id": "yes", "type": "end", "data": {}},
+            {"id": "no", "type": "end", "data": {}},
+        ],
+        edges=[
+            {"source": "start", "target": "cond"},
+            {"source": "cond", "target": "yes", "sourceHandle": "true"},
+            {"source": "cond", "target": "no", "sourceHandle": "false"},
+        ],
+        **kwargs,
+    )
+
+
+def test_plan_precomputes_order_branches_and_predecessors():
+    plan = compile_workflow(branching_workflow())
+
+    assert plan.start_nodes == ("start",)
+    assert plan.order[:2] == ("start", "cond")
+    assert set(plan.order) == {"start", "cond", "yes", "no"}
+    assert not plan.has_cycle
+    assert plan.next_nodes("cond", "true") == ("yes",)
+    assert plan.next_nodes("cond", "false") == ("no",)
+    assert plan.next_nodes("cond") == ("yes", "no")
+    assert plan.predecessors["yes"] == ("cond",)
+    assert plan.node_models is not None and plan.validation_errors is None
+    assert list(plan.conditions) == ["cond"]
+    assert plan.conditions["cond"].parsed is not None
+
+
+def test_plan_reports_cycles_and_invalid_nodes():
+    plan = compile_workflow(
+        build_workflow(
+            nodes=[
+                {"id": "a", "type": "start", "data": {}},
+                {"id": "b", "type": "mystery", "data": {}},
+            ],
+            edges=[
+                {"source": "a", "target": "b"},
+                {"source": "b", "target": "b"},
+            ],
+        )
+    )
+
+    assert plan.has_cycle
+    assert plan.order == ("a",)
+    assert plan.node_models is None
+    assert plan.validation_errors
+
+
+def test_cache_is_keyed_by_workflow_version():
+    cache = WorkflowPlanCache(max_entries=2)
+    workflow = branching_workflow()
+
+    plan = cache.get(workflow)
+    assert cache.get(branching_workflow()) is plan
+
+    edited = branching_workflow(updated_at=NOW + timedelta(seconds=1))
+    assert cache.get(edited) is not plan
+    assert len(cache) == 1
+
+    cache.invalidate("wf-plan")
+    assert len(cache) == 0
+
+
+def test_cache_evicts_least_recently_used():
+    cache = WorkflowPlanCache(max_entries=2)
+    first, second, third = (branching_workflow(workflow_id=f"wf-{i}") for i in range(3))
+
+    first_plan = cache.get(first)
+    cache.get(second)
+    cache.get(first)
+    cache.get(third)
+
+    assert cache.get(first) is first_plan
+    assert len(cache) == 2
+
+
+def test_engines_share_the_cached_plan(monkeypatch):
+    monkeypatch.setattr(workflow_plan, "_plan_cache", WorkflowPlanCache(8))
+    workflow = branching_workflow()
+
+    assert WorkflowEngine(workflow).plan is WorkflowEngine(workflow).plan
+    assert get_workflow_plan(workflow) is WorkflowEngine(workflow).plan
+
+    plan = get_workflow_plan(workflow)
+    invalidate_workflow_plan(workflow.id)
+    assert WorkflowEngine(workflow).plan is not plan
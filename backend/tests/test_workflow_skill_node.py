@@ -5,7 +5,7 @@ Tests cover:
 - Skill node execution with input mappings
 - Skill loading and validation
 - Input mapping from upstream nodes
-- SSE event parsing and forwarding
+- Stream event forwarding
 - Error handling for missing skills
 - Path consistency between modules
 """
@@ -15,6 +15,7 @@ from unittest.mock import AsyncMock, MagicMock, patch
 from app.core.paths import SKILLS_DIR
 from app.core.workflow.workflow_nodes import execute_skill_node
 from app.core.workflow.workflow_context import ExecutionContext
+from app.utils.sse import CitationEvent, DoneEvent, ThoughtEvent, TokenEvent
 
 
 class TestExecuteSkillNode:
@@ -94,10 +95,10 @@ class TestExecuteSkillNode:
 
         # Mock executor
         async def mock_execute(skill, inputs):
-            yield "event: thought\ndata: {\"status\": \"start\"}\n\n"
-            yield "event: token\ndata: {\"content\": \"Hello\"}\n\n"
-            yield "event: token\ndata: {\"content\": \" World\"}\n\n"
-            yield "event: done\ndata: {\"status\": \"success\"}\n\n"
+            yield ThoughtEvent({"status": "start"})
+            yield TokenEvent("Hello")
+            yield TokenEvent(" World")
+            yield DoneEvent("success")
 
         mock_executor = MagicMock()
         mock_executor.execute = mock_execute
@@ -155,7 +156,7 @@ class TestExecuteSkillNode:
         async def mock_execute(skill, inputs):
             nonlocal captured_inputs
             captured_inputs = inputs
-            yield "event: done\ndata: {\"status\": \"success\"}\n\n"
+            yield DoneEvent("success")
 
         mock_executor = MagicMock()
         mock_executor.execute = mock_execute
@@ -203,7 +204,7 @@ class TestExecuteSkillNode:
         async def mock_execute(skill, inputs):
             nonlocal captured_inputs
             captured_inputs = inputs
-            yield "event: done\ndata: {\"status\": \"success\"}\n\n"
+            yield DoneEvent("success")
 
         mock_executor = MagicMock()
         mock_executor.execute = mock_execute
@@ -237,7 +238,7 @@ class TestExecuteSkillNode:
         mock_loader.get_skill.return_value = mock_skill
 
         async def mock_execute(skill, inputs):
-            yield "event: done\ndata: {\"status\": \"error\", \"message\": \"Execution failed\"}\n\n"
+            yield DoneEvent("error", "Execution failed")
 
         mock_executor = MagicMock()
         mock_executor.execute = mock_execute
@@ -272,9 +273,9 @@ class TestExecuteSkillNode:
         mock_loader.get_skill.return_value = mock_skill
 
         async def mock_execute(skill, inputs):
-            yield "event: thought\ndata: {\"type\": \"validation\", \"status\": \"start\"}\n\n"
-            yield "event: thought\ndata: {\"type\": \"validation\", \"status\": \"complete\"}\n\n"
-            yield "event: done\ndata: {\"status\": \"success\", \"message\": \"OK\"}\n\n"
+            yield ThoughtEvent({"type": "validation", "status": "start"})
+            yield ThoughtEvent({"type": "validation", "status": "complete"})
+            yield DoneEvent("success", "OK")
 
         mock_executor = MagicMock()
         mock_executor.execute = mock_execute
@@ -309,8 +310,8 @@ class TestExecuteSkillNode:
         mock_loader.get_skill.return_value = mock_skill
 
         async def mock_execute(skill, inputs):
-            yield "event: citation\ndata: {\"sources\": [{\"doc_id\": \"doc1\"}]}\n\n"
-            yield "event: done\ndata: {\"status\": \"success\"}\n\n"
+            yield CitationEvent([{"doc_id": "doc1"}])
+            yield DoneEvent("success")
 
         mock_executor = MagicMock()
         mock_executor.execute = mock_execute
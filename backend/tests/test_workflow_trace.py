@@ -0,0 +1,134 @@
+"""Tests for per-node timing traces of workflow executions."""
+
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import text
+
+from app.api.workflow import get_execution_trace
+from app.core import config
+from app.core.database import AsyncSessionLocal, init_db
+from app.core.workflow import workflow_engine
+from app.core.workflow.workflow_engine import WorkflowEngine
+from app.core.workflow.workflow_trace import ExecutionTrace, load_trace
+from app.models.user import User
+from app.models.workflow import GraphData, Workflow
+
+USER = User(id=1, email="trace@example.com")
+
+
+@pytest.fixture(scope="function", autouse=True)
+async def setup_database(monkeypatch):
+    await init_db()
+
+    async def fake_llm_node(node, ctx, get_input):
+        node_id = node["id"]
+        yield {"type": "node_start", "node_id": node_id, "node_type": "llm"}
+        delay = node["data"].get("delay", 0)
+        for token in ("x", "y", "z")[: node["data"].get("tokens", 0)]:
+            await asyncio.sleep(delay)
+            yield {"type": "token", "node_id": node_id, "content": token}
+        output = f"{node_id}!"
+        ctx.set_output(node_id, output)
+        yield {"type": "node_complete", "node_id": node_id, "output": output}
+
+    monkeypatch.setattr(workflow_engine, "execute_llm_node", fake_llm_node)
+    yield
+    async with AsyncSessionLocal() as session:
+        for table in (
+            "workflow_execution_traces",
+            "workflow_execution_steps",
+            "workflow_executions",
+        ):
+            await session.execute(text(f"DELETE FROM {table}"))
+        await session.commit()
+
+
+def _diamond() -> Workflow:
+    now = datetime.now(timezone.utc)
+    return Workflow(
+        id="wf-trace",
+        name="Diamond",
+        graph_data=GraphData(
+            nodes=[
+                {"id": "start", "type": "start", "data": {}},
+                {"id": "fast", "type": "llm", "data": {}},
+                {"id": "slow", "type": "llm", "data": {"tokens": 3, "delay": 0.02}},
+                {"id": "end", "type": "end", "data": {}},
+            ],
+            edges=[
+                {"source": "start", "target": "fast"},
+                {"source": "start", "target": "slow"},
+                {"source": "fast", "target": "end"},
+                {"source": "slow", "target": "end"},
+            ],
+        ),
+        created_at=now,
+        updated_at=now,
+    )
+
+
+@pytest.mark.parametrize("mode", ["parallel", "sequential"])
+async def test_execution_records_spans_and_critical_path(monkeypatch, mode):
+    monkeypatch.setattr(
+        config, "_settings", config.Settings(workflow_execution_mode=mode)
+    )
+    events = [
+        e async for e in WorkflowEngine(_diamond()).execute("q", execution_id="t-1")
+    ]
+    assert events[-1]["type"] == "workflow_complete"
+
+    trace = await get_execution_trace("t-1", user=USER)
+
+    assert trace["status"] == "completed"
+    spans = {span["node_id"]: span for span in trace["spans"]}
+    assert set(spans) == {"start", "fast", "slow", "end"}
+    assert all(span["status"] == "completed" for span in spans.values())
+    slow = spans["slow"]
+    assert slow["node_type"] == "llm"
+    assert slow["tokens"] == 3
+    assert slow["bytes_out"] == len("slow!")
+    assert slow["duration_ms"] >= 60
+    assert 0 <= slow["time_to_first_token_ms"] <= slow["duration_ms"]
+    assert slow["queued_ms"] <= slow["start_ms"] <= slow["first_event_ms"]
+    assert spans["fast"]["first_token_ms"] is None
+
+    path = trace["critical_path"]
+    assert [node["node_id"] for node in path["nodes"]] == ["start", "slow", "end"]
+    assert path["duration_ms"] >= slow["duration_ms"]
+
+
+async def test_unpersisted_runs_and_unknown_executions_have_no_trace():
+    events = [
+        e
+        async for e in WorkflowEngine(_diamond()).execute(
+            "q", execution_id="t-2", persist=False
+        )
+    ]
+
+    assert events[-1]["type"] == "workflow_complete"
+    assert await load_trace("t-2") is None
+    with pytest.raises(HTTPException) as exc_info:
+        await get_execution_trace("t-2", user=USER)
+    assert exc_info.value.status_code == 404
+
+
+def test_trace_survives_a_round_trip_for_resume():
+    predecessors = {"start": (), "a": ("start",), "b": ("a",)}
+    trace = ExecutionTrace(predecessors)
+    trace.queued(["start"])
+    trace.start("start", "start")
+    trace.end("start")
+    trace.queued(["a"])
+
+    resumed = ExecutionTrace.from_json(trace.to_json(), predecessors)
+    resumed.start("a", "llm")
+    resumed.end("a", "failed")
+
+    data = resumed.to_json()
+    assert data["started_at"] == trace.started_at
+    assert [span["status"] for span in data["spans"]] == ["completed", "failed"]
+    assert data["spans"][1]["queued_ms"] == trace.spans["a"].queued_ms
+    assert [n["node_id"] for n in data["critical_path"]["nodes"]] == ["start", "a"]